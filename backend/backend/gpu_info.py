@@ -1,6 +1,8 @@
+import os
 import platform
 import subprocess
 import json
+import time
 
 
 class GPUInfo:
@@ -153,11 +155,16 @@ class GPUInfo:
             gpu_list = self._get_mac_gpu_info()
 
         # Update vendor, codec, and Whisper model information
+        vendor_counts = {}
         for gpu in gpu_list:
             vendor = self.vendor_map.get(gpu.get("vendor_id", "").upper(), "Unknown")
             best_codec = self.codecs.get(vendor, "libx264")
             gpu["vendor"] = vendor
             gpu["codec"] = best_codec
+            # Numer karty wśród kart tego producenta w kolejności magistrali PCI
+            # (jak CUDA przy CUDA_DEVICE_ORDER=PCI_BUS_ID)
+            gpu["vendor_index"] = vendor_counts.get(vendor, 0)
+            vendor_counts[vendor] = gpu["vendor_index"] + 1
 
             # Use tools to fetch VRAM if available
             if "vram" not in gpu or gpu["vram"] == 0:
@@ -277,7 +284,57 @@ class GPUInfo:
                 return model
         return "tiny"
 
+    def cpu_profile(self):
+        """Profile used when no GPU is detected: software encoding on the CPU."""
+        return {
+            "name": "CPU",
+            "vendor_id": "Unknown",
+            "device_id": "Unknown",
+            "vendor": "Unknown",
+            "codec": self.codecs["Unknown"],
+            "vram": 0,
+            "whisper_model": self.get_best_whisper_model(0),
+        }
+
     def save_to_json(self, gpu_list, file_path="gpu_info.json"):
-        with open(file_path, "w") as f:
+        # Zapis atomowy: inne procesy mogą w tym czasie czytać plik
+        partial_path = f"{file_path}.{os.getpid()}.part"
+        with open(partial_path, "w") as f:
             json.dump(gpu_list, f, indent=4)
+        os.replace(partial_path, file_path)
         print(f"GPU information saved to {file_path}")
+
+    def load_from_json(self, file_path="gpu_info.json"):
+        with open(file_path) as f:
+            return json.load(f)
+
+
+def load_gpu_devices(cache_path, ttl, refresh=False):
+    """
+    Returns the detected GPUs, best first, never an empty list. Results are
+    read from `cache_path` while it is younger than `ttl` seconds (0 keeps it
+    forever), so only the first process after expiry runs the detection tools.
+    """
+    gpu_info = GPUInfo()
+    if not refresh:
+        try:
+            age = time.time() - os.path.getmtime(cache_path)
+            if ttl <= 0 or age < ttl:
+                devices = gpu_info.load_from_json(cache_path)
+                if devices:
+                    return devices
+        except (OSError, ValueError):
+            pass
+
+    devices = gpu_info.get_gpu_info() or [gpu_info.cpu_profile()]
+    # Najpierw karty ze sprzętowym kodekiem, potem według ilości VRAM
+    # (np. adapter BMC serwera nie może wyprzedzić karty NVIDIA)
+    devices.sort(
+        key=lambda d: (d.get("codec", "libx264") != "libx264", d.get("vram", 0)),
+        reverse=True,
+    )
+    try:
+        gpu_info.save_to_json(devices, cache_path)
+    except OSError as e:
+        print(f"Could not cache GPU information in {cache_path}: {e}")
+    return devices
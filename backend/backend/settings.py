@@ -13,17 +13,38 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 import os
 from decouple import config
-from backend.gpu_info import GPUInfo
-
-
-gpu_info = GPUInfo()
-GPU_LIST = gpu_info.get_gpu_info()[0]
+from django.utils.functional import SimpleLazyObject
+from backend.gpu_info import load_gpu_devices
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Wykrywanie GPU przy pierwszym użyciu, nie przy imporcie ustawień; wynik jest
+# zapisywany w GPU_INFO_CACHE (odświeżanie: manage.py refresh_gpu_info)
+GPU_INFO_CACHE = config(
+    "GPU_INFO_CACHE", default=os.path.join(BASE_DIR, "gpu_info.json")
+)
+GPU_INFO_CACHE_TTL = config("GPU_INFO_CACHE_TTL", default=7 * 24 * 3600, cast=int)
+GPU_DEVICES = SimpleLazyObject(
+    lambda: load_gpu_devices(GPU_INFO_CACHE, GPU_INFO_CACHE_TTL)
+)
+GPU_LIST = SimpleLazyObject(lambda: GPU_DEVICES[0])
+# Numeracja kart CUDA zgodna z kolejnością wykrywania (magistrala PCI)
+os.environ.setdefault("CUDA_DEVICE_ORDER", "PCI_BUS_ID")
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# Przekazanie wysyłki plików multimedialnych serwerowi WWW: prefiks lokalizacji
+# "internal" w nginx (X-Accel-Redirect) albo X-Sendfile (Apache, lighttpd)
+MEDIA_ACCEL_REDIRECT = config("MEDIA_ACCEL_REDIRECT", default="")
+MEDIA_SENDFILE = config("MEDIA_SENDFILE", default=False, cast=bool)
+
+# Pierwszy handler liczy SHA-256 przesyłanych plików (rejestr zasobów)
+FILE_UPLOAD_HANDLERS = [
+    "backend_api.assets.HashingUploadHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
 
 
 # Quick-start development settings - unsuitable for production
@@ -154,3 +175,157 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
+
+# Komunikaty procesów roboczych (backend_api.jobs, ...) trafiają na konsolę
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "backend_api": {
+            "handlers": ["console"],
+            "level": config("BACKEND_LOG_LEVEL", default="INFO"),
+        },
+    },
+}
+
+# Render job queue
+# Liczba procesów wykonujących zadania renderowania (manage.py run_render_workers)
+# Każde zadanie renderuje do własnego katalogu (renders/job_<id>/), więc
+# procesy nie nadpisują sobie plików wynikowych
+RENDER_WORKERS = config("RENDER_WORKERS", default=2, cast=int)
+RENDER_POLL_INTERVAL = config("RENDER_POLL_INTERVAL", default=1.0, cast=float)
+BATCH_RENDER_MAX_CLIPS = config("BATCH_RENDER_MAX_CLIPS", default=50, cast=int)
+# Listy filmów i projektów (api/videos/, api/projects/), stronicowane kursorem
+LIST_PAGE_SIZE = config("LIST_PAGE_SIZE", default=50, cast=int)
+LIST_MAX_PAGE_SIZE = 200
+# Manifest plików projektu (api/projects/<id>/files/)
+PROJECT_MANIFEST_PAGE_SIZE = config("PROJECT_MANIFEST_PAGE_SIZE", default=100, cast=int)
+PROJECT_MANIFEST_MAX_PAGE_SIZE = 500
+THUMBNAIL_WIDTH = config("THUMBNAIL_WIDTH", default=320, cast=int)
+# Arkusze miniatur osi czasu (api/assets/<id>/sprites/): jedna klatka co tyle
+# sekund na każdym poziomie przybliżenia, w arkuszach kolumny x wiersze
+SPRITE_INTERVALS = (2, 10, 60)
+SPRITE_GRID = (10, 10)
+SPRITE_TILE_WIDTH = 160
+# Miniatury z dowolnego momentu (api/assets/<id>/thumbnail/): dozwolone
+# szerokości, krok zaokrąglania czasu i limit pamięci podręcznej na dysku
+THUMBNAIL_WIDTHS = (160, 320, 640)
+THUMBNAIL_TIME_STEP = 0.1
+THUMBNAIL_CACHE_MAX_BYTES = config(
+    "THUMBNAIL_CACHE_MAX_BYTES", default=512 * 1024 * 1024, cast=int
+)
+# Co tyle sekund proces roboczy przycina pamięć podręczną miniatur do limitu
+THUMBNAIL_CACHE_PRUNE_INTERVAL = config(
+    "THUMBNAIL_CACHE_PRUNE_INTERVAL", default=300, cast=int
+)
+# Przebieg fali dźwięku (api/assets/<id>/waveform/): szczyt poziomu 0 co
+# WAVEFORM_SAMPLES_PER_PEAK próbek (10 ms), wartości 8- lub 16-bitowe
+WAVEFORM_SAMPLE_RATE = 16000
+WAVEFORM_SAMPLES_PER_PEAK = 160
+WAVEFORM_BITS = 8
+WAVEFORM_MAX_PEAKS = 10000
+# Proxy do podglądu w edytorze (api/assets/<id>/preview/) dla źródeł wyższych
+# niż PROXY_HEIGHT; końcowe renderowanie zawsze używa oryginału
+PROXY_HEIGHT = config("PROXY_HEIGHT", default=540, cast=int)
+PROXY_CRF = 30
+PROXY_KEYFRAME_INTERVAL = 0.5
+# Propozycje fragmentów (api/assets/<id>/highlights/): wagi składników oceny
+# okna, próg zmiany histogramu jasności uznawanej za cięcie sceny, domyślna
+# długość propozycji w sekundach i limit ich liczby
+HIGHLIGHT_WEIGHTS = {"loudness": 0.35, "speech": 0.3, "scene": 0.15, "motion": 0.2}
+HIGHLIGHT_SCENE_THRESHOLD = 0.35
+HIGHLIGHT_DEFAULT_LENGTH = 30
+HIGHLIGHT_MAX_COUNT = 50
+# Indeks klatek kluczowych i cięć scen (api/assets/<id>/cut-points/): próg
+# wyniku filtra scene FFmpeg (0-1), powyżej którego klatka zaczyna nową scenę
+SCENE_CUT_THRESHOLD = 0.3
+# Limit napisów w jednej odpowiedzi zapytania o okno czasu
+# (api/projects/<id>/subtitles/cues/)
+SUBTITLE_CUES_MAX_PAGE = 2000
+# Najdłuższy dozwolony napis: zapytanie o okno czyta tylko napisy zaczynające
+# się najwyżej tyle przed oknem (dłuższe są przycinane przy imporcie SRT)
+SUBTITLE_MAX_CUE_MS = config("SUBTITLE_MAX_CUE_MS", default=60000, cast=int)
+# Styl napisów wypalanych w obrazie (pola stylu ASS, np. kolory &HAABBGGRR);
+# zadanie może nadpisać dowolne z nich w `subtitle_style`
+SUBTITLE_BURN_STYLE = {
+    "FontName": "Arial",
+    "FontSize": 14,
+    "PrimaryColour": "&H00FFFFFF",
+    "OutlineColour": "&H00000000",
+    "BorderStyle": 1,
+    "Outline": 1.5,
+    "Shadow": 0,
+    "Alignment": 2,
+    "MarginV": 40,
+}
+# Sloty urządzeń: każda karta ze sprzętowym koderem i CPU przyjmują tyle zadań
+# naraz (0 dla CPU: jedno zadanie na 4 rdzenie)
+GPU_SLOT_TASKS = config("GPU_SLOT_TASKS", default=2, cast=int)
+CPU_SLOT_TASKS = config("CPU_SLOT_TASKS", default=0, cast=int)
+# Wybór kodeka: najszybszy kodek z testu (manage.py benchmark_encoders), którego
+# PSNR i jakość na bitrate (względem libx264 "fast") nie spadają poniżej progów
+ENCODER_BENCHMARK_CACHE = config(
+    "ENCODER_BENCHMARK_CACHE", default=os.path.join(BASE_DIR, "encoder_benchmark.json")
+)
+ENCODER_BENCHMARK_TTL = config(
+    "ENCODER_BENCHMARK_TTL", default=30 * 24 * 3600, cast=int
+)
+ENCODER_MIN_PSNR = config("ENCODER_MIN_PSNR", default=40.0, cast=float)
+ENCODER_MIN_EFFICIENCY = config("ENCODER_MIN_EFFICIENCY", default=0.8, cast=float)
+# Strumień postępu (render-jobs/<id>/events/): częstotliwość odczytu zadania
+# i odstęp między komentarzami podtrzymującymi połączenie
+SSE_POLL_INTERVAL = config("SSE_POLL_INTERVAL", default=0.5, cast=float)
+SSE_HEARTBEAT_INTERVAL = config("SSE_HEARTBEAT_INTERVAL", default=15.0, cast=float)
+# Strumień kończy się po tylu sekundach (klient łączy się ponownie) albo gdy
+# postęp zadania nie zmienia się przez SSE_STALE_JOB_SECONDS; SSE_RETRY_MS to
+# opóźnienie ponownego połączenia przekazywane klientowi
+SSE_MAX_STREAM_SECONDS = config("SSE_MAX_STREAM_SECONDS", default=300.0, cast=float)
+SSE_STALE_JOB_SECONDS = config("SSE_STALE_JOB_SECONDS", default=120.0, cast=float)
+SSE_RETRY_MS = config("SSE_RETRY_MS", default=5000, cast=int)
+
+# Whisper transcription service
+# Modele pozostają w pamięci procesu `manage.py run_transcription_service`,
+# pusty adres wyłącza usługę (każdy proces ładuje wtedy własne modele)
+TRANSCRIPTION_SERVICE_ADDRESS = config(
+    "TRANSCRIPTION_SERVICE_ADDRESS",
+    default=(
+        r"\\.\pipe\shorts-intelligence-transcription"
+        if os.name == "nt"
+        else os.path.join(BASE_DIR, "transcription.sock")
+    ),
+)
+WHISPER_MEMORY_BUDGET_MB = config("WHISPER_MEMORY_BUDGET_MB", default=8000, cast=int)
+# Nagrania dłuższe niż TRANSCRIPTION_PARALLEL_MIN_DURATION sekund są dzielone
+# w miejscach ciszy i transkrybowane równolegle; 0 procesów = liczba rdzeni
+# podzielona przez liczbę wątków torch na proces (1 na maszynach z CUDA)
+TRANSCRIPTION_WORKERS = config("TRANSCRIPTION_WORKERS", default=0, cast=int)
+TRANSCRIPTION_THREADS_PER_WORKER = config(
+    "TRANSCRIPTION_THREADS_PER_WORKER", default=2, cast=int
+)
+# Łączny limit procesów transkrypcji równoległej na hoście (0 = liczba rdzeni
+# podzielona przez wątki na proces). Z usługą transkrypcji wszystkie zadania
+# korzystają z jej jednej puli; bez niej każdy proces renderujący dostaje
+# 1/RENDER_WORKERS limitu
+TRANSCRIPTION_MAX_WORKERS = config("TRANSCRIPTION_MAX_WORKERS", default=0, cast=int)
+TRANSCRIPTION_CHUNK_SECONDS = config(
+    "TRANSCRIPTION_CHUNK_SECONDS", default=120.0, cast=float
+)
+TRANSCRIPTION_PARALLEL_MIN_DURATION = config(
+    "TRANSCRIPTION_PARALLEL_MIN_DURATION", default=600.0, cast=float
+)
+
+# Media probing
+# Liczba wyników FFprobe trzymanych w pamięci każdego procesu
+PROBE_CACHE_SIZE = config("PROBE_CACHE_SIZE", default=256, cast=int)
+
+# Resumable uploads
+# Maksymalny rozmiar pojedynczego fragmentu w żądaniu PUT uploads/<id>/chunks/<n>/
+UPLOAD_MAX_CHUNK_SIZE = config(
+    "UPLOAD_MAX_CHUNK_SIZE", default=64 * 1024 * 1024, cast=int
+)
+# Maksymalny zadeklarowany rozmiar całego pliku
+UPLOAD_MAX_SIZE = config("UPLOAD_MAX_SIZE", default=50 * 1024**3, cast=int)
+# Otwarte i nieudane sesje bez aktywności dłużej niż tyle sekund usuwa
+# manage.py expire_uploads (razem z częściowymi plikami)
+UPLOAD_SESSION_TTL = config("UPLOAD_SESSION_TTL", default=24 * 3600, cast=int)
@@ -17,11 +17,19 @@ Including another URLconf
 
 from django.contrib import admin
 from django.conf import settings
-from django.conf.urls.static import static
-from django.urls import path
+from django.urls import path, re_path
 from django.urls.conf import include
 
+from backend_api.media_serving import serve_media
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("backend_api.urls")),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # Pliki multimedialne także poza trybem DEBUG: zakresy bajtów, walidatory
+    # i opcjonalne przekazanie do serwera WWW (MEDIA_ACCEL_REDIRECT)
+    re_path(
+        rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.+)$",
+        serve_media,
+        name="media",
+    ),
+]
@@ -0,0 +1,162 @@
+# assets.py
+import hashlib
+import os
+import shutil
+import uuid
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db import IntegrityError
+
+from .models import Asset
+
+ASSETS_DIR = "assets"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def new_hasher():
+    return hashlib.sha256()
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """
+    Computes the SHA-256 of every uploaded file while Django streams it to the
+    next upload handler, so ingesting an upload never re-reads it from disk.
+    Digests are exposed as `request.upload_digests[field_name]`.
+    """
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.hasher = new_hasher()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not hasattr(self.request, "upload_digests"):
+            self.request.upload_digests = {}
+        self.request.upload_digests[self.field_name] = self.hasher.hexdigest()
+        # Plik tworzy kolejny handler (pamięć lub plik tymczasowy)
+        return None
+
+
+def hash_file(path):
+    hasher = new_hasher()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def blob_name_for(digest, original_name=""):
+    extension = os.path.splitext(original_name)[1].lower()
+    return f"{ASSETS_DIR}/{digest[:2]}/{digest}{extension}"
+
+
+def _register(digest, size, original_name, store):
+    """
+    Returns (asset, created). `store(path)` is called to materialize the blob
+    only when no asset with this digest exists yet.
+    """
+    asset = Asset.objects.filter(digest=digest).first()
+    if asset is not None and default_storage.exists(asset.blob):
+        return asset, False
+
+    blob = asset.blob if asset is not None else blob_name_for(digest, original_name)
+    blob_path = default_storage.path(blob)
+    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+
+    # Zapis do pliku tymczasowego i atomowa zamiana, aby nie wystawić
+    # niekompletnego bloba równoległym żądaniom
+    partial_path = f"{blob_path}.{uuid.uuid4().hex}.part"
+    try:
+        store(partial_path)
+        os.replace(partial_path, blob_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    if asset is not None:
+        return asset, False
+    try:
+        return (
+            Asset.objects.create(
+                digest=digest, size=size, original_name=original_name, blob=blob
+            ),
+            True,
+        )
+    except IntegrityError:
+        return Asset.objects.get(digest=digest), False
+
+
+def ingest_upload(uploaded_file, digest=None):
+    """
+    Stores an UploadedFile in the content-addressed blob store. Returns
+    (asset, created); uploads of already known content are discarded.
+    """
+    if digest is None:
+        hasher = new_hasher()
+        for chunk in uploaded_file.chunks():
+            hasher.update(chunk)
+        digest = hasher.hexdigest()
+
+    def store(path):
+        if hasattr(uploaded_file, "temporary_file_path"):
+            # Duże pliki: przeniesienie zamiast kopiowania
+            file_move_safe(uploaded_file.temporary_file_path(), path)
+        else:
+            with open(path, "wb") as f:
+                for chunk in uploaded_file.chunks():
+                    f.write(chunk)
+
+    return _register(digest, uploaded_file.size, uploaded_file.name, store)
+
+
+def ingest_path(path, original_name="", digest=None, move=True):
+    """Registers a file already on the server's disk as an asset."""
+    digest = digest or hash_file(path)
+
+    def store(target):
+        if move:
+            file_move_safe(path, target)
+        else:
+            shutil.copyfile(path, target)
+
+    asset, created = _register(
+        digest, os.path.getsize(path), original_name or os.path.basename(path), store
+    )
+    if move and not created and os.path.exists(path):
+        os.remove(path)
+    return asset, created
+
+
+def link_asset(asset, name):
+    """
+    Exposes an asset under the storage path `name` using a hardlink, so project
+    folders never hold a second copy of the same blob. Re-linking a name
+    replaces it instead of creating a renamed duplicate.
+    """
+    source = default_storage.path(asset.blob)
+    target = default_storage.path(name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if os.path.exists(target) and os.path.samefile(source, target):
+        return name
+
+    partial = f"{target}.{uuid.uuid4().hex}.part"
+    try:
+        os.link(source, partial)
+    except OSError:
+        # System plików bez hardlinków (np. inne urządzenie)
+        shutil.copyfile(source, partial)
+    os.replace(partial, target)
+    return name
+
+
+def resolve_asset_id(value):
+    """Returns the Asset for an `asset_id` request value, or None."""
+    try:
+        return Asset.objects.get(pk=int(value))
+    except (TypeError, ValueError, Asset.DoesNotExist):
+        return None
@@ -0,0 +1,504 @@
+# cutting.py
+import os
+import subprocess
+import tempfile
+
+from .progress import run_ffmpeg
+
+AUDIO_ENHANCE_FILTER = "highpass=f=200, lowpass=f=3000"
+
+CUT_MODE_AUTO = "auto"
+CUT_MODE_REENCODE = "reencode"
+CUT_MODE_COPY = "copy"
+CUT_MODE_SMART = "smart"
+CUT_MODES = [CUT_MODE_AUTO, CUT_MODE_REENCODE, CUT_MODE_COPY, CUT_MODE_SMART]
+
+# Kodeki, których strumień można skopiować do kontenera MP4 bez kodowania
+COPYABLE_CODECS = {"h264"}
+COPYABLE_PIX_FMTS = {"yuv420p", "yuvj420p"}
+
+# Przesunięcie, aby -ss przed -i trafiło dokładnie w klatkę kluczową
+SEEK_EPSILON = 0.001
+
+# Ustawienia libx264, gdy wywołujący nie wybrał kodeka (encoders.quality_args)
+DEFAULT_QUALITY_ARGS = ["-crf", "18", "-preset", "fast"]
+
+# Segmenty sklejane w trybie "smart": MPEG-TS przenosi SPS/PPS w strumieniu,
+# więc fragmenty z libx264 i skopiowane GOP-y można łączyć bez kodowania
+SEGMENT_FORMAT = "mpegts"
+SEGMENT_EXTENSION = ".ts"
+
+# Klipy wsadowe bliżej siebie niż BATCH_MAX_GAP sekund dekodowane są jednym
+# przebiegiem; BATCH_MAX_OUTPUTS ogranicza liczbę równoległych enkoderów
+BATCH_MAX_GAP = 60.0
+BATCH_MAX_OUTPUTS = 8
+
+
+def parse_timestamp(value):
+    """Parses seconds ("75.5") or clock time ("00:01:15.5", "01:15") into seconds."""
+    seconds = 0.0
+    for part in str(value).strip().replace(",", ".").split(":"):
+        seconds = seconds * 60 + float(part)
+    if seconds < 0:
+        raise ValueError(f"Negative timestamp: {value}")
+    return seconds
+
+
+def scale_value(info, target_resolution):
+    """FFmpeg scale arguments that fit the longer side to `target_resolution`."""
+    if info.height > info.width:
+        return f"-1:{target_resolution}"
+    return f"{target_resolution}:-1"
+
+
+def needs_scaling(info, target_resolution):
+    return max(info.width, info.height) != target_resolution
+
+
+def escape_filter_value(value):
+    """
+    Escapes an option value for a filter graph given as one -vf argument:
+    once for the option parser, once for the graph parser.
+    """
+    for char in "\\':":
+        value = value.replace(char, "\\" + char)
+    for char in "\\'[],;":
+        value = value.replace(char, "\\" + char)
+    return value
+
+
+def subtitles_filter(subtitles_path, style):
+    """libass filter drawing an SRT file with ASS `style` overrides."""
+    force_style = ",".join(f"{key}={value}" for key, value in style.items())
+    return (
+        f"subtitles=filename={escape_filter_value(subtitles_path)}"
+        f":force_style={escape_filter_value(force_style)}"
+    )
+
+
+def clip_audio_command(source_path, output_path, start, end, sample_rate=16000):
+    """
+    Decodes only the audio of [start, end) to mono WAV for Whisper; the
+    video stream is not decoded at all.
+    """
+    return [
+        "ffmpeg",
+        "-y",
+        "-v",
+        "error",
+        "-ss",
+        f"{start:.6f}",
+        "-i",
+        source_path,
+        "-t",
+        f"{end - start:.6f}",
+        "-vn",
+        "-ac",
+        "1",
+        "-ar",
+        str(sample_rate),
+        output_path,
+    ]
+
+
+def find_keyframes(path, start, end):
+    """
+    Keyframe timestamps within [start, end] read from packet flags only, so the
+    lookup demuxes the window without decoding anything.
+    """
+    output = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-read_intervals",
+            f"{start}%{end}",
+            "-show_entries",
+            "packet=pts_time,flags",
+            "-of",
+            "csv=p=0",
+            path,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    keyframes = []
+    for line in output.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            keyframes.append(float(pts_time))
+    return sorted(keyframes)
+
+
+class CutPlan:
+    """
+    How a clip is extracted. For smart cuts only [start, copy_start) and
+    [copy_end, end) are re-encoded; the GOPs in between are stream-copied.
+    """
+
+    __slots__ = ("mode", "start", "end", "copy_start", "copy_end")
+
+    def __init__(self, mode, start, end, copy_start=None, copy_end=None):
+        self.mode = mode
+        self.start = start
+        self.end = end
+        self.copy_start = copy_start
+        self.copy_end = copy_end
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def __repr__(self):
+        return (
+            f"CutPlan({self.mode}, {self.start:.3f}-{self.end:.3f}, "
+            f"copy={self.copy_start}-{self.copy_end})"
+        )
+
+
+def can_stream_copy(info, target_resolution, has_video_filters=False):
+    video = info.video
+    return (
+        video is not None
+        and not has_video_filters
+        and not needs_scaling(info, target_resolution)
+        and video.codec_name in COPYABLE_CODECS
+        and video.pix_fmt in COPYABLE_PIX_FMTS
+    )
+
+
+def plan_cut(
+    path,
+    info,
+    start,
+    end,
+    target_resolution,
+    mode=CUT_MODE_AUTO,
+    keyframes=None,
+    has_video_filters=False,
+):
+    """Chooses the cheapest way to extract [start, end) that `mode` allows."""
+    if end <= start:
+        raise ValueError("End time must be after start time")
+
+    if mode == CUT_MODE_REENCODE or not can_stream_copy(
+        info, target_resolution, has_video_filters
+    ):
+        return CutPlan(CUT_MODE_REENCODE, start, end)
+
+    if keyframes is None:
+        keyframes = find_keyframes(path, start, end)
+
+    if mode == CUT_MODE_COPY:
+        # Start przesunięty do poprzedzającej klatki kluczowej
+        previous = [k for k in keyframes if k <= start + SEEK_EPSILON]
+        copy_start = previous[-1] if previous else start
+        return CutPlan(CUT_MODE_COPY, copy_start, end, copy_start, end)
+
+    inside = [k for k in keyframes if start - SEEK_EPSILON <= k < end]
+    if not inside:
+        # Cały klip mieści się w jednym niepełnym GOP
+        return CutPlan(CUT_MODE_REENCODE, start, end)
+
+    copy_start = inside[0]
+    copy_end = inside[-1] if len(inside) > 1 else end
+    if copy_start - start < SEEK_EPSILON and copy_end == end:
+        return CutPlan(CUT_MODE_COPY, start, end, start, end)
+    return CutPlan(CUT_MODE_SMART, start, end, copy_start, copy_end)
+
+
+def _ffmpeg(args, duration=None, on_progress=None):
+    run_ffmpeg(["ffmpeg", "-y", "-v", "error", *args], duration, on_progress)
+
+
+def reencode_command(
+    source_path,
+    output_path,
+    plan,
+    codec,
+    video_filters=None,
+    audio_filter=None,
+    quality_args=None,
+):
+    """Full re-encode, seeking on the input so nothing before `start` is decoded."""
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-ss",
+        f"{plan.start:.6f}",
+        "-i",
+        source_path,
+        "-t",
+        f"{plan.duration:.6f}",
+    ]
+    if video_filters:
+        cmd.extend(["-vf", ",".join(video_filters)])
+    cmd.extend(["-c:v", codec])
+    cmd.extend(quality_args if quality_args is not None else DEFAULT_QUALITY_ARGS)
+    cmd.extend(["-c:a", "aac"])
+    if audio_filter:
+        cmd.extend(["-af", audio_filter])
+    cmd.append(output_path)
+    return cmd
+
+
+def _encode_boundary(source_path, segment_path, start, end, on_progress=None):
+    # Fragment brzegowy kodowany zgodnie ze strumieniem źródłowym (H.264 4:2:0)
+    _ffmpeg(
+        [
+            "-ss",
+            f"{start:.6f}",
+            "-i",
+            source_path,
+            "-t",
+            f"{end - start:.6f}",
+            "-an",
+            "-c:v",
+            "libx264",
+            "-crf",
+            "18",
+            "-preset",
+            "fast",
+            "-pix_fmt",
+            "yuv420p",
+            "-f",
+            SEGMENT_FORMAT,
+            segment_path,
+        ],
+        end - start,
+        on_progress,
+    )
+
+
+def _copy_segment(source_path, segment_path, start, end, on_progress=None):
+    _ffmpeg(
+        [
+            "-ss",
+            f"{start + SEEK_EPSILON:.6f}",
+            "-i",
+            source_path,
+            "-t",
+            f"{end - start:.6f}",
+            "-an",
+            "-c:v",
+            "copy",
+            "-bsf:v",
+            "h264_mp4toannexb",
+            "-f",
+            SEGMENT_FORMAT,
+            segment_path,
+        ],
+        end - start,
+        on_progress,
+    )
+
+
+def smart_cut(source_path, output_path, plan, audio_filter=None, on_progress=None):
+    """
+    Re-encodes the partial GOPs at the cut points, stream-copies the middle
+    and muxes the video with audio taken from the same (input-seeked) window.
+    """
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path)) as workdir:
+        segments = []
+        if plan.copy_start - plan.start >= SEEK_EPSILON:
+            segments.append(("head", plan.start, plan.copy_start, _encode_boundary))
+        segments.append(("middle", plan.copy_start, plan.copy_end, _copy_segment))
+        if plan.end - plan.copy_end >= SEEK_EPSILON:
+            segments.append(("tail", plan.copy_end, plan.end, _encode_boundary))
+
+        list_path = os.path.join(workdir, "segments.txt")
+        with open(list_path, "w") as segment_list:
+            for name, start, end, produce in segments:
+                segment_path = os.path.join(workdir, name + SEGMENT_EXTENSION)
+                produce(
+                    source_path,
+                    segment_path,
+                    start,
+                    end,
+                    _segment_progress(on_progress, plan, start, end),
+                )
+                segment_list.write(f"file '{segment_path}'\n")
+
+        cmd = [
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            list_path,
+            "-ss",
+            f"{plan.start:.6f}",
+            "-i",
+            source_path,
+            "-t",
+            f"{plan.duration:.6f}",
+            "-map",
+            "0:v",
+            "-map",
+            "1:a?",
+            "-c:v",
+            "copy",
+            "-c:a",
+            "aac",
+        ]
+        if audio_filter:
+            cmd.extend(["-af", audio_filter])
+        # Segmenty pokryły już cały postęp, multipleksowanie jest szybkie
+        _ffmpeg([*cmd, "-movflags", "+faststart", output_path])
+
+
+def _segment_progress(on_progress, plan, start, end):
+    """Maps the progress of one smart-cut segment onto the whole clip."""
+    if on_progress is None:
+        return None
+    return lambda fraction, sample: on_progress(
+        (start - plan.start + fraction * (end - start)) / plan.duration, sample
+    )
+
+
+def stream_copy(source_path, output_path, plan, audio_filter=None, on_progress=None):
+    cmd = [
+        "-ss",
+        f"{plan.start + SEEK_EPSILON:.6f}",
+        "-i",
+        source_path,
+        "-t",
+        f"{plan.duration:.6f}",
+        "-map",
+        "0:v:0",
+        "-map",
+        "0:a?",
+        "-c:v",
+        "copy",
+    ]
+    if audio_filter:
+        cmd.extend(["-c:a", "aac", "-af", audio_filter])
+    else:
+        cmd.extend(["-c:a", "copy"])
+    _ffmpeg([*cmd, "-movflags", "+faststart", output_path], plan.duration, on_progress)
+
+
+def cut_clip(
+    source_path,
+    output_path,
+    plan,
+    codec,
+    video_filters=None,
+    audio_filter=None,
+    quality_args=None,
+    on_progress=None,
+):
+    """
+    Executes a CutPlan, reporting `on_progress(fraction, FFmpegProgress)`.
+    Raises subprocess.CalledProcessError on failure.
+    """
+    if plan.mode == CUT_MODE_COPY:
+        stream_copy(source_path, output_path, plan, audio_filter, on_progress)
+    elif plan.mode == CUT_MODE_SMART:
+        smart_cut(source_path, output_path, plan, audio_filter, on_progress)
+    else:
+        run_ffmpeg(
+            reencode_command(
+                source_path,
+                output_path,
+                plan,
+                codec,
+                video_filters,
+                audio_filter,
+                quality_args,
+            ),
+            plan.duration,
+            on_progress,
+        )
+
+
+class ClipSpec:
+    """One output of a multi-clip render; `key` identifies it to the caller."""
+
+    __slots__ = ("key", "start", "end", "scale", "audio_filter", "output_path")
+
+    def __init__(self, key, start, end, scale, output_path, audio_filter=None):
+        if end <= start:
+            raise ValueError("End time must be after start time")
+        self.key = key
+        self.start = start
+        self.end = end
+        self.scale = scale
+        self.output_path = output_path
+        self.audio_filter = audio_filter
+
+
+def group_clips(specs, max_gap=BATCH_MAX_GAP, max_outputs=BATCH_MAX_OUTPUTS):
+    """
+    Splits clips into groups rendered by one FFmpeg process each. A group
+    covers one contiguous window of the source, so clips far apart do not
+    force decoding everything in between.
+    """
+    groups = []
+    window_end = None
+    for spec in sorted(specs, key=lambda s: (s.start, s.end)):
+        if (
+            groups
+            and spec.start - window_end <= max_gap
+            and len(groups[-1]) < max_outputs
+        ):
+            groups[-1].append(spec)
+            window_end = max(window_end, spec.end)
+        else:
+            groups.append([spec])
+            window_end = spec.end
+    return groups
+
+
+def multi_clip_command(source_path, specs, codec, has_audio=True, quality_args=None):
+    """
+    A single FFmpeg command that decodes the window covering all `specs` once,
+    splits the decoded frames and writes every clip to its own output.
+    """
+    window_start = min(spec.start for spec in specs)
+    window_end = max(spec.end for spec in specs)
+    count = len(specs)
+
+    graph = ["[0:v:0]split=%d%s" % (count, "".join(f"[v{i}]" for i in range(count)))]
+    if has_audio:
+        graph.append(
+            "[0:a:0]asplit=%d%s" % (count, "".join(f"[a{i}]" for i in range(count)))
+        )
+    for i, spec in enumerate(specs):
+        # Znaczniki czasu po -ss na wejściu zaczynają się od zera
+        start = spec.start - window_start
+        end = spec.end - window_start
+        graph.append(
+            f"[v{i}]trim=start={start:.6f}:end={end:.6f},setpts=PTS-STARTPTS,"
+            f"scale={spec.scale}[vout{i}]"
+        )
+        if has_audio:
+            audio = f"[a{i}]atrim=start={start:.6f}:end={end:.6f},asetpts=PTS-STARTPTS"
+            if spec.audio_filter:
+                audio += "," + spec.audio_filter.replace(" ", "")
+            graph.append(f"{audio}[aout{i}]")
+
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-ss",
+        f"{window_start:.6f}",
+        "-t",
+        f"{window_end - window_start:.6f}",
+        "-i",
+        source_path,
+        "-filter_complex",
+        ";".join(graph),
+    ]
+    for i, spec in enumerate(specs):
+        cmd.extend(["-map", f"[vout{i}]"])
+        if has_audio:
+            cmd.extend(["-map", f"[aout{i}]", "-c:a", "aac"])
+        cmd.extend(["-c:v", codec])
+        cmd.extend(quality_args if quality_args is not None else DEFAULT_QUALITY_ARGS)
+        cmd.extend(["-movflags", "+faststart", spec.output_path])
+    return cmd
@@ -0,0 +1,340 @@
+# encoders.py
+import json
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_CODEC = "libx264"
+FALLBACK_PRESET = "fast"
+
+# Sprzętowe kodeki H.264 i metoda -hwaccel, bez której nie zadziałają
+HARDWARE_ENCODERS = {
+    "h264_nvenc": "cuda",
+    "h264_qsv": "qsv",
+    "h264_amf": None,
+    "h264_videotoolbox": "videotoolbox",
+}
+SOFTWARE_PRESETS = ["ultrafast", "superfast", "veryfast", "faster", "fast"]
+
+# Materiał testowy: syntetyczny obraz z ruchem, bez dostępu do plików
+BENCHMARK_RATE = 30
+BENCHMARK_SOURCE = f"testsrc2=size=1280x720:rate={BENCHMARK_RATE}"
+BENCHMARK_SECONDS = 2
+BENCHMARK_TIMEOUT = 60
+
+
+def quality_args(codec, preset=None):
+    """
+    FFmpeg arguments selecting roughly CRF 18-20 quality for each encoder;
+    hardware encoders do not understand libx264's -crf and presets.
+    """
+    if codec == "h264_nvenc":
+        return ["-preset", preset or "p4", "-rc", "vbr", "-cq", "20", "-b:v", "0"]
+    if codec == "h264_qsv":
+        return ["-preset", preset or "faster", "-global_quality", "20"]
+    if codec == "h264_amf":
+        return ["-quality", preset or "balanced", "-rc", "cqp", "-qp_i", "20"]
+    if codec == "h264_videotoolbox":
+        return ["-q:v", "65"]
+    return ["-crf", "18", "-preset", preset or FALLBACK_PRESET]
+
+
+class EncoderChoice:
+    """An encoder with its settings and, once benchmarked, its scores."""
+
+    __slots__ = ("codec", "preset", "fps", "psnr", "bitrate_kbps", "error")
+
+    def __init__(
+        self, codec, preset=None, fps=None, psnr=None, bitrate_kbps=None, error=""
+    ):
+        self.codec = codec
+        self.preset = preset
+        self.fps = fps
+        self.psnr = psnr
+        self.bitrate_kbps = bitrate_kbps
+        self.error = error
+
+    @property
+    def quality_args(self):
+        return quality_args(self.codec, self.preset)
+
+    @property
+    def quality_per_bitrate(self):
+        """PSNR (dB) per Mbit/s of the benchmark encode."""
+        if not self.psnr or not self.bitrate_kbps:
+            return None
+        return self.psnr / (self.bitrate_kbps / 1000)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+    def __repr__(self):
+        return (
+            f"EncoderChoice({self.codec} {self.preset or ''}, fps={self.fps}, "
+            f"psnr={self.psnr}, kbps={self.bitrate_kbps})"
+        )
+
+
+FALLBACK = EncoderChoice(FALLBACK_CODEC, FALLBACK_PRESET)
+
+
+def _ffmpeg_output(*args):
+    return subprocess.run(
+        ["ffmpeg", "-hide_banner", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=BENCHMARK_TIMEOUT,
+    ).stdout
+
+
+def parse_encoders(output):
+    """Names of video encoders in `ffmpeg -encoders` output."""
+    encoders = []
+    for line in output.splitlines():
+        match = re.match(r"^\s*V[A-Z.]{5}\s+(\S+)", line)
+        if match and match.group(1) != "=":
+            encoders.append(match.group(1))
+    return encoders
+
+
+def parse_hwaccels(output):
+    """Methods listed by `ffmpeg -hwaccels`."""
+    lines = output.splitlines()
+    for i, line in enumerate(lines):
+        if line.strip().endswith("methods:"):
+            return [name.strip() for name in lines[i + 1 :] if name.strip()]
+    return []
+
+
+def candidates(encoders, hwaccels):
+    """Encoders worth benchmarking on this host, hardware ones first."""
+    found = [
+        EncoderChoice(codec)
+        for codec, hwaccel in HARDWARE_ENCODERS.items()
+        if codec in encoders and (hwaccel is None or hwaccel in hwaccels)
+    ]
+    if FALLBACK_CODEC in encoders:
+        found.extend(EncoderChoice(FALLBACK_CODEC, p) for p in SOFTWARE_PRESETS)
+    return found
+
+
+def benchmark(choice, seconds=BENCHMARK_SECONDS):
+    """
+    Encodes `seconds` of the synthetic test pattern with `choice`, recording
+    frames per second, PSNR against the source and the resulting bitrate.
+    A failing encoder is recorded with its error instead of raising.
+    """
+    source = f"{BENCHMARK_SOURCE}:duration={seconds}"
+    with tempfile.TemporaryDirectory() as workdir:
+        output_path = os.path.join(workdir, "benchmark.mp4")
+        try:
+            started = time.monotonic()
+            _ffmpeg_output(
+                "-v",
+                "error",
+                "-f",
+                "lavfi",
+                "-i",
+                source,
+                "-pix_fmt",
+                "yuv420p",
+                "-c:v",
+                choice.codec,
+                *choice.quality_args,
+                "-y",
+                output_path,
+            )
+            elapsed = time.monotonic() - started
+
+            # Filtr psnr wypisuje wynik na stderr
+            report = subprocess.run(
+                [
+                    "ffmpeg",
+                    "-hide_banner",
+                    "-i",
+                    output_path,
+                    "-f",
+                    "lavfi",
+                    "-i",
+                    source,
+                    "-lavfi",
+                    "[0:v][1:v]psnr",
+                    "-f",
+                    "null",
+                    "-",
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+                timeout=BENCHMARK_TIMEOUT,
+            ).stderr
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            error = getattr(e, "stderr", "") or str(e)
+            choice.error = error.strip().splitlines()[-1] if error.strip() else str(e)
+            return choice
+
+        match = re.search(r"average:([\d.]+|inf)", report)
+        if match:
+            # "inf" oznacza obraz identyczny ze źródłem
+            psnr = match.group(1)
+            choice.psnr = 99.0 if psnr == "inf" else round(float(psnr), 2)
+        choice.fps = round(seconds * BENCHMARK_RATE / elapsed, 1)
+        choice.bitrate_kbps = round(
+            os.path.getsize(output_path) * 8 / seconds / 1000, 1
+        )
+    return choice
+
+
+def choose_encoder(results, min_psnr=None, min_efficiency=None):
+    """
+    The fastest benchmarked encoder whose PSNR reaches `min_psnr` and whose
+    quality per bitrate is at least `min_efficiency` times that of the
+    libx264 reference preset; FALLBACK when none qualifies.
+    """
+    min_psnr = settings.ENCODER_MIN_PSNR if min_psnr is None else min_psnr
+    if min_efficiency is None:
+        min_efficiency = settings.ENCODER_MIN_EFFICIENCY
+
+    reference = next(
+        (
+            r.quality_per_bitrate
+            for r in results
+            if r.codec == FALLBACK_CODEC and r.preset == FALLBACK_PRESET
+        ),
+        None,
+    )
+    viable = [
+        r
+        for r in results
+        if not r.error
+        and r.fps
+        and (r.psnr or 0) >= min_psnr
+        and (
+            reference is None
+            or (r.quality_per_bitrate or 0) >= reference * min_efficiency
+        )
+    ]
+    if not viable:
+        return FALLBACK
+    return max(viable, key=lambda r: r.fps)
+
+
+def run_benchmarks():
+    """Probes FFmpeg's encoders and benchmarks every candidate."""
+    encoders = parse_encoders(_ffmpeg_output("-encoders"))
+    hwaccels = parse_hwaccels(_ffmpeg_output("-hwaccels"))
+    version = _ffmpeg_output("-version").splitlines()[0]
+
+    results = []
+    for choice in candidates(encoders, hwaccels):
+        results.append(benchmark(choice))
+        logger.info("Encoder benchmark: %s", results[-1])
+    return {
+        "ffmpeg_version": version,
+        "hwaccels": hwaccels,
+        "results": [r.to_dict() for r in results],
+    }
+
+
+def save_benchmarks(data, file_path):
+    # Zapis atomowy: procesy robocze mogą w tym czasie czytać plik
+    partial_path = f"{file_path}.{os.getpid()}.part"
+    with open(partial_path, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(partial_path, file_path)
+
+
+def read_benchmarks(file_path, ttl=0):
+    """
+    Benchmark results saved in `file_path`, or None when there are none or
+    they are older than `ttl` seconds (0 accepts any age).
+    """
+    try:
+        age = time.time() - os.path.getmtime(file_path)
+        if ttl <= 0 or age < ttl:
+            with open(file_path) as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def load_benchmarks(file_path, ttl, refresh=False):
+    """
+    Benchmark results from `file_path` while it is younger than `ttl` seconds
+    (0 keeps them forever); otherwise the benchmark is run and saved.
+    Called by `benchmark_encoders` and before the render workers start,
+    never from a render job.
+    """
+    if not refresh:
+        data = read_benchmarks(file_path, ttl)
+        if data is not None:
+            return data
+
+    data = run_benchmarks()
+    try:
+        save_benchmarks(data, file_path)
+    except OSError as e:
+        logger.warning("Could not save encoder benchmark to %s: %s", file_path, e)
+    return data
+
+
+_selected = {}
+
+
+def select_encoder(codecs=None):
+    """
+    The encoder renders should use, chosen once per process from the
+    persisted benchmark (see ENCODER_BENCHMARK_CACHE). `codecs` restricts
+    the choice to the encoders of one device slot. Only reads the saved
+    results: without them renders use FALLBACK until the benchmark is run.
+    """
+    key = tuple(codecs) if codecs else None
+    if key not in _selected:
+        # Przeterminowane wyniki nadal lepsze niż libx264 w ciemno
+        data = read_benchmarks(settings.ENCODER_BENCHMARK_CACHE)
+        if data is None:
+            logger.warning("Encoder benchmark missing, using %s", FALLBACK_CODEC)
+            return FALLBACK
+        try:
+            results = [
+                EncoderChoice.from_dict(r)
+                for r in data["results"]
+                if key is None or r["codec"] in key
+            ]
+            _selected[key] = choose_encoder(results)
+        except (KeyError, TypeError) as e:
+            logger.warning(
+                "Encoder benchmark unreadable, using %s: %s", FALLBACK_CODEC, e
+            )
+            _selected[key] = FALLBACK
+        logger.info("Selected encoder for %s: %s", key or "any device", _selected[key])
+    return _selected[key]
+
+
+def run_with_fallback(encode, choice):
+    """
+    Calls `encode(choice)`; when a hardware encoder fails at render time
+    (driver update, exhausted sessions) the encode is retried with libx264.
+    """
+    try:
+        return encode(choice)
+    except subprocess.CalledProcessError:
+        if choice.codec == FALLBACK_CODEC:
+            raise
+        logger.warning(
+            "Encoder %s failed, retrying with %s", choice.codec, FALLBACK_CODEC
+        )
+        return encode(FALLBACK)
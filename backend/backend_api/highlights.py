@@ -0,0 +1,325 @@
+# highlights.py
+import os
+import subprocess
+import tempfile
+
+import numpy as np
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from .media_probe import ProbeError, probe
+from .proxies import preview_source
+
+ANALYSIS_DIR = "analysis"
+ANALYSIS_VERSION = 1
+# Rozdzielczość cech: jedna wartość każdej cechy na krok
+HOP_SECONDS = 0.5
+AUDIO_RATE = 16000
+# Ramki do pomiaru modulacji głośności (sylaby mowy to ok. 4-5 Hz)
+AUDIO_FRAME_SECONDS = 0.02
+# Klatki analizowane na sekundę, w skali szarości i małej rozdzielczości
+VIDEO_FPS = 4
+VIDEO_SIZE = (64, 36)
+HISTOGRAM_BINS = 16
+# Dekodowanie w blokach o tej długości: pamięć nie zależy od długości nagrania
+BLOCK_SECONDS = 60
+# Kroki głośniejsze od szumu tła o tyle dB i z taką zmiennością głośności
+# w obrębie kroku uznawane są za mowę
+VOICE_MARGIN_DB = 10.0
+SPEECH_MODULATION_DB = 3.0
+# Skok głośności liczony względem średniej z otoczenia tej długości
+LOUDNESS_CONTEXT_SECONDS = 30
+FEATURES = ("loudness", "modulation", "motion", "cuts")
+
+
+class AnalysisError(Exception):
+    pass
+
+
+def analysis_name(content_hash):
+    return f"{ANALYSIS_DIR}/{content_hash[:2]}/{content_hash}.npz"
+
+
+def read_blocks(cmd, block_bytes):
+    """Yields fixed-size blocks of an FFmpeg pipe (the last may be shorter)."""
+    with tempfile.TemporaryFile() as stderr:
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr) as process:
+            while True:
+                data = process.stdout.read(block_bytes)
+                if not data:
+                    break
+                yield data
+        if process.returncode:
+            stderr.seek(0)
+            raise AnalysisError(stderr.read().decode(errors="replace").strip())
+
+
+def audio_hop_features(samples):
+    """
+    Per HOP_SECONDS of float samples: RMS level (dBFS) and the spread of
+    the levels of its AUDIO_FRAME_SECONDS frames, high for speech.
+    """
+    hop = int(AUDIO_RATE * HOP_SECONDS)
+    frame = int(AUDIO_RATE * AUDIO_FRAME_SECONDS)
+    count = len(samples) // hop
+    frames = samples[: count * hop].reshape(count, hop // frame, frame)
+    power = np.mean(np.square(frames), axis=2)
+    loudness = 10 * np.log10(np.mean(power, axis=1) + 1e-10)
+    modulation = np.std(10 * np.log10(power + 1e-10), axis=1)
+    return loudness.astype(np.float32), modulation.astype(np.float32)
+
+
+def audio_features(path):
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-v",
+        "error",
+        "-i",
+        path,
+        "-map",
+        "0:a:0",
+        "-vn",
+        "-ac",
+        "1",
+        "-ar",
+        str(AUDIO_RATE),
+        "-f",
+        "s16le",
+        "pipe:1",
+    ]
+    hop_bytes = int(AUDIO_RATE * HOP_SECONDS) * 2
+    block_bytes = hop_bytes * int(BLOCK_SECONDS / HOP_SECONDS)
+    loudness, modulation = [], []
+    pending = b""
+    for data in read_blocks(cmd, block_bytes):
+        data = pending + data
+        usable = len(data) - len(data) % hop_bytes
+        pending = data[usable:]
+        samples = np.frombuffer(data[:usable], "<i2").astype(np.float32) / 32768
+        block_loudness, block_modulation = audio_hop_features(samples)
+        loudness.append(block_loudness)
+        modulation.append(block_modulation)
+    if not loudness:
+        return np.empty(0, np.float32), np.empty(0, np.float32)
+    return np.concatenate(loudness), np.concatenate(modulation)
+
+
+def video_hop_features(frames, previous):
+    """
+    Per HOP_SECONDS of grayscale frames (n, pixels): mean absolute change
+    between frames (motion energy) and the number of scene cuts, where the
+    luma histogram changes by more than HIGHLIGHT_SCENE_THRESHOLD.
+    """
+    frames = frames.astype(np.int16)
+    if previous is None:
+        previous = frames[:1]
+    # Każda klatka porównywana z poprzednią, także z końca poprzedniego bloku
+    frames = np.concatenate([previous, frames])
+    count, pixels = frames.shape
+    motion = np.mean(np.abs(np.diff(frames, axis=0)), axis=1) / 255
+
+    # Histogramy wszystkich klatek naraz: osobny zakres koszyków na klatkę
+    bins = frames.astype(np.int32) * HISTOGRAM_BINS // 256
+    bins += HISTOGRAM_BINS * np.arange(count, dtype=np.int32)[:, None]
+    histograms = np.bincount(bins.ravel(), minlength=count * HISTOGRAM_BINS)
+    histograms = histograms.reshape(count, HISTOGRAM_BINS) / pixels
+    change = np.abs(np.diff(histograms, axis=0)).sum(axis=1) / 2
+    cuts = change > settings.HIGHLIGHT_SCENE_THRESHOLD
+    count -= 1
+
+    per_hop = int(VIDEO_FPS * HOP_SECONDS)
+    hops = count // per_hop
+    return (
+        motion[: hops * per_hop].reshape(hops, per_hop).mean(axis=1),
+        cuts[: hops * per_hop].reshape(hops, per_hop).sum(axis=1),
+    )
+
+
+def video_features(path):
+    width, height = VIDEO_SIZE
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-v",
+        "error",
+        # Klatki nieużywane jako odniesienie nie są dekodowane
+        "-skip_frame",
+        "noref",
+        "-i",
+        path,
+        "-map",
+        "0:v:0",
+        "-vf",
+        f"fps={VIDEO_FPS},scale={width}:{height},format=gray",
+        "-f",
+        "rawvideo",
+        "pipe:1",
+    ]
+    frame_bytes = width * height
+    hop_frames = int(VIDEO_FPS * HOP_SECONDS)
+    block_bytes = frame_bytes * hop_frames * int(BLOCK_SECONDS / HOP_SECONDS)
+    motion, cuts = [], []
+    previous = None
+    pending = b""
+    for data in read_blocks(cmd, block_bytes):
+        data = pending + data
+        usable = len(data) - len(data) % (frame_bytes * hop_frames)
+        pending = data[usable:]
+        if not usable:
+            continue
+        frames = np.frombuffer(data[:usable], np.uint8).reshape(-1, frame_bytes)
+        block_motion, block_cuts = video_hop_features(frames, previous)
+        previous = frames[-1:].astype(np.int16)
+        motion.append(block_motion)
+        cuts.append(block_cuts)
+    if not motion:
+        return np.empty(0, np.float32), np.empty(0, np.float32)
+    return (
+        np.concatenate(motion).astype(np.float32),
+        np.concatenate(cuts).astype(np.float32),
+    )
+
+
+def fit(values, length, silence=0):
+    """Pads with `silence` or trims `values` to `length` hops."""
+    values = values[:length]
+    return np.pad(values, (0, length - len(values)), constant_values=silence)
+
+
+def analyze_media(asset):
+    """
+    Decodes the audio and a downscaled grayscale video of `asset` (from
+    the preview proxy when there is one) in fixed-size blocks and stores
+    per-HOP_SECONDS features in analysis/<sha256>.npz.
+    """
+    name = analysis_name(asset.digest)
+    if default_storage.exists(name):
+        return name
+    try:
+        info = probe(asset.path, content_hash=asset.digest)
+    except ProbeError as e:
+        raise AnalysisError(f"Cannot read {asset}: {e}")
+    if not info.video and not info.audio:
+        raise AnalysisError(f"{asset} has no audio or video stream")
+
+    hops = max(1, int(np.ceil((info.duration or 0) / HOP_SECONDS)))
+    loudness = np.full(hops, -100, np.float32)
+    modulation = motion = cuts = np.zeros(hops, np.float32)
+    if info.audio:
+        loudness, modulation = audio_features(asset.path)
+        loudness = fit(loudness, hops, silence=-100)
+        modulation = fit(modulation, hops)
+    if info.video:
+        motion, cuts = video_features(preview_source(asset, info))
+        motion, cuts = fit(motion, hops), fit(cuts, hops)
+
+    target = default_storage.path(name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    partial = f"{target}.{os.getpid()}.part.npz"
+    try:
+        np.savez(
+            partial,
+            version=ANALYSIS_VERSION,
+            hop=HOP_SECONDS,
+            loudness=loudness,
+            modulation=modulation,
+            motion=motion,
+            cuts=cuts,
+        )
+        os.replace(partial, target)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return name
+
+
+def load_analysis(asset):
+    """Stored features of `asset`, or None if not analyzed yet."""
+    name = analysis_name(asset.digest)
+    if not default_storage.exists(name):
+        return None
+    with np.load(default_storage.path(name)) as data:
+        if int(data["version"]) != ANALYSIS_VERSION:
+            return None
+        return {key: data[key] for key in ("hop", *FEATURES)}
+
+
+def moving_mean(values, width):
+    """Mean over a centred window of `width` hops (shorter at the edges)."""
+    padded = np.concatenate([[0], np.cumsum(values, dtype=np.float64)])
+    index = np.arange(len(values))
+    low = np.clip(index - width // 2, 0, len(values))
+    high = np.clip(index + width // 2 + 1, 0, len(values))
+    return (padded[high] - padded[low]) / (high - low)
+
+
+def normalize(values):
+    """Scales a non-negative feature so its 95th percentile maps to 1."""
+    scale = np.percentile(values, 95) if len(values) else 0
+    if scale <= 0:
+        scale = values.max() if len(values) and values.max() > 0 else 1
+    return np.clip(values / scale, 0, 1)
+
+
+def feature_scores(features):
+    """
+    Per-hop components in [0, 1]: loudness peaks above their surroundings,
+    speech presence, scene cuts and motion energy.
+    """
+    hop = float(features["hop"])
+    loudness = features["loudness"]
+    noise_floor = np.percentile(loudness, 10)
+    speech = (loudness > noise_floor + VOICE_MARGIN_DB) & (
+        features["modulation"] > SPEECH_MODULATION_DB
+    )
+    context = moving_mean(loudness, int(LOUDNESS_CONTEXT_SECONDS / hop))
+    return {
+        "loudness": normalize(np.clip(loudness - context, 0, None)),
+        "speech": speech.astype(np.float32),
+        "scene": normalize(features["cuts"]),
+        "motion": normalize(features["motion"]),
+    }
+
+
+def top_candidates(features, length, count, weights=None):
+    """
+    The `count` best non-overlapping windows of `length` seconds as
+    (start, end, score, components) with scores in [0, 1]: the weighted
+    means of feature_scores over the window (HIGHLIGHT_WEIGHTS).
+    """
+    weights = weights or settings.HIGHLIGHT_WEIGHTS
+    hop = float(features["hop"])
+    components = feature_scores(features)
+    total = len(components["speech"])
+    window = min(max(1, int(round(length / hop))), total)
+
+    sums = {
+        name: np.concatenate([[0], np.cumsum(values, dtype=np.float64)])
+        for name, values in components.items()
+    }
+    means = {
+        name: (values[window:] - values[:-window]) / window
+        for name, values in sums.items()
+    }
+    weight_sum = sum(weights.values()) or 1
+    scores = sum(weights.get(name, 0) * means[name] for name in means) / weight_sum
+
+    candidates = []
+    available = np.ones(len(scores), bool)
+    for start in np.argsort(-scores, kind="stable"):
+        if not available[start]:
+            continue
+        candidates.append(
+            (
+                round(float(start * hop), 3),
+                round(float(min(start + window, total) * hop), 3),
+                round(float(scores[start]), 4),
+                {name: round(float(means[name][start]), 4) for name in means},
+            )
+        )
+        if len(candidates) == count:
+            break
+        # Okna nakładające się na wybrane odpadają
+        available[max(0, start - window + 1) : start + window] = False
+    return candidates
@@ -0,0 +1,159 @@
+# jobs.py
+import logging
+import os
+import socket
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .media_probe import ProbeError
+from .cutting import parse_timestamp
+from .media_tasks import claim_next_media_task, run_media_task
+from .models import RenderClip, RenderJob
+from .render import render_job
+from .sprites import prune_thumbnail_cache
+from .uploads import claim_next_upload, finalize_session
+
+logger = logging.getLogger(__name__)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_render(source, **options):
+    """Creates a queued RenderJob for a source already saved in default_storage."""
+    return RenderJob.objects.create(source=source, **options)
+
+
+def enqueue_batch(source, clips, **options):
+    """
+    Creates one queued RenderJob rendering several clips of `source`. `clips`
+    are dicts with start_time, end_time and optionally resolution and
+    enhance_audio; the job's own time range spans all of them.
+    """
+    first = min(clips, key=lambda clip: parse_timestamp(clip["start_time"]))
+    last = max(clips, key=lambda clip: parse_timestamp(clip["end_time"]))
+    # Zadanie i klipy w jednej transakcji, aby proces roboczy nie pobrał
+    # zadania bez klipów
+    with transaction.atomic():
+        job = RenderJob.objects.create(
+            source=source,
+            start_time=first["start_time"],
+            end_time=last["end_time"],
+            **options,
+        )
+        RenderClip.objects.bulk_create(
+            RenderClip(job=job, index=index, **clip) for index, clip in enumerate(clips)
+        )
+    return job
+
+
+def claim_next_job(worker=None):
+    """
+    Atomically moves the oldest queued job to `running` and returns it.
+    The conditional UPDATE makes concurrent workers skip jobs already taken.
+    """
+    worker = worker or worker_name()
+    while True:
+        job = (
+            RenderJob.objects.filter(status=RenderJob.STATUS_QUEUED)
+            .order_by("created_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+
+        claimed = RenderJob.objects.filter(
+            pk=job.pk, status=RenderJob.STATUS_QUEUED
+        ).update(
+            status=RenderJob.STATUS_RUNNING,
+            worker=worker,
+            started_at=timezone.now(),
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_job(job, scheduler=None):
+    """Executes a claimed job and records the outcome on the model."""
+    try:
+        video_path, subtitles_path = render_job(job, scheduler)
+    except (subprocess.CalledProcessError, ProbeError):
+        logger.exception("Render job #%s: video processing failed", job.pk)
+        job.status = RenderJob.STATUS_FAILED
+        job.error = "Video processing failed"
+    except Exception as e:
+        logger.exception("Render job #%s failed", job.pk)
+        job.status = RenderJob.STATUS_FAILED
+        job.error = str(e)
+    else:
+        job.status = RenderJob.STATUS_DONE
+        job.progress = 100
+        job.eta_seconds = None
+        job.video_path = video_path
+        job.subtitles_path = subtitles_path
+    finally:
+        # Usuń pliki tymczasowe (bloby z rejestru zasobów zostają)
+        if job.asset_id is None and job.source and default_storage.exists(job.source):
+            default_storage.delete(job.source)
+
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+def requeue_stale_jobs(hostname=None):
+    """
+    Returns jobs left `running` by workers on this host (e.g. after a crash
+    or restart) back to the queue.
+    """
+    hostname = hostname or socket.gethostname()
+    return RenderJob.objects.filter(
+        Q(worker__startswith=f"{hostname}:"), status=RenderJob.STATUS_RUNNING
+    ).update(status=RenderJob.STATUS_QUEUED, worker="", started_at=None)
+
+
+def worker_loop(stop_event, poll_interval=1.0, scheduler=None):
+    """
+    Claims and runs jobs until `stop_event` is set, placing their tasks on
+    the device slots of `scheduler`. Finished uploads are hashed and
+    registered, and media tasks (sprite sheets, ...) run only while no
+    render job is waiting. Every THUMBNAIL_CACHE_PRUNE_INTERVAL seconds the
+    thumbnail cache is trimmed back to its size limit.
+    """
+    worker = worker_name()
+    logger.info("Render worker %s started", worker)
+    last_prune = None
+    while not stop_event.is_set():
+        now = time.monotonic()
+        if last_prune is None or (
+            now - last_prune >= settings.THUMBNAIL_CACHE_PRUNE_INTERVAL
+        ):
+            # Przegląd całej pamięci podręcznej nie obciąża żądań miniatur
+            prune_thumbnail_cache()
+            last_prune = now
+
+        job = claim_next_job(worker)
+        if job is not None:
+            logger.info("Render worker %s picked up job #%s", worker, job.pk)
+            run_job(job, scheduler)
+            continue
+        session = claim_next_upload(worker)
+        if session is not None:
+            logger.info("Render worker %s is finalizing %s", worker, session)
+            finalize_session(session)
+            continue
+        task = claim_next_media_task(worker)
+        if task is not None:
+            logger.info("Render worker %s picked up %s", worker, task)
+            run_media_task(task)
+            continue
+        stop_event.wait(poll_interval)
+    logger.info("Render worker %s stopped", worker)
@@ -0,0 +1,66 @@
+# listing.py
+import django_filters
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+from .models import Project, Video
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Newest first, paged by an opaque cursor over the (created_at, id) index:
+    every page is one index range scan, however deep the client has paged.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = settings.LIST_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.LIST_MAX_PAGE_SIZE
+
+
+class VideoFilter(django_filters.FilterSet):
+    title = django_filters.CharFilter(lookup_expr="icontains")
+    # Identyfikator porównywany wprost, bez pobierania projektu do walidacji
+    project = django_filters.NumberFilter(field_name="project_id")
+    project_title = django_filters.CharFilter(
+        field_name="project__title", lookup_expr="icontains"
+    )
+    created_after = django_filters.IsoDateTimeFilter(
+        field_name="created_at", lookup_expr="gte"
+    )
+    created_before = django_filters.IsoDateTimeFilter(
+        field_name="created_at", lookup_expr="lt"
+    )
+    # Zakresy po kolumnach metadanych, np. ?min_height=2160&min_duration=3600
+    min_duration = django_filters.NumberFilter(field_name="duration", lookup_expr="gte")
+    max_duration = django_filters.NumberFilter(field_name="duration", lookup_expr="lte")
+    min_height = django_filters.NumberFilter(field_name="height", lookup_expr="gte")
+    max_height = django_filters.NumberFilter(field_name="height", lookup_expr="lte")
+    min_width = django_filters.NumberFilter(field_name="width", lookup_expr="gte")
+    min_size = django_filters.NumberFilter(field_name="size", lookup_expr="gte")
+    max_size = django_filters.NumberFilter(field_name="size", lookup_expr="lte")
+
+    class Meta:
+        model = Video
+        fields = [
+            "title",
+            "project",
+            "project_title",
+            "video_codec",
+            "audio_codec",
+            "content_hash",
+        ]
+
+
+class ProjectFilter(django_filters.FilterSet):
+    title = django_filters.CharFilter(lookup_expr="icontains")
+    created_after = django_filters.IsoDateTimeFilter(
+        field_name="created_at", lookup_expr="gte"
+    )
+    created_before = django_filters.IsoDateTimeFilter(
+        field_name="created_at", lookup_expr="lt"
+    )
+
+    class Meta:
+        model = Project
+        fields = ["title"]
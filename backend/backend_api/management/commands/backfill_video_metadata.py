@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from backend_api.media_probe import PROBE_VERSION, ProbeError
+from backend_api.models import Video
+from backend_api.video_metadata import backfill_video_metadata
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills the metadata columns (duration, fps, dimensions, codecs, "
+        "bitrate, size, content hash) of videos stored before they existed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Probe every video again, not only those missing metadata.",
+        )
+
+    def handle(self, *args, **options):
+        videos = Video.objects.exclude(file="").only("id", "file", "asset")
+        if not options["all"]:
+            videos = videos.filter(
+                Q(probe_version__isnull=True) | Q(probe_version__lt=PROBE_VERSION)
+            )
+
+        done = failed = 0
+        for video in videos.order_by("id").iterator():
+            try:
+                fields = backfill_video_metadata(video)
+            except (OSError, ProbeError) as e:
+                failed += 1
+                self.stderr.write(f"Video #{video.pk} ({video.file.name}): {e}")
+                continue
+            done += 1
+            self.stdout.write(
+                f"Video #{video.pk}: {fields['width']}x{fields['height']}, "
+                f"{fields['duration']} s"
+            )
+
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(f"Updated {done} video(s), {failed} failed"))
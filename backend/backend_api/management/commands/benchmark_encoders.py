@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend_api.encoders import EncoderChoice, choose_encoder, load_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the H.264 encoders supported by FFmpeg on this host and "
+        "saves the scores used to pick the render encoder."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--if-stale",
+            action="store_true",
+            help="Only benchmark when the saved results are missing or expired.",
+        )
+
+    def handle(self, *args, **options):
+        data = load_benchmarks(
+            settings.ENCODER_BENCHMARK_CACHE,
+            settings.ENCODER_BENCHMARK_TTL,
+            refresh=not options["if_stale"],
+        )
+        results = [EncoderChoice.from_dict(r) for r in data["results"]]
+        for result in results:
+            if result.error:
+                self.stdout.write(f"{result.codec}: unavailable ({result.error})")
+            else:
+                self.stdout.write(
+                    f"{result.codec} {result.preset or ''}: {result.fps} fps, "
+                    f"PSNR {result.psnr} dB, {result.bitrate_kbps} kb/s"
+                )
+
+        choice = choose_encoder(results)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Renders will use {choice.codec} {choice.preset or ''}".rstrip()
+            )
+        )
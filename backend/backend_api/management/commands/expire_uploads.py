@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend_api.uploads import expire_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes resumable upload sessions that were abandoned (open or failed "
+        "and idle for longer than UPLOAD_SESSION_TTL) and their partial files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=settings.UPLOAD_SESSION_TTL,
+            help="Idle time in seconds after which a session expires "
+            "(default: UPLOAD_SESSION_TTL).",
+        )
+
+    def handle(self, *args, **options):
+        count = expire_sessions(options["max_age"])
+        self.stdout.write(self.style.SUCCESS(f"Removed {count} expired upload(s)"))
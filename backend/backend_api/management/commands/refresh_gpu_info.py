@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.gpu_info import load_gpu_devices
+
+
+class Command(BaseCommand):
+    help = "Detects GPUs again and rewrites the cached hardware profile."
+
+    def handle(self, *args, **options):
+        devices = load_gpu_devices(
+            settings.GPU_INFO_CACHE, settings.GPU_INFO_CACHE_TTL, refresh=True
+        )
+        for device in devices:
+            self.stdout.write(
+                f"{device.get('name', 'Unknown')}: codec {device.get('codec')}, "
+                f"VRAM {device.get('vram', 0)} MB, "
+                f"Whisper model {device.get('whisper_model')}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Hardware profile saved to {settings.GPU_INFO_CACHE}")
+        )
@@ -0,0 +1,70 @@
+import signal
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend_api.encoders import FALLBACK_CODEC, load_benchmarks
+from backend_api.jobs import requeue_stale_jobs
+from backend_api.media_tasks import requeue_stale_media_tasks
+from backend_api.uploads import requeue_stale_uploads
+from backend_api.workers import WorkerPool
+
+
+class Command(BaseCommand):
+    help = "Starts a pool of processes that execute queued render jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.RENDER_WORKERS,
+            help="Number of worker processes (default: RENDER_WORKERS).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.RENDER_POLL_INTERVAL,
+            help="Seconds an idle worker waits before checking the queue again.",
+        )
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} interrupted job(s)")
+        requeued = requeue_stale_media_tasks()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} interrupted media task(s)")
+        requeued = requeue_stale_uploads()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} interrupted upload(s)")
+
+        # Test koderów przed startem procesów, a nie w pierwszym zadaniu
+        try:
+            load_benchmarks(
+                settings.ENCODER_BENCHMARK_CACHE, settings.ENCODER_BENCHMARK_TTL
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            self.stderr.write(
+                f"Encoder benchmark failed, renders use {FALLBACK_CODEC}: {e}"
+            )
+
+        pool = WorkerPool(options["workers"], options["poll_interval"])
+
+        def shutdown(signum, frame):
+            self.stdout.write("Stopping render workers...")
+            pool.stop()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        pool.start()
+        self.stdout.write(
+            self.style.SUCCESS(f"Started {options['workers']} render worker(s)")
+        )
+        for slot in pool.scheduler.status():
+            self.stdout.write(
+                f"Device slot {slot['slot']}: {slot['name']} ({slot['codec']}), "
+                f"up to {slot['max_tasks']} task(s)"
+            )
+        pool.join()
@@ -0,0 +1,55 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend_api.scheduler import whisper_devices
+from backend_api.transcription import ModelRegistry, TranscriptionServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Starts the transcription service that keeps Whisper models resident "
+        "and shares them with web and render workers over local IPC."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--memory-budget",
+            type=int,
+            default=settings.WHISPER_MEMORY_BUDGET_MB,
+            help="Memory (MB) the resident models may use before LRU eviction.",
+        )
+        parser.add_argument(
+            "--preload",
+            nargs="*",
+            default=[],
+            help="Whisper models to load before accepting requests.",
+        )
+        parser.add_argument(
+            "--device",
+            action="append",
+            dest="devices",
+            help=(
+                "Device to preload the models on, e.g. cuda:0 (repeatable; "
+                "default: the devices render workers transcribe on)."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        registry = ModelRegistry(options["memory_budget"])
+        devices = options["devices"] or whisper_devices()
+        for model_name in options["preload"]:
+            for device in devices:
+                registry.get(model_name, device)
+
+        server = TranscriptionServer(registry)
+
+        def shutdown(signum, frame):
+            self.stdout.write("Stopping transcription service...")
+            server.close()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        server.serve_forever()
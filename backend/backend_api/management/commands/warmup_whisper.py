@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from backend_api.transcription import (
+    TranscriptionServiceUnavailable,
+    call_service,
+    whisper_model_sizes,
+)
+
+
+class Command(BaseCommand):
+    help = "Loads Whisper models into the running transcription service."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            help="Models to load (default: the model picked for the detected GPU).",
+        )
+        parser.add_argument(
+            "--device",
+            action="append",
+            dest="devices",
+            help=(
+                "Device to load the models on, e.g. cuda:0 (repeatable; "
+                "default: the devices render workers transcribe on)."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        models = options["models"] or [settings.GPU_LIST["whisper_model"]]
+        unknown = set(models) - set(whisper_model_sizes())
+        if unknown:
+            raise CommandError(
+                f"Unknown Whisper model(s): {', '.join(sorted(unknown))}"
+            )
+
+        try:
+            reply = call_service(
+                {"op": "warmup", "models": models, "devices": options["devices"]}
+            )
+        except TranscriptionServiceUnavailable:
+            raise CommandError(
+                "Transcription service is not running. "
+                "Start it with `manage.py run_transcription_service`."
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Resident models: {', '.join(reply['loaded'])}")
+        )
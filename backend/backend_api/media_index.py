@@ -0,0 +1,187 @@
+# media_index.py
+import os
+import shutil
+import subprocess
+import tempfile
+from array import array
+
+import numpy as np
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from .media_probe import ProbeError, probe
+from .proxies import preview_source
+
+INDEXES_DIR = "indexes"
+KEYFRAMES_NAME = "keyframes.npy"
+SCENES_NAME = "scenes.npy"
+# Wykrywanie scen na klatkach tej szerokości: wynik prawie ten sam, dekodowanie
+# i porównywanie dużo tańsze
+SCENE_DETECT_WIDTH = 160
+
+
+class MediaIndexError(Exception):
+    pass
+
+
+def index_folder(content_hash):
+    return f"{INDEXES_DIR}/{content_hash[:2]}/{content_hash}"
+
+
+def stream_lines(cmd):
+    """Yields stdout lines of `cmd` as they arrive."""
+    with tempfile.TemporaryFile() as stderr:
+        with subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=stderr, text=True
+        ) as process:
+            yield from process.stdout
+        if process.returncode:
+            stderr.seek(0)
+            raise MediaIndexError(stderr.read().decode(errors="replace").strip())
+
+
+def read_keyframes(path):
+    """
+    Timestamps of the keyframes of the first video stream, from packet
+    flags: the file is demuxed, nothing is decoded.
+    """
+    times = array("d")
+    for line in stream_lines(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "packet=pts_time,flags",
+            "-of",
+            "csv=p=0",
+            path,
+        ]
+    ):
+        pts_time, _, flags = line.strip().partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            times.append(float(pts_time))
+    return np.unique(np.frombuffer(times, np.float64))
+
+
+def read_scene_cuts(path, threshold):
+    """Timestamps where FFmpeg's scene score of a frame exceeds `threshold`."""
+    times = array("d")
+    for line in stream_lines(
+        [
+            "ffmpeg",
+            "-nostdin",
+            "-v",
+            "error",
+            "-i",
+            path,
+            "-map",
+            "0:v:0",
+            "-vf",
+            f"scale={SCENE_DETECT_WIDTH}:-2,select='gt(scene\\,{threshold})',"
+            "metadata=print:file=-",
+            "-f",
+            "null",
+            "-",
+        ]
+    ):
+        # Linie "frame:N pts:P pts_time:T", po nich wartości metadanych
+        for field in line.split():
+            if field.startswith("pts_time:"):
+                times.append(float(field[len("pts_time:") :]))
+    return np.unique(np.frombuffer(times, np.float64))
+
+
+def generate_index(asset):
+    """
+    Records the keyframe and scene-cut timestamps of `asset` as sorted
+    float64 arrays (indexes/<sha256>/*.npy). Keyframes come from the
+    original, whose packets renders copy; scene cuts are detected on the
+    preview proxy when there is one, as its timestamps are the original's.
+    """
+    folder = index_folder(asset.digest)
+    if default_storage.exists(f"{folder}/{SCENES_NAME}"):
+        return folder
+
+    try:
+        info = probe(asset.path, content_hash=asset.digest)
+    except ProbeError as e:
+        raise MediaIndexError(f"Cannot read {asset}: {e}")
+    if not info.video:
+        raise MediaIndexError(f"{asset} has no video stream")
+
+    target = default_storage.path(folder)
+    partial = f"{target}.{os.getpid()}.part"
+    shutil.rmtree(partial, ignore_errors=True)
+    os.makedirs(partial)
+    try:
+        np.save(os.path.join(partial, KEYFRAMES_NAME), read_keyframes(asset.path))
+        np.save(
+            os.path.join(partial, SCENES_NAME),
+            read_scene_cuts(preview_source(asset, info), settings.SCENE_CUT_THRESHOLD),
+        )
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        os.rename(partial, target)
+    finally:
+        shutil.rmtree(partial, ignore_errors=True)
+    return folder
+
+
+def neighbours(times, position):
+    """The last time <= `position` and the first time > it, or None."""
+    index = int(np.searchsorted(times, position, side="right"))
+    previous = float(times[index - 1]) if index > 0 else None
+    following = float(times[index]) if index < len(times) else None
+    return previous, following
+
+
+def nearest(times, position):
+    previous, following = neighbours(times, position)
+    if previous is None or (
+        following is not None and following - position < position - previous
+    ):
+        return following
+    return previous
+
+
+class MediaIndex:
+    """
+    Keyframes and scene cuts of one asset. The arrays are memory-mapped and
+    every lookup is a binary search, so long sources cost no more to query.
+    """
+
+    def __init__(self, folder):
+        self.keyframes = np.load(os.path.join(folder, KEYFRAMES_NAME), mmap_mode="r")
+        self.scene_cuts = np.load(os.path.join(folder, SCENES_NAME), mmap_mode="r")
+
+    def keyframe_neighbours(self, position):
+        return neighbours(self.keyframes, position)
+
+    def nearest_keyframe(self, position):
+        return nearest(self.keyframes, position)
+
+    def scene_cut_neighbours(self, position):
+        return neighbours(self.scene_cuts, position)
+
+    def nearest_scene_cut(self, position):
+        return nearest(self.scene_cuts, position)
+
+    def keyframes_for_cut(self, start, end):
+        """
+        Keyframes from the last one at or before `start` up to `end`: what
+        cutting.plan_cut needs to plan [start, end).
+        """
+        first = max(int(np.searchsorted(self.keyframes, start, side="right")) - 1, 0)
+        last = int(np.searchsorted(self.keyframes, end, side="right"))
+        return self.keyframes[first:last].tolist()
+
+
+def load_media_index(asset):
+    """The stored index of `asset`, or None if not generated yet."""
+    folder = index_folder(asset.digest)
+    if not default_storage.exists(f"{folder}/{SCENES_NAME}"):
+        return None
+    return MediaIndex(default_storage.path(folder))
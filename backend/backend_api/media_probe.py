@@ -0,0 +1,308 @@
+# media_probe.py
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from fractions import Fraction
+
+from django.conf import settings
+
+from .models import MediaProbe
+
+# Zmiana formatu MediaInfo unieważnia wpisy zapisane w bazie
+PROBE_VERSION = 1
+
+FINGERPRINT_SAMPLE_SIZE = 1024 * 1024
+
+
+class ProbeError(Exception):
+    pass
+
+
+def parse_rate(value):
+    """Parses an FFprobe rational such as "30000/1001"; None for "0/0" or junk."""
+    try:
+        numerator, _, denominator = str(value).partition("/")
+        rate = Fraction(int(numerator), int(denominator or 1))
+    except (ValueError, ZeroDivisionError):
+        return None
+    return rate or None
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class StreamInfo:
+    __slots__ = (
+        "index",
+        "codec_type",
+        "codec_name",
+        "profile",
+        "width",
+        "height",
+        "pix_fmt",
+        "fps",
+        "rotation",
+        "bit_rate",
+        "duration",
+        "sample_rate",
+        "channels",
+        "channel_layout",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_ffprobe(cls, stream):
+        rotation = _int(stream.get("tags", {}).get("rotate"))
+        for side_data in stream.get("side_data_list", []):
+            if "rotation" in side_data:
+                rotation = _int(side_data["rotation"])
+
+        fps = None
+        if stream.get("codec_type") == "video":
+            fps = parse_rate(stream.get("avg_frame_rate")) or parse_rate(
+                stream.get("r_frame_rate")
+            )
+
+        return cls(
+            index=stream.get("index"),
+            codec_type=stream.get("codec_type"),
+            codec_name=stream.get("codec_name"),
+            profile=stream.get("profile"),
+            width=_int(stream.get("width")),
+            height=_int(stream.get("height")),
+            pix_fmt=stream.get("pix_fmt"),
+            fps=fps,
+            rotation=(rotation or 0) % 360,
+            bit_rate=_int(stream.get("bit_rate")),
+            duration=_float(stream.get("duration")),
+            sample_rate=_int(stream.get("sample_rate")),
+            channels=_int(stream.get("channels")),
+            channel_layout=stream.get("channel_layout"),
+        )
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        if self.fps is not None:
+            data["fps"] = [self.fps.numerator, self.fps.denominator]
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        if data.get("fps") is not None:
+            data["fps"] = Fraction(*data["fps"])
+        return cls(**data)
+
+
+class MediaInfo:
+    """Typed result of a single `ffprobe -print_format json` run."""
+
+    __slots__ = ("format_name", "duration", "bit_rate", "size", "streams")
+
+    def __init__(self, format_name, duration, bit_rate, size, streams):
+        self.format_name = format_name
+        self.duration = duration
+        self.bit_rate = bit_rate
+        self.size = size
+        self.streams = streams
+
+    @classmethod
+    def from_ffprobe(cls, data):
+        streams = [StreamInfo.from_ffprobe(s) for s in data.get("streams", [])]
+        fmt = data.get("format", {})
+        duration = _float(fmt.get("duration"))
+        if duration is None:
+            durations = [s.duration for s in streams if s.duration is not None]
+            duration = max(durations, default=None)
+        return cls(
+            format_name=fmt.get("format_name"),
+            duration=duration,
+            bit_rate=_int(fmt.get("bit_rate")),
+            size=_int(fmt.get("size")),
+            streams=streams,
+        )
+
+    def to_dict(self):
+        return {
+            "format_name": self.format_name,
+            "duration": self.duration,
+            "bit_rate": self.bit_rate,
+            "size": self.size,
+            "streams": [stream.to_dict() for stream in self.streams],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        data["streams"] = [StreamInfo.from_dict(s) for s in data["streams"]]
+        return cls(**data)
+
+    def _first(self, codec_type):
+        for stream in self.streams:
+            if stream.codec_type == codec_type:
+                return stream
+        return None
+
+    @property
+    def video(self):
+        return self._first("video")
+
+    @property
+    def audio(self):
+        return self._first("audio")
+
+    @property
+    def fps(self):
+        return self.video.fps if self.video else None
+
+    @property
+    def rotation(self):
+        return self.video.rotation if self.video else 0
+
+    @property
+    def width(self):
+        """Display width, i.e. after applying the rotation metadata."""
+        if not self.video:
+            return None
+        if self.rotation in (90, 270):
+            return self.video.height
+        return self.video.width
+
+    @property
+    def height(self):
+        if not self.video:
+            return None
+        if self.rotation in (90, 270):
+            return self.video.width
+        return self.video.height
+
+    @property
+    def video_codec(self):
+        return self.video.codec_name if self.video else None
+
+    @property
+    def audio_codec(self):
+        return self.audio.codec_name if self.audio else None
+
+    @property
+    def total_frames(self):
+        if self.fps is None or self.duration is None:
+            return None
+        return int(self.duration * self.fps)
+
+
+def file_fingerprint(path):
+    """
+    Cheap content hash: file size plus the first, middle and last MB, so that
+    multi-GB sources are not read in full just to look up cached metadata.
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.blake2b(str(size).encode(), digest_size=20)
+    with open(path, "rb") as f:
+        for offset in (0, size // 2, max(size - FINGERPRINT_SAMPLE_SIZE, 0)):
+            f.seek(offset)
+            digest.update(f.read(FINGERPRINT_SAMPLE_SIZE))
+    return digest.hexdigest()
+
+
+class _ProbeCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            info = self._entries.get(key)
+            if info is not None:
+                self._entries.move_to_end(key)
+            return info
+
+    def put(self, key, info):
+        with self._lock:
+            self._entries[key] = info
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+probe_cache = _ProbeCache(settings.PROBE_CACHE_SIZE)
+
+
+def run_ffprobe(path):
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-print_format",
+                "json",
+                "-show_format",
+                "-show_streams",
+                path,
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return MediaInfo.from_ffprobe(json.loads(result.stdout))
+    except subprocess.CalledProcessError as e:
+        raise ProbeError(e.stderr.strip() or str(e)) from e
+    except ValueError as e:
+        raise ProbeError(f"Invalid FFprobe output: {e}") from e
+
+
+def probe(path, content_hash=None):
+    """
+    Returns MediaInfo for `path`. Results are cached in-process and in the
+    MediaProbe table, keyed by content hash and mtime, so FFprobe runs once per
+    asset version.
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError as e:
+        raise ProbeError(str(e)) from e
+    content_hash = content_hash or file_fingerprint(path)
+    key = (content_hash, mtime_ns)
+
+    info = probe_cache.get(key)
+    if info is not None:
+        return info
+
+    row = MediaProbe.objects.filter(
+        content_hash=content_hash, mtime_ns=mtime_ns, probe_version=PROBE_VERSION
+    ).first()
+    if row is not None:
+        info = MediaInfo.from_dict(row.data)
+    else:
+        info = run_ffprobe(path)
+        MediaProbe.objects.update_or_create(
+            content_hash=content_hash,
+            mtime_ns=mtime_ns,
+            defaults={"probe_version": PROBE_VERSION, "data": info.to_dict()},
+        )
+
+    probe_cache.put(key, info)
+    return info
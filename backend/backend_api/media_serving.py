@@ -0,0 +1,174 @@
+# media_serving.py
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+# Katalogi, w których nazwa pliku zawiera skrót treści: plik pod danym adresem
+# nigdy się nie zmienia (assets/<sha256>, thumbnails/<sha256>.jpg,
+# sprites/<sha256>/..., waveforms/<sha256>.bin, proxies/<sha256>.mp4)
+IMMUTABLE_PREFIXES = (
+    "assets/",
+    "thumbnails/",
+    "sprites/",
+    "waveforms/",
+    "proxies/",
+)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+STREAM_CHUNK_SIZE = 256 * 1024
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    The inclusive (start, end) byte range of a single-range `Range` header,
+    or None when the whole file should be sent (no header, several ranges
+    or a unit other than bytes). Raises RangeNotSatisfiable for ranges
+    outside the file.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Sufiks: ostatnie N bajtów
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def file_etag(stat):
+    return quote_etag(f"{stat.st_size:x}-{stat.st_mtime_ns:x}")
+
+
+def if_range_matches(request, etag, last_modified):
+    """Whether a Range may be honoured under the request's If-Range header."""
+    value = request.headers.get("If-Range")
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith("W/"):
+        return value == etag
+    since = parse_http_date_safe(value)
+    return since is not None and int(last_modified) <= since
+
+
+def read_range(path, start, end):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serves a file under MEDIA_ROOT with byte ranges (206), ETag and
+    Last-Modified validators and cache headers. With MEDIA_ACCEL_REDIRECT
+    (nginx) or MEDIA_SENDFILE (Apache, lighttpd) the body is left to the
+    web server, which handles ranges itself.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Invalid media path")
+    if not os.path.isfile(full_path):
+        raise Http404("Media file not found")
+
+    stat = os.stat(full_path)
+    etag = file_etag(stat)
+    last_modified = stat.st_mtime
+    immutable = path.startswith(IMMUTABLE_PREFIXES)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": (
+            IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+        ),
+    }
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified)
+    )
+    if response is not None:
+        if isinstance(response, HttpResponseNotModified):
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = (
+            settings.MEDIA_ACCEL_REDIRECT.rstrip("/") + "/" + path
+        )
+    elif settings.MEDIA_SENDFILE:
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = full_path
+    else:
+        # If-Range z nieaktualnym walidatorem: cały plik zamiast fragmentu
+        range_header = request.headers.get("Range", "")
+        if not if_range_matches(request, etag, last_modified):
+            range_header = ""
+        response = range_response(full_path, stat.st_size, content_type, range_header)
+
+    for name, value in headers.items():
+        response[name] = value
+    if encoding:
+        response["Content-Encoding"] = encoding
+    return response
+
+
+def range_response(full_path, size, content_type, range_header):
+    """The whole file (200), the requested byte range (206) or 416."""
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        return FileResponse(open(full_path, "rb"), content_type=content_type)
+
+    start, end = byte_range
+    response = StreamingHttpResponse(
+        read_range(full_path, start, end), status=206, content_type=content_type
+    )
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = str(end - start + 1)
+    return response
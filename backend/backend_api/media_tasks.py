@@ -0,0 +1,119 @@
+# media_tasks.py
+import logging
+import socket
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .highlights import analyze_media
+from .media_index import generate_index
+from .models import MediaTask, RenderJob
+from .proxies import generate_proxy
+from .sprites import generate_sprites
+from .transcripts import transcribe_asset
+from .video_metadata import record_video_metadata
+from .waveform import generate_waveform
+
+logger = logging.getLogger(__name__)
+
+# Funkcja wykonująca zadanie danego rodzaju; przyjmuje Asset (zadania
+# KIND_PROJECT_FILE wykonuje project_files.describe_project_file)
+TASK_HANDLERS = {
+    MediaTask.KIND_SPRITES: generate_sprites,
+    MediaTask.KIND_WAVEFORM: generate_waveform,
+    MediaTask.KIND_PROXY: generate_proxy,
+    MediaTask.KIND_HIGHLIGHTS: analyze_media,
+    MediaTask.KIND_INDEX: generate_index,
+    MediaTask.KIND_METADATA: record_video_metadata,
+    MediaTask.KIND_TRANSCRIPT: transcribe_asset,
+}
+
+
+def enqueue_media_task(asset, kind):
+    """
+    Returns the task of `kind` for `asset`, queueing it if there is none.
+    A failed task stays failed (the source will not decode any better on
+    a retry) until it is deleted.
+    """
+    task, _ = MediaTask.objects.get_or_create(asset=asset, kind=kind)
+    return task
+
+
+def requeue_media_task(task):
+    """Queues a finished task again, e.g. when its result has to be redone."""
+    MediaTask.objects.filter(pk=task.pk).update(
+        status=RenderJob.STATUS_QUEUED,
+        worker="",
+        error="",
+        started_at=None,
+        finished_at=None,
+    )
+
+
+def enqueue_project_file_task(entry):
+    """
+    Queues the manifest metadata task of ProjectFile `entry`. A finished or
+    failed task is queued again: registration means the file has changed.
+    """
+    task, created = MediaTask.objects.get_or_create(
+        project_file=entry, kind=MediaTask.KIND_PROJECT_FILE
+    )
+    if not created and task.status != RenderJob.STATUS_QUEUED:
+        requeue_media_task(task)
+    return task
+
+
+def claim_next_media_task(worker):
+    """
+    Atomically moves the oldest queued media task to `running` and returns
+    it (see jobs.claim_next_job).
+    """
+    while True:
+        task = (
+            MediaTask.objects.filter(status=RenderJob.STATUS_QUEUED)
+            .order_by("created_at", "id")
+            .first()
+        )
+        if task is None:
+            return None
+
+        claimed = MediaTask.objects.filter(
+            pk=task.pk, status=RenderJob.STATUS_QUEUED
+        ).update(
+            status=RenderJob.STATUS_RUNNING,
+            worker=worker,
+            started_at=timezone.now(),
+        )
+        if claimed:
+            task.refresh_from_db()
+            return task
+
+
+def run_media_task(task):
+    """Executes a claimed task and records the outcome on the model."""
+    try:
+        if task.kind == MediaTask.KIND_PROJECT_FILE:
+            # project_files kolejkuje zadania zasobów: import w funkcji
+            from .project_files import describe_project_file
+
+            describe_project_file(task.project_file)
+        else:
+            TASK_HANDLERS[task.kind](task.asset)
+    except Exception as e:
+        logger.exception("Media task %s failed", task)
+        task.status = RenderJob.STATUS_FAILED
+        task.error = str(e)
+    else:
+        task.status = RenderJob.STATUS_DONE
+        task.error = ""
+    task.finished_at = timezone.now()
+    task.save()
+    return task
+
+
+def requeue_stale_media_tasks(hostname=None):
+    """Returns media tasks left `running` by workers on this host to the queue."""
+    hostname = hostname or socket.gethostname()
+    return MediaTask.objects.filter(
+        Q(worker__startswith=f"{hostname}:"), status=RenderJob.STATUS_RUNNING
+    ).update(status=RenderJob.STATUS_QUEUED, worker="", started_at=None)
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0002_project'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=16)),
+                ('source', models.CharField(max_length=500)),
+                ('start_time', models.CharField(max_length=32)),
+                ('end_time', models.CharField(max_length=32)),
+                ('resolution', models.CharField(default='1080p', max_length=16)),
+                ('enhance_audio', models.BooleanField(default=False)),
+                ('add_subtitles', models.BooleanField(default=False)),
+                ('video_path', models.CharField(blank=True, max_length=500)),
+                ('subtitles_path', models.CharField(blank=True, max_length=500)),
+                ('error', models.TextField(blank=True)),
+                ('worker', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='backend_api_status_a6b297_idx')],
+            },
+        ),
+    ]
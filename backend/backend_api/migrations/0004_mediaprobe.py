@@ -0,0 +1,27 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0003_renderjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaProbe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('mtime_ns', models.BigIntegerField()),
+                ('probe_version', models.PositiveSmallIntegerField()),
+                ('data', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('content_hash', 'mtime_ns'), name='unique_media_probe')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0006_upload_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='renderjob',
+            name='cut_mode',
+            field=models.CharField(default='auto', max_length=16),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0007_renderjob_cut_mode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderClip',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('start_time', models.CharField(max_length=32)),
+                ('end_time', models.CharField(max_length=32)),
+                ('resolution', models.CharField(default='1080p', max_length=16)),
+                ('enhance_audio', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=16)),
+                ('video_path', models.CharField(blank=True, max_length=500)),
+                ('error', models.TextField(blank=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='clips', to='backend_api.renderjob')),
+            ],
+            options={
+                'ordering': ['job', 'index'],
+                'unique_together': {('job', 'index')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0008_renderclip'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Transcript',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('model_name', models.CharField(max_length=32)),
+                ('language', models.CharField(blank=True, max_length=16)),
+                ('transcript_version', models.PositiveSmallIntegerField()),
+                ('detected_language', models.CharField(blank=True, max_length=16)),
+                ('data', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('content_hash', 'model_name', 'language'), name='unique_transcript')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0009_transcript'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='renderjob',
+            name='bitrate',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='renderjob',
+            name='eta_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='renderjob',
+            name='fps',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='renderjob',
+            name='progress',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='renderjob',
+            name='speed',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='renderjob',
+            name='stage',
+            field=models.CharField(blank=True, max_length=16),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0010_renderjob_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project_id', models.CharField(max_length=64)),
+                ('name', models.CharField(max_length=255)),
+                ('path', models.CharField(max_length=500)),
+                ('size', models.BigIntegerField()),
+                ('content_hash', models.CharField(max_length=64)),
+                ('mime_type', models.CharField(blank=True, max_length=100)),
+                ('duration', models.FloatField(blank=True, null=True)),
+                ('width', models.PositiveIntegerField(blank=True, null=True)),
+                ('height', models.PositiveIntegerField(blank=True, null=True)),
+                ('video_codec', models.CharField(blank=True, max_length=32)),
+                ('audio_codec', models.CharField(blank=True, max_length=32)),
+                ('thumbnail', models.CharField(blank=True, max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('asset', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='backend_api.asset')),
+            ],
+            options={
+                'ordering': ['project_id', 'id'],
+                'indexes': [models.Index(fields=['project_id', 'id'], name='backend_api_project_3b7121_idx')],
+                'constraints': [models.UniqueConstraint(fields=('project_id', 'name'), name='unique_project_file')],
+            },
+        ),
+    ]
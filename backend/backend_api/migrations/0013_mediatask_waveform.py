@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0012_mediatask'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mediatask',
+            name='kind',
+            field=models.CharField(choices=[('sprites', 'Sprite sheets'), ('waveform', 'Waveform')], max_length=16),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0014_mediatask_proxy'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mediatask',
+            name='kind',
+            field=models.CharField(choices=[('sprites', 'Sprite sheets'), ('waveform', 'Waveform'), ('proxy', 'Preview proxy'), ('highlights', 'Highlight analysis')], max_length=16),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0016_mediatask_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='renderjob',
+            name='burn_subtitles',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='renderjob',
+            name='subtitle_style',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0017_renderjob_burn_subtitles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubtitleCue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project_id', models.CharField(max_length=64)),
+                ('start_ms', models.PositiveIntegerField()),
+                ('end_ms', models.PositiveIntegerField()),
+                ('text', models.TextField()),
+                ('words', models.JSONField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['project_id', 'start_ms', 'id'],
+                'indexes': [models.Index(fields=['project_id', 'start_ms'], name='backend_api_project_fad70c_idx'), models.Index(fields=['project_id', 'end_ms'], name='backend_api_project_39ac5f_idx')],
+            },
+        ),
+    ]
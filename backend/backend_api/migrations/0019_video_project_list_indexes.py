@@ -0,0 +1,31 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0018_subtitlecue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='project',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='videos', to='backend_api.project'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['created_at', 'id'], name='backend_api_created_54531c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['created_at', 'id'], name='backend_api_created_c33bef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['project', 'created_at', 'id'], name='backend_api_project_2e0211_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend_api', '0020_video_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='uploadsession',
+            name='expected_digest',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='uploadsession',
+            name='project_file',
+            field=models.CharField(blank=True, max_length=512),
+        ),
+        migrations.AddField(
+            model_name='uploadsession',
+            name='target_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='uploadsession',
+            name='worker',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='status',
+            field=models.CharField(choices=[('open', 'Open'), ('queued', 'Queued'), ('finalizing', 'Finalizing'), ('complete', 'Complete'), ('failed', 'Failed')], default='open', max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='uploadsession',
+            index=models.Index(fields=['status', 'updated_at'], name='backend_api_status_13a27d_idx'),
+        ),
+    ]
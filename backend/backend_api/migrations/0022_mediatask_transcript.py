@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backend_api", "0021_upload_session_finalize"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="mediatask",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("sprites", "Sprite sheets"),
+                    ("waveform", "Waveform"),
+                    ("proxy", "Preview proxy"),
+                    ("highlights", "Highlight analysis"),
+                    ("index", "Keyframe and scene-cut index"),
+                    ("metadata", "Video metadata"),
+                    ("transcript", "Whole-source transcript"),
+                ],
+                max_length=16,
+            ),
+        ),
+    ]
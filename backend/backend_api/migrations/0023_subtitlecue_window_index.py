@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backend_api", "0022_mediatask_transcript"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="subtitlecue",
+            name="backend_api_project_39ac5f_idx",
+        ),
+    ]
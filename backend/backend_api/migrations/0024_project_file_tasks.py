@@ -0,0 +1,69 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backend_api", "0023_subtitlecue_window_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mediatask",
+            name="project_file",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="media_tasks",
+                to="backend_api.projectfile",
+            ),
+        ),
+        migrations.AddField(
+            model_name="projectfile",
+            name="mtime",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="mediatask",
+            name="asset",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="media_tasks",
+                to="backend_api.asset",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="mediatask",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("sprites", "Sprite sheets"),
+                    ("waveform", "Waveform"),
+                    ("proxy", "Preview proxy"),
+                    ("highlights", "Highlight analysis"),
+                    ("index", "Keyframe and scene-cut index"),
+                    ("metadata", "Video metadata"),
+                    ("transcript", "Whole-source transcript"),
+                    ("project_file", "Project file metadata"),
+                ],
+                max_length=16,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="projectfile",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name="mediatask",
+            constraint=models.UniqueConstraint(
+                fields=("project_file", "kind"), name="unique_project_file_task"
+            ),
+        ),
+    ]
@@ -1,22 +1,413 @@
+import uuid
+
+from django.core.files.storage import default_storage
 from django.db import models
 
 # Create your models here.
 
 
-class Video(models.Model):
+class Project(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
-    file = models.FileField(upload_to="videos/")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Listy są stronicowane kursorem po (created_at, id)
+        indexes = [models.Index(fields=["created_at", "id"])]
+
     def __str__(self):
         return self.title
 
 
-class Project(models.Model):
+class Video(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
+    file = models.FileField(upload_to="videos/")
+    project = models.ForeignKey(
+        Project,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="videos",
+    )
+    asset = models.ForeignKey(
+        "Asset", null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Metadane z FFprobe zapisane przy przyjęciu pliku (video_metadata.py);
+    # probe_version jest pusty, dopóki plik nie został zbadany
+    duration = models.FloatField(null=True, blank=True)
+    fps_num = models.PositiveIntegerField(null=True, blank=True)
+    fps_den = models.PositiveIntegerField(null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    video_codec = models.CharField(max_length=32, blank=True)
+    audio_codec = models.CharField(max_length=32, blank=True)
+    bit_rate = models.BigIntegerField(null=True, blank=True)
+    size = models.BigIntegerField(null=True, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)
+    probe_version = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["project", "created_at", "id"]),
+            # Np. "4K dłuższe niż godzina": zakres wysokości, potem długości
+            models.Index(fields=["height", "duration"]),
+            models.Index(fields=["duration"]),
+            models.Index(fields=["video_codec", "height"]),
+            models.Index(fields=["content_hash"]),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class Asset(models.Model):
+    """A source file stored once in the blob store under its SHA-256 digest."""
+
+    digest = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    original_name = models.CharField(max_length=255, blank=True)
+    # Ścieżka bloba względem default_storage
+    blob = models.CharField(max_length=500)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.original_name or 'Asset'} ({self.digest[:12]})"
+
+    @property
+    def path(self):
+        return default_storage.path(self.blob)
+
+
+class RenderJob(models.Model):
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED
+    )
+    asset = models.ForeignKey(
+        Asset, null=True, blank=True, on_delete=models.SET_NULL, related_name="jobs"
+    )
+    # Ścieżka źródła względem default_storage
+    source = models.CharField(max_length=500)
+    start_time = models.CharField(max_length=32)
+    end_time = models.CharField(max_length=32)
+    resolution = models.CharField(max_length=16, default="1080p")
+    cut_mode = models.CharField(max_length=16, default="auto")
+    enhance_audio = models.BooleanField(default=False)
+    add_subtitles = models.BooleanField(default=False)
+    # Napisy wypalone w obrazie; styl nadpisuje pola SUBTITLE_BURN_STYLE
+    burn_subtitles = models.BooleanField(default=False)
+    subtitle_style = models.JSONField(default=dict, blank=True)
+    video_path = models.CharField(max_length=500, blank=True)
+    subtitles_path = models.CharField(max_length=500, blank=True)
+    # Postęp zapisywany przez proces roboczy (progress.ProgressReporter)
+    stage = models.CharField(max_length=16, blank=True)
+    progress = models.FloatField(default=0)
+    eta_seconds = models.FloatField(null=True, blank=True)
+    speed = models.FloatField(null=True, blank=True)
+    fps = models.FloatField(null=True, blank=True)
+    bitrate = models.CharField(max_length=32, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"RenderJob #{self.pk} ({self.status})"
+
+    @property
+    def queue_position(self):
+        """1-based position among queued jobs, 0 once the job left the queue."""
+        if self.status != self.STATUS_QUEUED:
+            return 0
+        ahead = RenderJob.objects.filter(status=self.STATUS_QUEUED).filter(
+            models.Q(created_at__lt=self.created_at)
+            | models.Q(created_at=self.created_at, id__lt=self.id)
+        )
+        return ahead.count() + 1
+
+
+class RenderClip(models.Model):
+    """One output of a batch RenderJob; all clips share the job's source."""
+
+    job = models.ForeignKey(RenderJob, on_delete=models.CASCADE, related_name="clips")
+    index = models.PositiveIntegerField()
+    start_time = models.CharField(max_length=32)
+    end_time = models.CharField(max_length=32)
+    resolution = models.CharField(max_length=16, default="1080p")
+    enhance_audio = models.BooleanField(default=False)
+    status = models.CharField(
+        max_length=16,
+        choices=RenderJob.STATUS_CHOICES,
+        default=RenderJob.STATUS_QUEUED,
+    )
+    video_path = models.CharField(max_length=500, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["job", "index"]
+        unique_together = ("job", "index")
+
+    def __str__(self):
+        return f"RenderClip #{self.job_id}/{self.index} ({self.status})"
+
+
+class MediaTask(models.Model):
+    """
+    Background processing of an asset (e.g. timeline sprite sheets) or of
+    a project file (its manifest metadata), run by the render workers when
+    no render job is waiting. One task per kind and subject.
+    """
+
+    KIND_SPRITES = "sprites"
+    KIND_WAVEFORM = "waveform"
+    KIND_PROXY = "proxy"
+    KIND_HIGHLIGHTS = "highlights"
+    KIND_INDEX = "index"
+    KIND_METADATA = "metadata"
+    KIND_TRANSCRIPT = "transcript"
+    KIND_PROJECT_FILE = "project_file"
+    KIND_CHOICES = [
+        (KIND_SPRITES, "Sprite sheets"),
+        (KIND_WAVEFORM, "Waveform"),
+        (KIND_PROXY, "Preview proxy"),
+        (KIND_HIGHLIGHTS, "Highlight analysis"),
+        (KIND_INDEX, "Keyframe and scene-cut index"),
+        (KIND_METADATA, "Video metadata"),
+        (KIND_TRANSCRIPT, "Whole-source transcript"),
+        (KIND_PROJECT_FILE, "Project file metadata"),
+    ]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    asset = models.ForeignKey(
+        Asset,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="media_tasks",
+    )
+    # Zadania KIND_PROJECT_FILE dotyczą pliku projektu, a nie zasobu
+    project_file = models.ForeignKey(
+        "ProjectFile",
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="media_tasks",
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=RenderJob.STATUS_CHOICES,
+        default=RenderJob.STATUS_QUEUED,
+    )
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        constraints = [
+            models.UniqueConstraint(fields=["asset", "kind"], name="unique_media_task"),
+            models.UniqueConstraint(
+                fields=["project_file", "kind"], name="unique_project_file_task"
+            ),
+        ]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        subject = self.asset_id or f"file {self.project_file_id}"
+        return f"MediaTask {self.kind} #{subject} ({self.status})"
+
+
+class MediaProbe(models.Model):
+    """FFprobe metadata persisted per file content hash and modification time."""
+
+    content_hash = models.CharField(max_length=64)
+    mtime_ns = models.BigIntegerField()
+    probe_version = models.PositiveSmallIntegerField()
+    data = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_hash", "mtime_ns"], name="unique_media_probe"
+            )
+        ]
+
+    def __str__(self):
+        return f"MediaProbe {self.content_hash[:12]}"
+
+
+class Transcript(models.Model):
+    """
+    Whisper output for a whole source, with word timestamps, stored once per
+    content hash, model and requested language (empty for auto-detection).
+    """
+
+    content_hash = models.CharField(max_length=64)
+    model_name = models.CharField(max_length=32)
+    language = models.CharField(max_length=16, blank=True)
+    transcript_version = models.PositiveSmallIntegerField()
+    detected_language = models.CharField(max_length=16, blank=True)
+    data = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_hash", "model_name", "language"],
+                name="unique_transcript",
+            )
+        ]
+
+    def __str__(self):
+        return f"Transcript {self.content_hash[:12]} ({self.model_name})"
+
+
+class ProjectFile(models.Model):
+    """
+    A file in a project's folder (edit_files_<project_id>/) with the metadata
+    the editor needs to list it without downloading it.
+    """
+
+    project_id = models.CharField(max_length=64)
+    name = models.CharField(max_length=255)
+    # Ścieżka pliku względem default_storage
+    path = models.CharField(max_length=500)
+    asset = models.ForeignKey(
+        Asset, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    size = models.BigIntegerField()
+    # st_mtime z chwili rejestracji; zmiana oznacza nową treść pliku
+    mtime = models.FloatField(null=True, blank=True)
+    # Puste, dopóki zadanie w tle nie policzy skrótu
+    content_hash = models.CharField(max_length=64, blank=True)
+    mime_type = models.CharField(max_length=100, blank=True)
+    duration = models.FloatField(null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    video_codec = models.CharField(max_length=32, blank=True)
+    audio_codec = models.CharField(max_length=32, blank=True)
+    thumbnail = models.CharField(max_length=500, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["project_id", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["project_id", "name"], name="unique_project_file"
+            )
+        ]
+        indexes = [models.Index(fields=["project_id", "id"])]
+
+    def __str__(self):
+        return f"{self.name} (project {self.project_id})"
+
+
+class SubtitleCue(models.Model):
+    """
+    One subtitle of a project. Cues are queried by time window and edited
+    one at a time, so the editor never loads or rewrites the whole track.
+    """
+
+    project_id = models.CharField(max_length=64)
+    start_ms = models.PositiveIntegerField()
+    end_ms = models.PositiveIntegerField()
+    text = models.TextField()
+    # Słowa z czasami [start_ms, end_ms, słowo], gdy są znane
+    words = models.JSONField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["project_id", "start_ms", "id"]
+        # Okno czasu to zakres start_ms (por. subtitle_cues.cues_in_window)
+        indexes = [models.Index(fields=["project_id", "start_ms"])]
+
+    def __str__(self):
+        return f"Cue {self.start_ms}-{self.end_ms} ms (project {self.project_id})"
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload assembled from numbered chunks written in place.
+    Finalizing (hashing and registering the file) is queued for a render
+    worker, so large uploads never hash inside a request.
+    """
+
+    STATUS_OPEN = "open"
+    STATUS_QUEUED = "queued"
+    STATUS_FINALIZING = "finalizing"
+    STATUS_COMPLETE = "complete"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_OPEN, "Open"),
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_FINALIZING, "Finalizing"),
+        (STATUS_COMPLETE, "Complete"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    project_id = models.CharField(max_length=64, blank=True)
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=STATUS_OPEN
+    )
+    asset = models.ForeignKey(
+        Asset, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    # Parametry finalizacji przekazane procesowi roboczemu
+    expected_digest = models.CharField(max_length=64, blank=True)
+    target_name = models.CharField(max_length=255, blank=True)
+    project_file = models.CharField(max_length=512, blank=True)
+    worker = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "updated_at"])]
+
+    def __str__(self):
+        return f"Upload {self.filename} ({self.status})"
+
+    @property
+    def partial_name(self):
+        return f"uploads/{self.pk}.part"
+
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(
+        UploadSession, on_delete=models.CASCADE, related_name="chunks"
+    )
+    index = models.PositiveIntegerField()
+    offset = models.BigIntegerField()
+    size = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["session", "index"], name="unique_upload_chunk"
+            )
+        ]
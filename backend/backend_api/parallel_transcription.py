@@ -0,0 +1,336 @@
+# parallel_transcription.py
+import logging
+import multiprocessing
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from django.conf import settings
+
+from .transcription import (
+    TranscriptionServiceUnavailable,
+    call_service,
+    local_registry,
+)
+
+logger = logging.getLogger(__name__)
+
+# Whisper pracuje na mono 16 kHz
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.03
+# Uśrednianie energii, aby pojedyncza cicha ramka w środku słowa nie
+# została wybrana jako miejsce podziału
+SMOOTHING_SECONDS = 0.3
+# Okno wokół docelowej długości fragmentu, w którym szukana jest cisza
+SEARCH_SECONDS = 15.0
+# Ramki głośniejsze od szumu tła o tyle dB (ale nie mniej niż tyle poniżej
+# najgłośniejszych fragmentów) uznawane są za mowę
+VOICE_MARGIN_DB = 10.0
+# Porcja PCM czytana naraz z potoku FFmpeg podczas szukania ciszy (~2 s)
+AUDIO_BLOCK_SIZE = 64 * 1024
+
+
+def _ffmpeg_audio_command(path, sample_rate, start=None, duration=None):
+    command = ["ffmpeg", "-nostdin", "-v", "error"]
+    if start:
+        # Szukanie przed -i: dekodowanie zaczyna się od fragmentu
+        command += ["-ss", f"{start:.3f}"]
+    command += ["-i", path]
+    if duration is not None:
+        command += ["-t", f"{duration:.3f}"]
+    return command + ["-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-"]
+
+
+def decode_audio(path, start=0.0, duration=None, sample_rate=SAMPLE_RATE):
+    """
+    Decodes `duration` seconds (to the end when None) of the first audio
+    stream of `path` from `start` to mono float32 PCM.
+    """
+    output = subprocess.run(
+        _ffmpeg_audio_command(path, sample_rate, start, duration),
+        capture_output=True,
+        check=True,
+    ).stdout
+    return np.frombuffer(output, np.int16).astype(np.float32) / 32768.0
+
+
+def frame_energy(audio, sample_rate=SAMPLE_RATE):
+    """RMS level (dBFS) of consecutive FRAME_SECONDS frames of `audio`."""
+    frame_size = int(sample_rate * FRAME_SECONDS)
+    count = len(audio) // frame_size
+    if count == 0:
+        return np.empty(0, np.float32)
+    frames = audio[: count * frame_size].reshape(count, frame_size)
+    return (10 * np.log10(np.mean(np.square(frames), axis=1) + 1e-10)).astype(
+        np.float32
+    )
+
+
+def smooth_energy(energy):
+    width = max(1, int(SMOOTHING_SECONDS / FRAME_SECONDS))
+    if len(energy) == 0:
+        return energy
+    return np.convolve(energy, np.ones(width) / width, mode="same")
+
+
+def frame_energy_db(audio, sample_rate=SAMPLE_RATE):
+    """Smoothed RMS level (dBFS) of consecutive FRAME_SECONDS frames."""
+    return smooth_energy(frame_energy(audio, sample_rate))
+
+
+def stream_energy_db(stream, sample_rate=SAMPLE_RATE, block_size=AUDIO_BLOCK_SIZE):
+    """
+    frame_energy_db() of s16le PCM read from `stream` in blocks of
+    `block_size` bytes; only one block and the per-frame levels (4 bytes
+    per FRAME_SECONDS) are held in memory.
+    """
+    frame_bytes = int(sample_rate * FRAME_SECONDS) * 2
+    levels = []
+    pending = b""
+    while True:
+        data = stream.read(block_size)
+        if not data:
+            break
+        pending += data
+        usable = len(pending) - len(pending) % frame_bytes
+        if usable:
+            samples = np.frombuffer(pending[:usable], np.int16)
+            levels.append(
+                frame_energy(samples.astype(np.float32) / 32768.0, sample_rate)
+            )
+            pending = pending[usable:]
+    energy = np.concatenate(levels) if levels else np.empty(0, np.float32)
+    return smooth_energy(energy)
+
+
+def audio_energy_db(path, sample_rate=SAMPLE_RATE):
+    """Streams the audio of `path` through FFmpeg into frame_energy_db()."""
+    process = subprocess.Popen(
+        _ffmpeg_audio_command(path, sample_rate),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        energy = stream_energy_db(process.stdout, sample_rate)
+    finally:
+        process.stdout.close()
+    if process.wait() != 0:
+        raise subprocess.CalledProcessError(process.returncode, process.args)
+    return energy
+
+
+def find_split_points(energy, chunk_seconds, search_seconds=SEARCH_SECONDS):
+    """
+    Frame indices that cut the audio into pieces of about `chunk_seconds`,
+    each placed at the quietest frame within `search_seconds` of the target.
+    """
+    chunk = int(chunk_seconds / FRAME_SECONDS)
+    search = min(int(search_seconds / FRAME_SECONDS), chunk // 2)
+    splits = []
+    position = 0
+    while len(energy) - position > chunk + search:
+        low = position + chunk - search
+        high = position + chunk + search
+        position = low + int(np.argmin(energy[low:high]))
+        splits.append(position)
+    return splits
+
+
+def voiced_chunks(energy, chunk_seconds):
+    """
+    Splits audio with the frame levels `energy` at silences into
+    (offset_seconds, duration_seconds) chunks, the last one lasting to the
+    end (duration None), and drops chunks without speech, so Whisper never
+    runs on long silent stretches.
+    """
+    if len(energy) == 0:
+        return []
+    noise_floor, peak = np.percentile(energy, [10, 99])
+    voiced = energy > min(noise_floor + VOICE_MARGIN_DB, peak - VOICE_MARGIN_DB)
+
+    bounds = [0, *find_split_points(energy, chunk_seconds), len(energy)]
+    chunks = []
+    for start, end in zip(bounds, bounds[1:]):
+        if not voiced[start:end].any():
+            continue
+        # Ostatni fragment obejmuje też próbki za ostatnią pełną ramką
+        duration = None if end == len(energy) else (end - start) * FRAME_SECONDS
+        chunks.append((start * FRAME_SECONDS, duration))
+    return chunks
+
+
+def merge_results(results, offsets):
+    """Concatenates chunk results, shifting segment and word times by offset."""
+    segments = []
+    for result, offset in zip(results, offsets):
+        for segment in result["segments"]:
+            segment = dict(
+                segment,
+                id=len(segments),
+                start=segment["start"] + offset,
+                end=segment["end"] + offset,
+            )
+            if segment.get("words"):
+                segment["words"] = [
+                    dict(word, start=word["start"] + offset, end=word["end"] + offset)
+                    for word in segment["words"]
+                ]
+            segments.append(segment)
+    return {
+        "text": "".join(result.get("text", "") for result in results),
+        "segments": segments,
+        "language": next(
+            (result["language"] for result in results if result.get("language")),
+            None,
+        ),
+    }
+
+
+def _init_worker(threads):
+    # Proces "spawn" musi sam skonfigurować Django (local_registry() czyta
+    # ustawienia)
+    import django
+    import torch
+
+    django.setup()
+    torch.set_num_threads(threads)
+
+
+def _transcribe_chunk(path, offset, duration, model_name, options):
+    # Każdy fragment dekodowany osobno: proces nadrzędny nie trzyma audio
+    audio = decode_audio(path, offset, duration)
+    # Model zostaje w rejestrze procesu między fragmentami i transkrypcjami
+    return local_registry().transcribe(audio, model_name, **options)
+
+
+def _start_pool(workers, threads):
+    # "spawn": proces roboczy renderowania mógł już zainicjować wątki torch
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads,),
+    )
+
+
+def worker_limit():
+    """
+    Host-wide cap on parallel transcription processes: TRANSCRIPTION_MAX_WORKERS,
+    or one per TRANSCRIPTION_THREADS_PER_WORKER cores.
+    """
+    if settings.TRANSCRIPTION_MAX_WORKERS:
+        return settings.TRANSCRIPTION_MAX_WORKERS
+    return max(1, (os.cpu_count() or 1) // settings.TRANSCRIPTION_THREADS_PER_WORKER)
+
+
+def worker_count(threads, limit):
+    """
+    TRANSCRIPTION_WORKERS, or one worker per `threads` cores on CPU-only
+    hosts; never more than `limit`.
+    """
+    if settings.TRANSCRIPTION_WORKERS:
+        return min(settings.TRANSCRIPTION_WORKERS, limit)
+
+    import torch
+
+    if torch.cuda.is_available():
+        # Jeden model na GPU; równoległe procesy tylko konkurują o pamięć
+        return 1
+    return min(max(1, (os.cpu_count() or 1) // threads), limit)
+
+
+def transcribe_parallel(
+    registry, path, model_name, workers, threads, chunk_seconds=None, **options
+):
+    """
+    Transcribes `path` in silence-aligned chunks on a pool of `workers`
+    processes, each running Whisper with `threads` torch threads, and merges
+    the results with corrected offsets. Silences are found in one streamed
+    pass over the audio; every worker then decodes just its own chunk.
+
+    The pool is kept in `registry` under "pool:<model>", so its workers keep
+    their models resident between calls while the registry counts the
+    `workers` model copies against its memory budget and shuts the pool
+    down when it evicts it.
+    """
+    chunk_seconds = chunk_seconds or settings.TRANSCRIPTION_CHUNK_SECONDS
+    chunks = voiced_chunks(audio_energy_db(path), chunk_seconds)
+    if not chunks:
+        return {"text": "", "segments": [], "language": options.get("language")}
+
+    count = len(chunks)
+    with registry.hold(
+        f"pool:{model_name}",
+        workers * registry.size_of(model_name),
+        lambda: _start_pool(workers, threads),
+        lambda pool: pool.shutdown(wait=False),
+    ) as pool:
+        results = list(
+            pool.map(
+                _transcribe_chunk,
+                [path] * count,
+                [offset for offset, _ in chunks],
+                [duration for _, duration in chunks],
+                [model_name] * count,
+                [options] * count,
+            )
+        )
+    return merge_results(results, [offset for offset, _ in chunks])
+
+
+def run_transcription(
+    registry, path, model_name, content_hash=None, device=None, limit=1, **options
+):
+    """
+    Transcribes `path` with the models of `registry`, splitting recordings
+    longer than TRANSCRIPTION_PARALLEL_MIN_DURATION across up to `limit`
+    processes; shorter ones, and any transcription placed on a GPU `device`,
+    run on the registry's resident model.
+    """
+    # Import na żądanie: procesy puli importują ten moduł bez django.setup(),
+    # więc nie może on na starcie ładować modeli
+    from .media_probe import probe
+
+    duration = probe(path, content_hash=content_hash).duration or 0
+    on_cpu = device is None or device == "cpu"
+    if on_cpu and duration >= settings.TRANSCRIPTION_PARALLEL_MIN_DURATION:
+        threads = settings.TRANSCRIPTION_THREADS_PER_WORKER
+        workers = worker_count(threads, limit)
+        if workers > 1:
+            logger.info(
+                "Transcribing %.0fs of audio on %s processes", duration, workers
+            )
+            return transcribe_parallel(
+                registry, path, model_name, workers, threads, **options
+            )
+    return registry.transcribe(path, model_name, device, **options)
+
+
+def transcribe_long(path, model_name=None, content_hash=None, device=None, **options):
+    """
+    Transcribes `path` (see run_transcription) in the transcription service
+    when it is running, so the whole host shares one pool within the
+    service's memory budget. Otherwise each render process uses its own
+    registry and a pool of at most 1/RENDER_WORKERS of worker_limit().
+    """
+    model_name = model_name or settings.GPU_LIST["whisper_model"]
+    if settings.TRANSCRIPTION_SERVICE_ADDRESS:
+        try:
+            reply = call_service(
+                {
+                    "op": "transcribe_long",
+                    "path": path,
+                    "model": model_name,
+                    "content_hash": content_hash,
+                    "device": device,
+                    "options": options,
+                }
+            )
+            return reply["result"]
+        except TranscriptionServiceUnavailable:
+            pass
+    limit = max(1, worker_limit() // settings.RENDER_WORKERS)
+    return run_transcription(
+        local_registry(), path, model_name, content_hash, device, limit, **options
+    )
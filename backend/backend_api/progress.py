@@ -0,0 +1,152 @@
+# progress.py
+import subprocess
+import time
+
+from .models import RenderJob
+
+STAGE_PROBE = "probe"
+STAGE_ENCODE = "encode"
+STAGE_TRANSCRIBE = "transcribe"
+STAGE_WRITE_SRT = "write_srt"
+
+# Udział etapów w postępie całego zadania (w procentach)
+STAGE_WEIGHTS = {
+    STAGE_PROBE: 2,
+    STAGE_ENCODE: 78,
+    STAGE_TRANSCRIBE: 18,
+    STAGE_WRITE_SRT: 2,
+}
+
+# Minimalny odstęp między zapisami postępu do bazy
+PROGRESS_INTERVAL = 0.5
+
+
+class FFmpegProgress:
+    """One block of `ffmpeg -progress` output."""
+
+    __slots__ = ("out_time", "fps", "speed", "bitrate", "finished")
+
+    def __init__(self, out_time=0.0, fps=None, speed=None, bitrate="", finished=False):
+        self.out_time = out_time
+        self.fps = fps
+        self.speed = speed
+        self.bitrate = bitrate
+        self.finished = finished
+
+    def fraction(self, duration):
+        if self.finished:
+            return 1.0
+        if not duration:
+            return 0.0
+        return min(max(self.out_time / duration, 0.0), 1.0)
+
+
+def _number(value):
+    try:
+        return float(value.rstrip("x"))
+    except (AttributeError, ValueError):
+        return None
+
+
+def parse_progress(lines):
+    """
+    Yields an FFmpegProgress for every `progress=continue|end` block of
+    `ffmpeg -progress` key=value output.
+    """
+    values = {}
+    for line in lines:
+        key, _, value = line.strip().partition("=")
+        if not key:
+            continue
+        if key != "progress":
+            values[key] = value
+            continue
+
+        # out_time_ms to w rzeczywistości mikrosekundy (jak out_time_us)
+        micros = _number(values.get("out_time_us", values.get("out_time_ms")))
+        yield FFmpegProgress(
+            out_time=(micros or 0.0) / 1_000_000,
+            fps=_number(values.get("fps")),
+            speed=_number(values.get("speed")),
+            bitrate="" if values.get("bitrate") == "N/A" else values.get("bitrate", ""),
+            finished=value == "end",
+        )
+        values = {}
+
+
+def run_ffmpeg(cmd, duration=None, on_progress=None):
+    """
+    Runs an FFmpeg command, calling `on_progress(fraction, sample)` as the
+    output advances. Raises subprocess.CalledProcessError on failure.
+    """
+    if on_progress is None:
+        subprocess.run(cmd, check=True)
+        return
+
+    cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True) as process:
+        for sample in parse_progress(process.stdout):
+            on_progress(sample.fraction(duration), sample)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, cmd)
+
+
+class ProgressReporter:
+    """
+    Publishes the stage, overall percentage, ETA and encode speed of a
+    RenderJob. Updates are throttled to PROGRESS_INTERVAL and written with
+    a single UPDATE, so they never overwrite other fields of the job.
+    """
+
+    def __init__(self, job, stages):
+        self.job = job
+        # Kolejność wywołującego: wypalanie napisów transkrybuje przed kodowaniem
+        self.stages = [stage for stage in stages if stage in STAGE_WEIGHTS]
+        total = sum(STAGE_WEIGHTS[stage] for stage in self.stages)
+        self.offsets = {}
+        self.weights = {}
+        position = 0.0
+        for stage in self.stages:
+            self.offsets[stage] = position
+            self.weights[stage] = STAGE_WEIGHTS[stage] * 100 / total
+            position += self.weights[stage]
+        self.stage = None
+        self._last_write = 0.0
+
+    def start(self, stage):
+        self.stage = stage
+        self._write(force=True, progress=self.offsets.get(stage, 0.0), eta_seconds=None)
+
+    def ffmpeg_callback(self, duration):
+        """
+        An `on_progress` callback for run_ffmpeg covering the current stage,
+        which produces `duration` seconds of output.
+        """
+
+        def on_progress(fraction, sample):
+            eta = None
+            if sample.speed:
+                # Prędkość kodowania to sekundy materiału na sekundę
+                eta = (1.0 - fraction) * duration / sample.speed
+            self._write(
+                force=sample.finished,
+                progress=self.offsets.get(self.stage, 0.0)
+                + fraction * self.weights.get(self.stage, 0.0),
+                eta_seconds=eta,
+                speed=sample.speed,
+                fps=sample.fps,
+                bitrate=sample.bitrate,
+            )
+
+        return on_progress
+
+    def _write(self, force=False, **fields):
+        now = time.monotonic()
+        if not force and now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        fields["stage"] = self.stage or ""
+        fields["progress"] = round(min(fields.get("progress", 0.0), 100.0), 1)
+        RenderJob.objects.filter(pk=self.job.pk).update(**fields)
+        for name, value in fields.items():
+            setattr(self.job, name, value)
@@ -0,0 +1,191 @@
+# project_files.py
+import logging
+import mimetypes
+import os
+import subprocess
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .assets import hash_file
+from .media_probe import ProbeError, probe
+from .media_tasks import enqueue_media_task, enqueue_project_file_task
+from .models import Asset, MediaTask, ProjectFile
+from .proxies import needs_proxy
+
+logger = logging.getLogger(__name__)
+
+THUMBNAILS_DIR = "thumbnails"
+
+
+def project_folder(project_id):
+    return f"edit_files_{project_id}"
+
+
+def thumbnail_name(content_hash):
+    # Miniatury adresowane treścią: ten sam plik w kilku projektach ma jedną
+    return f"{THUMBNAILS_DIR}/{content_hash[:2]}/{content_hash}.jpg"
+
+
+def make_thumbnail(path, content_hash, duration=None):
+    """
+    Extracts one frame of `path` (a second in, or the middle of shorter
+    clips) as a THUMBNAIL_WIDTH-wide JPEG. Returns its storage name, or ""
+    when FFmpeg cannot decode a frame.
+    """
+    name = thumbnail_name(content_hash)
+    if default_storage.exists(name):
+        return name
+
+    target = default_storage.path(name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    position = min(1.0, duration / 2) if duration else 0.0
+    partial = f"{target}.{os.getpid()}.part.jpg"
+    try:
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-nostdin",
+                "-v",
+                "error",
+                "-ss",
+                f"{position:.3f}",
+                "-i",
+                path,
+                "-frames:v",
+                "1",
+                "-vf",
+                f"scale={settings.THUMBNAIL_WIDTH}:-2",
+                "-q:v",
+                "4",
+                "-y",
+                partial,
+            ],
+            check=True,
+            capture_output=True,
+        )
+        os.replace(partial, target)
+    except subprocess.CalledProcessError as e:
+        logger.warning("Could not create thumbnail for %s: %s", path, e.stderr.strip())
+        return ""
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return name
+
+
+def register_project_file(project_id, path, asset=None):
+    """
+    Records (or refreshes) the manifest entry of the project file stored at
+    `path` from a stat() alone and queues a media task that fills in the
+    content hash, media metadata and thumbnail (see describe_project_file).
+    """
+    full_path = default_storage.path(path)
+    stat = os.stat(full_path)
+    name = os.path.basename(path)
+    fields = {
+        "path": path,
+        "asset": asset,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "content_hash": asset.digest if asset is not None else "",
+        "mime_type": mimetypes.guess_type(name)[0] or "",
+        "duration": None,
+        "width": None,
+        "height": None,
+        "video_codec": "",
+        "audio_codec": "",
+        "thumbnail": "",
+    }
+    entry, _ = ProjectFile.objects.update_or_create(
+        project_id=str(project_id), name=name, defaults=fields
+    )
+    enqueue_project_file_task(entry)
+    return entry
+
+
+def describe_project_file(entry):
+    """
+    Fills the manifest entry `entry` in: size, content hash, media metadata
+    from FFprobe and a thumbnail. Files FFprobe cannot read are listed
+    without media metadata. Media backed by an asset get their preview
+    proxy, timeline sprite sheets, keyframe index and waveform queued.
+    Entries whose file changed since registration are left to the task
+    queued by the newer registration.
+    """
+    full_path = default_storage.path(entry.path)
+    stat = os.stat(full_path)
+    if (stat.st_size, stat.st_mtime) != (entry.size, entry.mtime):
+        return entry
+
+    asset = entry.asset
+    content_hash = asset.digest if asset is not None else hash_file(full_path)
+    if asset is None:
+        # Plik dodany z pominięciem API, ale o treści znanej z rejestru zasobów
+        asset = Asset.objects.filter(digest=content_hash).first()
+    fields = {"asset": asset, "content_hash": content_hash}
+
+    try:
+        info = probe(full_path, content_hash=content_hash)
+    except ProbeError:
+        info = None
+    if info is not None and (info.video or info.audio):
+        fields.update(
+            duration=info.duration,
+            video_codec=info.video_codec or "",
+            audio_codec=info.audio_codec or "",
+        )
+        if info.video:
+            fields.update(width=info.width, height=info.height)
+            fields["thumbnail"] = make_thumbnail(full_path, content_hash, info.duration)
+            if asset is not None:
+                # Proxy pierwszy: podgląd w edytorze czeka na niego najdłużej
+                if needs_proxy(info):
+                    enqueue_media_task(asset, MediaTask.KIND_PROXY)
+                enqueue_media_task(asset, MediaTask.KIND_SPRITES)
+                enqueue_media_task(asset, MediaTask.KIND_INDEX)
+        if info.audio and asset is not None:
+            enqueue_media_task(asset, MediaTask.KIND_WAVEFORM)
+
+    # Pojedynczy UPDATE: nowsza rejestracja w międzyczasie nie jest nadpisana
+    ProjectFile.objects.filter(pk=entry.pk, size=entry.size, mtime=entry.mtime).update(
+        updated_at=timezone.now(), **fields
+    )
+    return entry
+
+
+def sync_project_files(project_id):
+    """
+    Brings the manifest in line with the project folder: registers files
+    added outside the API (or changed since), drops entries of deleted files.
+    Every file costs one stat(); hashing and probing run in the background.
+    """
+    folder = project_folder(project_id)
+    entries = {
+        entry.name: entry
+        for entry in ProjectFile.objects.filter(project_id=str(project_id))
+    }
+    names = set()
+    if default_storage.exists(folder):
+        names = {
+            name
+            for name in default_storage.listdir(folder)[1]
+            if not name.endswith(".part")
+        }
+
+    for name in sorted(names):
+        path = f"{folder}/{name}"
+        entry = entries.get(name)
+        stat = os.stat(default_storage.path(path))
+        if entry is not None and (entry.size, entry.mtime) == (
+            stat.st_size,
+            stat.st_mtime,
+        ):
+            continue
+        # Zmieniona treść: zasób z poprzedniego wpisu już jej nie opisuje
+        register_project_file(project_id, path)
+
+    removed = [entry.pk for name, entry in entries.items() if name not in names]
+    if removed:
+        ProjectFile.objects.filter(pk__in=removed).delete()
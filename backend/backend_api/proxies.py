@@ -0,0 +1,138 @@
+# proxies.py
+import os
+import subprocess
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .media_probe import ProbeError, probe
+from .models import ProjectFile
+
+PROXIES_DIR = "proxies"
+
+
+class ProxyError(Exception):
+    pass
+
+
+def proxy_name(content_hash):
+    return f"{PROXIES_DIR}/{content_hash[:2]}/{content_hash}.mp4"
+
+
+def needs_proxy(info):
+    """Only sources taller than PROXY_HEIGHT are worth a lighter copy."""
+    return bool(info.video) and (info.height or 0) > settings.PROXY_HEIGHT
+
+
+def proxy_size(info):
+    """Display size of the proxy of a source described by `info`."""
+    width = round(info.width * settings.PROXY_HEIGHT / info.height / 2) * 2
+    return width, settings.PROXY_HEIGHT
+
+
+def proxy_command(source, target):
+    """
+    A low-bitrate H.264 rendition for scrubbing: PROXY_HEIGHT lines, a
+    keyframe every PROXY_KEYFRAME_INTERVAL seconds, no B-frames and
+    fastdecode, so any position decodes from a nearby keyframe. Frame
+    timestamps are passed through, so times on the proxy are times on
+    the original.
+    """
+    return [
+        "ffmpeg",
+        "-nostdin",
+        "-v",
+        "error",
+        "-i",
+        source,
+        "-map",
+        "0:v:0",
+        "-map",
+        "0:a:0?",
+        "-vf",
+        f"scale=-2:{settings.PROXY_HEIGHT}",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-tune",
+        "fastdecode",
+        "-crf",
+        str(settings.PROXY_CRF),
+        "-bf",
+        "0",
+        "-force_key_frames",
+        f"expr:gte(t,n_forced*{settings.PROXY_KEYFRAME_INTERVAL})",
+        "-pix_fmt",
+        "yuv420p",
+        "-fps_mode",
+        "passthrough",
+        "-c:a",
+        "aac",
+        "-b:a",
+        "96k",
+        "-ac",
+        "2",
+        "-movflags",
+        "+faststart",
+        "-y",
+        target,
+    ]
+
+
+def generate_proxy(asset):
+    """
+    Encodes the preview proxy of `asset` into proxies/. Sources no taller
+    than PROXY_HEIGHT get none: the original is already cheap to play.
+    """
+    name = proxy_name(asset.digest)
+    if default_storage.exists(name):
+        return name
+
+    try:
+        info = probe(asset.path, content_hash=asset.digest)
+    except ProbeError as e:
+        raise ProxyError(f"Cannot read {asset}: {e}")
+    if not needs_proxy(info):
+        return None
+
+    target = default_storage.path(name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    partial = f"{target}.{os.getpid()}.part.mp4"
+    try:
+        subprocess.run(
+            proxy_command(asset.path, partial),
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        os.replace(partial, target)
+    except subprocess.CalledProcessError as e:
+        raise ProxyError(f"Could not create proxy for {asset}: {e.stderr}")
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    # Nowy proxy_url we wpisach manifestu: zmiana ETagu projektów z tym plikiem
+    ProjectFile.objects.filter(content_hash=asset.digest).update(
+        updated_at=timezone.now()
+    )
+    return name
+
+
+def existing_proxy(asset):
+    """Storage name of the proxy of `asset`, or None if there is none (yet)."""
+    name = proxy_name(asset.digest)
+    return name if default_storage.exists(name) else None
+
+
+def preview_source(asset, info, min_width=0):
+    """
+    Path to decode previews of `asset` (described by `info`) from: the
+    proxy when it exists and is at least `min_width` wide, otherwise the
+    original.
+    """
+    name = existing_proxy(asset)
+    if name is not None and proxy_size(info)[0] >= min_width:
+        return default_storage.path(name)
+    return asset.path
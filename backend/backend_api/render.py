@@ -0,0 +1,313 @@
+# render.py
+import logging
+import os
+import subprocess
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .cutting import (
+    AUDIO_ENHANCE_FILTER,
+    ClipSpec,
+    clip_audio_command,
+    cut_clip,
+    group_clips,
+    multi_clip_command,
+    parse_timestamp,
+    plan_cut,
+    scale_value,
+    subtitles_filter,
+)
+from .encoders import run_with_fallback, select_encoder
+from .media_index import load_media_index
+from .media_probe import probe
+from .media_tasks import enqueue_media_task
+from .models import MediaTask, RenderJob
+from .parallel_transcription import transcribe_long
+from .scheduler import TASK_ENCODE, TASK_TRANSCRIBE, local_scheduler
+from .progress import (
+    STAGE_ENCODE,
+    STAGE_PROBE,
+    STAGE_TRANSCRIBE,
+    STAGE_WRITE_SRT,
+    ProgressReporter,
+    run_ffmpeg,
+)
+from .transcripts import cached_transcript, segments_to_srt, slice_transcript
+
+logger = logging.getLogger(__name__)
+
+# Mapowanie rozdzielczości do wartości pionowych
+RESOLUTION_MAPPING = {
+    "480p": 480,
+    "720p": 720,
+    "1080p": 1080,
+    "1440p": 1440,
+    "4K": 2160,
+}
+
+OUTPUT_VIDEO_NAME = "processed_video.mp4"
+SUBTITLES_NAME = "subtitles.srt"
+CLIP_AUDIO_NAME = "clip_audio.wav"
+RENDERS_DIR = "renders"
+
+
+def render_job(job, scheduler=None):
+    """
+    Renders a RenderJob into its own workspace (see job_workspace): cuts and
+    scales the source with FFmpeg (see cutting.plan_cut) and optionally
+    transcribes it with Whisper, publishing the stage and progress on the
+    job. Burned-in subtitles are transcribed first and drawn by the same,
+    single video encode. Encoding and transcription each run on the
+    least-loaded device slot of `scheduler` (see scheduler.py).
+    Returns storage paths of (video, subtitles).
+    Raises ProbeError or subprocess.CalledProcessError when FFprobe or FFmpeg
+    fails, ValueError for invalid timestamps.
+    """
+    scheduler = scheduler or local_scheduler()
+    if job.clips.exists():
+        return render_batch(job, scheduler)
+
+    target_resolution = RESOLUTION_MAPPING.get(job.resolution, 1080)
+    source_path = default_storage.path(job.source)
+    workspace = job_workspace(job)
+    video_name = f"{workspace}/{OUTPUT_VIDEO_NAME}"
+    output_video_path = default_storage.path(video_name)
+    os.makedirs(os.path.dirname(output_video_path), exist_ok=True)
+
+    subtitle_stages = []
+    if job.add_subtitles or job.burn_subtitles:
+        subtitle_stages = [STAGE_TRANSCRIBE, STAGE_WRITE_SRT]
+    if job.burn_subtitles:
+        # Napisy muszą istnieć przed jedynym kodowaniem obrazu
+        stages = [STAGE_PROBE, *subtitle_stages, STAGE_ENCODE]
+    else:
+        stages = [STAGE_PROBE, STAGE_ENCODE, *subtitle_stages]
+    progress = ProgressReporter(job, stages)
+
+    progress.start(STAGE_PROBE)
+    # Wymiary wyświetlane (z uwzględnieniem obrotu) z pamięci podręcznej FFprobe
+    info = probe(source_path, content_hash=job.asset.digest if job.asset else None)
+
+    start, end = parse_timestamp(job.start_time), parse_timestamp(job.end_time)
+    # Klatki kluczowe z indeksu zasobu, bez ponownego czytania pliku
+    index = load_media_index(job.asset) if job.asset else None
+    # Wyszukiwanie na wejściu (-ss przed -i) i kopiowanie strumienia, gdy można
+    plan = plan_cut(
+        source_path,
+        info,
+        start,
+        end,
+        target_resolution,
+        mode=job.cut_mode,
+        keyframes=index.keyframes_for_cut(start, end) if index else None,
+        has_video_filters=job.burn_subtitles,
+    )
+    logger.info("Render job #%s: %s", job.pk, plan)
+
+    video_filters = [f"scale={scale_value(info, target_resolution)}"]
+    subtitles_name = ""
+    if job.burn_subtitles:
+        subtitles_name = write_subtitles(
+            job, source_path, plan, scheduler, progress, clip_audio=True
+        )
+        # Bez rozpoznanej mowy nie ma czego wypalać (libass odrzuca pusty plik)
+        if default_storage.size(subtitles_name):
+            style = {**settings.SUBTITLE_BURN_STYLE, **job.subtitle_style}
+            video_filters.append(
+                subtitles_filter(default_storage.path(subtitles_name), style)
+            )
+
+    progress.start(STAGE_ENCODE)
+    with scheduler.reserve(TASK_ENCODE) as slot:
+        # Kodek urządzenia wybrany testem wydajności (encoders.select_encoder)
+        encoder = select_encoder([slot.codec])
+        logger.info(
+            "Render job #%s: encoding on %s with %s", job.pk, slot, encoder.codec
+        )
+        run_with_fallback(
+            lambda choice: cut_clip(
+                source_path,
+                output_video_path,
+                plan,
+                choice.codec,
+                video_filters=video_filters,
+                audio_filter=AUDIO_ENHANCE_FILTER if job.enhance_audio else None,
+                quality_args=choice.quality_args + slot.encoder_args(choice.codec),
+                on_progress=progress.ffmpeg_callback(plan.duration),
+            ),
+            encoder,
+        )
+
+    if job.add_subtitles and not job.burn_subtitles:
+        subtitles_name = write_subtitles(
+            job, source_path, plan, scheduler, progress, output_video_path
+        )
+
+    return video_name, subtitles_name
+
+
+def write_subtitles(
+    job, source_path, plan, scheduler, progress, rendered_path=None, clip_audio=False
+):
+    """
+    Transcribes the clip of `plan` with Whisper and saves its SRT into the
+    job's workspace, returning the storage name. Registered sources with a
+    stored whole-source transcript just slice it. Otherwise Whisper reads
+    either the already rendered clip or, with `clip_audio`, the clip's
+    audio decoded alone from the source, and a registered source gets its
+    whole-source transcript queued for later clips.
+    """
+    whisper_model = settings.GPU_LIST["whisper_model"]
+    workspace = job_workspace(job)
+    progress.start(STAGE_TRANSCRIBE)
+    with scheduler.reserve(TASK_TRANSCRIBE, whisper_model) as slot:
+        device = slot.whisper_device
+        transcript = None
+        if job.asset is not None:
+            transcript = cached_transcript(job.asset.digest, whisper_model)
+        if transcript is not None:
+            # Napisy dowolnego fragmentu to przycięte i przesunięte segmenty
+            segments = slice_transcript(transcript, plan.start, plan.end)
+        else:
+            if job.asset is not None:
+                # Wielogodzinne źródło nie opóźnia renderu: całość w tle
+                enqueue_media_task(job.asset, MediaTask.KIND_TRANSCRIPT)
+            if clip_audio:
+                rendered_path = default_storage.path(f"{workspace}/{CLIP_AUDIO_NAME}")
+                run_ffmpeg(
+                    clip_audio_command(source_path, rendered_path, plan.start, plan.end)
+                )
+            try:
+                result = transcribe_long(
+                    rendered_path, whisper_model, device=device, fp16=False
+                )
+            finally:
+                if clip_audio and os.path.exists(rendered_path):
+                    os.remove(rendered_path)
+            segments = result["segments"]
+
+    progress.start(STAGE_WRITE_SRT)
+    subtitles_name = f"{workspace}/{SUBTITLES_NAME}"
+    # Pozostałość po przerwanym wcześniej przebiegu tego samego zadania
+    if default_storage.exists(subtitles_name):
+        default_storage.delete(subtitles_name)
+
+    # Zapisz napisy w `default_storage` jako plik .srt
+    subtitles_content = ContentFile(segments_to_srt(segments).encode("utf-8"))
+    return default_storage.save(subtitles_name, subtitles_content)
+
+
+def job_workspace(job):
+    """
+    Storage directory holding every output of `job`, so concurrent renders
+    never write to the same files.
+    """
+    return f"{RENDERS_DIR}/job_{job.pk}"
+
+
+def clip_output_name(job, index):
+    return f"{job_workspace(job)}/clip_{index:02}.mp4"
+
+
+def render_batch(job, scheduler):
+    """
+    Renders every RenderClip of a batch job. Nearby clips share one FFmpeg
+    process (see cutting.multi_clip_command), so the source window is
+    demuxed and decoded once for all of them. Each clip records its own
+    status; CalledProcessError is raised only when no clip succeeded.
+    """
+    source_path = default_storage.path(job.source)
+    progress = ProgressReporter(job, [STAGE_PROBE, STAGE_ENCODE])
+    progress.start(STAGE_PROBE)
+    info = probe(source_path, content_hash=job.asset.digest if job.asset else None)
+
+    clips = list(job.clips.all())
+    specs = []
+    for clip in clips:
+        target_resolution = RESOLUTION_MAPPING.get(clip.resolution, 1080)
+        clip.video_path = clip_output_name(job, clip.index)
+        specs.append(
+            ClipSpec(
+                clip,
+                parse_timestamp(clip.start_time),
+                parse_timestamp(clip.end_time),
+                scale_value(info, target_resolution),
+                default_storage.path(clip.video_path),
+                AUDIO_ENHANCE_FILTER if clip.enhance_audio else None,
+            )
+        )
+    os.makedirs(os.path.dirname(specs[0].output_path), exist_ok=True)
+
+    groups = group_clips(specs)
+    windows = [
+        max(spec.end for spec in group) - min(spec.start for spec in group)
+        for group in groups
+    ]
+    total = sum(windows)
+    progress.start(STAGE_ENCODE)
+    on_progress = progress.ffmpeg_callback(total)
+    with scheduler.reserve(TASK_ENCODE) as slot:
+        encoder = select_encoder([slot.codec])
+        logger.info(
+            "Render job #%s: encoding on %s with %s", job.pk, slot, encoder.codec
+        )
+        failure = encode_groups(
+            job, source_path, info, groups, windows, slot, encoder, on_progress
+        )
+
+    if failure is not None and not any(
+        clip.status == RenderJob.STATUS_DONE for clip in clips
+    ):
+        raise failure
+    return "", ""
+
+
+def encode_groups(job, source_path, info, groups, windows, slot, encoder, on_progress):
+    """
+    Runs one FFmpeg pass per group of clips, recording the outcome on each
+    clip. Returns the last CalledProcessError, or None when all passes succeeded.
+    """
+    total = sum(windows)
+
+    failure = None
+    done = 0.0
+    for group, window in zip(groups, windows):
+        group_members = [spec.key for spec in group]
+        for clip in group_members:
+            clip.status = RenderJob.STATUS_RUNNING
+            clip.save(update_fields=["status", "video_path"])
+        logger.info("Render job #%s: %s clip(s) in one pass", job.pk, len(group))
+        try:
+            run_with_fallback(
+                lambda choice, group=group, done=done, window=window: run_ffmpeg(
+                    multi_clip_command(
+                        source_path,
+                        group,
+                        choice.codec,
+                        has_audio=info.audio is not None,
+                        quality_args=choice.quality_args
+                        + slot.encoder_args(choice.codec),
+                    ),
+                    window,
+                    # Postęp grupy przeliczony na wszystkie przebiegi zadania
+                    lambda fraction, sample: on_progress(
+                        (done + fraction * window) / total, sample
+                    ),
+                ),
+                encoder,
+            )
+        except subprocess.CalledProcessError as e:
+            failure = e
+            for clip in group_members:
+                clip.status = RenderJob.STATUS_FAILED
+                clip.error = "Video processing failed"
+                clip.video_path = ""
+                clip.save(update_fields=["status", "error", "video_path"])
+        else:
+            for clip in group_members:
+                clip.status = RenderJob.STATUS_DONE
+                clip.save(update_fields=["status"])
+        done += window
+    return failure
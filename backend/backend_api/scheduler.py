@@ -0,0 +1,250 @@
+# scheduler.py
+import multiprocessing
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .encoders import FALLBACK_CODEC
+
+TASK_ENCODE = "encode"
+TASK_TRANSCRIBE = "transcribe"
+
+# Szacunkowa pamięć karty zajmowana przez jedną sesję sprzętowego kodera
+ENCODE_VRAM_MB = 300
+
+
+class DeviceSlot:
+    """
+    One execution slot: a GPU with a hardware encoder, or the CPU running
+    software encoding. `max_tasks` limits concurrent tasks on the slot and
+    `vram_mb` the memory reserved by them (0 means not tracked).
+    """
+
+    __slots__ = (
+        "index",
+        "name",
+        "vendor",
+        "codec",
+        "max_tasks",
+        "vram_mb",
+        "whisper_device",
+    )
+
+    def __init__(
+        self, index, name, vendor, codec, max_tasks, vram_mb=0, whisper_device=None
+    ):
+        self.index = index
+        self.name = name
+        self.vendor = vendor
+        self.codec = codec
+        self.max_tasks = max_tasks
+        self.vram_mb = vram_mb
+        self.whisper_device = whisper_device
+
+    @property
+    def is_cpu(self):
+        return self.codec == FALLBACK_CODEC
+
+    def encoder_args(self, codec):
+        """Arguments pinning a hardware encode to this slot's card."""
+        if codec == "h264_nvenc" and self.whisper_device:
+            return ["-gpu", self.whisper_device.partition(":")[2]]
+        return []
+
+    def __repr__(self):
+        return f"DeviceSlot({self.index}: {self.name}, {self.codec})"
+
+
+def cpu_slot_tasks():
+    if settings.CPU_SLOT_TASKS:
+        return settings.CPU_SLOT_TASKS
+    # libx264 sam rozkłada kodowanie na wątki; kilka naraz tylko je przeplata
+    return max(1, (os.cpu_count() or 1) // 4)
+
+
+def build_slots(devices, gpu_tasks=None, cpu_tasks=None):
+    """
+    Execution slots for the detected `devices` (see gpu_info.load_gpu_devices):
+    one per GPU with a hardware encoder, followed by a CPU slot.
+    NVIDIA cards also run Whisper, on the CUDA device with the same index
+    among NVIDIA cards.
+    """
+    gpu_tasks = gpu_tasks or settings.GPU_SLOT_TASKS
+    cpu_tasks = cpu_tasks or cpu_slot_tasks()
+
+    slots = []
+    cuda_count = 0
+    for device in devices:
+        codec = device.get("codec", FALLBACK_CODEC)
+        if codec == FALLBACK_CODEC:
+            # Profil CPU lub karta bez sprzętowego kodera (np. adapter BMC)
+            continue
+        whisper_device = None
+        if device.get("vendor") == "NVIDIA":
+            whisper_device = f"cuda:{device.get('vendor_index', cuda_count)}"
+            cuda_count += 1
+        slots.append(
+            DeviceSlot(
+                len(slots),
+                device.get("name", "GPU"),
+                device.get("vendor", "Unknown"),
+                codec,
+                gpu_tasks,
+                device.get("vram", 0),
+                whisper_device,
+            )
+        )
+    slots.append(DeviceSlot(len(slots), "CPU", "Unknown", FALLBACK_CODEC, cpu_tasks))
+    return slots
+
+
+class DeviceScheduler:
+    """
+    Assigns tasks to the least-loaded slot that accepts them. Counters of
+    running tasks and reserved VRAM live in shared memory, so one scheduler
+    created before the render worker processes start is shared by all of them.
+    """
+
+    def __init__(self, slots, vram_for=None):
+        self.slots = slots
+        self.vram_for = vram_for or {}
+        self.active = multiprocessing.Array("i", len(slots), lock=False)
+        self.reserved_mb = multiprocessing.Array("i", len(slots), lock=False)
+        self.condition = multiprocessing.Condition()
+
+    def accepts(self, slot, task):
+        if task != TASK_TRANSCRIBE:
+            return True
+        if slot.is_cpu:
+            # Whisper na CPU tylko na maszynach bez karty CUDA: jest kilkadziesiąt
+            # razy wolniejszy, więc lepiej poczekać na wolną kartę
+            return not any(s.whisper_device for s in self.slots)
+        return slot.whisper_device is not None
+
+    def candidates(self, task, vram_mb=0):
+        """Slots able to take `task` right now, least loaded first."""
+        free = [
+            slot
+            for slot in self.slots
+            if self.accepts(slot, task)
+            and self.active[slot.index] < slot.max_tasks
+            and (
+                not slot.vram_mb
+                or self.reserved_mb[slot.index] + vram_mb <= slot.vram_mb
+            )
+        ]
+        # Przy równym obciążeniu wygrywa karta (karty są przed slotem CPU)
+        return sorted(
+            free,
+            key=lambda slot: (self.active[slot.index] / slot.max_tasks, slot.index),
+        )
+
+    def try_acquire(self, task, vram_mb=0):
+        """Reserves the least-loaded free slot for `task`, or returns None."""
+        with self.condition:
+            return self._take(task, vram_mb)
+
+    def _take(self, task, vram_mb):
+        free = self.candidates(task, vram_mb)
+        if not free:
+            return None
+        slot = free[0]
+        self.active[slot.index] += 1
+        if slot.vram_mb:
+            self.reserved_mb[slot.index] += vram_mb
+        return slot
+
+    def acquire(self, task, vram_mb=0, timeout=None):
+        """
+        Waits until a slot accepts `task` and reserves it. Raises
+        TimeoutError after `timeout` seconds and RuntimeError when no slot
+        could ever fit the task.
+        """
+        if not any(
+            self.accepts(slot, task) and (not slot.vram_mb or vram_mb <= slot.vram_mb)
+            for slot in self.slots
+        ):
+            raise RuntimeError(f"No device slot can run {task} ({vram_mb} MB)")
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while True:
+                slot = self._take(task, vram_mb)
+                if slot is not None:
+                    return slot
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No device slot became free for {task}")
+                self.condition.wait(remaining)
+
+    def release(self, slot, vram_mb=0):
+        with self.condition:
+            self.active[slot.index] -= 1
+            if slot.vram_mb:
+                self.reserved_mb[slot.index] -= vram_mb
+            self.condition.notify_all()
+
+    @contextmanager
+    def reserve(self, task, model_name=None):
+        """
+        Holds a slot for the duration of the block. Transcription reserves
+        the VRAM of `model_name`, encoding that of one encoder session.
+        """
+        if task == TASK_TRANSCRIBE:
+            vram_mb = self.vram_for.get(model_name, 0)
+        else:
+            vram_mb = ENCODE_VRAM_MB
+        slot = self.acquire(task, vram_mb)
+        try:
+            yield slot
+        finally:
+            self.release(slot, vram_mb)
+
+    def status(self):
+        return [
+            {
+                "slot": slot.index,
+                "name": slot.name,
+                "codec": slot.codec,
+                "active": self.active[slot.index],
+                "max_tasks": slot.max_tasks,
+                "reserved_mb": self.reserved_mb[slot.index],
+                "vram_mb": slot.vram_mb,
+            }
+            for slot in self.slots
+        ]
+
+
+def whisper_devices(devices=None):
+    """
+    Devices the render workers run Whisper on (settings.GPU_DEVICES by
+    default): the CUDA devices of the GPU slots, or [None] (Whisper's default
+    device, used by the CPU slot) on hosts without one.
+    """
+    devices = settings.GPU_DEVICES if devices is None else devices
+    cuda = [slot.whisper_device for slot in build_slots(devices) if slot.whisper_device]
+    return cuda or [None]
+
+
+def create_scheduler(devices=None):
+    """A scheduler for the detected devices (settings.GPU_DEVICES)."""
+    from .transcription import whisper_model_sizes
+
+    devices = settings.GPU_DEVICES if devices is None else devices
+    return DeviceScheduler(build_slots(devices), vram_for=whisper_model_sizes())
+
+
+_local_scheduler = None
+
+
+def local_scheduler():
+    """
+    Per-process scheduler used when a job runs outside the worker pool
+    (which passes its shared scheduler to every worker).
+    """
+    global _local_scheduler
+    if _local_scheduler is None:
+        _local_scheduler = create_scheduler()
+    return _local_scheduler
@@ -1,7 +1,17 @@
 # serializers.py
+from django.conf import settings
 from rest_framework import serializers
-from .models import Video, Project
-
+from django.core.files.storage import default_storage
+from .models import (
+    Video,
+    Project,
+    RenderJob,
+    RenderClip,
+    Asset,
+    ProjectFile,
+    SubtitleCue,
+)
+from .proxies import proxy_name
 
 # Create your serializers here.
 
@@ -10,9 +20,245 @@ class VideoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Video
         fields = "__all__"
+        # Wypełniane przy przyjęciu pliku (video_metadata.py)
+        read_only_fields = [
+            "asset",
+            "duration",
+            "fps_num",
+            "fps_den",
+            "width",
+            "height",
+            "video_codec",
+            "audio_codec",
+            "bit_rate",
+            "size",
+            "content_hash",
+            "probe_version",
+        ]
+
+
+class VideoListSerializer(serializers.ModelSerializer):
+    """Video entry of list pages; `columns` is all the query has to load."""
+
+    columns = (
+        "id",
+        "title",
+        "description",
+        "file",
+        "project",
+        "project__title",
+        "created_at",
+        "duration",
+        "width",
+        "height",
+        "fps_num",
+        "fps_den",
+        "video_codec",
+        "size",
+    )
+    project_title = serializers.CharField(
+        source="project.title", read_only=True, default=None
+    )
+
+    class Meta:
+        model = Video
+        fields = [
+            "id",
+            "title",
+            "description",
+            "file",
+            "project",
+            "project_title",
+            "created_at",
+            "duration",
+            "width",
+            "height",
+            "fps_num",
+            "fps_den",
+            "video_codec",
+            "size",
+        ]
+
+
+class ProjectListSerializer(serializers.ModelSerializer):
+    columns = ("id", "title", "description", "created_at")
+
+    class Meta:
+        model = Project
+        fields = ["id", "title", "description", "created_at"]
 
 
 class ProjectSerializer(serializers.ModelSerializer):
+    videos = VideoListSerializer(many=True, read_only=True)
+
     class Meta:
         model = Project
         fields = "__all__"
+
+
+class AssetSerializer(serializers.ModelSerializer):
+    asset_id = serializers.IntegerField(source="pk", read_only=True)
+
+    class Meta:
+        model = Asset
+        fields = ["asset_id", "digest", "size", "original_name", "created_at"]
+
+
+def absolute_media_url(path, context):
+    if not path:
+        return None
+    url = default_storage.url(path)
+    request = context.get("request")
+    return request.build_absolute_uri(url) if request else url
+
+
+class RenderClipSerializer(serializers.ModelSerializer):
+    video_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RenderClip
+        fields = [
+            "index",
+            "status",
+            "start_time",
+            "end_time",
+            "resolution",
+            "enhance_audio",
+            "video_url",
+            "error",
+        ]
+
+    def get_video_url(self, clip):
+        return absolute_media_url(clip.video_path, self.context)
+
+
+class RenderJobSerializer(serializers.ModelSerializer):
+    queue_position = serializers.IntegerField(read_only=True)
+    video_url = serializers.SerializerMethodField()
+    subtitles_url = serializers.SerializerMethodField()
+    clips = RenderClipSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = RenderJob
+        fields = [
+            "id",
+            "asset",
+            "status",
+            "queue_position",
+            "start_time",
+            "end_time",
+            "resolution",
+            "cut_mode",
+            "enhance_audio",
+            "add_subtitles",
+            "burn_subtitles",
+            "subtitle_style",
+            "video_url",
+            "subtitles_url",
+            "clips",
+            "stage",
+            "progress",
+            "eta_seconds",
+            "speed",
+            "fps",
+            "bitrate",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+
+    def get_video_url(self, job):
+        return absolute_media_url(job.video_path, self.context)
+
+    def get_subtitles_url(self, job):
+        return absolute_media_url(job.subtitles_path, self.context)
+
+
+class RenderJobProgressSerializer(serializers.ModelSerializer):
+    queue_position = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = RenderJob
+        fields = [
+            "id",
+            "status",
+            "queue_position",
+            "stage",
+            "progress",
+            "eta_seconds",
+            "speed",
+            "fps",
+            "bitrate",
+        ]
+
+
+class ProjectFileSerializer(serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+    proxy_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProjectFile
+        fields = [
+            "id",
+            "name",
+            "url",
+            "proxy_url",
+            "asset_id",
+            "size",
+            "content_hash",
+            "mime_type",
+            "duration",
+            "width",
+            "height",
+            "video_codec",
+            "audio_codec",
+            "thumbnail_url",
+            "updated_at",
+        ]
+
+    def get_url(self, entry):
+        return absolute_media_url(entry.path, self.context)
+
+    def get_proxy_url(self, entry):
+        # Proxy adresowany treścią: bez zapytania o zasób
+        name = proxy_name(entry.content_hash)
+        if not entry.content_hash or not default_storage.exists(name):
+            return None
+        return absolute_media_url(name, self.context)
+
+    def get_thumbnail_url(self, entry):
+        return absolute_media_url(entry.thumbnail, self.context)
+
+
+class SubtitleCueSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SubtitleCue
+        fields = ["id", "start_ms", "end_ms", "text", "words"]
+
+    def validate_words(self, words):
+        if words is None:
+            return words
+        if not isinstance(words, list) or not all(
+            isinstance(word, list)
+            and len(word) == 3
+            and all(isinstance(time, int) and time >= 0 for time in word[:2])
+            and isinstance(word[2], str)
+            for word in words
+        ):
+            raise serializers.ValidationError(
+                "words must be a list of [start_ms, end_ms, word]"
+            )
+        return words
+
+    def validate(self, attrs):
+        start_ms = attrs.get("start_ms", getattr(self.instance, "start_ms", 0))
+        end_ms = attrs.get("end_ms", getattr(self.instance, "end_ms", 0))
+        if end_ms <= start_ms:
+            raise serializers.ValidationError("end_ms must be after start_ms")
+        if end_ms - start_ms > settings.SUBTITLE_MAX_CUE_MS:
+            raise serializers.ValidationError(
+                f"A cue may last at most {settings.SUBTITLE_MAX_CUE_MS} ms"
+            )
+        return attrs
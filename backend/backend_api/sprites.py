@@ -0,0 +1,295 @@
+# sprites.py
+import json
+import math
+import os
+import shutil
+import subprocess
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from .media_probe import ProbeError, probe
+from .proxies import preview_source
+
+SPRITES_DIR = "sprites"
+THUMBNAIL_CACHE_DIR = "thumbcache"
+MANIFEST_NAME = "manifest.json"
+SHEET_PATTERN = "sheet_%04d.jpg"
+
+
+class ThumbnailError(Exception):
+    pass
+
+
+def sprite_folder(content_hash):
+    # Arkusze adresowane treścią: ten sam plik w kilku projektach ma jeden zestaw
+    return f"{SPRITES_DIR}/{content_hash[:2]}/{content_hash}"
+
+
+def tile_size(width, height, tile_width):
+    """Tile dimensions keeping the source aspect ratio (even height)."""
+    if not width or not height:
+        return tile_width, round(tile_width * 9 / 16 / 2) * 2
+    return tile_width, max(2, round(tile_width * height / width / 2) * 2)
+
+
+def vtt_timestamp(seconds):
+    hours, rest = divmod(seconds, 3600)
+    minutes, rest = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{rest:06.3f}"
+
+
+def build_vtt(level, duration):
+    """
+    WebVTT thumbnail index of one level: a cue per tile pointing at its
+    sheet with a #xywh media fragment (paths relative to the .vtt file).
+    """
+    lines = ["WEBVTT", ""]
+    per_sheet = level["columns"] * level["rows"]
+    interval = level["interval"]
+    for index in range(level["count"]):
+        start = index * interval
+        end = min(start + interval, duration)
+        sheet, position = divmod(index, per_sheet)
+        row, column = divmod(position, level["columns"])
+        lines.append(f"{vtt_timestamp(start)} --> {vtt_timestamp(end)}")
+        lines.append(
+            f"{level['folder']}/{SHEET_PATTERN % (sheet + 1)}#xywh="
+            f"{column * level['tile_width']},{row * level['tile_height']},"
+            f"{level['tile_width']},{level['tile_height']}"
+        )
+        lines.append("")
+    return "\n".join(lines)
+
+
+def sprite_filter(intervals, tile_width, tile_height, columns, rows):
+    """
+    filter_complex decoding the source once and splitting it into one
+    tiled output per interval. `fps` repeats the last keyframe when the
+    GOP is longer than the interval, so tiles stay aligned to time;
+    eof_action=pass keeps the first frame of sources shorter than one
+    interval.
+    """
+    labels = [f"s{index}" for index in range(len(intervals))]
+    chains = [
+        f"[0:v]scale={tile_width}:{tile_height},setsar=1,"
+        f"split={len(intervals)}{''.join(f'[{label}]' for label in labels)}"
+    ]
+    for index, (interval, label) in enumerate(zip(intervals, labels)):
+        chains.append(
+            f"[{label}]fps=1/{interval}:round=down:eof_action=pass,"
+            f"tile={columns}x{rows}[out{index}]"
+        )
+    return ";".join(chains)
+
+
+def generate_sprites(asset):
+    """
+    Writes sprite sheets of `asset` for every SPRITE_INTERVALS level in one
+    FFmpeg pass that decodes keyframes only (of the preview proxy when
+    there is one), plus a WebVTT index per level and a manifest.json. The
+    folder appears atomically once complete.
+    """
+    folder = sprite_folder(asset.digest)
+    if default_storage.exists(f"{folder}/{MANIFEST_NAME}"):
+        return folder
+
+    try:
+        info = probe(asset.path, content_hash=asset.digest)
+    except ProbeError as e:
+        raise ThumbnailError(f"Cannot read {asset}: {e}")
+    if not info.video:
+        raise ThumbnailError(f"{asset} has no video stream")
+
+    duration = info.duration or 0
+    intervals = list(settings.SPRITE_INTERVALS)
+    columns, rows = settings.SPRITE_GRID
+    tile_width, tile_height = tile_size(
+        info.width, info.height, settings.SPRITE_TILE_WIDTH
+    )
+
+    target = default_storage.path(folder)
+    partial = f"{target}.{os.getpid()}.part"
+    shutil.rmtree(partial, ignore_errors=True)
+    command = [
+        "ffmpeg",
+        "-nostdin",
+        "-v",
+        "error",
+        # Dekodowane są tylko klatki kluczowe: przebieg trwa sekundy, nie minuty
+        "-skip_frame",
+        "nokey",
+        "-i",
+        # Proxy (kolejkowany przed arkuszami) dekoduje się szybciej niż oryginał
+        preview_source(asset, info, tile_width),
+        "-filter_complex",
+        sprite_filter(intervals, tile_width, tile_height, columns, rows),
+    ]
+    for index, interval in enumerate(intervals):
+        os.makedirs(os.path.join(partial, f"{interval}s"))
+        command += [
+            "-map",
+            f"[out{index}]",
+            "-q:v",
+            "5",
+            os.path.join(partial, f"{interval}s", SHEET_PATTERN),
+        ]
+
+    try:
+        subprocess.run(command, check=True, capture_output=True, text=True)
+
+        levels = []
+        for interval in intervals:
+            sheets = len(os.listdir(os.path.join(partial, f"{interval}s")))
+            level = {
+                "interval": interval,
+                "folder": f"{interval}s",
+                "columns": columns,
+                "rows": rows,
+                "tile_width": tile_width,
+                "tile_height": tile_height,
+                # Ostatni arkusz może być niepełny
+                "count": min(
+                    max(1, math.ceil(duration / interval)), sheets * columns * rows
+                ),
+                "sheets": sheets,
+            }
+            with open(os.path.join(partial, f"{interval}s.vtt"), "w") as f:
+                f.write(build_vtt(level, duration))
+            levels.append(level)
+
+        with open(os.path.join(partial, MANIFEST_NAME), "w") as f:
+            json.dump({"duration": duration, "levels": levels}, f)
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.isdir(target):
+            # Niepełny wynik wcześniejszego przebiegu bez manifestu
+            shutil.rmtree(target)
+        os.rename(partial, target)
+    except subprocess.CalledProcessError as e:
+        raise ThumbnailError(f"Could not create sprites for {asset}: {e.stderr}")
+    finally:
+        shutil.rmtree(partial, ignore_errors=True)
+    return folder
+
+
+def load_sprite_manifest(asset):
+    """The manifest written by generate_sprites, or None if not generated yet."""
+    name = f"{sprite_folder(asset.digest)}/{MANIFEST_NAME}"
+    if not default_storage.exists(name):
+        return None
+    with default_storage.open(name) as f:
+        return json.load(f)
+
+
+def thumbnail_cache_name(content_hash, position, width):
+    millis = round(position * 1000)
+    return (
+        f"{THUMBNAIL_CACHE_DIR}/{content_hash[:2]}/{content_hash}_{millis}_{width}.jpg"
+    )
+
+
+def quantize_position(position, duration):
+    """
+    Rounds `position` to THUMBNAIL_TIME_STEP so nearby requests share cache
+    entries, and keeps it inside the source.
+    """
+    step = settings.THUMBNAIL_TIME_STEP
+    position = round(max(position, 0) / step) * step
+    if duration:
+        # Ostatnia klatka zaczyna się przed końcem pliku
+        position = min(position, max(duration - step, 0))
+    return round(position, 3)
+
+
+def thumbnail_at(asset, position, width):
+    """
+    Path of a `width`-wide JPEG of the frame of `asset` at `position`
+    seconds, extracted on first use (from the preview proxy when it is
+    wide enough) and kept in an LRU disk cache that render workers prune
+    in the background.
+    """
+    try:
+        info = probe(asset.path, content_hash=asset.digest)
+    except ProbeError as e:
+        raise ThumbnailError(f"Cannot read {asset}: {e}")
+    position = quantize_position(position, info.duration)
+    name = thumbnail_cache_name(asset.digest, position, width)
+    target = default_storage.path(name)
+
+    if os.path.exists(target):
+        # Czas modyfikacji pełni rolę czasu ostatniego użycia (atime bywa wyłączony)
+        os.utime(target)
+        return target
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    partial = f"{target}.{os.getpid()}.part.jpg"
+    try:
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-nostdin",
+                "-v",
+                "error",
+                # -ss przed -i: skok do klatki kluczowej i dekodowanie do celu
+                "-ss",
+                f"{position:.3f}",
+                "-i",
+                # Proxy z gęstymi klatkami kluczowymi dekoduje się dużo szybciej
+                preview_source(asset, info, width),
+                "-frames:v",
+                "1",
+                "-vf",
+                f"scale={width}:-2",
+                "-q:v",
+                "4",
+                "-y",
+                partial,
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        if not os.path.exists(partial):
+            raise ThumbnailError(f"No frame of {asset} at {position}s")
+        os.replace(partial, target)
+    except subprocess.CalledProcessError as e:
+        raise ThumbnailError(f"Could not extract frame of {asset}: {e.stderr}")
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return target
+
+
+def prune_thumbnail_cache(max_bytes=None):
+    """
+    Removes the least recently used cached thumbnails until the cache fits
+    in `max_bytes` (THUMBNAIL_CACHE_MAX_BYTES). Returns the number removed.
+    """
+    max_bytes = settings.THUMBNAIL_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    root = default_storage.path(THUMBNAIL_CACHE_DIR)
+    entries = []
+    total = 0
+    for folder, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(".part.jpg"):
+                continue
+            path = os.path.join(folder, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+            total += stat.st_size
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,158 @@
+# subtitle_cues.py
+import json
+import re
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .models import SubtitleCue
+from .transcripts import format_timestamp
+
+SUBTITLES_NAME = "subtitles.srt"
+# Wiersze zapisywane i eksportowane partiami tej wielkości
+BATCH_SIZE = 500
+TIMING = re.compile(
+    r"(\d+):(\d{2}):(\d{2})[,.](\d{3})\s*-->\s*(\d+):(\d{2}):(\d{2})[,.](\d{3})"
+)
+
+
+def subtitles_name(project_id):
+    return f"edit_files_{project_id}/{SUBTITLES_NAME}"
+
+
+def timing_ms(hours, minutes, seconds, milliseconds):
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(
+        milliseconds
+    )
+
+
+def parse_srt(lines):
+    """
+    Yields (start_ms, end_ms, text) for every cue of SRT (or WebVTT) text
+    read line by line; cue numbers and empty cues are skipped.
+    """
+    timing, text = None, []
+    for line in lines:
+        line = line.strip().lstrip("\ufeff")
+        match = TIMING.search(line)
+        if match:
+            if timing and text:
+                yield (*timing, "\n".join(text))
+            groups = match.groups()
+            timing, text = (timing_ms(*groups[:4]), timing_ms(*groups[4:])), []
+        elif not line:
+            if timing and text:
+                yield (*timing, "\n".join(text))
+            timing, text = None, []
+        elif timing is not None:
+            text.append(line)
+    if timing and text:
+        yield (*timing, "\n".join(text))
+
+
+def import_srt(project_id, lines):
+    """Replaces the cues of a project with those of SRT `lines`."""
+    count = 0
+    with transaction.atomic():
+        SubtitleCue.objects.filter(project_id=project_id).delete()
+        batch = []
+        for start_ms, end_ms, text in parse_srt(lines):
+            batch.append(
+                SubtitleCue(
+                    project_id=project_id,
+                    start_ms=start_ms,
+                    end_ms=min(
+                        max(end_ms, start_ms), start_ms + settings.SUBTITLE_MAX_CUE_MS
+                    ),
+                    text=text,
+                )
+            )
+            if len(batch) == BATCH_SIZE:
+                count += len(SubtitleCue.objects.bulk_create(batch))
+                batch = []
+        count += len(SubtitleCue.objects.bulk_create(batch))
+    return count
+
+
+def import_project_subtitles(project_id, name=None):
+    """
+    Loads the SRT file `name` (by default the project's subtitles.srt) into
+    the cue store.
+    """
+    name = name or subtitles_name(project_id)
+    with default_storage.open(name, "rb") as f:
+        lines = (line.decode("utf-8", errors="replace") for line in f)
+        return import_srt(project_id, lines)
+
+
+def project_cues(project_id):
+    """
+    Cues of a project, imported from its subtitles.srt on first use by
+    projects created before the cue store existed.
+    """
+    cues = SubtitleCue.objects.filter(project_id=project_id)
+    if not cues.exists() and default_storage.exists(subtitles_name(project_id)):
+        import_project_subtitles(project_id)
+    return cues
+
+
+def cues_in_window(project_id, start_ms, end_ms):
+    """
+    Cues of a project overlapping [start_ms, end_ms), in time order. No cue
+    is longer than SUBTITLE_MAX_CUE_MS, so only cues starting at most that
+    long before the window can reach into it: the query is one bounded
+    range of the (project_id, start_ms) index, however late the window.
+    """
+    return (
+        project_cues(project_id)
+        .filter(
+            start_ms__gte=max(start_ms - settings.SUBTITLE_MAX_CUE_MS, 0),
+            start_ms__lt=end_ms,
+            end_ms__gt=start_ms,
+        )
+        .order_by("start_ms", "id")
+    )
+
+
+def timed_rows(cues):
+    return (
+        cues.order_by("start_ms", "id")
+        .values_list("start_ms", "end_ms", "text")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+
+
+def srt_chunks(cues):
+    for index, (start_ms, end_ms, text) in enumerate(timed_rows(cues), start=1):
+        start = format_timestamp(start_ms / 1000)
+        end = format_timestamp(end_ms / 1000)
+        yield f"{index}\n{start} --> {end}\n{text}\n\n"
+
+
+def vtt_chunks(cues):
+    yield "WEBVTT\n\n"
+    for start_ms, end_ms, text in timed_rows(cues):
+        start = format_timestamp(start_ms / 1000).replace(",", ".")
+        end = format_timestamp(end_ms / 1000).replace(",", ".")
+        yield f"{start} --> {end}\n{text}\n\n"
+
+
+def json_chunks(cues):
+    yield '{"cues": ['
+    rows = (
+        cues.order_by("start_ms", "id")
+        .values("id", "start_ms", "end_ms", "text", "words")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    for index, row in enumerate(rows):
+        yield ("," if index else "") + json.dumps(row)
+    yield "]}"
+
+
+# Format eksportu: (generator fragmentów, typ treści, rozszerzenie pliku)
+EXPORT_FORMATS = {
+    "srt": (srt_chunks, "application/x-subrip; charset=utf-8", "srt"),
+    "vtt": (vtt_chunks, "text/vtt; charset=utf-8", "vtt"),
+    "json": (json_chunks, "application/json", "json"),
+}
@@ -1,15 +1,119 @@
 import tempfile
+from django.conf import settings
 from django.test import TestCase, Client, override_settings
+from django.core.management import call_command
 from django.urls import reverse
+from django.utils import timezone
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.files.storage import default_storage
 from rest_framework import status
 from rest_framework.test import APIClient
-from .models import Video, Project
+from backend.gpu_info import GPUInfo, load_gpu_devices
+from .cutting import (
+    CUT_MODE_COPY,
+    CUT_MODE_REENCODE,
+    CUT_MODE_SMART,
+    ClipSpec,
+    clip_audio_command,
+    group_clips,
+    multi_clip_command,
+    parse_timestamp,
+    plan_cut,
+    reencode_command,
+    subtitles_filter,
+)
+from . import encoders
+from .encoders import (
+    EncoderChoice,
+    candidates,
+    choose_encoder,
+    parse_encoders,
+    parse_hwaccels,
+    quality_args,
+    run_with_fallback,
+    select_encoder,
+)
+from .scheduler import (
+    TASK_ENCODE,
+    TASK_TRANSCRIBE,
+    DeviceScheduler,
+    build_slots,
+    whisper_devices,
+)
+from .assets import hash_file
+from .jobs import claim_next_job, enqueue_render, run_job, worker_loop
+from .uploads import claim_next_upload, finalize_session
+from .media_tasks import claim_next_media_task, run_media_task
+from .media_probe import PROBE_VERSION, MediaInfo, parse_rate, probe, probe_cache
+from .models import (
+    Video,
+    Project,
+    RenderJob,
+    MediaProbe,
+    Asset,
+    ProjectFile,
+    MediaTask,
+    SubtitleCue,
+    Transcript,
+    UploadSession,
+)
 from .serializers import VideoSerializer, ProjectSerializer
+from .media_index import MediaIndex, read_scene_cuts
+from .highlights import top_candidates, video_hop_features
+from .proxies import preview_source, proxy_name
+from .sprites import generate_sprites, prune_thumbnail_cache
+from .waveform import Waveform, build_waveform
+from .progress import (
+    STAGE_ENCODE,
+    STAGE_PROBE,
+    STAGE_TRANSCRIBE,
+    STAGE_WRITE_SRT,
+    FFmpegProgress,
+    ProgressReporter,
+    parse_progress,
+    run_ffmpeg,
+)
+from .parallel_transcription import (
+    frame_energy_db,
+    merge_results,
+    stream_energy_db,
+    transcribe_long,
+    voiced_chunks,
+    worker_count,
+)
+from .transcripts import (
+    TRANSCRIPT_VERSION,
+    compact_result,
+    format_timestamp,
+    segments_to_srt,
+    slice_transcript,
+    source_transcript,
+)
+from .subtitle_cues import cues_in_window, import_srt, parse_srt, project_cues
+from .views import parse_subtitle_style
+from .transcription import (
+    ModelRegistry,
+    TranscriptionServer,
+    TranscriptionServiceUnavailable,
+    call_service,
+    transcribe,
+)
 
 
 import os
+import hashlib
+import io
+import json
+import subprocess
+import threading
+import time
+import uuid
+from datetime import timedelta
+from fractions import Fraction
+from unittest import mock
+
+import numpy as np
 
 video_path = os.path.join(default_storage.location, "temp", "test_video.mp4")
 
@@ -86,7 +190,8 @@ class VideoViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn("fps", response.json())
 
-    def test_process_video(self):
+    @mock.patch("backend_api.render.select_encoder", return_value=encoders.FALLBACK)
+    def test_process_video(self, select_encoder):
         with open(video_path, "rb") as file:
             video_file = SimpleUploadedFile(
                 "test_video.mp4", file.read(), content_type="video/mp4"
@@ -102,9 +207,126 @@ class VideoViewTests(TestCase):
                 "add_subtitles": "false",
             },
         )
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["job_id"]
+
+        run_job(claim_next_job())
+        response = self.client.get(f"/api/render-jobs/{job_id}/")
         self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], RenderJob.STATUS_DONE)
+        self.assertEqual(response.json()["progress"], 100)
         self.assertIn("video_url", response.json())
 
+    @mock.patch("backend_api.render.select_encoder", return_value=encoders.FALLBACK)
+    def test_concurrent_jobs_render_into_separate_workspaces(self, select_encoder):
+        with override_settings(MEDIA_ROOT=tempfile.mkdtemp()):
+            with open(video_path, "rb") as file:
+                content = file.read()
+            jobs = []
+            for end_time in ["00:00:01", "00:00:02"]:
+                source = default_storage.save("temp/source.mp4", ContentFile(content))
+                jobs.append(
+                    enqueue_render(
+                        source,
+                        start_time="00:00:00",
+                        end_time=end_time,
+                        cut_mode="copy",
+                    )
+                )
+            for _ in jobs:
+                run_job(claim_next_job())
+            for job in jobs:
+                job.refresh_from_db()
+            self.assertEqual(
+                [job.video_path for job in jobs],
+                [f"renders/job_{job.pk}/processed_video.mp4" for job in jobs],
+            )
+
+            project = Project.objects.create(title="Two renders")
+            response = self.client.post(
+                "/api/finalize-project-files/",
+                {
+                    "project_id": project.pk,
+                    "job_id": jobs[1].pk,
+                    "video_name": "my clip.mp4",
+                },
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 200)
+            jobs[1].refresh_from_db()
+            self.assertEqual(jobs[1].video_path, f"edit_files_{project.pk}/my_clip.mp4")
+            self.assertTrue(default_storage.exists(jobs[1].video_path))
+            # Wynik drugiego zadania pozostaje nietknięty
+            self.assertTrue(default_storage.exists(jobs[0].video_path))
+
+            response = self.client.post(
+                "/api/finalize-project-files/",
+                {"project_id": project.pk},
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 400)
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_jobs_finalized_into_one_project_keep_their_files(self):
+        project = Project.objects.create(title="Two renders")
+        jobs = []
+        for index in range(2):
+            job = enqueue_render("temp/x.mp4", start_time="0", end_time="1")
+            video = default_storage.save(
+                f"renders/job_{job.pk}/processed_video.mp4",
+                ContentFile(f"video {index}".encode()),
+            )
+            subtitles = default_storage.save(
+                f"renders/job_{job.pk}/subtitles.srt",
+                ContentFile(
+                    f"1\n00:00:00,000 --> 00:00:01,000\nclip {index}\n".encode()
+                ),
+            )
+            RenderJob.objects.filter(pk=job.pk).update(
+                status=RenderJob.STATUS_DONE, video_path=video, subtitles_path=subtitles
+            )
+            jobs.append(job)
+
+        for job in jobs:
+            response = self.client.post(
+                "/api/finalize-project-files/",
+                {"project_id": project.pk, "job_id": job.pk},
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 200)
+        for index, job in enumerate(jobs):
+            job.refresh_from_db()
+            self.assertEqual(
+                job.video_path, f"edit_files_{project.pk}/processed_video_{job.pk}.mp4"
+            )
+            self.assertEqual(
+                job.subtitles_path, f"edit_files_{project.pk}/subtitles_{job.pk}.srt"
+            )
+            with default_storage.open(job.video_path) as f:
+                self.assertEqual(f.read(), f"video {index}".encode())
+
+        # Zajęta nazwa podana przez użytkownika nie jest nadpisywana
+        job = enqueue_render("temp/x.mp4", start_time="0", end_time="1")
+        video = default_storage.save(
+            f"renders/job_{job.pk}/processed_video.mp4", ContentFile(b"video 2")
+        )
+        RenderJob.objects.filter(pk=job.pk).update(
+            status=RenderJob.STATUS_DONE, video_path=video
+        )
+        response = self.client.post(
+            "/api/finalize-project-files/",
+            {
+                "project_id": project.pk,
+                "job_id": job.pk,
+                "video_name": f"processed_video_{jobs[0].pk}.mp4",
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 409)
+        with default_storage.open(jobs[0].video_path) as f:
+            self.assertEqual(f.read(), b"video 0")
+        self.assertTrue(default_storage.exists(video))
+
 
 class ProjectViewTests(TestCase):
     def setUp(self):
@@ -116,4 +338,1867 @@ class ProjectViewTests(TestCase):
     def test_project_list(self):
         response = self.client.get("/api/projects/")
         self.assertEqual(response.status_code, 200)
-        self.assertIn("Test Project", response.json()[0]["title"])
+        self.assertIn("Test Project", response.json()["results"][0]["title"])
+
+    def test_project_detail_lists_its_videos(self):
+        Video.objects.create(title="Clip", file="videos/a.mp4", project=self.project)
+        Video.objects.create(title="Elsewhere", file="videos/b.mp4")
+
+        response = self.client.get(f"/api/projects/{self.project.pk}/")
+        self.assertEqual(
+            [video["title"] for video in response.json()["videos"]], ["Clip"]
+        )
+
+
+class ListingTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.project = Project.objects.create(title="Podcast")
+        for index in range(5):
+            Video.objects.create(
+                title=f"Episode {index}",
+                file=f"videos/{index}.mp4",
+                project=self.project if index % 2 else None,
+            )
+
+    def test_cursor_pages_cover_every_video_newest_first(self):
+        titles, url = [], "/api/videos/?page_size=2"
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page["results"]), 2)
+            titles += [video["title"] for video in page["results"]]
+            url = page["next"]
+        self.assertEqual(titles, [f"Episode {index}" for index in range(4, -1, -1)])
+
+    def test_filters_and_search(self):
+        page = self.client.get(f"/api/videos/?project={self.project.pk}").json()
+        self.assertEqual(
+            [video["title"] for video in page["results"]], ["Episode 3", "Episode 1"]
+        )
+        self.assertEqual(page["results"][0]["project_title"], "Podcast")
+
+        page = self.client.get("/api/videos/?search=podcast").json()
+        self.assertEqual(len(page["results"]), 2)
+        page = self.client.get("/api/projects/?title=pod").json()
+        self.assertEqual([p["title"] for p in page["results"]], ["Podcast"])
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        with self.assertNumQueries(1):
+            self.client.get("/api/videos/")
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class VideoMetadataTests(TestCase):
+    def test_upload_is_probed_in_background_and_filterable(self):
+        with open(video_path, "rb") as file:
+            response = self.client.post(
+                "/api/videos/",
+                {"title": "Source", "file": SimpleUploadedFile("a b.mp4", file.read())},
+            )
+        self.assertEqual(response.status_code, 201)
+        video = Video.objects.get(pk=response.json()["id"])
+        self.assertEqual(video.file.name, "videos/a_b.mp4")
+        self.assertEqual(video.content_hash, video.asset.digest)
+        self.assertIsNone(video.probe_version)
+
+        task = run_media_task(claim_next_media_task("test:1"))
+        self.assertEqual(task.kind, MediaTask.KIND_METADATA)
+        video.refresh_from_db()
+        self.assertEqual((video.width, video.height), (640, 360))
+        self.assertAlmostEqual(video.duration, 15, delta=0.1)
+        self.assertEqual(Fraction(video.fps_num, video.fps_den), probe(video_path).fps)
+        self.assertEqual(video.video_codec, "h264")
+        self.assertEqual(video.size, os.path.getsize(video_path))
+
+        def titles(params):
+            page = self.client.get("/api/videos/", params).json()
+            return [entry["title"] for entry in page["results"]]
+
+        self.assertEqual(titles({"min_height": 360, "min_duration": 10}), ["Source"])
+        self.assertEqual(titles({"min_height": 2160, "min_duration": 3600}), [])
+
+    def test_same_content_uploaded_twice_gets_metadata(self):
+        with open(video_path, "rb") as file:
+            content = file.read()
+
+        def upload(name):
+            response = self.client.post(
+                "/api/videos/",
+                {"title": name, "file": SimpleUploadedFile(f"{name}.mp4", content)},
+            )
+            self.assertEqual(response.status_code, 201)
+            return Video.objects.get(pk=response.json()["id"])
+
+        first = upload("first")
+        run_media_task(claim_next_media_task("test:1"))
+        # Zasób jest wspólny, a jego zadanie już się wykonało
+        second = upload("second")
+        self.assertEqual(second.asset_id, first.asset_id)
+        self.assertEqual(second.height, 360)
+        self.assertEqual(second.probe_version, PROBE_VERSION)
+        self.assertAlmostEqual(second.duration, 15, delta=0.1)
+        task = MediaTask.objects.get(asset=first.asset, kind=MediaTask.KIND_METADATA)
+        self.assertEqual(task.status, RenderJob.STATUS_DONE)
+
+        # Bez zbadanego wiersza zadanie wykonuje się ponownie
+        Video.objects.all().delete()
+        third = upload("third")
+        task.refresh_from_db()
+        self.assertEqual(task.status, RenderJob.STATUS_QUEUED)
+        self.assertEqual(
+            run_media_task(claim_next_media_task("test:1")).kind,
+            MediaTask.KIND_METADATA,
+        )
+        third.refresh_from_db()
+        self.assertEqual(third.height, 360)
+
+    def test_replacing_the_file_describes_the_new_content(self):
+        with open(video_path, "rb") as file:
+            response = self.client.post(
+                "/api/videos/",
+                {"title": "Clip", "file": SimpleUploadedFile("a.mp4", file.read())},
+            )
+        video = Video.objects.get(pk=response.json()["id"])
+        old_name = video.file.name
+        # Jak po wykonanym zadaniu metadanych
+        Video.objects.filter(pk=video.pk).update(
+            height=360, probe_version=PROBE_VERSION
+        )
+        MediaTask.objects.update(status=RenderJob.STATUS_DONE)
+
+        client = APIClient()
+        url = f"/api/videos/{video.pk}/"
+        response = client.patch(url, {"title": "Renamed"}, format="multipart")
+        self.assertEqual(response.status_code, 200)
+        video.refresh_from_db()
+        self.assertEqual((video.title, video.height), ("Renamed", 360))
+
+        response = client.patch(
+            url, {"file": SimpleUploadedFile("b.mp4", b"new")}, format="multipart"
+        )
+        self.assertEqual(response.status_code, 200)
+        video.refresh_from_db()
+        self.assertEqual(video.asset.digest, hashlib.sha256(b"new").hexdigest())
+        self.assertEqual((video.size, video.content_hash), (3, video.asset.digest))
+        self.assertIsNone(video.height)
+        self.assertIsNone(video.probe_version)
+        self.assertFalse(default_storage.exists(old_name))
+        self.assertEqual(
+            set(
+                MediaTask.objects.filter(
+                    asset=video.asset, status=RenderJob.STATUS_QUEUED
+                ).values_list("kind", flat=True)
+            ),
+            {MediaTask.KIND_METADATA, MediaTask.KIND_PROXY},
+        )
+
+    def test_backfill_command(self):
+        with open(video_path, "rb") as file:
+            name = default_storage.save("videos/old.mp4", ContentFile(file.read()))
+        video = Video.objects.create(title="Old", file=name)
+        broken = Video.objects.create(title="Gone", file="videos/missing.mp4")
+
+        out, err = io.StringIO(), io.StringIO()
+        call_command("backfill_video_metadata", stdout=out, stderr=err)
+        self.assertIn("Updated 1 video(s), 1 failed", out.getvalue())
+        self.assertIn(f"Video #{broken.pk}", err.getvalue())
+        video.refresh_from_db()
+        self.assertEqual(video.height, 360)
+        self.assertEqual(video.content_hash, hash_file(video_path))
+
+        # Zbadane wiersze są pomijane przy kolejnym uruchomieniu
+        call_command("backfill_video_metadata", stdout=out, stderr=io.StringIO())
+        self.assertIn("Updated 0 video(s), 1 failed", out.getvalue())
+
+
+class RenderJobQueueTests(TestCase):
+    def _enqueue(self, source="temp/missing.mp4"):
+        return enqueue_render(
+            source,
+            start_time="00:00:00",
+            end_time="00:00:05",
+            resolution="720p",
+        )
+
+    def test_queue_position(self):
+        first = self._enqueue()
+        second = self._enqueue()
+        self.assertEqual(first.queue_position, 1)
+        self.assertEqual(second.queue_position, 2)
+
+        claim_next_job("test:1")
+        second.refresh_from_db()
+        self.assertEqual(second.queue_position, 1)
+
+    def test_claim_next_job_is_fifo_and_exclusive(self):
+        first = self._enqueue()
+        second = self._enqueue()
+
+        claimed = claim_next_job("test:1")
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual(claimed.status, RenderJob.STATUS_RUNNING)
+        self.assertEqual(claimed.worker, "test:1")
+        self.assertEqual(claim_next_job("test:2").pk, second.pk)
+        self.assertIsNone(claim_next_job("test:3"))
+
+    def test_failed_job_reports_error(self):
+        job = self._enqueue()
+        with self.assertLogs("backend_api.jobs", "ERROR") as logs:
+            run_job(claim_next_job())
+        self.assertIn("Traceback", logs.output[0])
+
+        response = self.client.get(f"/api/render-jobs/{job.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], RenderJob.STATUS_FAILED)
+        self.assertTrue(response.json()["error"])
+        self.assertIsNone(response.json()["video_url"])
+
+    def test_unknown_job_returns_404(self):
+        response = self.client.get("/api/render-jobs/999/")
+        self.assertEqual(response.status_code, 404)
+
+
+class FakeWhisperModel:
+    def __init__(self, name, device=None):
+        self.name = name
+        self.device = device
+
+    def transcribe(self, path, **options):
+        return {"text": f"{self.name}:{os.path.basename(path)}", "segments": []}
+
+
+class ModelRegistryTests(TestCase):
+    def setUp(self):
+        self.loads = []
+
+        def loader(name):
+            self.loads.append(name)
+            return FakeWhisperModel(name)
+
+        self.registry = ModelRegistry(
+            3000, loader=loader, sizes={"tiny": 1000, "base": 1000, "small": 2000}
+        )
+
+    def test_models_stay_resident(self):
+        self.registry.transcribe("/tmp/a.wav", "tiny")
+        self.registry.transcribe("/tmp/b.wav", "tiny")
+        self.assertEqual(self.loads, ["tiny"])
+
+    def test_least_recently_used_model_is_evicted(self):
+        self.registry.get("tiny")
+        self.registry.get("base")
+        self.registry.get("tiny")
+        self.registry.get("small")
+
+        self.assertEqual(self.registry.loaded(), ["tiny", "small"])
+        self.assertLessEqual(self.registry.used_mb(), 3000)
+
+    def test_models_in_use_are_not_evicted(self):
+        with self.registry.acquire("tiny"), self.registry.acquire("small"):
+            loader = threading.Thread(target=self.registry.get, args=("base",))
+            loader.start()
+            loader.join(0.2)
+            # Budżet jest pełny, a oba modele są w użyciu
+            self.assertTrue(loader.is_alive())
+            self.assertEqual(self.loads, ["tiny", "small"])
+        loader.join(1)
+        self.assertFalse(loader.is_alive())
+        self.assertEqual(self.loads, ["tiny", "small", "base"])
+        self.assertLessEqual(self.registry.used_mb(), 3000)
+
+    def test_resident_models_are_served_while_another_loads(self):
+        self.registry.get("tiny")
+        release = threading.Event()
+
+        def slow_loader(name):
+            release.wait(1)
+            return FakeWhisperModel(name)
+
+        self.registry.loader = slow_loader
+        loader = threading.Thread(target=self.registry.get, args=("small",))
+        loader.start()
+        try:
+            result = self.registry.transcribe("/tmp/a.wav", "tiny")
+            self.assertTrue(loader.is_alive())
+        finally:
+            release.set()
+            loader.join(1)
+        self.assertEqual(result["text"], "tiny:a.wav")
+        self.assertEqual(self.registry.loaded(), ["small", "tiny"])
+
+    def test_held_pool_counts_against_the_budget(self):
+        closed = []
+        with self.registry.hold("pool:tiny", 2000, lambda: "pool", closed.append):
+            self.assertEqual(self.registry.used_mb(), 2000)
+        self.registry.get("small")
+        # Bezczynna pula usunięta jak model, z zamknięciem procesów
+        self.assertEqual(closed, ["pool"])
+        self.assertEqual(self.registry.loaded(), ["small"])
+
+
+class TranscriptionServiceTests(TestCase):
+    def setUp(self):
+        socket_dir = tempfile.mkdtemp()
+        self.address = os.path.join(socket_dir, "transcription.sock")
+        registry = ModelRegistry(2000, loader=FakeWhisperModel)
+        self.server = TranscriptionServer(registry, address=self.address)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        for _ in range(50):
+            if os.path.exists(self.address):
+                break
+            time.sleep(0.05)
+
+    def tearDown(self):
+        self.server.close()
+        self.thread.join(1)
+
+    def test_transcribe_through_service(self):
+        with override_settings(TRANSCRIPTION_SERVICE_ADDRESS=self.address):
+            result = transcribe("/tmp/clip.mp4", "base")
+            reply = call_service({"op": "status"})
+        self.assertEqual(result["text"], "base:clip.mp4")
+        self.assertEqual(reply["loaded"], ["base"])
+
+    def test_warmup_loads_models_on_the_transcription_devices(self):
+        loads = []
+
+        def loader(name, device=None):
+            loads.append((name, device))
+            return FakeWhisperModel(name, device)
+
+        self.server.registry.loader = loader
+        with override_settings(
+            TRANSCRIPTION_SERVICE_ADDRESS=self.address,
+            GPU_DEVICES=[NVIDIA_GPU, dict(NVIDIA_GPU, vendor_index=1)],
+        ):
+            reply = call_service({"op": "warmup", "models": ["tiny"]})
+            self.assertEqual(reply["loaded"], ["tiny@cuda:0", "tiny@cuda:1"])
+            # Zadanie na slocie GPU korzysta z wczytanego modelu
+            result = transcribe("/tmp/clip.mp4", "tiny", device="cuda:1")
+        self.assertEqual(result["text"], "tiny:clip.mp4")
+        self.assertEqual(loads, [("tiny", "cuda:0"), ("tiny", "cuda:1")])
+
+    def test_long_transcriptions_run_in_the_service(self):
+        info = MediaInfo(None, 30.0, None, None, [])
+        with override_settings(TRANSCRIPTION_SERVICE_ADDRESS=self.address), mock.patch(
+            "backend_api.media_probe.probe", return_value=info
+        ):
+            result = transcribe_long("/tmp/long.mp4", "base")
+        self.assertEqual(result["text"], "base:long.mp4")
+        self.assertEqual(self.server.registry.loaded(), ["base"])
+
+    @override_settings(
+        TRANSCRIPTION_MAX_WORKERS=8, TRANSCRIPTION_WORKERS=6, RENDER_WORKERS=2
+    )
+    def test_local_pools_share_the_worker_limit(self):
+        with mock.patch(
+            "backend_api.parallel_transcription.run_transcription"
+        ) as run_transcription:
+            transcribe_long("/tmp/long.mp4", "base")
+        # Bez usługi każdy z dwóch procesów renderujących dostaje połowę limitu
+        self.assertEqual(run_transcription.call_args[0][5], 4)
+        self.assertEqual(worker_count(2, 4), 4)
+
+    def test_service_unavailable(self):
+        with self.assertRaises(TranscriptionServiceUnavailable):
+            call_service({"op": "status"}, address=self.address + ".missing")
+
+
+FFPROBE_OUTPUT = {
+    "streams": [
+        {
+            "index": 0,
+            "codec_type": "video",
+            "codec_name": "h264",
+            "width": 1920,
+            "height": 1080,
+            "avg_frame_rate": "30000/1001",
+            "r_frame_rate": "30000/1001",
+            "side_data_list": [{"rotation": -90}],
+        },
+        {
+            "index": 1,
+            "codec_type": "audio",
+            "codec_name": "aac",
+            "sample_rate": "48000",
+            "channels": 2,
+            "channel_layout": "stereo",
+            "avg_frame_rate": "0/0",
+        },
+    ],
+    "format": {"format_name": "mov,mp4", "duration": "61.5", "bit_rate": "8000000"},
+}
+
+
+class MediaProbeTests(TestCase):
+    def setUp(self):
+        probe_cache.clear()
+        fd, self.path = tempfile.mkstemp(suffix=".mp4")
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"not really a video")
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_parse_ffprobe_json(self):
+        info = MediaInfo.from_ffprobe(FFPROBE_OUTPUT)
+        self.assertEqual(info.fps, Fraction(30000, 1001))
+        self.assertEqual(info.rotation, 270)
+        self.assertEqual((info.width, info.height), (1080, 1920))
+        self.assertEqual(info.audio.channel_layout, "stereo")
+        self.assertEqual(info.total_frames, 1843)
+        self.assertIsNone(parse_rate("0/0"))
+
+    def test_probe_runs_ffprobe_once(self):
+        completed = subprocess.CompletedProcess(
+            [], 0, stdout=json.dumps(FFPROBE_OUTPUT), stderr=""
+        )
+        with mock.patch(
+            "backend_api.media_probe.subprocess.run", return_value=completed
+        ) as run:
+            first = probe(self.path)
+            second = probe(self.path)
+            self.assertIs(first, second)
+            self.assertEqual(run.call_count, 1)
+
+            # Po restarcie procesu wynik pochodzi z bazy danych
+            probe_cache.clear()
+            self.assertEqual(probe(self.path).fps, Fraction(30000, 1001))
+            self.assertEqual(run.call_count, 1)
+        self.assertEqual(MediaProbe.objects.count(), 1)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class AssetRegistryTests(TestCase):
+    def _upload(self, content=b"same bytes", name="clip.mp4"):
+        return self.client.post(
+            "/api/assets/",
+            {"file": SimpleUploadedFile(name, content, content_type="video/mp4")},
+        )
+
+    def test_upload_is_deduplicated_by_digest(self):
+        first = self._upload()
+        second = self._upload(name="copy.mp4")
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.json()["asset_id"], second.json()["asset_id"])
+        self.assertEqual(Asset.objects.count(), 1)
+
+        digest = first.json()["digest"]
+        response = self.client.get("/api/assets/lookup/", {"digest": digest})
+        self.assertEqual(response.json()["asset_id"], first.json()["asset_id"])
+
+    def test_project_files_are_hardlinks(self):
+        asset_id = self._upload().json()["asset_id"]
+        for _ in range(2):
+            response = self.client.post(
+                "/api/upload-file/",
+                {"asset_id": asset_id, "project_id": 7, "name": "source.mp4"},
+            )
+            self.assertEqual(response.status_code, 201)
+
+        asset = Asset.objects.get(pk=asset_id)
+        linked = default_storage.path("edit_files_7/source.mp4")
+        self.assertTrue(os.path.samefile(asset.path, linked))
+        self.assertEqual(default_storage.listdir("edit_files_7")[1], ["source.mp4"])
+
+    def test_render_from_asset_needs_no_upload(self):
+        asset_id = self._upload().json()["asset_id"]
+        response = self.client.post(
+            "/api/process-video/",
+            {
+                "asset_id": asset_id,
+                "start_time": "0",
+                "end_time": "1",
+                "resolution": "720p",
+                "enhance_audio": "false",
+                "add_subtitles": "false",
+            },
+        )
+        self.assertEqual(response.status_code, 202)
+        job = RenderJob.objects.get(pk=response.json()["job_id"])
+        self.assertEqual(job.asset_id, asset_id)
+        self.assertEqual(job.source, Asset.objects.get(pk=asset_id).blob)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ResumableUploadTests(TestCase):
+    content = bytes(range(256)) * 40
+
+    def _put_chunk(self, upload_id, index, chunk_size=4096):
+        offset = index * chunk_size
+        return self.client.generic(
+            "PUT",
+            f"/api/uploads/{upload_id}/chunks/{index}/?offset={offset}",
+            self.content[offset : offset + chunk_size],
+            content_type="application/octet-stream",
+        )
+
+    def _create(self, **extra):
+        response = self.client.post(
+            "/api/uploads/",
+            {"filename": "stream.mp4", "size": len(self.content), **extra},
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()["upload_id"]
+
+    def test_chunks_in_any_order_then_finalize(self):
+        upload_id = self._create(project_id=3)
+        self.assertEqual(self._put_chunk(upload_id, 2).status_code, 200)
+        self.assertEqual(self._put_chunk(upload_id, 0).status_code, 200)
+
+        state = self.client.get(f"/api/uploads/{upload_id}/").json()
+        self.assertEqual(state["received_ranges"], [[0, 4096], [8192, 10240]])
+        self.assertEqual(state["missing_ranges"], [[4096, 8192]])
+        response = self.client.post(f"/api/uploads/{upload_id}/finalize/")
+        self.assertEqual(response.status_code, 400)
+
+        self._put_chunk(upload_id, 1)
+        response = self.client.post(
+            f"/api/uploads/{upload_id}/finalize/",
+            {"sha256": hashlib.sha256(self.content).hexdigest()},
+        )
+        # Haszowanie odbywa się w procesie roboczym, nie w żądaniu
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], UploadSession.STATUS_QUEUED)
+        finalize_session(claim_next_upload("test:1"))
+
+        response = self.client.get(f"/api/uploads/{upload_id}/")
+        self.assertEqual(response.json()["status"], UploadSession.STATUS_COMPLETE)
+        asset = Asset.objects.get(pk=response.json()["asset_id"])
+        with open(asset.path, "rb") as f:
+            self.assertEqual(f.read(), self.content)
+        project_file = default_storage.path("edit_files_3/stream.mp4")
+        self.assertTrue(os.path.samefile(asset.path, project_file))
+        self.assertFalse(default_storage.exists(f"uploads/{upload_id}.part"))
+
+    def test_chunk_outside_declared_size_is_rejected(self):
+        upload_id = self._create()
+        response = self._put_chunk(upload_id, 3)
+        self.assertEqual(response.status_code, 400)
+
+    def test_checksum_mismatch_fails_in_the_worker(self):
+        upload_id = self._create()
+        for index in range(3):
+            self._put_chunk(upload_id, index)
+        self.client.post(f"/api/uploads/{upload_id}/finalize/", {"sha256": "0" * 64})
+        finalize_session(claim_next_upload("test:1"))
+
+        state = self.client.get(f"/api/uploads/{upload_id}/").json()
+        self.assertEqual(state["status"], UploadSession.STATUS_FAILED)
+        self.assertEqual(state["error"], "Checksum mismatch")
+        self.assertFalse(Asset.objects.exists())
+
+    def test_declared_size_is_limited(self):
+        with override_settings(UPLOAD_MAX_SIZE=len(self.content) - 1):
+            response = self.client.post(
+                "/api/uploads/", {"filename": "big.mp4", "size": len(self.content)}
+            )
+        self.assertEqual(response.status_code, 400)
+
+    def test_abandoned_sessions_expire(self):
+        idle_id = self._create()
+        active_id = self._create()
+        UploadSession.objects.filter(pk=idle_id).update(
+            updated_at=timezone.now() - timedelta(days=2)
+        )
+        UploadSession.objects.filter(pk=active_id).update(
+            updated_at=timezone.now() - timedelta(days=2)
+        )
+        self._put_chunk(active_id, 0)
+
+        call_command("expire_uploads", max_age=24 * 3600, stdout=io.StringIO())
+        self.assertEqual(
+            list(UploadSession.objects.values_list("pk", flat=True)),
+            [uuid.UUID(active_id)],
+        )
+        self.assertFalse(default_storage.exists(f"uploads/{idle_id}.part"))
+        self.assertTrue(default_storage.exists(f"uploads/{active_id}.part"))
+
+
+def make_media_info(width=1280, height=720, codec="h264", pix_fmt="yuv420p"):
+    return MediaInfo.from_ffprobe(
+        {
+            "streams": [
+                {
+                    "index": 0,
+                    "codec_type": "video",
+                    "codec_name": codec,
+                    "pix_fmt": pix_fmt,
+                    "width": width,
+                    "height": height,
+                    "avg_frame_rate": "30/1",
+                }
+            ],
+            "format": {"duration": "10800"},
+        }
+    )
+
+
+class CutPlanTests(TestCase):
+    keyframes = [9000.0, 9002.0, 9004.0, 9006.0]
+
+    def test_parse_timestamp(self):
+        self.assertEqual(parse_timestamp("02:30:00"), 9000.0)
+        self.assertEqual(parse_timestamp("01:15.5"), 75.5)
+        self.assertEqual(parse_timestamp("12.25"), 12.25)
+
+    def test_smart_cut_copies_whole_gops(self):
+        plan = plan_cut(
+            "src.mp4", make_media_info(), 9001.0, 9005.0, 1280, keyframes=self.keyframes
+        )
+        self.assertEqual(plan.mode, CUT_MODE_SMART)
+        self.assertEqual((plan.copy_start, plan.copy_end), (9002.0, 9004.0))
+
+    def test_keyframe_aligned_cut_is_pure_copy(self):
+        plan = plan_cut(
+            "src.mp4", make_media_info(), 9002.0, 9005.0, 1280, keyframes=[9002.0]
+        )
+        self.assertEqual(plan.mode, CUT_MODE_COPY)
+
+    def test_scaling_or_other_codec_reencodes(self):
+        for info, resolution in (
+            (make_media_info(), 720),
+            (make_media_info(codec="hevc"), 1280),
+            (make_media_info(pix_fmt="yuv420p10le"), 1280),
+        ):
+            plan = plan_cut(
+                "src.mp4", info, 9001.0, 9005.0, resolution, keyframes=self.keyframes
+            )
+            self.assertEqual(plan.mode, CUT_MODE_REENCODE)
+
+    def test_reencode_seeks_on_input(self):
+        plan = plan_cut("src.mp4", make_media_info(), 9000.0, 9030.0, 720)
+        cmd = reencode_command("src.mp4", "out.mp4", plan, "libx264")
+        self.assertLess(cmd.index("-ss"), cmd.index("-i"))
+        self.assertEqual(cmd[cmd.index("-t") + 1], "30.000000")
+        self.assertEqual(cmd[-1], "out.mp4")
+
+
+class BatchRenderTests(TestCase):
+    def test_nearby_clips_share_one_pass(self):
+        specs = [
+            ClipSpec(i, start, end, "720:-1", f"clip_{i}.mp4")
+            for i, (start, end) in enumerate([(10, 20), (3600, 3630), (25, 40)])
+        ]
+        groups = group_clips(specs, max_gap=60)
+        self.assertEqual([[s.key for s in g] for g in groups], [[0, 2], [1]])
+        self.assertEqual(len(group_clips(specs, max_gap=60, max_outputs=1)), 3)
+
+    def test_multi_clip_command_decodes_once(self):
+        specs = [
+            ClipSpec(0, 10, 20, "720:-1", "a.mp4"),
+            ClipSpec(1, 15, 40, "-1:1080", "b.mp4", "highpass=f=200, lowpass=f=3000"),
+        ]
+        cmd = multi_clip_command("src.mp4", specs, "libx264")
+        self.assertEqual(cmd.count("-i"), 1)
+        self.assertEqual(cmd[cmd.index("-ss") + 1], "10.000000")
+        graph = cmd[cmd.index("-filter_complex") + 1]
+        self.assertIn("split=2[v0][v1]", graph)
+        self.assertIn("trim=start=5.000000:end=30.000000", graph)
+        self.assertIn("highpass=f=200,lowpass=f=3000[aout1]", graph)
+        self.assertEqual(cmd[-1], "b.mp4")
+
+    @mock.patch("backend_api.render.select_encoder", return_value=encoders.FALLBACK)
+    def test_batch_render_writes_every_clip(self, select_encoder):
+        with open(video_path, "rb") as file:
+            video_file = SimpleUploadedFile(
+                "test_video.mp4", file.read(), content_type="video/mp4"
+            )
+        clips = [
+            {"start_time": "00:00:01", "end_time": "00:00:03", "resolution": "480p"},
+            {"start_time": "2", "end_time": "4", "enhance_audio": True},
+        ]
+        response = self.client.post(
+            "/api/batch-render/", {"video": video_file, "clips": json.dumps(clips)}
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["clips"], 2)
+
+        run_job(claim_next_job())
+        data = self.client.get(response.json()["status_url"]).json()
+        self.assertEqual(data["status"], RenderJob.STATUS_DONE)
+        self.assertEqual(
+            [clip["status"] for clip in data["clips"]], [RenderJob.STATUS_DONE] * 2
+        )
+        info = probe(default_storage.path(f"renders/job_{data['id']}/clip_00.mp4"))
+        self.assertAlmostEqual(info.duration, 2, delta=0.1)
+        self.assertEqual(info.width, 480)
+
+    def test_invalid_clips_are_rejected(self):
+        for clips in (
+            "[]",
+            "not json",
+            json.dumps([{"start_time": "5", "end_time": "1"}]),
+        ):
+            response = self.client.post(
+                "/api/batch-render/",
+                {"asset_id": "1", "clips": clips},
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+WHISPER_RESULT = {
+    "language": "en",
+    "segments": [
+        {
+            "start": 0.0,
+            "end": 2.0,
+            "text": " Hello there.",
+            "words": [
+                {"start": 0.0, "end": 0.8, "word": " Hello"},
+                {"start": 0.9, "end": 2.0, "word": " there."},
+            ],
+        },
+        {
+            "start": 2.5,
+            "end": 4.0,
+            "text": " General Kenobi.",
+            "words": [
+                {"start": 2.5, "end": 3.2, "word": " General"},
+                {"start": 3.3, "end": 4.0, "word": " Kenobi."},
+            ],
+        },
+    ],
+}
+
+
+class TranscriptCacheTests(TestCase):
+    def test_format_timestamp_keeps_milliseconds(self):
+        self.assertEqual(format_timestamp(3723.456), "01:02:03,456")
+        self.assertEqual(format_timestamp(59.9996), "00:01:00,000")
+
+    def test_slice_shifts_and_trims_segments(self):
+        data = compact_result(WHISPER_RESULT)
+        segments = slice_transcript(data, 1.0, 3.5)
+        self.assertEqual(
+            segments,
+            [
+                {"start": 0.0, "end": 1.0, "text": "there."},
+                {"start": 1.5, "end": 2.2, "text": "General"},
+            ],
+        )
+        self.assertEqual(
+            segments_to_srt(segments).splitlines()[:3],
+            ["1", "00:00:00,000 --> 00:00:01,000", "there."],
+        )
+
+    def test_whisper_runs_once_per_source(self):
+        with mock.patch(
+            "backend_api.transcripts.transcribe_long", return_value=WHISPER_RESULT
+        ) as run:
+            first = source_transcript("source.mp4", "ab" * 32, "tiny")
+            second = source_transcript("source.mp4", "ab" * 32, "tiny")
+        run.assert_called_once()
+        self.assertTrue(run.call_args.kwargs["word_timestamps"])
+        self.assertEqual(first, second)
+        self.assertEqual(len(slice_transcript(second, 0, 10)), 2)
+
+
+class ParallelTranscriptionTests(TestCase):
+    def test_audio_is_split_at_silences_and_silent_chunks_dropped(self):
+        rate = 16000
+        rng = np.random.default_rng(0)
+        speech = lambda seconds: rng.uniform(-0.5, 0.5, int(seconds * rate))
+        silence = lambda seconds: np.zeros(int(seconds * rate))
+        audio = np.concatenate(
+            [speech(55), silence(2), speech(50), silence(70), speech(20)]
+        ).astype(np.float32)
+
+        chunks = voiced_chunks(frame_energy_db(audio, rate), chunk_seconds=50)
+        # Pierwszy podział trafia w ciszę po 55 s
+        self.assertEqual(chunks[0][0], 0)
+        self.assertTrue(55 <= chunks[1][0] <= 57)
+        self.assertIsNone(chunks[-1][1])
+        # Fragmenty złożone z samej ciszy są pomijane
+        for offset, duration in chunks[:-1]:
+            start = int(offset * rate)
+            samples = audio[start : start + int(duration * rate)]
+            self.assertGreater(np.abs(samples).max(), 0)
+        length = len(audio) / rate
+        covered = sum(duration for _, duration in chunks[:-1])
+        self.assertLess(covered + length - chunks[-1][0], length)
+
+    def test_energy_is_computed_from_streamed_blocks(self):
+        rng = np.random.default_rng(1)
+        audio = (rng.uniform(-0.5, 0.5, 16000 * 7 + 123) * 32767).astype(np.int16)
+        # Bloki nie pokrywają się z granicami ramek ani próbek
+        energy = stream_energy_db(io.BytesIO(audio.tobytes()), block_size=1001)
+        expected = frame_energy_db(audio.astype(np.float32) / 32768.0)
+        np.testing.assert_allclose(energy, expected, rtol=1e-5)
+
+    def test_merge_shifts_segments_and_words(self):
+        merged = merge_results(
+            [WHISPER_RESULT, {**WHISPER_RESULT, "language": None}], [0.0, 100.0]
+        )
+        self.assertEqual(len(merged["segments"]), 4)
+        self.assertEqual(merged["segments"][2]["start"], 100.0)
+        self.assertEqual(merged["segments"][3]["words"][1]["end"], 104.0)
+        self.assertEqual([s["id"] for s in merged["segments"]], [0, 1, 2, 3])
+        self.assertEqual(merged["language"], "en")
+
+
+FFMPEG_PROGRESS = """frame=120
+fps=48.00
+bitrate=1500.2kbits/s
+out_time_us=4000000
+out_time_ms=4000000
+speed=2.5x
+progress=continue
+frame=250
+fps=N/A
+bitrate=N/A
+out_time_ms=10000000
+speed=N/A
+progress=end
+"""
+
+
+class RenderProgressTests(TestCase):
+    def test_parse_ffmpeg_progress(self):
+        first, last = parse_progress(FFMPEG_PROGRESS.splitlines())
+        self.assertEqual(first.out_time, 4.0)
+        self.assertEqual((first.fps, first.speed), (48.0, 2.5))
+        self.assertEqual(first.bitrate, "1500.2kbits/s")
+        self.assertEqual(first.fraction(10), 0.4)
+        self.assertIsNone(last.speed)
+        self.assertTrue(last.finished)
+        self.assertEqual(last.fraction(20), 1.0)
+
+    def test_reporter_maps_stages_onto_job_progress(self):
+        job = enqueue_render("temp/x.mp4", start_time="0", end_time="10")
+        stages = [STAGE_PROBE, STAGE_ENCODE, STAGE_TRANSCRIBE, STAGE_WRITE_SRT]
+        progress = ProgressReporter(job, stages)
+        progress.start(STAGE_ENCODE)
+        sample = next(parse_progress(FFMPEG_PROGRESS.splitlines()))
+        with mock.patch("backend_api.progress.PROGRESS_INTERVAL", 0):
+            progress.ffmpeg_callback(10)(sample.fraction(10), sample)
+
+        job.refresh_from_db()
+        self.assertEqual(job.stage, STAGE_ENCODE)
+        self.assertEqual(job.progress, 33.2)
+        self.assertEqual(job.speed, 2.5)
+        self.assertEqual(job.eta_seconds, 2.4)
+
+    def test_burned_subtitle_stages_only_move_forward(self):
+        job = enqueue_render("temp/x.mp4", start_time="0", end_time="10")
+        stages = [STAGE_PROBE, STAGE_TRANSCRIBE, STAGE_WRITE_SRT, STAGE_ENCODE]
+        progress = ProgressReporter(job, stages)
+        seen = []
+        for stage in stages:
+            progress.start(stage)
+            seen.append(progress.job.progress)
+        progress.ffmpeg_callback(10)(1.0, FFmpegProgress(finished=True))
+        seen.append(progress.job.progress)
+        self.assertEqual(seen, sorted(seen))
+        self.assertEqual(len(set(seen)), len(seen))
+        self.assertEqual(seen[-1], 100)
+
+    def test_events_stream_progress_then_done(self):
+        job = enqueue_render("temp/x.mp4", start_time="0", end_time="10")
+        RenderJob.objects.filter(pk=job.pk).update(
+            status=RenderJob.STATUS_RUNNING, stage=STAGE_ENCODE, progress=50
+        )
+        response = self.client.get(f"/api/render-jobs/{job.pk}/events/")
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = iter(response.streaming_content)
+
+        event = next(events).decode()
+        self.assertTrue(event.startswith("event: progress\n"))
+        self.assertEqual(json.loads(event.split("data: ")[1])["progress"], 50)
+
+        RenderJob.objects.filter(pk=job.pk).update(status=RenderJob.STATUS_DONE)
+        event = next(events).decode()
+        self.assertTrue(event.startswith("event: done\n"))
+        self.assertEqual(
+            json.loads(event.split("data: ")[1])["status"], RenderJob.STATUS_DONE
+        )
+
+    @override_settings(SSE_POLL_INTERVAL=0, SSE_RETRY_MS=1000)
+    def test_stream_ends_with_reconnect_after_max_duration(self):
+        job = enqueue_render("temp/x.mp4", start_time="0", end_time="10")
+        with override_settings(SSE_MAX_STREAM_SECONDS=0):
+            response = self.client.get(f"/api/render-jobs/{job.pk}/events/")
+            events = [event.decode() for event in response.streaming_content]
+        self.assertEqual(len(events), 2)
+        self.assertTrue(events[1].startswith("retry: 1000\nevent: reconnect\n"))
+
+    @override_settings(SSE_POLL_INTERVAL=0, SSE_RETRY_MS=1000)
+    def test_stream_of_a_stalled_job_ends(self):
+        # Zadanie w kolejce, ale żaden proces roboczy go nie pobiera
+        job = enqueue_render("temp/x.mp4", start_time="0", end_time="10")
+        with override_settings(SSE_STALE_JOB_SECONDS=0):
+            response = self.client.get(f"/api/render-jobs/{job.pk}/events/")
+            events = [event.decode() for event in response.streaming_content]
+        self.assertTrue(events[0].startswith("event: progress\n"))
+        self.assertTrue(events[-1].startswith("retry: 1000\nevent: stalled\n"))
+        self.assertEqual(
+            json.loads(events[-1].split("data: ")[1])["status"],
+            RenderJob.STATUS_QUEUED,
+        )
+
+
+NVIDIA_GPU = {
+    "name": "GeForce RTX 3060",
+    "vendor": "NVIDIA",
+    "codec": "h264_nvenc",
+    "vram": 12000,
+    "whisper_model": "large",
+}
+
+
+class HardwareDetectionTests(TestCase):
+    def setUp(self):
+        self.cache_path = os.path.join(tempfile.mkdtemp(), "gpu_info.json")
+
+    def test_no_gpu_falls_back_to_cpu_profile(self):
+        with mock.patch.object(GPUInfo, "get_gpu_info", return_value=[]):
+            devices = load_gpu_devices(self.cache_path, ttl=60)
+        self.assertEqual(devices[0]["codec"], "libx264")
+        self.assertEqual(devices[0]["whisper_model"], "tiny")
+
+    def test_cached_profile_skips_detection_until_ttl(self):
+        with mock.patch.object(
+            GPUInfo, "get_gpu_info", return_value=[NVIDIA_GPU]
+        ) as detect:
+            load_gpu_devices(self.cache_path, ttl=60)
+            self.assertEqual(load_gpu_devices(self.cache_path, ttl=60), [NVIDIA_GPU])
+            self.assertEqual(detect.call_count, 1)
+
+            os.utime(self.cache_path, (0, 0))
+            load_gpu_devices(self.cache_path, ttl=60)
+            load_gpu_devices(self.cache_path, ttl=60, refresh=True)
+            self.assertEqual(detect.call_count, 3)
+
+    def test_hardware_encoder_is_preferred(self):
+        bmc = {"name": "ASPEED", "codec": "libx264", "vram": 0, "whisper_model": "tiny"}
+        with mock.patch.object(GPUInfo, "get_gpu_info", return_value=[bmc, NVIDIA_GPU]):
+            devices = load_gpu_devices(self.cache_path, ttl=60)
+        self.assertEqual(devices[0]["codec"], "h264_nvenc")
+
+    def test_gpu_info_endpoint(self):
+        response = self.client.get("/api/gpu-info/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("codec", response.json())
+
+
+FFMPEG_ENCODERS = """Encoders:
+ V..... = Video
+ A..... = Audio
+ ------
+ V....D libx264              libx264 H.264 / AVC / MPEG-4 AVC (codec h264)
+ V....D h264_nvenc           NVIDIA NVENC H.264 encoder (codec h264)
+ V....D h264_qsv             H.264 / AVC (Intel Quick Sync Video) (codec h264)
+ A....D aac                  AAC (Advanced Audio Coding)
+"""
+
+
+class EncoderSelectionTests(TestCase):
+    def test_parse_capabilities(self):
+        self.assertEqual(
+            parse_encoders(FFMPEG_ENCODERS), ["libx264", "h264_nvenc", "h264_qsv"]
+        )
+        self.assertEqual(
+            parse_hwaccels("Hardware acceleration methods:\ncuda\nvaapi\n\n"),
+            ["cuda", "vaapi"],
+        )
+
+    def test_hardware_encoders_need_their_hwaccel(self):
+        found = candidates(parse_encoders(FFMPEG_ENCODERS), ["cuda"])
+        codecs = [choice.codec for choice in found]
+        self.assertEqual(codecs[0], "h264_nvenc")
+        self.assertNotIn("h264_qsv", codecs)
+        self.assertIn("libx264", codecs)
+
+    def test_fastest_encoder_above_quality_floor_wins(self):
+        results = [
+            EncoderChoice("h264_nvenc", fps=400, psnr=45, bitrate_kbps=5000),
+            EncoderChoice("libx264", "ultrafast", fps=170, psnr=56, bitrate_kbps=9500),
+            EncoderChoice("libx264", "veryfast", fps=60, psnr=47, bitrate_kbps=4250),
+            EncoderChoice("libx264", "fast", fps=34, psnr=49.6, bitrate_kbps=4650),
+            EncoderChoice("h264_qsv", error="Device creation failed"),
+        ]
+        self.assertEqual(choose_encoder(results, 40, 0.8).codec, "h264_nvenc")
+        # Sprzętowy koder poniżej progu jakości: wygrywa najszybszy preset
+        # libx264, który nie marnuje bitrate'u
+        self.assertEqual(choose_encoder(results, 46, 0.8).preset, "veryfast")
+        self.assertIs(choose_encoder(results[4:], 40, 0.8), encoders.FALLBACK)
+
+    def test_codec_specific_quality_args(self):
+        self.assertIn("-cq", quality_args("h264_nvenc"))
+        self.assertNotIn("-crf", quality_args("h264_nvenc"))
+        self.assertIn("-global_quality", quality_args("h264_qsv"))
+        self.assertEqual(
+            quality_args("libx264", "veryfast"), ["-crf", "18", "-preset", "veryfast"]
+        )
+
+    def test_selection_only_reads_the_saved_benchmark(self):
+        cache = os.path.join(tempfile.mkdtemp(), "benchmark.json")
+        nvenc = EncoderChoice("h264_nvenc", fps=400, psnr=45, bitrate_kbps=5000)
+        with override_settings(ENCODER_BENCHMARK_CACHE=cache), mock.patch.dict(
+            encoders._selected, clear=True
+        ), mock.patch("backend_api.encoders.run_benchmarks") as run_benchmarks:
+            self.assertIs(select_encoder(["h264_nvenc"]), encoders.FALLBACK)
+            # Wyniki zapisane później (np. przez benchmark_encoders) są użyte
+            encoders.save_benchmarks({"results": [nvenc.to_dict()]}, cache)
+            self.assertEqual(select_encoder(["h264_nvenc"]).codec, "h264_nvenc")
+        run_benchmarks.assert_not_called()
+
+    def test_failed_hardware_encode_retries_with_libx264(self):
+        used = []
+
+        def encode(choice):
+            used.append(choice.codec)
+            if choice.codec != "libx264":
+                raise subprocess.CalledProcessError(1, ["ffmpeg"])
+            return "ok"
+
+        self.assertEqual(run_with_fallback(encode, EncoderChoice("h264_nvenc")), "ok")
+        self.assertEqual(used, ["h264_nvenc", "libx264"])
+
+
+class DeviceSchedulerTests(TestCase):
+    def scheduler(self, devices, gpu_tasks=2, cpu_tasks=1):
+        slots = build_slots(devices, gpu_tasks=gpu_tasks, cpu_tasks=cpu_tasks)
+        return DeviceScheduler(slots, vram_for={"large": 10000, "tiny": 1000})
+
+    def test_cpu_only_host_gets_one_cpu_slot(self):
+        scheduler = self.scheduler([GPUInfo().cpu_profile()], cpu_tasks=2)
+        self.assertEqual([slot.codec for slot in scheduler.slots], ["libx264"])
+
+        first = scheduler.try_acquire(TASK_ENCODE)
+        second = scheduler.try_acquire(TASK_TRANSCRIBE, 1000)
+        self.assertTrue(first.is_cpu and second.is_cpu)
+        self.assertIsNone(scheduler.try_acquire(TASK_ENCODE))
+
+        scheduler.release(first)
+        self.assertEqual(scheduler.try_acquire(TASK_ENCODE), first)
+
+    def test_encodes_spread_over_every_device(self):
+        second_gpu = dict(NVIDIA_GPU, name="RTX A4000", vendor_index=1)
+        scheduler = self.scheduler([NVIDIA_GPU, second_gpu])
+
+        # Najmniej obciążony slot: obie karty, CPU, potem znów karty
+        slots = [scheduler.try_acquire(TASK_ENCODE) for _ in range(5)]
+        self.assertEqual([slot.index for slot in slots], [0, 1, 2, 0, 1])
+        self.assertEqual(slots[1].encoder_args("h264_nvenc"), ["-gpu", "1"])
+        self.assertEqual(slots[2].encoder_args("libx264"), [])
+        self.assertIsNone(scheduler.try_acquire(TASK_ENCODE))
+
+    def test_transcription_respects_vram_and_stays_on_cuda(self):
+        small_gpu = dict(NVIDIA_GPU, name="GTX 1650", vram=4000, vendor_index=1)
+        scheduler = self.scheduler([NVIDIA_GPU, small_gpu], gpu_tasks=4)
+
+        slot = scheduler.try_acquire(TASK_TRANSCRIBE, 10000)
+        self.assertEqual(slot.whisper_device, "cuda:0")
+        # Model "large" nie zmieści się ponownie ani na mniejszej karcie, ani na CPU
+        self.assertIsNone(scheduler.try_acquire(TASK_TRANSCRIBE, 10000))
+        self.assertEqual(scheduler.try_acquire(TASK_TRANSCRIBE, 1000).index, 1)
+
+        with self.assertRaises(TimeoutError):
+            scheduler.acquire(TASK_TRANSCRIBE, 10000, timeout=0.05)
+        with self.assertRaises(RuntimeError):
+            scheduler.acquire(TASK_TRANSCRIBE, 20000)
+
+        scheduler.release(slot, 10000)
+        with scheduler.reserve(TASK_TRANSCRIBE, "large") as slot:
+            self.assertEqual(scheduler.status()[0]["reserved_mb"], 10000)
+        self.assertEqual(scheduler.status()[0]["reserved_mb"], 0)
+
+    def test_whisper_devices(self):
+        second_gpu = dict(NVIDIA_GPU, name="RTX A4000", vendor_index=1)
+        self.assertEqual(
+            whisper_devices([NVIDIA_GPU, second_gpu]), ["cuda:0", "cuda:1"]
+        )
+        # Bez karty CUDA Whisper działa na domyślnym urządzeniu
+        self.assertEqual(whisper_devices([]), [None])
+
+    def test_cards_without_hardware_encoder_are_skipped(self):
+        bmc = {"name": "ASPEED", "codec": "libx264", "vram": 0}
+        intel = {"name": "UHD 770", "vendor": "Intel", "codec": "h264_qsv"}
+        scheduler = self.scheduler([intel, bmc])
+        self.assertEqual(
+            [slot.codec for slot in scheduler.slots], ["h264_qsv", "libx264"]
+        )
+        # Bez karty CUDA Whisper działa na CPU
+        self.assertTrue(scheduler.try_acquire(TASK_TRANSCRIBE, 1000).is_cpu)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ProjectManifestTests(TestCase):
+    def manifest(self, project_id, **params):
+        headers = {}
+        if "etag" in params:
+            headers["HTTP_IF_NONE_MATCH"] = params.pop("etag")
+        return self.client.get(f"/api/projects/{project_id}/files/", params, **headers)
+
+    def test_uploaded_video_is_listed_with_metadata(self):
+        with open(video_path, "rb") as file:
+            video_file = SimpleUploadedFile(
+                "source.mp4", file.read(), content_type="video/mp4"
+            )
+        response = self.client.post(
+            "/api/upload-file/", {"file": video_file, "project_id": 3}
+        )
+        self.assertEqual(response.status_code, 201)
+
+        # Wpis od razu, metadane z zadania w tle
+        [entry] = self.manifest(3).json()["results"]
+        self.assertEqual(entry["size"], os.path.getsize(video_path))
+        self.assertIsNone(entry["width"])
+        while (task := claim_next_media_task("test:1")) is not None:
+            self.assertEqual(run_media_task(task).status, RenderJob.STATUS_DONE)
+
+        response = self.manifest(3)
+        self.assertEqual(response.status_code, 200)
+        [entry] = response.json()["results"]
+        self.assertEqual(entry["name"], "source.mp4")
+        self.assertEqual((entry["width"], entry["height"]), (640, 360))
+        self.assertEqual(entry["video_codec"], "h264")
+        self.assertAlmostEqual(entry["duration"], 15, delta=0.5)
+        self.assertEqual(entry["content_hash"], Asset.objects.get().digest)
+        self.assertTrue(default_storage.exists(ProjectFile.objects.get().thumbnail))
+
+        # Niezmieniony projekt: 304 bez treści
+        etag = response["ETag"]
+        self.assertEqual(self.manifest(3, etag=etag).status_code, 304)
+
+    def test_cursor_pagination_and_folder_sync(self):
+        for name in ["a.srt", "b.srt", "c.srt"]:
+            default_storage.save(f"edit_files_4/{name}", ContentFile(b"1\n"))
+
+        first = self.manifest(4, limit=2).json()
+        self.assertEqual([e["name"] for e in first["results"]], ["a.srt", "b.srt"])
+        self.assertEqual(first["count"], 3)
+        second = self.manifest(4, limit=2, cursor=first["next_cursor"]).json()
+        self.assertEqual([e["name"] for e in second["results"]], ["c.srt"])
+        self.assertIsNone(second["next_cursor"])
+
+        etag = self.manifest(4)["ETag"]
+        default_storage.delete("edit_files_4/b.srt")
+        response = self.manifest(4, etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [e["name"] for e in response.json()["results"]], ["a.srt", "c.srt"]
+        )
+        self.assertEqual(self.manifest(4, cursor="x").status_code, 400)
+
+    def test_folder_sync_only_stats_files(self):
+        name = default_storage.save("edit_files_6/a.srt", ContentFile(b"1\n"))
+        with mock.patch("backend_api.project_files.hash_file") as hash_file:
+            [entry] = self.manifest(6).json()["results"]
+        hash_file.assert_not_called()
+        self.assertEqual((entry["size"], entry["content_hash"]), (2, ""))
+
+        task = run_media_task(claim_next_media_task("test:1"))
+        self.assertEqual(task.kind, MediaTask.KIND_PROJECT_FILE)
+        self.assertEqual(task.status, RenderJob.STATUS_DONE)
+        [entry] = self.manifest(6).json()["results"]
+        self.assertEqual(entry["content_hash"], hashlib.sha256(b"1\n").hexdigest())
+        self.assertIsNone(claim_next_media_task("test:1"))
+
+        # Zmieniony plik: nowy wpis z stat() i ponownie zadanie w tle
+        with open(default_storage.path(name), "ab") as file:
+            file.write(b"00:00:00,000 --> 00:00:01,000\n")
+        [entry] = self.manifest(6).json()["results"]
+        self.assertEqual((entry["size"], entry["content_hash"]), (32, ""))
+        task.refresh_from_db()
+        self.assertEqual(task.status, RenderJob.STATUS_QUEUED)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class MediaServingTests(TestCase):
+    content = bytes(range(256)) * 8
+
+    def setUp(self):
+        self.name = default_storage.save("renders/job_1/clip.mp4", ContentFile(b""))
+        with open(default_storage.path(self.name), "wb") as f:
+            f.write(self.content)
+        self.url = f"/media/{self.name}"
+
+    def body(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(self.body(response), self.content)
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=100-199")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(
+            response["Content-Range"], f"bytes 100-199/{len(self.content)}"
+        )
+        self.assertEqual(self.body(response), self.content[100:200])
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-10")
+        self.assertEqual(self.body(response), self.content[-10:])
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=5000-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.content)}")
+
+    def test_conditional_requests(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["Cache-Control"], "no-cache")
+
+        # Plik zmienił się od pobrania fragmentu: cała treść zamiast zakresu
+        response = self.client.get(
+            self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_content_addressed_files_are_immutable(self):
+        name = default_storage.save("assets/ab/abcdef.mp4", ContentFile(b"blob"))
+        response = self.client.get(f"/media/{name}")
+        self.assertIn("immutable", response["Cache-Control"])
+
+    def test_offload_to_web_server(self):
+        with override_settings(MEDIA_ACCEL_REDIRECT="/protected-media/"):
+            response = self.client.get(self.url, HTTP_RANGE="bytes=0-9")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.name}")
+        self.assertEqual(response.content, b"")
+
+        self.assertEqual(self.client.get("/media/../db.sqlite3").status_code, 404)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class SpriteTests(TestCase):
+    def setUp(self):
+        with open(video_path, "rb") as file:
+            response = self.client.post(
+                "/api/assets/",
+                {"file": SimpleUploadedFile("source.mp4", file.read())},
+            )
+        self.asset = Asset.objects.get(pk=response.json()["asset_id"])
+        # Proxy kolejkowany przy przyjęciu pliku
+        run_media_task(claim_next_media_task("test:1"))
+
+    def test_sprite_sheets_are_generated_by_a_media_task(self):
+        url = f"/api/assets/{self.asset.pk}/sprites/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 202)
+        # Kolejne żądanie nie tworzy drugiego zadania
+        self.client.get(url)
+        self.assertEqual(
+            MediaTask.objects.filter(kind=MediaTask.KIND_SPRITES).count(), 1
+        )
+
+        task = run_media_task(claim_next_media_task("test:1"))
+        self.assertEqual(task.status, RenderJob.STATUS_DONE)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        levels = {level["interval"]: level for level in response.json()["levels"]}
+        # 15 s źródła: 8 kafelków co 2 s, jeden co 60 s, po jednym arkuszu
+        self.assertEqual(levels[2]["count"], 8)
+        self.assertEqual(levels[60]["count"], 1)
+        self.assertEqual(len(levels[2]["sheets"]), 1)
+        self.assertEqual((levels[2]["tile_width"], levels[2]["tile_height"]), (160, 90))
+
+        sheet = self.client.get(levels[2]["sheets"][0])
+        self.assertEqual(sheet.status_code, 200)
+        self.assertIn("immutable", sheet["Cache-Control"])
+        vtt = b"".join(self.client.get(levels[2]["vtt_url"]).streaming_content)
+        cues = vtt.decode().split("\n\n")[1:]
+        self.assertEqual(len([cue for cue in cues if cue]), 8)
+        self.assertIn("00:00:02.000 --> 00:00:04.000", vtt.decode())
+        self.assertIn("2s/sheet_0001.jpg#xywh=160,0,160,90", vtt.decode())
+
+    def test_thumbnail_at_timestamp_is_cached(self):
+        url = f"/api/assets/{self.asset.pk}/thumbnail/"
+        response = self.client.get(url, {"t": "3.04", "width": 160})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        [cached] = os.listdir(
+            default_storage.path(f"thumbcache/{self.asset.digest[:2]}")
+        )
+        self.assertTrue(cached.endswith("_3000_160.jpg"))
+
+        # Pobliski moment trafia w tę samą klatkę z pamięci podręcznej
+        with mock.patch("backend_api.sprites.subprocess.run") as run:
+            self.client.get(url, {"t": "2.98", "width": 160})
+        run.assert_not_called()
+
+        self.assertEqual(
+            self.client.get(url, {"t": "1", "width": 100}).status_code, 400
+        )
+        self.assertEqual(self.client.get(url, {"t": "x"}).status_code, 400)
+
+    def test_workers_prune_the_cache_in_the_background(self):
+        stop = threading.Event()
+        with mock.patch("backend_api.jobs.prune_thumbnail_cache") as prune:
+            with mock.patch(
+                "backend_api.jobs.claim_next_job", side_effect=lambda worker: stop.set()
+            ):
+                worker_loop(stop, poll_interval=0)
+        prune.assert_called_once_with()
+
+    def test_cache_evicts_least_recently_used(self):
+        folder = default_storage.path("thumbcache/ab")
+        os.makedirs(folder)
+        for index, name in enumerate(["old.jpg", "used.jpg", "new.jpg"]):
+            path = os.path.join(folder, name)
+            with open(path, "wb") as f:
+                f.write(b"x" * 100)
+            os.utime(path, ns=(index * 10**9, index * 10**9))
+        # Trafienie odświeża czas użycia
+        os.utime(os.path.join(folder, "used.jpg"))
+
+        self.assertEqual(prune_thumbnail_cache(max_bytes=200), 1)
+        self.assertEqual(sorted(os.listdir(folder)), ["new.jpg", "used.jpg"])
+
+
+class WaveformPyramidTests(TestCase):
+    def build(self, samples, samples_per_peak=10, bits=8):
+        folder = tempfile.mkdtemp()
+        target = os.path.join(folder, "waveform.bin")
+        pcm = (samples * 32767).astype("<i2").tobytes()
+        build_waveform(io.BytesIO(pcm), target, 1000, samples_per_peak, bits)
+        return target
+
+    def test_levels_halve_and_keep_extremes(self):
+        samples = np.sin(np.linspace(0, 200 * np.pi, 10037)) * 0.5
+        samples[5000] = -0.9
+        waveform = Waveform(self.build(samples))
+
+        counts = [peaks for peaks, _ in waveform.levels]
+        # 10037 próbek po 10: 1004 szczyty, dalej co połowę aż do jednego
+        self.assertEqual(counts[:3], [1004, 502, 251])
+        self.assertEqual(counts[-1], 1)
+        self.assertEqual(waveform.peaks_per_second(1), 50)
+
+        _, top = waveform.read(len(counts) - 1, 0, 1)
+        self.assertAlmostEqual(top[0, 0], -0.9 * 127, delta=1)
+        self.assertAlmostEqual(top[0, 1], 0.5 * 127, delta=1)
+        first, window = waveform.read(0, 495, 10)
+        self.assertEqual(first, 495)
+        self.assertAlmostEqual(window[:, 0].min(), -0.9 * 127, delta=1)
+
+    def test_block_size_does_not_change_the_result(self):
+        samples = np.random.default_rng(1).uniform(-1, 1, 20011)
+        whole = self.build(samples, bits=16)
+        with mock.patch("backend_api.waveform.BLOCK_PEAKS", 3):
+            blocks = self.build(samples, bits=16)
+        with open(whole, "rb") as a, open(blocks, "rb") as b:
+            self.assertEqual(a.read(), b.read())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class WaveformEndpointTests(TestCase):
+    def test_visible_window_at_requested_zoom(self):
+        with open(video_path, "rb") as file:
+            response = self.client.post(
+                "/api/assets/", {"file": SimpleUploadedFile("source.mp4", file.read())}
+            )
+        url = f"/api/assets/{response.json()['asset_id']}/waveform/"
+        run_media_task(claim_next_media_task("test:1"))  # proxy
+        self.assertEqual(self.client.get(url).status_code, 202)
+        task = run_media_task(claim_next_media_task("test:1"))
+        self.assertEqual(task.status, RenderJob.STATUS_DONE)
+
+        # Cały 15-sekundowy plik na 100 pikselach: poziom z >= 100 szczytami
+        data = self.client.get(url, {"start": 0, "end": 15, "width": 100}).json()
+        self.assertGreaterEqual(len(data["max"]), 100)
+        self.assertLess(len(data["max"]), 200)
+        self.assertEqual(len(data["min"]), len(data["rms"]))
+
+        data = self.client.get(url, {"start": 5, "end": 6, "level": 0}).json()
+        self.assertEqual(data["peaks_per_second"], 100)
+        self.assertEqual(data["start"], 5)
+        self.assertEqual(len(data["max"]), 100)
+        self.assertTrue(all(lo <= hi for lo, hi in zip(data["min"], data["max"])))
+
+        self.assertEqual(self.client.get(url, {"start": "nan"}).status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), PROXY_HEIGHT=180)
+class PreviewProxyTests(TestCase):
+    def test_proxy_is_made_first_and_preferred_for_previews(self):
+        with open(video_path, "rb") as file:
+            video_file = SimpleUploadedFile("source.mp4", file.read())
+        self.client.post("/api/upload-file/", {"file": video_file, "project_id": 5})
+        asset = Asset.objects.get()
+        url = f"/api/assets/{asset.pk}/preview/"
+        self.assertEqual(self.client.get(url).status_code, 202)
+
+        task = run_media_task(claim_next_media_task("test:1"))
+        self.assertEqual(task.kind, MediaTask.KIND_PROXY)
+        self.assertEqual(task.status, RenderJob.STATUS_DONE)
+
+        data = self.client.get(url).json()
+        self.assertTrue(data["proxy"])
+        self.assertEqual((data["width"], data["height"]), (320, 180))
+        proxy = probe(default_storage.path(proxy_name(asset.digest)))
+        self.assertEqual(proxy.height, 180)
+        self.assertAlmostEqual(proxy.duration, 15, delta=0.1)
+        [entry] = self.client.get("/api/projects/5/files/").json()["results"]
+        self.assertTrue(entry["proxy_url"].endswith(f"{asset.digest}.mp4"))
+
+        # Miniatury szersze niż proxy nadal z oryginału
+        info = probe(asset.path, content_hash=asset.digest)
+        self.assertNotEqual(preview_source(asset, info, 160), asset.path)
+        self.assertEqual(preview_source(asset, info, 640), asset.path)
+        # Renderowanie czyta oryginał
+        job = enqueue_render(asset.blob, asset=asset, start_time="0", end_time="1")
+        self.assertEqual(default_storage.path(job.source), asset.path)
+
+        # Arkusze miniatur powstają z proxy
+        with mock.patch("backend_api.sprites.subprocess.run") as run:
+            generate_sprites(asset)
+        self.assertIn(
+            default_storage.path(proxy_name(asset.digest)), run.call_args[0][0]
+        )
+
+    def test_proxy_is_queued_at_ingest(self):
+        with open(video_path, "rb") as file:
+            content = file.read()
+        self.client.post("/api/assets/", {"file": SimpleUploadedFile("a.mp4", content)})
+        self.client.post(
+            "/api/videos/",
+            {"title": "Clip", "file": SimpleUploadedFile("b.mp4", content)},
+        )
+        asset = Asset.objects.get()
+        self.assertEqual(
+            list(
+                MediaTask.objects.filter(asset=asset)
+                .order_by("id")
+                .values_list("kind", flat=True)
+            ),
+            [MediaTask.KIND_PROXY, MediaTask.KIND_METADATA],
+        )
+
+    @override_settings(PROXY_HEIGHT=540)
+    def test_small_sources_play_the_original(self):
+        with open(video_path, "rb") as file:
+            response = self.client.post(
+                "/api/assets/", {"file": SimpleUploadedFile("source.mp4", file.read())}
+            )
+        asset = Asset.objects.get(pk=response.json()["asset_id"])
+        data = self.client.get(f"/api/assets/{asset.pk}/preview/").json()
+        self.assertFalse(data["proxy"])
+        self.assertTrue(data["url"].endswith(asset.blob))
+
+
+class HighlightScoringTests(TestCase):
+    def features(self, hops=240):
+        rng = np.random.default_rng(2)
+        return {
+            "hop": 0.5,
+            "loudness": rng.uniform(-52, -48, hops).astype(np.float32),
+            "modulation": rng.uniform(0, 1, hops).astype(np.float32),
+            "motion": rng.uniform(0, 0.01, hops).astype(np.float32),
+            "cuts": np.zeros(hops, np.float32),
+        }
+
+    def test_loud_speech_with_action_ranks_first(self):
+        features = self.features()
+        # 40-50 s: głośna mowa, ruch i cięcia; 90-100 s: tylko ruch
+        features["loudness"][80:100] = -20
+        features["modulation"][80:100] = 6
+        features["motion"][80:100] = 0.2
+        features["cuts"][80:100:4] = 1
+        features["motion"][180:200] = 0.2
+
+        candidates = top_candidates(features, 10, 3)
+        self.assertEqual(len(candidates), 3)
+        (start, end, score, parts), second, third = candidates
+        self.assertEqual((start, end), (40, 50))
+        self.assertEqual(parts["speech"], 1)
+        self.assertEqual(second[:2], (90, 100))
+        self.assertGreater(score, second[2])
+        self.assertGreaterEqual(second[2], third[2])
+        # Propozycje nie nachodzą na siebie
+        spans = sorted(candidate[:2] for candidate in candidates)
+        for (_, end), (next_start, _) in zip(spans, spans[1:]):
+            self.assertLessEqual(end, next_start)
+
+    def test_window_longer_than_the_source(self):
+        [(start, end, _, _)] = top_candidates(self.features(20), 60, 5)
+        self.assertEqual((start, end), (0, 10))
+
+    def test_scene_cuts_span_block_boundaries(self):
+        frames = np.zeros((8, 16), np.uint8)
+        frames[4:] = 255
+        motion, cuts = video_hop_features(frames, None)
+        self.assertEqual(cuts.tolist(), [0, 0, 1, 0])
+        # Cięcie na granicy bloków: porównanie z ostatnią klatką poprzedniego
+        _, cuts = video_hop_features(frames[4:], frames[3:4].astype(np.int16))
+        self.assertEqual(cuts.tolist(), [1, 0])
+        self.assertEqual(motion.tolist(), [0, 0, 0.5, 0])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class HighlightEndpointTests(TestCase):
+    def test_analysis_runs_once_and_ranks_windows(self):
+        with open(video_path, "rb") as file:
+            response = self.client.post(
+                "/api/assets/", {"file": SimpleUploadedFile("source.mp4", file.read())}
+            )
+        url = f"/api/assets/{response.json()['asset_id']}/highlights/"
+        run_media_task(claim_next_media_task("test:1"))  # proxy
+        self.assertEqual(self.client.get(url).status_code, 202)
+        task = run_media_task(claim_next_media_task("test:1"))
+        self.assertEqual(task.kind, MediaTask.KIND_HIGHLIGHTS)
+        self.assertEqual(task.status, RenderJob.STATUS_DONE)
+
+        data = self.client.get(url, {"count": 3, "length": 5}).json()
+        self.assertEqual(data["duration"], 15)
+        self.assertEqual(len(data["candidates"]), 3)
+        scores = [candidate["score"] for candidate in data["candidates"]]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        for candidate in data["candidates"]:
+            self.assertEqual(candidate["end"] - candidate["start"], 5)
+            self.assertEqual(
+                set(candidate["features"]), {"loudness", "speech", "scene", "motion"}
+            )
+        self.assertFalse(claim_next_media_task("test:1"))
+
+        self.assertEqual(self.client.get(url, {"length": "inf"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"count": 0}).status_code, 400)
+
+
+class MediaIndexTests(TestCase):
+    def index(self, keyframes, scene_cuts):
+        folder = tempfile.mkdtemp()
+        np.save(os.path.join(folder, "keyframes.npy"), np.array(keyframes, float))
+        np.save(os.path.join(folder, "scenes.npy"), np.array(scene_cuts, float))
+        return MediaIndex(folder)
+
+    def test_lookups(self):
+        index = self.index([0, 2, 4, 6], [3.5])
+        self.assertEqual(index.keyframe_neighbours(2.5), (2, 4))
+        self.assertEqual(index.keyframe_neighbours(4), (4, 6))
+        self.assertEqual(index.keyframe_neighbours(7), (6, None))
+        self.assertEqual(index.nearest_keyframe(3.2), 4)
+        self.assertEqual(index.nearest_keyframe(-1), 0)
+        self.assertEqual(index.scene_cut_neighbours(1), (None, 3.5))
+        self.assertEqual(index.nearest_scene_cut(9), 3.5)
+        self.assertEqual(self.index([], []).nearest_scene_cut(1), None)
+
+    def test_keyframes_for_cut_plan_like_a_probe(self):
+        index = self.index(CutPlanTests.keyframes, [])
+        self.assertEqual(index.keyframes_for_cut(9001, 9005), [9000, 9002, 9004])
+        for mode in (CUT_MODE_SMART, CUT_MODE_COPY):
+            plan = plan_cut(
+                "src.mp4",
+                make_media_info(),
+                9001.0,
+                9005.0,
+                1280,
+                mode=mode,
+                keyframes=index.keyframes_for_cut(9001, 9005),
+            )
+            expected = plan_cut(
+                "src.mp4",
+                make_media_info(),
+                9001.0,
+                9005.0,
+                1280,
+                mode=mode,
+                keyframes=CutPlanTests.keyframes,
+            )
+            self.assertEqual(repr(plan), repr(expected))
+
+    def test_scene_cuts_are_detected(self):
+        path = os.path.join(tempfile.mkdtemp(), "cut.mp4")
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-v",
+                "error",
+                "-f",
+                "lavfi",
+                "-i",
+                "testsrc=size=320x180:rate=25:duration=2",
+                "-f",
+                "lavfi",
+                "-i",
+                "smptebars=size=320x180:rate=25:duration=2",
+                "-filter_complex",
+                "[0][1]concat=n=2:v=1",
+                path,
+            ],
+            check=True,
+        )
+        self.assertEqual(read_scene_cuts(path, 0.3).tolist(), [2])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class CutPointEndpointTests(TestCase):
+    @mock.patch("backend_api.render.select_encoder", return_value=encoders.FALLBACK)
+    def test_index_is_built_on_ingest_and_used_for_cuts(self, select_encoder):
+        with open(video_path, "rb") as file:
+            video_file = SimpleUploadedFile("source.mp4", file.read())
+        self.client.post("/api/upload-file/", {"file": video_file, "project_id": 7})
+        asset = Asset.objects.get()
+        url = f"/api/assets/{asset.pk}/cut-points/"
+        self.assertEqual(self.client.get(url).status_code, 202)
+        while (task := claim_next_media_task("test:1")) is not None:
+            self.assertEqual(run_media_task(task).status, RenderJob.STATUS_DONE)
+
+        # Klatka kluczowa co sekundę, bez zmian scen
+        data = self.client.get(url, {"t": 2.4}).json()
+        self.assertEqual(data["keyframes"], 15)
+        self.assertEqual(data["keyframe"], {"previous": 2, "next": 3, "nearest": 2})
+        self.assertEqual(data["scene_cut"]["nearest"], None)
+        self.assertEqual(self.client.get(url, {"t": "nan"}).status_code, 400)
+
+        job = enqueue_render(
+            asset.blob, asset=asset, start_time="2.5", end_time="4.5", cut_mode="copy"
+        )
+        with mock.patch(
+            "backend_api.cutting.find_keyframes", side_effect=AssertionError
+        ), mock.patch("backend_api.render.RESOLUTION_MAPPING", {"1080p": 640}):
+            job = run_job(claim_next_job())
+        self.assertEqual(job.status, RenderJob.STATUS_DONE, job.error)
+
+
+class BurnedSubtitleTests(TestCase):
+    def test_filter_escapes_path_and_style(self):
+        self.assertEqual(
+            subtitles_filter("/media/a:b'c.srt", {"FontSize": 20, "Outline": 2}),
+            "subtitles=filename=/media/a\\\\:b\\\\\\'c.srt"
+            ":force_style=FontSize=20\\,Outline=2",
+        )
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    @mock.patch("backend_api.render.select_encoder", return_value=encoders.FALLBACK)
+    def test_captions_cost_one_video_encode(self, select_encoder):
+        with open(video_path, "rb") as file:
+            source = default_storage.save("temp/source.mp4", ContentFile(file.read()))
+        job = enqueue_render(
+            source,
+            start_time="2",
+            end_time="5",
+            resolution="480p",
+            burn_subtitles=True,
+            subtitle_style={"FontSize": 24},
+        )
+
+        calls = []
+
+        def transcribe(path, *args, **kwargs):
+            calls.append(("transcribe", os.path.basename(path)))
+            return {"segments": [{"start": 0.5, "end": 2.0, "text": " Hello"}]}
+
+        def ffmpeg(cmd, *args, **kwargs):
+            calls.append(("ffmpeg", cmd))
+            return run_ffmpeg(cmd, *args, **kwargs)
+
+        with mock.patch(
+            "backend_api.render.transcribe_long", side_effect=transcribe
+        ), mock.patch("backend_api.render.run_ffmpeg", side_effect=ffmpeg), mock.patch(
+            "backend_api.cutting.run_ffmpeg", side_effect=ffmpeg
+        ):
+            job = run_job(claim_next_job())
+        self.assertEqual(job.status, RenderJob.STATUS_DONE, job.error)
+
+        # Dźwięk klipu bez obrazu, transkrypcja, potem jedno kodowanie obrazu
+        (_, audio), transcription, (_, encode) = calls
+        self.assertIn("-vn", audio)
+        self.assertEqual(audio[audio.index("-ss") + 1], "2.000000")
+        self.assertEqual(transcription, ("transcribe", "clip_audio.wav"))
+        video_filter = encode[encode.index("-vf") + 1]
+        self.assertIn("subtitles=filename=", video_filter)
+        self.assertIn("FontSize=24", video_filter)
+        self.assertIn("Outline=1.5", video_filter)
+
+        self.assertEqual(
+            default_storage.listdir(f"renders/job_{job.pk}")[1],
+            ["processed_video.mp4", "subtitles.srt"],
+        )
+        with default_storage.open(job.subtitles_path) as f:
+            self.assertIn("00:00:00,500 --> 00:00:02,000", f.read().decode())
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    @mock.patch("backend_api.render.select_encoder", return_value=encoders.FALLBACK)
+    def test_registered_source_transcribes_only_the_clip(self, select_encoder):
+        with open(video_path, "rb") as file:
+            response = self.client.post(
+                "/api/assets/", {"file": SimpleUploadedFile("source.mp4", file.read())}
+            )
+        asset = Asset.objects.get(pk=response.json()["asset_id"])
+        job = enqueue_render(
+            asset.blob,
+            asset=asset,
+            start_time="2",
+            end_time="5",
+            resolution="480p",
+            burn_subtitles=True,
+        )
+
+        transcribed = []
+
+        def transcribe(path, *args, **kwargs):
+            transcribed.append(os.path.basename(path))
+            return {"segments": [{"start": 0.5, "end": 2.0, "text": " Hello"}]}
+
+        with mock.patch(
+            "backend_api.render.transcribe_long", side_effect=transcribe
+        ), mock.patch(
+            "backend_api.render.clip_audio_command", wraps=clip_audio_command
+        ) as audio_command:
+            job = run_job(claim_next_job())
+        self.assertEqual(job.status, RenderJob.STATUS_DONE, job.error)
+
+        # Bez zapisanej transkrypcji: tylko dźwięk klipu, całość w tle
+        audio_command.assert_called_once()
+        self.assertEqual(transcribed, ["clip_audio.wav"])
+        self.assertTrue(
+            MediaTask.objects.filter(
+                asset=asset, kind=MediaTask.KIND_TRANSCRIPT
+            ).exists()
+        )
+
+        # Z zapisaną transkrypcją kolejny klip tylko ją przycina
+        Transcript.objects.create(
+            content_hash=asset.digest,
+            model_name=settings.GPU_LIST["whisper_model"],
+            transcript_version=TRANSCRIPT_VERSION,
+            data=compact_result(WHISPER_RESULT),
+        )
+        enqueue_render(
+            asset.blob, asset=asset, start_time="0", end_time="3", burn_subtitles=True
+        )
+        with mock.patch("backend_api.render.transcribe_long") as run:
+            job = run_job(claim_next_job())
+        self.assertEqual(job.status, RenderJob.STATUS_DONE, job.error)
+        run.assert_not_called()
+
+    def test_style_fields_are_validated(self):
+        for style in ('{"Bogus": 1}', '{"FontName": "A,B"}', "[1]", "{"):
+            with self.assertRaises(ValueError):
+                parse_subtitle_style(style)
+        self.assertEqual(parse_subtitle_style('{"FontSize": 30}'), {"FontSize": 30})
+        self.assertEqual(parse_subtitle_style(None), {})
+
+
+SRT_TRACK = """\ufeff1
+00:00:01,000 --> 00:00:02,500
+Hello
+
+2
+00:00:03,000 --> 00:00:04,000
+Two
+lines
+
+3
+00:01:00,000 --> 00:01:02,000
+Later
+"""
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class SubtitleCueTests(TestCase):
+    def setUp(self):
+        default_storage.save(
+            "edit_files_3/subtitles.srt", ContentFile(SRT_TRACK.encode())
+        )
+        self.url = "/api/projects/3/subtitles/cues/"
+
+    def tearDown(self):
+        default_storage.delete("edit_files_3/subtitles.srt")
+
+    def test_parse_srt(self):
+        cues = list(parse_srt(SRT_TRACK.replace("\n", "\r\n").splitlines()))
+        self.assertEqual(
+            cues,
+            [
+                (1000, 2500, "Hello"),
+                (3000, 4000, "Two\nlines"),
+                (60000, 62000, "Later"),
+            ],
+        )
+
+    def test_window_reaches_back_one_maximum_cue_length(self):
+        project_cues("3")
+        with override_settings(SUBTITLE_MAX_CUE_MS=10000):
+            SubtitleCue.objects.create(
+                project_id="3", start_ms=50000, end_ms=59500, text="Long"
+            )
+            window = cues_in_window("3", 59000, 61000)
+            self.assertEqual([cue.text for cue in window], ["Long", "Later"])
+            self.assertIn('"start_ms" >= 49000', str(window.query))
+
+            response = self.client.post(
+                self.url,
+                {"start_ms": 0, "end_ms": 10001, "text": "Too long"},
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_import_clamps_cues_to_the_maximum_length(self):
+        with override_settings(SUBTITLE_MAX_CUE_MS=1000):
+            import_srt("3", SRT_TRACK.splitlines())
+        self.assertEqual(
+            list(
+                SubtitleCue.objects.filter(project_id="3").values_list(
+                    "end_ms", flat=True
+                )
+            ),
+            [2000, 4000, 61000],
+        )
+
+    def test_window_query_and_single_cue_edits(self):
+        cues = self.client.get(self.url, {"start_ms": 2000, "end_ms": 3500}).json()
+        self.assertEqual([cue["text"] for cue in cues["cues"]], ["Hello", "Two\nlines"])
+        self.assertFalse(cues["truncated"])
+        self.assertEqual(SubtitleCue.objects.filter(project_id="3").count(), 3)
+
+        cue_url = f"{self.url}{cues['cues'][0]['id']}/"
+        response = self.client.patch(
+            cue_url,
+            {"text": "Hi", "words": [[1000, 1400, "Hi"]]},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["start_ms"], 1000)
+        response = self.client.patch(
+            cue_url, {"end_ms": 500}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(
+            self.url,
+            {"start_ms": 5000, "end_ms": 6000, "text": "New"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        later = self.client.get(self.url, {"start_ms": 59000}).json()["cues"]
+        self.assertEqual(
+            self.client.delete(f"{self.url}{later[0]['id']}/").status_code, 204
+        )
+        self.assertEqual(
+            self.client.get(self.url, {"start_ms": 5, "end_ms": 1}).status_code, 400
+        )
+
+        response = self.client.get("/api/projects/3/subtitles/export/srt/")
+        self.assertEqual(
+            b"".join(response.streaming_content).decode(),
+            "1\n00:00:01,000 --> 00:00:02,500\nHi\n\n"
+            "2\n00:00:03,000 --> 00:00:04,000\nTwo\nlines\n\n"
+            "3\n00:00:05,000 --> 00:00:06,000\nNew\n\n",
+        )
+        response = self.client.get("/api/projects/3/subtitles/export/vtt/")
+        vtt = b"".join(response.streaming_content).decode()
+        self.assertTrue(vtt.startswith("WEBVTT\n\n00:00:01.000 --> 00:00:02.500\nHi"))
+        response = self.client.get("/api/projects/3/subtitles/export/json/")
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(data["cues"][0]["words"], [[1000, 1400, "Hi"]])
+        self.assertEqual(len(data["cues"]), 3)
+        response = self.client.get("/api/projects/3/subtitles/export/ass/")
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get("/api/fetch-subtitles/", {"project_id": 3})
+        self.assertIn(
+            "00:00:03,000 --> 00:00:04,000",
+            b"".join(response.streaming_content).decode(),
+        )
+        response = self.client.get("/api/fetch-subtitles/", {"project_id": 4})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,353 @@
+# transcription.py
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from multiprocessing.connection import Client, Listener
+
+from django.conf import settings
+
+from backend.gpu_info import GPUInfo
+
+from .scheduler import whisper_devices
+
+logger = logging.getLogger(__name__)
+
+
+def whisper_model_sizes():
+    """
+    Approximate resident size (MB) of every Whisper model, taken from the VRAM
+    thresholds in GPUInfo.whisper_models. The smallest models still take ~1 GB.
+    """
+    return {model: max(min_vram, 1000) for min_vram, model in GPUInfo().whisper_models}
+
+
+def load_whisper_model(name, device=None):
+    # Import na żądanie: procesy web korzystające z usługi nie ładują torch
+    from whisper import load_model
+
+    return load_model(name, device=device)
+
+
+class _Entry:
+    """A registry slot: the model (once loaded) and the callers using it."""
+
+    def __init__(self, size, close=None):
+        self.size = size
+        # Zwalnia zasób przy usunięciu z rejestru (np. zamyka pulę procesów)
+        self.close = close
+        self.model = None
+        self.error = None
+        self.users = 0
+        self.ready = threading.Event()
+        # Jeden model nie obsługuje równoległych wywołań transcribe()
+        self.lock = threading.Lock()
+
+    def evicted(self, key):
+        logger.info("Evicted '%s' from registry", key)
+        if self.close is not None:
+            self.close(self.model)
+
+
+class ModelRegistry:
+    """
+    Keeps loaded Whisper models resident and evicts the least recently used
+    idle ones once their total size would exceed `memory_budget_mb`. A model
+    loaded on a specific device is kept under "name@device". Other resources
+    holding models, such as the process pool of parallel transcription, are
+    accounted in the same budget through hold().
+
+    Every caller holds a reference for as long as it uses a model, and only
+    models nobody references are evicted; a load that does not fit waits for
+    one to be released. Loading happens outside the registry lock, so models
+    that are already resident stay available meanwhile.
+    """
+
+    def __init__(self, memory_budget_mb, loader=load_whisper_model, sizes=None):
+        self.memory_budget_mb = memory_budget_mb
+        self.loader = loader
+        self.sizes = sizes if sizes is not None else whisper_model_sizes()
+        self._entries = OrderedDict()
+        self._condition = threading.Condition()
+
+    def size_of(self, name):
+        name = name.partition("@")[0]
+        return self.sizes.get(name, max(self.sizes.values(), default=0))
+
+    def used_mb(self):
+        # Ładowane modele też zajmują już swoje miejsce w budżecie
+        with self._condition:
+            return sum(entry.size for entry in self._entries.values())
+
+    def loaded(self):
+        with self._condition:
+            return [key for key, entry in self._entries.items() if entry.ready.is_set()]
+
+    def _make_room(self, size):
+        """Evicts idle models until `size` MB fit; False if they cannot yet."""
+        used = sum(entry.size for entry in self._entries.values())
+        for key, entry in list(self._entries.items()):
+            if used + size <= self.memory_budget_mb:
+                break
+            if entry.users or not entry.ready.is_set():
+                continue
+            del self._entries[key]
+            used -= entry.size
+            entry.evicted(key)
+        # Model większy niż cały budżet mieści się, gdy nic innego nie jest załadowane
+        return used + size <= self.memory_budget_mb or not self._entries
+
+    def _checkout(self, key, size, load, close=None):
+        with self._condition:
+            while True:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.users += 1
+                    self._entries.move_to_end(key)
+                    owner = False
+                    break
+                if self._make_room(size):
+                    entry = self._entries[key] = _Entry(size, close)
+                    entry.users = 1
+                    owner = True
+                    break
+                # Wszystkie modele są w użyciu; czekaj na zwolnienie któregoś
+                self._condition.wait()
+
+        if owner:
+            self._load(key, load, entry)
+        else:
+            entry.ready.wait()
+        if entry.error is not None:
+            self._release(entry)
+            raise entry.error
+        return entry
+
+    def _checkout_model(self, name, device):
+        if device is None:
+            return self._checkout(name, self.size_of(name), lambda: self.loader(name))
+        return self._checkout(
+            f"{name}@{device}",
+            self.size_of(name),
+            lambda: self.loader(name, device=device),
+        )
+
+    def _load(self, key, load, entry):
+        logger.info("Loading '%s'", key)
+        try:
+            entry.model = load()
+        except Exception as e:
+            entry.error = e
+            with self._condition:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+                self._condition.notify_all()
+        finally:
+            entry.ready.set()
+
+    def _release(self, entry):
+        with self._condition:
+            entry.users -= 1
+            if entry.users == 0:
+                self._condition.notify_all()
+
+    @contextmanager
+    def acquire(self, name, device=None):
+        """Yields the resident model, keeping it loaded until the block exits."""
+        entry = self._checkout_model(name, device)
+        try:
+            yield entry.model
+        finally:
+            self._release(entry)
+
+    @contextmanager
+    def hold(self, key, size_mb, load, close=None):
+        """
+        Yields the resource under `key`, created by `load()` and accounted as
+        `size_mb` of the budget. Once idle it is evicted like a model, with
+        `close(resource)` called on eviction.
+        """
+        entry = self._checkout(key, size_mb, load, close)
+        try:
+            yield entry.model
+        finally:
+            self._release(entry)
+
+    def get(self, name, device=None):
+        """Loads the model if needed (e.g. to warm up) and returns it."""
+        with self.acquire(name, device) as model:
+            return model
+
+    def transcribe(self, path, model_name, device=None, **options):
+        entry = self._checkout_model(model_name, device)
+        try:
+            with entry.lock:
+                return entry.model.transcribe(path, **options)
+        finally:
+            self._release(entry)
+
+    def evict(self, name):
+        """Drops an idle model; models in use are kept."""
+        with self._condition:
+            entry = self._entries.get(name)
+            if entry is None or entry.users or not entry.ready.is_set():
+                return False
+            del self._entries[name]
+        entry.evicted(name)
+        return True
+
+
+_local_registry = None
+
+
+def local_registry():
+    """Per-process registry used when the transcription service is not running."""
+    global _local_registry
+    if _local_registry is None:
+        _local_registry = ModelRegistry(settings.WHISPER_MEMORY_BUDGET_MB)
+    return _local_registry
+
+
+def _authkey():
+    return settings.SECRET_KEY.encode("utf-8")
+
+
+class TranscriptionServer:
+    """
+    Serves transcription requests from web and render workers over local IPC
+    (a Unix socket or a Windows named pipe), sharing one ModelRegistry.
+    """
+
+    def __init__(self, registry, address=None, authkey=None):
+        self.registry = registry
+        self.address = address or settings.TRANSCRIPTION_SERVICE_ADDRESS
+        self.authkey = authkey or _authkey()
+        self.listener = None
+
+    def handle(self, message):
+        op = message.get("op")
+        if op == "transcribe":
+            model_name = message.get("model") or settings.GPU_LIST["whisper_model"]
+            result = self.registry.transcribe(
+                message["path"],
+                model_name,
+                message.get("device"),
+                **message.get("options", {}),
+            )
+            return {"ok": True, "result": result}
+        if op == "transcribe_long":
+            # Import w funkcji: parallel_transcription korzysta z tego modułu
+            from .parallel_transcription import run_transcription, worker_limit
+
+            result = run_transcription(
+                self.registry,
+                message["path"],
+                message.get("model") or settings.GPU_LIST["whisper_model"],
+                message.get("content_hash"),
+                message.get("device"),
+                worker_limit(),
+                **message.get("options", {}),
+            )
+            return {"ok": True, "result": result}
+        if op == "warmup":
+            # Klucze jak przy transkrypcji: model na każdym urządzeniu slotów
+            devices = message.get("devices") or whisper_devices()
+            for model_name in message.get("models", []):
+                for device in devices:
+                    self.registry.get(model_name, device)
+            return {"ok": True, "loaded": self.registry.loaded()}
+        if op == "status":
+            return {
+                "ok": True,
+                "loaded": self.registry.loaded(),
+                "used_mb": self.registry.used_mb(),
+                "budget_mb": self.registry.memory_budget_mb,
+            }
+        return {"ok": False, "error": f"Unknown operation: {op}"}
+
+    def _serve_connection(self, connection):
+        with connection:
+            while True:
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = self.handle(message)
+                except Exception as e:
+                    logger.exception("Transcription service request failed")
+                    reply = {"ok": False, "error": str(e)}
+                connection.send(reply)
+
+    def serve_forever(self):
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            try:
+                call_service({"op": "status"}, self.address)
+            except TranscriptionServiceUnavailable:
+                # Gniazdo po poprzednim, nieczysto zakończonym procesie
+                os.unlink(self.address)
+            else:
+                raise RuntimeError(
+                    f"Transcription service already runs on {self.address}"
+                )
+
+        self.listener = Listener(self.address, authkey=self.authkey)
+        logger.info("Transcription service listening on %s", self.address)
+        while True:
+            try:
+                connection = self.listener.accept()
+            except OSError:
+                # Listener zamknięty przez close()
+                return
+            threading.Thread(
+                target=self._serve_connection, args=(connection,), daemon=True
+            ).start()
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.close()
+
+
+class TranscriptionServiceUnavailable(Exception):
+    pass
+
+
+def call_service(message, address=None):
+    """Sends one request to the transcription service and returns its reply."""
+    address = address or settings.TRANSCRIPTION_SERVICE_ADDRESS
+    try:
+        connection = Client(address, authkey=_authkey())
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        raise TranscriptionServiceUnavailable(str(e)) from e
+
+    with connection:
+        connection.send(message)
+        reply = connection.recv()
+    if not reply.get("ok"):
+        raise RuntimeError(reply.get("error", "Transcription service error"))
+    return reply
+
+
+def transcribe(path, model_name=None, device=None, **options):
+    """
+    Transcribes `path` with Whisper on `device` (e.g. "cuda:1"; Whisper's
+    default when None). Uses the resident models of the transcription service
+    when it is running, otherwise this process's registry.
+    """
+    model_name = model_name or settings.GPU_LIST["whisper_model"]
+    if settings.TRANSCRIPTION_SERVICE_ADDRESS:
+        try:
+            reply = call_service(
+                {
+                    "op": "transcribe",
+                    "path": path,
+                    "model": model_name,
+                    "device": device,
+                    "options": options,
+                }
+            )
+            return reply["result"]
+        except TranscriptionServiceUnavailable:
+            pass
+    return local_registry().transcribe(path, model_name, device, **options)
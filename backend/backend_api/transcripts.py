@@ -0,0 +1,138 @@
+# transcripts.py
+from django.conf import settings
+
+from .models import Transcript
+from .parallel_transcription import transcribe_long
+
+# Zmiana formatu zapisu unieważnia wpisy w bazie
+TRANSCRIPT_VERSION = 1
+
+
+def format_timestamp(seconds: float) -> str:
+    """Formatuje timestamp w stylu SRT: HH:MM:SS,mmm"""
+    total_ms = max(0, int(round(seconds * 1000)))
+    hours, total_ms = divmod(total_ms, 3_600_000)
+    minutes, total_ms = divmod(total_ms, 60_000)
+    seconds, milliseconds = divmod(total_ms, 1000)
+    return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
+
+
+def compact_result(result):
+    """
+    Converts a Whisper result into the stored form: flat lists of
+    [start, end, text, first_word, last_word] segments and [start, end, word]
+    words, with times rounded to milliseconds.
+    """
+    segments = []
+    words = []
+    for segment in result["segments"]:
+        first = len(words)
+        for word in segment.get("words") or []:
+            words.append([round(word["start"], 3), round(word["end"], 3), word["word"]])
+        segments.append(
+            [
+                round(segment["start"], 3),
+                round(segment["end"], 3),
+                segment["text"],
+                first,
+                len(words),
+            ]
+        )
+    return {"segments": segments, "words": words}
+
+
+def cached_transcript(content_hash, model_name, language=None):
+    """The stored compact transcript of a source, or None if there is none."""
+    row = (
+        Transcript.objects.filter(
+            content_hash=content_hash,
+            model_name=model_name,
+            language=language or "",
+            transcript_version=TRANSCRIPT_VERSION,
+        )
+        .only("data")
+        .first()
+    )
+    return row.data if row is not None else None
+
+
+def source_transcript(path, content_hash, model_name, language=None, device=None):
+    """
+    Returns the compact transcript of a whole source, running Whisper only
+    when no transcript for this content, model and language is stored yet.
+    """
+    data = cached_transcript(content_hash, model_name, language)
+    if data is not None:
+        return data
+
+    result = transcribe_long(
+        path,
+        model_name,
+        content_hash=content_hash,
+        device=device,
+        fp16=False,
+        word_timestamps=True,
+        language=language,
+    )
+    data = compact_result(result)
+    Transcript.objects.update_or_create(
+        content_hash=content_hash,
+        model_name=model_name,
+        language=language or "",
+        defaults={
+            "transcript_version": TRANSCRIPT_VERSION,
+            "detected_language": result.get("language") or "",
+            "data": data,
+        },
+    )
+    return data
+
+
+def transcribe_asset(asset):
+    """Media task storing the whole-source transcript of `asset`."""
+    source_transcript(asset.path, asset.digest, settings.GPU_LIST["whisper_model"])
+
+
+def slice_transcript(data, start, end):
+    """
+    Segments of a compact transcript that fall within [start, end), shifted
+    so the window starts at zero. Segments crossing the window edges keep
+    only the words whose midpoint lies inside it.
+    """
+    words = data["words"]
+    duration = end - start
+    segments = []
+    for seg_start, seg_end, text, first, last in data["segments"]:
+        if seg_start >= end:
+            break
+        if seg_end <= start:
+            continue
+
+        if last > first:
+            inside = [
+                word
+                for word in words[first:last]
+                if start <= (word[0] + word[1]) / 2 < end
+            ]
+            if not inside:
+                continue
+            seg_start, seg_end = inside[0][0], inside[-1][1]
+            text = "".join(word[2] for word in inside)
+
+        segments.append(
+            {
+                "start": min(max(seg_start - start, 0.0), duration),
+                "end": min(max(seg_end - start, 0.0), duration),
+                "text": text.strip(),
+            }
+        )
+    return segments
+
+
+def segments_to_srt(segments):
+    lines = []
+    for i, segment in enumerate(segments, start=1):
+        start = format_timestamp(segment["start"])
+        end = format_timestamp(segment["end"])
+        lines.append(f"{i}\n{start} --> {end}\n{segment['text'].strip()}\n")
+    return "\n".join(lines) + ("\n" if lines else "")
@@ -0,0 +1,219 @@
+# uploads.py
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils import timezone
+
+from .assets import hash_file, ingest_path, link_asset
+from .project_files import register_project_file
+from .media_tasks import enqueue_media_task
+from .models import MediaTask, UploadChunk, UploadSession
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class UploadError(Exception):
+    pass
+
+
+def create_session(filename, total_size, project_id=""):
+    """Opens an upload session and preallocates its (sparse) destination file."""
+    if total_size < 0:
+        raise UploadError("Invalid file size")
+    if total_size > settings.UPLOAD_MAX_SIZE:
+        raise UploadError(
+            f"File is too large (limit: {settings.UPLOAD_MAX_SIZE} bytes)"
+        )
+
+    session = UploadSession.objects.create(
+        filename=os.path.basename(filename),
+        total_size=total_size,
+        project_id=project_id or "",
+    )
+    path = default_storage.path(session.partial_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.truncate(total_size)
+    return session
+
+
+def write_chunk(session, index, offset, stream, length):
+    """
+    Streams `length` bytes from `stream` into the session file at `offset`.
+    Memory use is bounded by COPY_BUFFER_SIZE; chunks may arrive in any order
+    and in parallel, and re-sending a chunk overwrites it.
+    """
+    if session.status != UploadSession.STATUS_OPEN:
+        raise UploadError("Upload session is already finalized")
+    if length > settings.UPLOAD_MAX_CHUNK_SIZE:
+        raise UploadError("Chunk is too large")
+    if offset < 0 or offset + length > session.total_size:
+        raise UploadError("Chunk lies outside of the declared file size")
+
+    written = 0
+    with open(default_storage.path(session.partial_name), "r+b") as f:
+        f.seek(offset)
+        while written < length:
+            data = stream.read(min(COPY_BUFFER_SIZE, length - written))
+            if not data:
+                break
+            f.write(data)
+            written += len(data)
+
+    if written != length:
+        raise UploadError(f"Expected {length} bytes, received {written}")
+
+    UploadChunk.objects.update_or_create(
+        session=session, index=index, defaults={"offset": offset, "size": length}
+    )
+    # Aktywna sesja nie wygasa (expire_sessions)
+    UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+    return written
+
+
+def received_ranges(session):
+    """Merged [start, end) byte ranges that are already stored."""
+    ranges = []
+    for offset, size in (
+        session.chunks.order_by("offset").values_list("offset", "size").iterator()
+    ):
+        end = offset + size
+        if ranges and offset <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([offset, end])
+    return ranges
+
+
+def missing_ranges(session, ranges=None):
+    ranges = received_ranges(session) if ranges is None else ranges
+    missing = []
+    position = 0
+    for start, end in ranges:
+        if start > position:
+            missing.append([position, start])
+        position = max(position, end)
+    if position < session.total_size:
+        missing.append([position, session.total_size])
+    return missing
+
+
+def request_finalize(session, expected_digest=None, name=None):
+    """
+    Queues a complete upload for finalize_session() on a render worker.
+    Requests for a session that is already queued or finalized are no-ops.
+    """
+    if session.status != UploadSession.STATUS_OPEN:
+        return session
+    if missing_ranges(session):
+        raise UploadError("Upload is incomplete")
+
+    UploadSession.objects.filter(
+        pk=session.pk, status=UploadSession.STATUS_OPEN
+    ).update(
+        status=UploadSession.STATUS_QUEUED,
+        expected_digest=(expected_digest or "").lower(),
+        target_name=name or "",
+        updated_at=timezone.now(),
+    )
+    session.refresh_from_db()
+    return session
+
+
+def claim_next_upload(worker):
+    """
+    Atomically moves the oldest queued upload to `finalizing` and returns it
+    (see jobs.claim_next_job).
+    """
+    while True:
+        session = (
+            UploadSession.objects.filter(status=UploadSession.STATUS_QUEUED)
+            .order_by("updated_at", "pk")
+            .first()
+        )
+        if session is None:
+            return None
+
+        claimed = UploadSession.objects.filter(
+            pk=session.pk, status=UploadSession.STATUS_QUEUED
+        ).update(status=UploadSession.STATUS_FINALIZING, worker=worker)
+        if claimed:
+            session.refresh_from_db()
+            return session
+
+
+def finalize_session(session):
+    """
+    Registers the assembled file as an asset by renaming it into the blob
+    store (no copy) and, for project uploads, links it into
+    edit_files_<project_id>/. Runs on a render worker; the outcome is
+    recorded on the session.
+    """
+    try:
+        path = default_storage.path(session.partial_name)
+        digest = hash_file(path)
+        if session.expected_digest and session.expected_digest != digest:
+            raise UploadError("Checksum mismatch")
+
+        asset, _ = ingest_path(path, session.filename, digest=digest, move=True)
+        enqueue_media_task(asset, MediaTask.KIND_PROXY)
+
+        if session.project_id:
+            file_name = default_storage.get_valid_name(
+                session.target_name or session.filename
+            )
+            session.project_file = link_asset(
+                asset, f"edit_files_{session.project_id}/{file_name}"
+            )
+            register_project_file(session.project_id, session.project_file, asset)
+    except UploadError as e:
+        session.status = UploadSession.STATUS_FAILED
+        session.error = str(e)
+    except Exception as e:
+        logger.exception("Finalizing %s failed", session)
+        session.status = UploadSession.STATUS_FAILED
+        session.error = str(e)
+    else:
+        session.status = UploadSession.STATUS_COMPLETE
+        session.asset = asset
+        session.error = ""
+        session.chunks.all().delete()
+    session.save()
+    return session
+
+
+def requeue_stale_uploads(hostname=None):
+    """Returns uploads left `finalizing` by workers on this host to the queue."""
+    hostname = hostname or socket.gethostname()
+    return UploadSession.objects.filter(
+        Q(worker__startswith=f"{hostname}:"),
+        status=UploadSession.STATUS_FINALIZING,
+    ).update(status=UploadSession.STATUS_QUEUED, worker="")
+
+
+def expire_sessions(max_age=None):
+    """
+    Deletes open and failed sessions idle for longer than `max_age`
+    (default: UPLOAD_SESSION_TTL seconds) together with their partial
+    files. Returns the number of sessions removed.
+    """
+    max_age = max_age if max_age is not None else settings.UPLOAD_SESSION_TTL
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    expired = UploadSession.objects.filter(
+        status__in=[UploadSession.STATUS_OPEN, UploadSession.STATUS_FAILED],
+        updated_at__lt=cutoff,
+    )
+    count = 0
+    for session in expired.iterator():
+        if default_storage.exists(session.partial_name):
+            default_storage.delete(session.partial_name)
+        session.delete()
+        count += 1
+    return count
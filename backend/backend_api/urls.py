@@ -1,17 +1,35 @@
 # urls.py
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
 from .views import (
     VideoViewSet,
     ProjectViewSet,
     get_video_fps,
+    upload_asset,
+    asset_detail,
+    asset_sprites,
+    asset_thumbnail,
+    asset_preview,
+    asset_waveform,
+    asset_highlights,
+    asset_cut_points,
+    lookup_asset,
+    create_upload,
+    upload_status,
+    upload_chunk,
+    finalize_upload,
     process_video,
+    batch_render,
+    render_job_status,
+    render_job_events,
     get_gpu_info,
     upload_file,
     list_files,
+    project_manifest,
     finalize_project_files,
     fetch_subtitles,
+    subtitle_cues,
+    subtitle_cue_detail,
+    export_subtitles,
 )
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from rest_framework.routers import DefaultRouter
@@ -30,15 +48,91 @@ urlpatterns = [
         SpectacularSwaggerView.as_view(url_name="schema"),
         name="swagger_ui",
     ),
+    path("assets/", view=upload_asset, name="upload_asset"),
+    path("assets/lookup/", view=lookup_asset, name="lookup_asset"),
+    path("assets/<int:asset_id>/", view=asset_detail, name="asset_detail"),
+    path(
+        "assets/<int:asset_id>/sprites/",
+        view=asset_sprites,
+        name="asset_sprites",
+    ),
+    path(
+        "assets/<int:asset_id>/thumbnail/",
+        view=asset_thumbnail,
+        name="asset_thumbnail",
+    ),
+    path(
+        "assets/<int:asset_id>/preview/",
+        view=asset_preview,
+        name="asset_preview",
+    ),
+    path(
+        "assets/<int:asset_id>/waveform/",
+        view=asset_waveform,
+        name="asset_waveform",
+    ),
+    path(
+        "assets/<int:asset_id>/highlights/",
+        view=asset_highlights,
+        name="asset_highlights",
+    ),
+    path(
+        "assets/<int:asset_id>/cut-points/",
+        view=asset_cut_points,
+        name="asset_cut_points",
+    ),
+    path("uploads/", view=create_upload, name="create_upload"),
+    path("uploads/<uuid:upload_id>/", view=upload_status, name="upload_status"),
+    path(
+        "uploads/<uuid:upload_id>/chunks/<int:index>/",
+        view=upload_chunk,
+        name="upload_chunk",
+    ),
+    path(
+        "uploads/<uuid:upload_id>/finalize/",
+        view=finalize_upload,
+        name="finalize_upload",
+    ),
     path("get-video-fps/", view=get_video_fps, name="get_video_fps"),
     path("process-video/", view=process_video, name="process_video"),
+    path("batch-render/", view=batch_render, name="batch_render"),
+    path(
+        "render-jobs/<int:job_id>/",
+        view=render_job_status,
+        name="render_job_status",
+    ),
+    path(
+        "render-jobs/<int:job_id>/events/",
+        view=render_job_events,
+        name="render_job_events",
+    ),
     path("gpu-info/", view=get_gpu_info, name="get_gpu_info"),
     path("upload-file/", view=upload_file, name="upload_file"),
     path("list-files/", view=list_files, name="list_files"),
+    path(
+        "projects/<str:project_id>/files/",
+        view=project_manifest,
+        name="project_manifest",
+    ),
     path(
         "finalize-project-files/",
         view=finalize_project_files,
         name="finalize_project_files",
     ),
     path("fetch-subtitles/", view=fetch_subtitles, name="fetch_subtitles"),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path(
+        "projects/<str:project_id>/subtitles/cues/",
+        view=subtitle_cues,
+        name="subtitle_cues",
+    ),
+    path(
+        "projects/<str:project_id>/subtitles/cues/<int:cue_id>/",
+        view=subtitle_cue_detail,
+        name="subtitle_cue_detail",
+    ),
+    path(
+        "projects/<str:project_id>/subtitles/export/<str:export_format>/",
+        view=export_subtitles,
+        name="export_subtitles",
+    ),
+]
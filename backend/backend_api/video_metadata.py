@@ -0,0 +1,100 @@
+# video_metadata.py
+from .assets import hash_file
+from .media_probe import PROBE_VERSION, probe
+from .models import Asset, Video
+
+# Kolumny wypełniane przez metadata_fields()
+METADATA_COLUMNS = [
+    "duration",
+    "fps_num",
+    "fps_den",
+    "width",
+    "height",
+    "video_codec",
+    "audio_codec",
+    "bit_rate",
+    "size",
+    "content_hash",
+    "probe_version",
+]
+
+
+def metadata_fields(info, content_hash, size):
+    """Video columns describing MediaInfo `info` of a file."""
+    fps = info.fps
+    return {
+        "duration": info.duration,
+        "fps_num": fps.numerator if fps else None,
+        "fps_den": fps.denominator if fps else None,
+        "width": info.width,
+        "height": info.height,
+        "video_codec": info.video_codec or "",
+        "audio_codec": info.audio_codec or "",
+        "bit_rate": info.bit_rate,
+        "size": size,
+        "content_hash": content_hash,
+        "probe_version": PROBE_VERSION,
+    }
+
+
+def unprobed_fields(asset):
+    """Video columns of a file of `asset` that FFprobe has not read yet."""
+    return {
+        "duration": None,
+        "fps_num": None,
+        "fps_den": None,
+        "width": None,
+        "height": None,
+        "video_codec": "",
+        "audio_codec": "",
+        "bit_rate": None,
+        "size": asset.size,
+        "content_hash": asset.digest,
+        "probe_version": None,
+    }
+
+
+def record_video_metadata(asset):
+    """
+    Probes `asset` once and stores the result on every Video backed by it.
+    Raises ProbeError when FFprobe cannot read the file.
+    """
+    info = probe(asset.path, content_hash=asset.digest)
+    return Video.objects.filter(asset=asset).update(
+        **metadata_fields(info, asset.digest, asset.size)
+    )
+
+
+def copy_video_metadata(video):
+    """
+    Fills `video` from another Video of the same asset that was already
+    probed, so a new row for known content needs neither FFprobe nor a
+    media task. Returns False when there is no such row.
+    """
+    probed = (
+        Video.objects.filter(asset_id=video.asset_id, probe_version=PROBE_VERSION)
+        .exclude(pk=video.pk)
+        .values(*METADATA_COLUMNS)
+        .first()
+    )
+    if probed is None:
+        return False
+    Video.objects.filter(pk=video.pk).update(**probed)
+    return True
+
+
+def backfill_video_metadata(video):
+    """
+    Fills the metadata columns of a Video stored before they existed (or
+    probed by an older PROBE_VERSION) straight from its file.
+    Raises ProbeError when FFprobe cannot read it, OSError when it is missing.
+    """
+    path = video.file.path
+    content_hash = hash_file(path)
+    info = probe(path, content_hash=content_hash)
+    fields = metadata_fields(info, content_hash, video.file.size)
+    if video.asset_id is None:
+        # Treść już zarejestrowana: wiersz zyskuje zadania i pliki zasobu
+        fields["asset"] = Asset.objects.filter(digest=content_hash).first()
+    Video.objects.filter(pk=video.pk).update(**fields)
+    return fields
@@ -1,410 +1,835 @@
 # views.py
 import base64
+import hashlib
+import json
+import math
 import os
-import subprocess
-import shutil
-from whisper import load_model  # Upewnij się, że zainstalowano OpenAI Whisper
+import time
 
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
 from rest_framework.decorators import api_view
+from rest_framework.filters import SearchFilter
 from rest_framework.response import Response
-from .models import Video, Project
-from .serializers import VideoSerializer, ProjectSerializer
+from .assets import ingest_upload, link_asset, resolve_asset_id
+from .cutting import CUT_MODE_AUTO, CUT_MODES, parse_timestamp
+from .jobs import enqueue_batch, enqueue_render
+from .listing import CreatedAtCursorPagination, ProjectFilter, VideoFilter
+from .highlights import load_analysis, top_candidates
+from .media_index import load_media_index
+from .media_serving import IMMUTABLE_CACHE_CONTROL
+from .media_tasks import enqueue_media_task, requeue_media_task
+from .video_metadata import copy_video_metadata, unprobed_fields
+from .uploads import (
+    UploadError,
+    create_session,
+    missing_ranges,
+    received_ranges,
+    request_finalize,
+    write_chunk,
+)
+from .media_probe import ProbeError, probe
+from .models import (
+    Video,
+    Project,
+    RenderJob,
+    Asset,
+    UploadSession,
+    ProjectFile,
+    MediaTask,
+)
+from .project_files import register_project_file, sync_project_files
+from .proxies import existing_proxy, needs_proxy, proxy_size
+from .subtitle_cues import (
+    EXPORT_FORMATS,
+    cues_in_window,
+    import_project_subtitles,
+    project_cues,
+    srt_chunks,
+)
+from .sprites import (
+    SHEET_PATTERN,
+    ThumbnailError,
+    load_sprite_manifest,
+    sprite_folder,
+    thumbnail_at,
+)
+from .waveform import WaveformError, open_waveform
+from .serializers import (
+    VideoSerializer,
+    VideoListSerializer,
+    ProjectSerializer,
+    ProjectListSerializer,
+    RenderJobSerializer,
+    RenderJobProgressSerializer,
+    AssetSerializer,
+    ProjectFileSerializer,
+    SubtitleCueSerializer,
+    absolute_media_url,
+)
 
 from django.conf import settings
-from django.http import JsonResponse, HttpResponse
+from django.http import (
+    FileResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.views.decorators.csrf import csrf_exempt
-from django.core.files.base import ContentFile
+from django.views.decorators.http import require_GET
 from django.core.files.storage import default_storage
+from django.db.models import Count, Max, Prefetch
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.http import parse_etags, quote_etag
+from django.utils.text import get_valid_filename
 
 
 class VideoViewSet(viewsets.ModelViewSet):
-    queryset = Video.objects.all()
+    """
+    Videos, newest first in cursor pages. Filters: `title`, `project`,
+    `project_title`, `created_after`, `created_before`; `search` matches
+    the video and project titles.
+    """
+
+    queryset = Video.objects.select_related("project")
     serializer_class = VideoSerializer
+    pagination_class = CreatedAtCursorPagination
+    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filterset_class = VideoFilter
+    search_fields = ["title", "project__title"]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            queryset = queryset.only(*VideoListSerializer.columns)
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return VideoListSerializer
+        return VideoSerializer
+
+    def perform_create(self, serializer):
+        self._save_upload(serializer)
+
+    def perform_update(self, serializer):
+        if "file" not in self.request.FILES:
+            serializer.save()
+            return
+        # Nowy plik: metadane i proxy starego zasobu już go nie opisują
+        old_name = serializer.instance.file.name
+        video = self._save_upload(serializer)
+        if (
+            old_name != video.file.name
+            and not Video.objects.filter(file=old_name).exists()
+        ):
+            default_storage.delete(old_name)
+
+    def _save_upload(self, serializer):
+        """
+        Stores the upload in the asset registry, exposed under videos/, and
+        queues the FFprobe pass filling the video's metadata columns and the
+        preview proxy.
+        """
+        uploaded = self.request.FILES["file"]
+        digests = getattr(self.request, "upload_digests", {})
+        asset, _ = ingest_upload(uploaded, digests.get("file"))
+        name = default_storage.get_available_name(
+            f"videos/{default_storage.get_valid_name(uploaded.name)}"
+        )
+        video = serializer.save(
+            file=link_asset(asset, name), asset=asset, **unprobed_fields(asset)
+        )
+        task = enqueue_media_task(asset, MediaTask.KIND_METADATA)
+        # Treść przesłana ponownie: zadanie zasobu już się wykonało i nie
+        # zaktualizuje nowego wiersza
+        if task.status == RenderJob.STATUS_DONE and not copy_video_metadata(video):
+            requeue_media_task(task)
+        enqueue_media_task(asset, MediaTask.KIND_PROXY)
+        return video
 
 
 class ProjectViewSet(viewsets.ModelViewSet):
+    """
+    Projects, newest first in cursor pages, filtered like VideoViewSet.
+    A single project lists its videos, loaded with one extra query.
+    """
+
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
+    pagination_class = CreatedAtCursorPagination
+    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filterset_class = ProjectFilter
+    search_fields = ["title"]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            return queryset.only(*ProjectListSerializer.columns)
+        videos = Video.objects.select_related("project").only(
+            *VideoListSerializer.columns
+        )
+        return queryset.prefetch_related(
+            Prefetch("videos", queryset=videos.order_by("-created_at", "-id"))
+        )
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return ProjectListSerializer
+        return ProjectSerializer
+
+
+def source_asset(request, field):
+    """
+    Returns the Asset a request refers to: either a multipart upload in
+    `field` (ingested into the blob store, its preview proxy queued) or an
+    existing `asset_id`.
+    """
+    if field in request.FILES:
+        digests = getattr(request, "upload_digests", {})
+        asset, _ = ingest_upload(request.FILES[field], digests.get(field))
+        enqueue_media_task(asset, MediaTask.KIND_PROXY)
+        return asset
+    return resolve_asset_id(request.data.get("asset_id"))
 
 
 @api_view(["POST"])
 @csrf_exempt
-def get_video_fps(request):
-    if request.method == "POST" and "video" in request.FILES:
-        video_file = request.FILES["video"]
-
-        # Zapisz plik tymczasowo, aby ffprobe mógł go odczytać
-        print(default_storage.exists("temp/"))
-        video_path = default_storage.save(f"temp/{video_file.name}", video_file)
-        print(video_path)
-
-        # Użyj ffprobe, aby uzyskać metadane wideo
-        ffprobe_cmd = [
-            "ffprobe",
-            "-v",
-            "error",
-            "-select_streams",
-            "v:0",
-            "-show_entries",
-            "stream=avg_frame_rate,duration",
-            "-of",
-            "default=noprint_wrappers=1:nokey=1",
-            f"{default_storage.path(video_path)}",
-        ]
+def upload_asset(request):
+    if "file" not in request.FILES:
+        return JsonResponse({"error": "No file uploaded"}, status=400)
 
-        try:
-            # Uruchomienie komendy
-            output = subprocess.check_output(ffprobe_cmd).decode("utf-8").split()
-            fps = eval(output[0])  # Zwraca proporcję np. "30000/1001"
-            duration = float(output[1])
-            print(fps, duration, int(duration * fps))
-            total_frames = float(int(duration * fps))
-
-            # Zwrot FPS, długości w sekundach oraz liczby klatek
-            return JsonResponse(
-                {"fps": fps, "duration": duration, "total_frames": total_frames}
-            )
+    digests = getattr(request, "upload_digests", {})
+    asset, created = ingest_upload(request.FILES["file"], digests.get("file"))
+    # Proxy od razu: podgląd w edytorze nie czeka na pierwsze żądanie
+    enqueue_media_task(asset, MediaTask.KIND_PROXY)
+    return Response(AssetSerializer(asset).data, status=201 if created else 200)
 
-        except subprocess.CalledProcessError as e:
-            return JsonResponse(
-                {"error": "Error processing video metadata"}, status=500
-            )
 
-        finally:
-            # Usuń tymczasowy plik
-            default_storage.delete(video_path)
+@api_view(["GET"])
+def asset_detail(request, asset_id):
+    asset = get_object_or_404(Asset, pk=asset_id)
+    return Response(AssetSerializer(asset).data)
+
 
-    return JsonResponse({"error": "Invalid request"}, status=400)
+@api_view(["GET"])
+def lookup_asset(request):
+    # Klient może policzyć SHA-256 lokalnie i pominąć ponowne przesyłanie
+    asset = get_object_or_404(Asset, digest=request.GET.get("digest", "").lower())
+    return Response(AssetSerializer(asset).data)
 
 
-def format_timestamp(seconds: float) -> str:
-    """Formatuje timestamp w stylu SRT: HH:MM:SS,mmm"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    seconds = int(seconds % 60)
-    milliseconds = int((seconds % 1) * 1000)
-    return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
+def media_task_pending(asset, kind):
+    """
+    202 while the media task producing a missing output is queued or
+    running (queueing it if needed), 422 when it failed.
+    """
+    task = enqueue_media_task(asset, kind)
+    if task.status == RenderJob.STATUS_FAILED:
+        return JsonResponse({"status": task.status, "error": task.error}, status=422)
+    return JsonResponse(
+        {"status": task.status}, status=202, headers={"Retry-After": "2"}
+    )
 
 
-@api_view(["POST"])
-@csrf_exempt
-def process_video(request):
-    if request.method == "POST" and "video" in request.FILES:
-        video_file = request.FILES["video"]
-        start_time = request.POST["start_time"]
-        end_time = request.POST["end_time"]
-        resolution = request.POST["resolution"]
-        enhance_audio = request.POST["enhance_audio"] == "true"
-        add_subtitles = request.POST["add_subtitles"] == "true"
-        print(
-            "\n\n\n",
-            start_time,
-            end_time,
-            resolution,
-            enhance_audio,
-            add_subtitles,
-            "\n\n\n",
+@api_view(["GET"])
+def asset_sprites(request, asset_id):
+    """
+    Timeline sprite sheets of an asset: per zoom level the seconds between
+    tiles, the sheet grid, the sheet URLs and a WebVTT thumbnail index.
+    Answers 202 while the sheets are being generated (queued on first
+    request).
+    """
+    asset = get_object_or_404(Asset, pk=asset_id)
+    manifest = load_sprite_manifest(asset)
+    if manifest is None:
+        return media_task_pending(asset, MediaTask.KIND_SPRITES)
+
+    folder = sprite_folder(asset.digest)
+    context = {"request": request}
+    levels = []
+    for level in manifest["levels"]:
+        base = f"{folder}/{level['folder']}"
+        levels.append(
+            {
+                "interval": level["interval"],
+                "columns": level["columns"],
+                "rows": level["rows"],
+                "tile_width": level["tile_width"],
+                "tile_height": level["tile_height"],
+                "count": level["count"],
+                "vtt_url": absolute_media_url(f"{base}.vtt", context),
+                "sheets": [
+                    absolute_media_url(f"{base}/{SHEET_PATTERN % index}", context)
+                    for index in range(1, level["sheets"] + 1)
+                ],
+            }
+        )
+    return Response(
+        {
+            "status": RenderJob.STATUS_DONE,
+            "duration": manifest["duration"],
+            "levels": levels,
+        },
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL},
+    )
+
+
+@api_view(["GET"])
+def asset_thumbnail(request, asset_id):
+    """
+    A JPEG of the frame at `t` seconds, `width` pixels wide (one of
+    THUMBNAIL_WIDTHS). Frames are cached on disk, least recently used first
+    out, so scrubbing the same region again costs no decoding.
+    """
+    asset = get_object_or_404(Asset, pk=asset_id)
+    try:
+        position = float(request.GET.get("t", 0))
+        width = int(request.GET.get("width") or settings.THUMBNAIL_WIDTH)
+        if not math.isfinite(position):
+            raise ValueError(position)
+    except ValueError:
+        return JsonResponse({"error": "t and width must be numbers"}, status=400)
+    if width not in settings.THUMBNAIL_WIDTHS:
+        return JsonResponse(
+            {"error": f"width must be one of {list(settings.THUMBNAIL_WIDTHS)}"},
+            status=400,
         )
 
-        # Mapowanie rozdzielczości do wartości pionowych
-        resolution_mapping = {
-            "480p": 480,
-            "720p": 720,
-            "1080p": 1080,
-            "1440p": 1440,
-            "4K": 2160,
+    try:
+        path = thumbnail_at(asset, position, width)
+    except ThumbnailError as e:
+        return JsonResponse({"error": str(e)}, status=404)
+    response = FileResponse(open(path, "rb"), content_type="image/jpeg")
+    response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+@api_view(["GET"])
+def asset_preview(request, asset_id):
+    """
+    The media the editor should play for an asset: its low-resolution
+    proxy, or the original when the source needs none. Answers 202 while
+    the proxy is being encoded. Renders always read the original.
+    """
+    asset = get_object_or_404(Asset, pk=asset_id)
+    try:
+        info = probe(asset.path, content_hash=asset.digest)
+    except ProbeError:
+        return JsonResponse({"error": "Error processing video metadata"}, status=500)
+
+    context = {"request": request}
+    if not needs_proxy(info):
+        return Response(
+            {
+                "url": absolute_media_url(asset.blob, context),
+                "proxy": False,
+                "width": info.width,
+                "height": info.height,
+            }
+        )
+    name = existing_proxy(asset)
+    if name is None:
+        return media_task_pending(asset, MediaTask.KIND_PROXY)
+    width, height = proxy_size(info)
+    return Response(
+        {
+            "url": absolute_media_url(name, context),
+            "proxy": True,
+            "width": width,
+            "height": height,
         }
-        target_resolution = resolution_mapping.get(resolution, 1080)  # Domyślnie 1080p
-        print("\n\n\n", target_resolution, "\n\n\n")
+    )
 
-        # Zapisz oryginalne wideo
-        video_path = default_storage.save(
-            os.path.join("temp", video_file.name), video_file
+
+@api_view(["GET"])
+def asset_waveform(request, asset_id):
+    """
+    Waveform peaks of an asset between `start` and `end` seconds, from the
+    coarsest zoom level giving at least `width` peaks (or the level given
+    as `level`). Peaks are (min, max, RMS) integers scaled to `bits`.
+    Answers 202 while the waveform is being generated.
+    """
+    asset = get_object_or_404(Asset, pk=asset_id)
+    try:
+        waveform = open_waveform(asset)
+    except WaveformError as e:
+        return JsonResponse({"error": str(e)}, status=500)
+    if waveform is None:
+        return media_task_pending(asset, MediaTask.KIND_WAVEFORM)
+
+    try:
+        start = float(request.GET.get("start") or 0)
+        end = float(request.GET.get("end") or 0)
+        width = int(request.GET.get("width") or 1000)
+        level = request.GET.get("level")
+        level = None if level in (None, "") else int(level)
+        if not (math.isfinite(start) and math.isfinite(end)):
+            raise ValueError((start, end))
+    except ValueError:
+        return JsonResponse(
+            {"error": "start, end, width and level must be numbers"}, status=400
+        )
+
+    top = len(waveform.levels) - 1
+    if end <= start:
+        # Bez końca zakresu: cały plik
+        end = waveform.levels[0][0] / waveform.peaks_per_second(0)
+    if level is None:
+        level = waveform.level_for(
+            end - max(start, 0), max(width, 1), settings.WAVEFORM_MAX_PEAKS
+        )
+    level = min(max(level, 0), top)
+
+    rate = waveform.peaks_per_second(level)
+    first = math.floor(max(start, 0) * rate)
+    count = min(math.ceil(end * rate) - first, settings.WAVEFORM_MAX_PEAKS)
+    first, peaks = waveform.read(level, first, count)
+    return Response(
+        {
+            "level": level,
+            "levels": top + 1,
+            "bits": waveform.bits,
+            "peaks_per_second": rate,
+            "start": first / rate,
+            "min": peaks[:, 0].tolist(),
+            "max": peaks[:, 1].tolist(),
+            "rms": peaks[:, 2].tolist(),
+        },
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL},
+    )
+
+
+@api_view(["GET"])
+def asset_highlights(request, asset_id):
+    """
+    The `count` best non-overlapping windows of `length` seconds to cut
+    shorts from, ranked by loudness peaks, speech density, scene-change
+    rate and motion energy. Answers 202 while the recording is analyzed
+    (queued on first request); re-ranking with other parameters reuses
+    the stored features.
+    """
+    asset = get_object_or_404(Asset, pk=asset_id)
+    features = load_analysis(asset)
+    if features is None:
+        return media_task_pending(asset, MediaTask.KIND_HIGHLIGHTS)
+
+    try:
+        count = int(request.GET.get("count") or 5)
+        length = float(request.GET.get("length") or settings.HIGHLIGHT_DEFAULT_LENGTH)
+        if not math.isfinite(length) or length <= 0 or count < 1:
+            raise ValueError((count, length))
+    except ValueError:
+        return JsonResponse(
+            {"error": "count and length must be positive numbers"}, status=400
+        )
+
+    candidates = top_candidates(
+        features, length, min(count, settings.HIGHLIGHT_MAX_COUNT)
+    )
+    return Response(
+        {
+            "duration": len(features["loudness"]) * float(features["hop"]),
+            "candidates": [
+                {"start": start, "end": end, "score": score, "features": parts}
+                for start, end, score, parts in candidates
+            ],
+        },
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL},
+    )
+
+
+@api_view(["GET"])
+def asset_cut_points(request, asset_id):
+    """
+    The keyframes and scene cuts around `t` seconds of a video asset
+    (previous, next and nearest of each), for snapping edits to points
+    that cut cleanly. Answers 202 while the index is being built.
+    """
+    asset = get_object_or_404(Asset, pk=asset_id)
+    index = load_media_index(asset)
+    if index is None:
+        return media_task_pending(asset, MediaTask.KIND_INDEX)
+
+    try:
+        position = float(request.GET.get("t") or 0)
+        if not math.isfinite(position):
+            raise ValueError(position)
+    except ValueError:
+        return JsonResponse({"error": "t must be a number"}, status=400)
+
+    previous_keyframe, next_keyframe = index.keyframe_neighbours(position)
+    previous_cut, next_cut = index.scene_cut_neighbours(position)
+    return Response(
+        {
+            "time": position,
+            "keyframes": len(index.keyframes),
+            "scene_cuts": len(index.scene_cuts),
+            "keyframe": {
+                "previous": previous_keyframe,
+                "next": next_keyframe,
+                "nearest": index.nearest_keyframe(position),
+            },
+            "scene_cut": {
+                "previous": previous_cut,
+                "next": next_cut,
+                "nearest": index.nearest_scene_cut(position),
+            },
+        },
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL},
+    )
+
+
+def upload_session_state(session):
+    ranges = received_ranges(session)
+    return {
+        "upload_id": str(session.pk),
+        "filename": session.filename,
+        "total_size": session.total_size,
+        "status": session.status,
+        "received_bytes": sum(end - start for start, end in ranges),
+        "received_ranges": ranges,
+        "missing_ranges": missing_ranges(session, ranges),
+        "asset_id": session.asset_id,
+        "file_url": (
+            default_storage.url(session.project_file) if session.project_file else None
+        ),
+        "error": session.error or None,
+    }
+
+
+@api_view(["POST"])
+def create_upload(request):
+    try:
+        filename = request.data["filename"]
+        total_size = int(request.data["size"])
+        session = create_session(
+            filename, total_size, project_id=request.data.get("project_id")
         )
-        output_video_name = "processed_video.mp4"
-        subtitles_name = "subtitles.srt"
+    except KeyError as e:
+        return JsonResponse({"error": f"Missing parameter: {e.args[0]}"}, status=400)
+    except (ValueError, UploadError) as e:
+        return JsonResponse({"error": str(e)}, status=400)
 
-        output_video_path = default_storage.path(output_video_name)
-        subtitles_path = default_storage.path(subtitles_name)
-        print("\n\n\n", video_path, output_video_path, subtitles_path, "\n\n\n")
+    return JsonResponse(upload_session_state(session), status=201)
 
-        # Wybór kodeka i modelu Whisper z ustawień
-        codec = settings.GPU_LIST["codec"]
-        whisper_model = settings.GPU_LIST["whisper_model"]
-        print("\n\n\n", codec, whisper_model, "\n\n\n")
 
-        # Uzyskaj proporcje wideo za pomocą FFprobe
+@api_view(["GET"])
+def upload_status(request, upload_id):
+    session = get_object_or_404(UploadSession, pk=upload_id)
+    return JsonResponse(upload_session_state(session))
+
+
+@api_view(["PUT"])
+def upload_chunk(request, upload_id, index):
+    session = get_object_or_404(UploadSession, pk=upload_id)
+    try:
+        offset = int(request.GET["offset"])
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+        # Treść czytana strumieniowo, bez buforowania całego fragmentu
+        written = write_chunk(session, index, offset, request.stream, length)
+    except KeyError:
+        return JsonResponse({"error": "Missing parameter: offset"}, status=400)
+    except (ValueError, UploadError) as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    return JsonResponse({"index": index, "offset": offset, "size": written})
+
+
+@api_view(["POST"])
+def finalize_upload(request, upload_id):
+    """
+    Queues the hashing and registration of a complete upload for a render
+    worker and returns 202; poll uploads/<id>/ until its status is
+    "complete" (or "failed").
+    """
+    session = get_object_or_404(UploadSession, pk=upload_id)
+    try:
+        session = request_finalize(
+            session,
+            expected_digest=request.data.get("sha256"),
+            name=request.data.get("name"),
+        )
+    except UploadError as e:
+        return JsonResponse(
+            {"error": str(e), **upload_session_state(session)}, status=400
+        )
+
+    if session.status == UploadSession.STATUS_COMPLETE:
+        return JsonResponse(
+            {**upload_session_state(session), **AssetSerializer(session.asset).data}
+        )
+    return JsonResponse(upload_session_state(session), status=202)
+
+
+@api_view(["POST"])
+@csrf_exempt
+def get_video_fps(request):
+    asset = source_asset(request, "video")
+    if asset is None:
+        return JsonResponse({"error": "Invalid request"}, status=400)
+
+    try:
+        # Jedno wywołanie ffprobe, wynik trafia do pamięci podręcznej
+        info = probe(asset.path, content_hash=asset.digest)
+        fps = float(info.fps)
+        duration = info.duration
+        total_frames = float(info.total_frames)
+
+        # Zwrot FPS, długości w sekundach oraz liczby klatek
+        return JsonResponse(
+            {
+                "fps": fps,
+                "duration": duration,
+                "total_frames": total_frames,
+                "asset_id": asset.pk,
+            }
+        )
+
+    except (ProbeError, TypeError):
+        return JsonResponse({"error": "Error processing video metadata"}, status=500)
+
+
+@api_view(["POST"])
+@csrf_exempt
+def process_video(request):
+    asset = source_asset(request, "video")
+    if asset is None:
+        return JsonResponse({"error": "Invalid request"}, status=400)
+
+    try:
+        start_time = request.data["start_time"]
+        end_time = request.data["end_time"]
+        resolution = request.data["resolution"]
+        enhance_audio = str(request.data["enhance_audio"]) == "true"
+        add_subtitles = str(request.data["add_subtitles"]) == "true"
+        burn_subtitles = str(request.data.get("burn_subtitles")) == "true"
+        subtitle_style = parse_subtitle_style(request.data.get("subtitle_style"))
+        cut_mode = request.data.get("cut_mode", CUT_MODE_AUTO)
+        if parse_timestamp(end_time) <= parse_timestamp(start_time):
+            raise ValueError("End time must be after start time")
+    except KeyError as e:
+        return JsonResponse({"error": f"Missing parameter: {e.args[0]}"}, status=400)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    if cut_mode not in CUT_MODES:
+        return JsonResponse({"error": f"Unknown cut mode: {cut_mode}"}, status=400)
+
+    # Źródło jest już w rejestrze zasobów, zadanie wykona proces roboczy
+    job = enqueue_render(
+        asset.blob,
+        asset=asset,
+        start_time=start_time,
+        end_time=end_time,
+        resolution=resolution,
+        cut_mode=cut_mode,
+        enhance_audio=enhance_audio,
+        add_subtitles=add_subtitles,
+        burn_subtitles=burn_subtitles,
+        subtitle_style=subtitle_style,
+    )
+    return queued_job_response(request, job, asset)
+
+
+def queued_job_response(request, job, asset, **extra):
+    return JsonResponse(
+        {
+            "job_id": job.pk,
+            "asset_id": asset.pk,
+            "status": job.status,
+            "queue_position": job.queue_position,
+            "status_url": request.build_absolute_uri(
+                reverse("render_job_status", args=[job.pk])
+            ),
+            "events_url": request.build_absolute_uri(
+                reverse("render_job_events", args=[job.pk])
+            ),
+            **extra,
+        },
+        status=202,
+    )
+
+
+def parse_subtitle_style(value):
+    """
+    Validates the `subtitle_style` field of a render request: an object (or
+    its JSON encoding) overriding fields of SUBTITLE_BURN_STYLE. Raises
+    ValueError with a message suitable for the client.
+    """
+    if value in (None, ""):
+        return {}
+    try:
+        style = json.loads(value) if isinstance(value, str) else value
+    except json.JSONDecodeError:
+        raise ValueError("subtitle_style must be a JSON object")
+    if not isinstance(style, dict):
+        raise ValueError("subtitle_style must be a JSON object")
+    for key, field in style.items():
+        if key not in settings.SUBTITLE_BURN_STYLE:
+            raise ValueError(f"Unknown subtitle style field: {key}")
+        # Przecinek lub znak równości rozbiłby listę pól force_style
+        if not isinstance(field, (str, int, float)) or any(
+            char in str(field) for char in ",=\n"
+        ):
+            raise ValueError(f"Invalid value of subtitle style field {key}")
+    return style
+
+
+def parse_clip_specs(value):
+    """
+    Validates the `clips` field of a batch render request (a list or its JSON
+    encoding). Raises ValueError with a message suitable for the client.
+    """
+    clips = json.loads(value) if isinstance(value, str) else value
+    if not isinstance(clips, list) or not clips:
+        raise ValueError("clips must be a non-empty list")
+    if len(clips) > settings.BATCH_RENDER_MAX_CLIPS:
+        raise ValueError(
+            f"At most {settings.BATCH_RENDER_MAX_CLIPS} clips per batch are allowed"
+        )
+
+    specs = []
+    for index, clip in enumerate(clips):
+        if not isinstance(clip, dict):
+            raise ValueError(f"Clip {index} must be an object")
         try:
-            probe = subprocess.run(
-                [
-                    "ffprobe",
-                    "-v",
-                    "error",
-                    "-select_streams",
-                    "v:0",
-                    "-show_entries",
-                    "stream=width,height",
-                    "-of",
-                    "csv=p=0",
-                    default_storage.path(video_path),
-                ],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            width, height = map(int, probe.stdout.strip().split(","))
-            scale_value = (
-                f"-1:{target_resolution}"
-                if height > width
-                else f"{target_resolution}:-1"
-            )
-            print("\n\n\n", width, height, scale_value, "\n\n\n")
-
-            # Sprawdź, czy plik wynikowy istnieje i usuń, jeśli tak
-            if default_storage.exists(output_video_name):
-                default_storage.delete(output_video_name)
-
-            # Komenda FFmpeg do przetworzenia wideo z dynamicznym skalowaniem
-            ffmpeg_cmd = [
-                "ffmpeg",
-                "-i",
-                default_storage.path(video_path),
-                "-vf",
-                f"scale={scale_value}",
-                "-ss",
-                start_time,
-                "-to",
-                end_time,
-                "-c:v",
-                codec,
-                "-crf",
-                "18",
-                "-preset",
-                "fast",
-                "-c:a",
-                "aac",
-                output_video_path,
-            ]
-            if enhance_audio:
-                ffmpeg_cmd.extend(["-af", "highpass=f=200, lowpass=f=3000"])
-
-            subprocess.run(ffmpeg_cmd, check=True)
-
-            # Generowanie napisów przy użyciu OpenAI Whisper
-            if add_subtitles:
-                model = load_model(whisper_model)
-                result = model.transcribe(output_video_path, fp16=False)
-
-                # Tworzenie pliku SRT z timestampami
-                srt_content = ""
-                for i, segment in enumerate(result["segments"], start=1):
-                    start = format_timestamp(segment["start"])
-                    end = format_timestamp(segment["end"])
-                    text = segment["text"].strip()
-                    srt_content += f"{i}\n{start} --> {end}\n{text}\n\n"
-
-                # Zapisz napisy w `default_storage` jako plik .srt
-                subtitles_content = ContentFile(srt_content.encode("utf-8"))
-                saved_subtitles_file = default_storage.save(
-                    subtitles_name, subtitles_content
-                )
+            spec = {
+                "start_time": str(clip["start_time"]),
+                "end_time": str(clip["end_time"]),
+                "resolution": clip.get("resolution", "1080p"),
+                "enhance_audio": str(clip.get("enhance_audio", False)).lower()
+                == "true",
+            }
+        except KeyError as e:
+            raise ValueError(f"Clip {index}: missing parameter: {e.args[0]}")
+        if parse_timestamp(spec["end_time"]) <= parse_timestamp(spec["start_time"]):
+            raise ValueError(f"Clip {index}: end time must be after start time")
+        specs.append(spec)
+    return specs
 
-            # Zwracanie URL-ów do przetworzonego wideo i napisów
-            video_url = request.build_absolute_uri(
-                default_storage.url(output_video_name)
-            )
-            subtitles_url = (
-                request.build_absolute_uri(default_storage.url(saved_subtitles_file))
-                if add_subtitles
-                else None
-            )
-            return JsonResponse(
-                {"video_url": video_url, "subtitles_url": subtitles_url}
-            )
 
-        except subprocess.CalledProcessError as e:
-            print("\n\n\nError processing video:", e)
-            return JsonResponse({"error": "Video processing failed"}, status=500)
-        finally:
-            # Usuń pliki tymczasowe
-            default_storage.delete(video_path)
-            # if default_storage.exists(output_video_name):
-            #     default_storage.delete(output_video_name)
-            # if add_subtitles and default_storage.exists(subtitles_name):
-            #     default_storage.delete(subtitles_name)
-
-    return JsonResponse({"error": "Invalid request"}, status=400)
-
-
-# @api_view(["POST"])
-# @csrf_exempt
-# def process_video(request):
-#     if request.method == "POST" and "video" in request.FILES:
-#         video_file = request.FILES["video"]
-#         start_time = request.POST["start_time"]
-#         end_time = request.POST["end_time"]
-#         resolution = request.POST["resolution"]
-#         enhance_audio = request.POST["enhance_audio"] == "true"
-#         add_subtitles = request.POST["add_subtitles"] == "true"
-
-#         # Mapowanie rozdzielczości do wartości pionowych
-#         resolution_mapping = {
-#             "480p": 480,
-#             "720p": 720,
-#             "1080p": 1080,
-#             "1440p": 1440,
-#             "4K": 2160,
-#         }
-#         target_resolution = resolution_mapping.get(resolution, 1080)
-
-#         output_video_name = "processed_video.mp4"
-#         subtitles_name = "subtitles.srt"
-#         codec = settings.GPU_INFO["codec"]
-#         whisper_model = settings.GPU_INFO["whisper_model"]
-
-#         def generate():
-#             # Informacja o rozpoczęciu przetwarzania
-#             yield "data: Rozpoczęcie przetwarzania wideo\n\n"
-
-#             # Zapisz oryginalne wideo
-#             video_path = default_storage.save(
-#                 os.path.join("temp", video_file.name), video_file
-#             )
-#             output_video_path = default_storage.path(output_video_name)
-#             subtitles_path = default_storage.path(subtitles_name)
-
-#             # Sprawdz proporcje wideo
-#             yield "data: Sprawdzanie rozmiaru wideo\n\n"
-#             try:
-#                 probe = subprocess.run(
-#                     [
-#                         "ffprobe",
-#                         "-v",
-#                         "error",
-#                         "-select_streams",
-#                         "v:0",
-#                         "-show_entries",
-#                         "stream=width,height",
-#                         "-of",
-#                         "csv=p=0",
-#                         default_storage.path(video_path),
-#                     ],
-#                     capture_output=True,
-#                     text=True,
-#                     check=True,
-#                 )
-#                 width, height = map(int, probe.stdout.strip().split(","))
-#                 scale_value = (
-#                     f"-1:{target_resolution}"
-#                     if height > width
-#                     else f"{target_resolution}:-1"
-#                 )
-
-#                 # Montowanie wideo
-#                 yield "data: Montowanie wideo\n\n"
-#                 if default_storage.exists(output_video_name):
-#                     default_storage.delete(output_video_name)
-
-#                 ffmpeg_cmd = [
-#                     "ffmpeg",
-#                     "-i",
-#                     default_storage.path(video_path),
-#                     "-vf",
-#                     f"scale={scale_value}",
-#                     "-ss",
-#                     start_time,
-#                     "-to",
-#                     end_time,
-#                     "-c:v",
-#                     codec,
-#                     "-preset",
-#                     "fast",
-#                     "-c:a",
-#                     "aac",
-#                     output_video_path,
-#                 ]
-
-#                 if codec == "libx264":
-#                     ffmpeg_cmd.extend(["-crf", "18"])
-#                 elif codec == "h264_nvenc":
-#                     ffmpeg_cmd.extend(["-cq:v", "20"])  # jakość dla kodeka NVIDIA
-
-#                 if enhance_audio:
-#                     ffmpeg_cmd.extend(["-af", "highpass=f=200, lowpass=f=3000"])
-
-#                 subprocess.run(ffmpeg_cmd, check=True)
-
-#                 # Generowanie napisów
-#                 if add_subtitles:
-#                     yield "data: Generowanie napisów\n\n"
-#                     model = load_model(whisper_model)
-#                     result = model.transcribe(output_video_path, fp16=False)
-
-#                     # Tworzenie pliku SRT z timestampami
-#                     srt_content = ""
-#                     for i, segment in enumerate(result["segments"], start=1):
-#                         start = format_timestamp(segment["start"])
-#                         end = format_timestamp(segment["end"])
-#                         text = segment["text"].strip()
-#                         srt_content += f"{i}\n{start} --> {end}\n{text}\n\n"
-
-#                     subtitles_content = ContentFile(srt_content.encode("utf-8"))
-#                     default_storage.save(subtitles_name, subtitles_content)
-
-#                 yield "data: Przetwarzanie zakończone\n\n"
-
-#                 # Zwrócenie URL-i po zakończeniu
-#                 video_url = request.build_absolute_uri(
-#                     default_storage.url(output_video_name)
-#                 )
-#                 subtitles_url = (
-#                     request.build_absolute_uri(default_storage.url(subtitles_name))
-#                     if add_subtitles
-#                     else None
-#                 )
-#                 yield f"data: {{'video_url': '{video_url}', 'subtitles_url': '{subtitles_url}'}}\n\n"
-
-#             except subprocess.CalledProcessError as e:
-#                 yield f"data: Error processing video: {str(e)}\n\n"
-#             finally:
-#                 # Usuń pliki tymczasowe
-#                 default_storage.delete(video_path)
-
-#         # Zwracanie `StreamingHttpResponse` z generatora `generate`
-#         response = StreamingHttpResponse(generate(), content_type="text/event-stream")
-#         response["Cache-Control"] = "no-cache"
-#         response["X-Accel-Buffering"] = "no"
-#         return response
-
-#     return JsonResponse({"error": "Invalid request"}, status=400)
+@api_view(["POST"])
+@csrf_exempt
+def batch_render(request):
+    """
+    Renders several clips of one source in a single job. The source (upload
+    or asset_id) is ingested once and decoded once per group of nearby clips.
+    """
+    asset = source_asset(request, "video")
+    if asset is None:
+        return JsonResponse({"error": "Invalid request"}, status=400)
+
+    try:
+        clips = parse_clip_specs(request.data["clips"])
+    except KeyError:
+        return JsonResponse({"error": "Missing parameter: clips"}, status=400)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    job = enqueue_batch(asset.blob, clips, asset=asset)
+    return queued_job_response(request, job, asset, clips=len(clips))
+
+
+@api_view(["GET"])
+def render_job_status(request, job_id):
+    job = get_object_or_404(RenderJob, pk=job_id)
+    return Response(RenderJobSerializer(job, context={"request": request}).data)
+
+
+def sse_message(event, data, retry=None):
+    # `retry:` podaje klientowi EventSource opóźnienie ponownego połączenia (ms)
+    prefix = f"retry: {retry}\n" if retry is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@require_GET
+def render_job_events(request, job_id):
+    """
+    Streams the progress of a render job as server-sent events: a `progress`
+    event whenever the stage, percentage, ETA or encode speed changes, then
+    a final `done` event with the full job once it finished or failed.
+
+    A stream holds a web worker, so it is bounded: after
+    SSE_MAX_STREAM_SECONDS it ends with a `reconnect` event (the client
+    opens a new stream), and a job whose progress has not changed for
+    SSE_STALE_JOB_SECONDS (still queued with no worker running, or left by
+    a crashed one) ends it with `stalled`. Both carry `retry:`. A client
+    that disconnects is noticed at the next write, at least every
+    SSE_HEARTBEAT_INTERVAL, when the server closes the generator.
+    """
+    get_object_or_404(RenderJob, pk=job_id)
+
+    def stream():
+        last_progress = None
+        started = last_change = last_sent = time.monotonic()
+        while True:
+            job = RenderJob.objects.get(pk=job_id)
+            if job.status in (RenderJob.STATUS_DONE, RenderJob.STATUS_FAILED):
+                data = RenderJobSerializer(job, context={"request": request}).data
+                yield sse_message("done", data)
+                return
+
+            progress = RenderJobProgressSerializer(job).data
+            now = time.monotonic()
+            if progress != last_progress:
+                yield sse_message("progress", progress)
+                last_progress = progress
+                last_change = last_sent = now
+            elif now - last_change >= settings.SSE_STALE_JOB_SECONDS:
+                yield sse_message("stalled", progress, settings.SSE_RETRY_MS)
+                return
+            elif now - last_sent >= settings.SSE_HEARTBEAT_INTERVAL:
+                # Komentarz SSE utrzymuje połączenie przez proxy
+                yield ": keep-alive\n\n"
+                last_sent = now
+            if now - started >= settings.SSE_MAX_STREAM_SECONDS:
+                yield sse_message("reconnect", progress, settings.SSE_RETRY_MS)
+                return
+            time.sleep(settings.SSE_POLL_INTERVAL)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 @api_view(["GET"])
 def get_gpu_info(request):
-    gpu_info = settings.GPU_LIST
+    gpu_info = dict(settings.GPU_LIST)
     return Response(gpu_info)
 
 
 @api_view(["POST"])
 def upload_file(request):
     try:
-        file = request.FILES.get("file")
-        project_id = request.POST.get("project_id")
-        if not file:
+        project_id = request.data.get("project_id")
+        if "file" not in request.FILES and not request.data.get("asset_id"):
             return JsonResponse({"error": "No file uploaded"}, status=400)
 
         # Sprawdź, czy project_id jest poprawne
         if not project_id:
             return JsonResponse({"error": "Project ID is required"}, status=400)
 
+        asset = source_asset(request, "file")
+        if asset is None:
+            return JsonResponse({"error": "Asset not found"}, status=404)
+
+        name = request.data.get("name") or (
+            request.FILES["file"].name
+            if "file" in request.FILES
+            else asset.original_name
+        )
+
         try:
-            # Save file to default_storage
-            file_path = default_storage.save(
-                f"edit_files_{project_id}/{file.name}", file
+            # Hardlink do bloba zamiast kolejnej kopii pliku
+            file_path = link_asset(
+                asset,
+                f"edit_files_{project_id}/{default_storage.get_valid_name(name)}",
             )
+            register_project_file(project_id, file_path, asset)
             return JsonResponse(
-                {"file_url": default_storage.url(file_path)}, status=201
+                {"file_url": default_storage.url(file_path), "asset_id": asset.pk},
+                status=201,
             )
         except Exception as storage_error:
             return JsonResponse(
@@ -438,47 +863,137 @@ def list_files(request):
     return JsonResponse({"files": files_data}, status=200)
 
 
+@api_view(["GET"])
+def project_manifest(request, project_id):
+    """
+    Metadata of a project's files (size, duration, dimensions, codecs,
+    thumbnail, content hash) in pages of `limit` entries after `cursor`.
+    The ETag changes whenever any entry does, so clients revalidate with
+    If-None-Match and get 304 for an unchanged project. Entries of new or
+    changed files list their size at once; hash, media metadata and
+    thumbnail follow from a background media task.
+    """
+    try:
+        cursor = int(request.GET.get("cursor") or 0)
+        limit = int(request.GET.get("limit") or settings.PROJECT_MANIFEST_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({"error": "cursor and limit must be integers"}, status=400)
+    limit = min(max(limit, 1), settings.PROJECT_MANIFEST_MAX_PAGE_SIZE)
+
+    # Pliki dodane z pominięciem API rejestrowane przy pobraniu pierwszej strony
+    if not cursor:
+        sync_project_files(project_id)
+
+    entries = ProjectFile.objects.filter(project_id=project_id)
+    summary = entries.aggregate(count=Count("id"), updated=Max("updated_at"))
+    etag = quote_etag(
+        hashlib.md5(
+            f"{summary['count']}:{summary['updated']}:{cursor}:{limit}".encode()
+        ).hexdigest()
+    )
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        return Response(status=304, headers=headers)
+
+    page = list(entries.filter(id__gt=cursor).order_by("id")[: limit + 1])
+    next_cursor = page[limit - 1].pk if len(page) > limit else None
+    return Response(
+        {
+            "count": summary["count"],
+            "results": ProjectFileSerializer(
+                page[:limit], many=True, context={"request": request}
+            ).data,
+            "next_cursor": next_cursor,
+        },
+        headers=headers,
+    )
+
+
+def move_without_overwrite(source, target):
+    """
+    Moves storage file `source` to `target`, raising FileExistsError instead
+    of replacing an existing file (a hard link fails atomically if it does).
+    """
+    os.link(default_storage.path(source), default_storage.path(target))
+    os.remove(default_storage.path(source))
+
+
 @api_view(["POST"])
 def finalize_project_files(request):
+    """
+    Moves the outputs of a finished render job (`job_id`) into the project's
+    folder, optionally renaming the video to `video_name`. Default names
+    carry the job id (processed_video_<id>.mp4, subtitles_<id>.srt), so
+    jobs finalized into the same project never replace each other's files;
+    a `video_name` that is already taken is refused with 409.
+    """
     project_id = request.data.get("project_id")
+    job_id = request.data.get("job_id")
     video_name = request.data.get("video_name")
     if not project_id:
         return JsonResponse({"error": "Project ID is required"}, status=400)
+    if not job_id:
+        return JsonResponse({"error": "Job ID is required"}, status=400)
 
-    try:
-        # Define source paths for processed files
-        temp_video_path = default_storage.path("processed_video.mp4")
-        temp_subtitles_path = default_storage.path("subtitles.srt")
+    job = RenderJob.objects.filter(pk=job_id).first() if str(job_id).isdigit() else None
+    if job is None:
+        return JsonResponse({"error": "Render job not found"}, status=404)
+    if job.status != RenderJob.STATUS_DONE or not job.video_path:
+        return JsonResponse({"error": "Render job has not finished"}, status=409)
 
+    try:
         # Define target project folder
-        project_folder = default_storage.path(f"edit_files_{project_id}/")
-        project_video_path = os.path.join(project_folder, "processed_video.mp4")
-        project_subtitles_path = os.path.join(project_folder, "subtitles.srt")
-
-        # Ensure project folder exists
-        if not os.path.exists(project_folder):
-            os.makedirs(project_folder)  # Use os.makedirs to create the directory
-
-        # Move processed video to the project folder
-        if default_storage.exists(temp_video_path):
-            shutil.move(temp_video_path, project_video_path)
-
-        # Move subtitles file if it exists
-        if default_storage.exists(temp_subtitles_path):
-            shutil.move(temp_subtitles_path, project_subtitles_path)
+        project_folder = f"edit_files_{project_id}"
+        os.makedirs(default_storage.path(project_folder), exist_ok=True)
 
         # Rename the video file if a new name is provided
+        base_name = f"processed_video_{job.pk}"
         if video_name:
-            new_video_path = os.path.join(project_folder, video_name)
-            os.rename(project_video_path, new_video_path)
+            base_name = get_valid_filename(
+                os.path.splitext(os.path.basename(video_name))[0]
+            )
+        video_target = f"{project_folder}/{base_name}.mp4"
+        subtitles_target = f"{project_folder}/subtitles_{job.pk}.srt"
+        workspace = os.path.dirname(job.video_path)
+
+        # Ponowne wywołanie dla tego samego zadania nie przenosi plików drugi raz
+        if os.path.dirname(job.video_path) != project_folder:
+            if not default_storage.exists(job.video_path):
+                return JsonResponse(
+                    {"error": "Rendered video is no longer available"}, status=404
+                )
+            try:
+                move_without_overwrite(job.video_path, video_target)
+            except FileExistsError:
+                return JsonResponse(
+                    {"error": f"{base_name}.mp4 already exists in this project"},
+                    status=409,
+                )
+            job.video_path = video_target
+
+        if job.subtitles_path and job.subtitles_path != subtitles_target:
+            if default_storage.exists(job.subtitles_path):
+                move_without_overwrite(job.subtitles_path, subtitles_target)
+                job.subtitles_path = subtitles_target
+        job.save(update_fields=["video_path", "subtitles_path"])
+        register_project_file(project_id, job.video_path)
+        if job.subtitles_path == subtitles_target:
+            register_project_file(project_id, subtitles_target)
+            # Napisy nowego renderu zastępują dotychczasowe wpisy projektu
+            import_project_subtitles(project_id, subtitles_target)
+
+        # Usuń pusty już katalog roboczy zadania
+        if workspace != project_folder:
+            try:
+                os.rmdir(default_storage.path(workspace))
+            except OSError:
+                pass
 
         # Return paths for the saved files
-        video_url = default_storage.url(
-            f"edit_files_{project_id}/{video_name if video_name else 'processed_video'}.mp4"
-        )
+        video_url = default_storage.url(job.video_path)
         subtitles_url = (
-            default_storage.url(f"edit_files_{project_id}/subtitles.srt")
-            if default_storage.exists(project_subtitles_path)
+            default_storage.url(job.subtitles_path)
+            if job.subtitles_path == subtitles_target
             else None
         )
 
@@ -492,18 +1007,85 @@ def finalize_project_files(request):
 
 @api_view(["GET"])
 def fetch_subtitles(request):
+    """The project's subtitles as SRT text, streamed from the cue store."""
     project_id = request.GET.get("project_id")
-    subtitle_path = f"edit_files_{project_id}/subtitles.srt"
-
-    # Check if the subtitle file exists in storage
-    if default_storage.exists(subtitle_path):
-        with default_storage.open(subtitle_path, "rb") as subtitle_file:
-            subtitle_content = subtitle_file.read().decode(
-                "utf-8"
-            )  # Read as binary, then decode
-            return HttpResponse(
-                subtitle_content, content_type="text/plain; charset=utf-8"
-            )
+    cues = project_cues(project_id)
+    if not cues.exists():
+        return JsonResponse({"error": "Subtitle file not found."}, status=404)
+    return StreamingHttpResponse(
+        srt_chunks(cues), content_type="text/plain; charset=utf-8"
+    )
+
+
+def subtitle_window(request):
+    """The [start_ms, end_ms) window of a cue query; ValueError if invalid."""
+    start_ms = int(request.GET.get("start_ms") or 0)
+    end = request.GET.get("end_ms")
+    end_ms = int(end) if end not in (None, "") else None
+    if start_ms < 0 or (end_ms is not None and end_ms <= start_ms):
+        raise ValueError((start_ms, end_ms))
+    return start_ms, end_ms
+
+
+@api_view(["GET", "POST"])
+def subtitle_cues(request, project_id):
+    """
+    GET: the cues overlapping [`start_ms`, `end_ms`) (at most
+    SUBTITLE_CUES_MAX_PAGE of them, with `truncated` set when more exist),
+    so the editor loads only what is visible. POST: adds one cue.
+    """
+    if request.method == "POST":
+        serializer = SubtitleCueSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+        cue = serializer.save(project_id=project_id)
+        return Response(SubtitleCueSerializer(cue).data, status=201)
 
-    # Return an error if the subtitle file doesn't exist
-    return JsonResponse({"error": "Subtitle file not found."}, status=404)
+    try:
+        start_ms, end_ms = subtitle_window(request)
+    except ValueError:
+        return JsonResponse(
+            {"error": "start_ms and end_ms must be integers, end after start"},
+            status=400,
+        )
+    limit = settings.SUBTITLE_CUES_MAX_PAGE
+    cues = cues_in_window(project_id, start_ms, end_ms or 2**31)
+    page = list(cues[: limit + 1])
+    return Response(
+        {
+            "cues": SubtitleCueSerializer(page[:limit], many=True).data,
+            "truncated": len(page) > limit,
+        }
+    )
+
+
+@api_view(["PATCH", "DELETE"])
+def subtitle_cue_detail(request, project_id, cue_id):
+    """Edits or removes one cue; the rest of the track is left untouched."""
+    cue = get_object_or_404(project_cues(project_id), pk=cue_id)
+    if request.method == "DELETE":
+        cue.delete()
+        return Response(status=204)
+    serializer = SubtitleCueSerializer(cue, data=request.data, partial=True)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=400)
+    serializer.save()
+    return Response(serializer.data)
+
+
+@api_view(["GET"])
+def export_subtitles(request, project_id, export_format):
+    """All cues of a project as `export_format` (srt, vtt or json), streamed."""
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse(
+            {"error": f"Format must be one of: {', '.join(EXPORT_FORMATS)}"},
+            status=400,
+        )
+    chunks, content_type, extension = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(
+        chunks(project_cues(project_id)), content_type=content_type
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="subtitles_{project_id}.{extension}"'
+    )
+    return response
@@ -0,0 +1,307 @@
+# waveform.py
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+
+import numpy as np
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from .media_probe import ProbeError, probe
+
+WAVEFORMS_DIR = "waveforms"
+MAGIC = b"SIWF"
+FORMAT_VERSION = 1
+# magic, wersja, bity na wartość, zarezerwowane, częstotliwość próbkowania,
+# próbki na szczyt poziomu 0, liczba poziomów
+HEADER = struct.Struct("<4sHBBIII")
+# Liczba szczytów poziomu i przesunięcie jego danych w pliku
+LEVEL = struct.Struct("<QQ")
+# Szczyty liczone na blok: pamięć nie zależy od długości nagrania
+BLOCK_PEAKS = 4096
+# Każdy szczyt to trójka (min, max, RMS)
+VALUES_PER_PEAK = 3
+
+
+class WaveformError(Exception):
+    pass
+
+
+def waveform_name(content_hash):
+    return f"{WAVEFORMS_DIR}/{content_hash[:2]}/{content_hash}.bin"
+
+
+def dtype_for(bits):
+    return np.dtype("<i2") if bits == 16 else np.dtype("i1")
+
+
+def pcm_samples(data):
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768
+
+
+def block_peaks(samples, samples_per_peak):
+    """
+    (min, max, RMS) of every `samples_per_peak` samples (floats in [-1, 1]);
+    a shorter tail forms one last peak.
+    """
+    full = len(samples) - len(samples) % samples_per_peak
+    frames = [samples[:full].reshape(-1, samples_per_peak)]
+    if full < len(samples):
+        frames.append(samples[full:].reshape(1, -1))
+    return np.concatenate(
+        [
+            np.stack(
+                [
+                    frame.min(axis=1),
+                    frame.max(axis=1),
+                    np.sqrt(np.mean(np.square(frame), axis=1)),
+                ],
+                axis=1,
+            )
+            for frame in frames
+            if frame.size
+        ]
+    )
+
+
+def merge_pairs(peaks):
+    """Halves the resolution of an even number of peaks."""
+    pairs = peaks.reshape(-1, 2, VALUES_PER_PEAK)
+    return np.stack(
+        [
+            pairs[:, :, 0].min(axis=1),
+            pairs[:, :, 1].max(axis=1),
+            np.sqrt(np.mean(np.square(pairs[:, :, 2]), axis=1)),
+        ],
+        axis=1,
+    )
+
+
+class PyramidWriter:
+    """
+    Writes peaks to one temporary file per zoom level. Level n + 1 merges
+    pairs of level n as blocks arrive; an unpaired peak waits for the next
+    block, so only one block per level is held in memory.
+    """
+
+    def __init__(self, folder, bits):
+        self.folder = folder
+        self.dtype = dtype_for(bits)
+        self.scale = np.iinfo(self.dtype).max
+        self.files = []
+        self.counts = []
+        self.carry = []
+
+    def level_path(self, level):
+        return os.path.join(self.folder, f"level_{level}.bin")
+
+    def add(self, level, peaks):
+        if level == len(self.files):
+            self.files.append(open(self.level_path(level), "wb"))
+            self.counts.append(0)
+            self.carry.append(None)
+
+        quantized = np.clip(np.round(peaks * self.scale), -self.scale, self.scale)
+        self.files[level].write(quantized.astype(self.dtype).tobytes())
+        self.counts[level] += len(peaks)
+
+        if self.carry[level] is not None:
+            peaks = np.concatenate([self.carry[level], peaks])
+            self.carry[level] = None
+        if len(peaks) % 2:
+            self.carry[level] = peaks[-1:]
+            peaks = peaks[:-1]
+        if len(peaks):
+            self.add(level + 1, merge_pairs(peaks))
+
+    def finish(self):
+        """Flushes unpaired peaks; the top level ends with a single peak."""
+        level = 0
+        while level < len(self.files):
+            if self.carry[level] is not None and self.counts[level] > 1:
+                carry, self.carry[level] = self.carry[level], None
+                self.add(level + 1, carry)
+            level += 1
+        for file in self.files:
+            file.close()
+        return self.counts
+
+
+def build_waveform(stream, target, sample_rate, samples_per_peak, bits):
+    """
+    Reads 16-bit mono PCM from `stream` in fixed-size blocks and writes the
+    peak pyramid to `target`: a header, a table of (peaks, offset) per
+    level and the quantized (min, max, RMS) triples of every level.
+    """
+    block_bytes = BLOCK_PEAKS * samples_per_peak * 2
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(target)) as folder:
+        writer = PyramidWriter(folder, bits)
+        pending = b""
+        while True:
+            data = stream.read(block_bytes)
+            if not data:
+                break
+            data = pending + data
+            # Niepełna próbka lub szczyt przechodzi do następnego bloku
+            usable = len(data) - len(data) % (samples_per_peak * 2)
+            pending = data[usable:]
+            if usable:
+                writer.add(0, block_peaks(pcm_samples(data[:usable]), samples_per_peak))
+        tail = pending[: len(pending) - len(pending) % 2]
+        if tail:
+            writer.add(0, block_peaks(pcm_samples(tail), samples_per_peak))
+        counts = writer.finish()
+        if not counts:
+            raise WaveformError("No audio samples decoded")
+
+        itemsize = dtype_for(bits).itemsize * VALUES_PER_PEAK
+        offset = HEADER.size + LEVEL.size * len(counts)
+        with open(target, "wb") as out:
+            out.write(
+                HEADER.pack(
+                    MAGIC,
+                    FORMAT_VERSION,
+                    bits,
+                    0,
+                    sample_rate,
+                    samples_per_peak,
+                    len(counts),
+                )
+            )
+            for count in counts:
+                out.write(LEVEL.pack(count, offset))
+                offset += count * itemsize
+            for level in range(len(counts)):
+                with open(writer.level_path(level), "rb") as f:
+                    shutil.copyfileobj(f, out)
+    return counts
+
+
+def generate_waveform(asset):
+    """
+    Decodes the first audio stream of `asset` once through an FFmpeg PCM
+    pipe and stores its waveform pyramid under waveforms/.
+    """
+    name = waveform_name(asset.digest)
+    if default_storage.exists(name):
+        return name
+
+    try:
+        info = probe(asset.path, content_hash=asset.digest)
+    except ProbeError as e:
+        raise WaveformError(f"Cannot read {asset}: {e}")
+    if not info.audio:
+        raise WaveformError(f"{asset} has no audio stream")
+
+    target = default_storage.path(name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    partial = f"{target}.{os.getpid()}.part"
+    sample_rate = settings.WAVEFORM_SAMPLE_RATE
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-v",
+        "error",
+        "-i",
+        asset.path,
+        "-map",
+        "0:a:0",
+        "-vn",
+        "-ac",
+        "1",
+        "-ar",
+        str(sample_rate),
+        "-f",
+        "s16le",
+        "pipe:1",
+    ]
+    try:
+        # Błędy do pliku: pełny potok stderr zatrzymałby FFmpeg
+        with tempfile.TemporaryFile() as stderr:
+            with subprocess.Popen(
+                cmd, stdout=subprocess.PIPE, stderr=stderr
+            ) as process:
+                build_waveform(
+                    process.stdout,
+                    partial,
+                    sample_rate,
+                    settings.WAVEFORM_SAMPLES_PER_PEAK,
+                    settings.WAVEFORM_BITS,
+                )
+            if process.returncode:
+                stderr.seek(0)
+                raise WaveformError(
+                    f"Could not decode audio of {asset}: "
+                    f"{stderr.read().decode(errors='replace')}"
+                )
+        os.replace(partial, target)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return name
+
+
+class Waveform:
+    """Read access to a stored pyramid; only the requested window is read."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise WaveformError(f"Truncated waveform file {path}")
+            (
+                magic,
+                version,
+                self.bits,
+                _,
+                self.sample_rate,
+                self.samples_per_peak,
+                level_count,
+            ) = HEADER.unpack(header)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise WaveformError(f"Unsupported waveform file {path}")
+            self.levels = [LEVEL.unpack(f.read(LEVEL.size)) for _ in range(level_count)]
+        self.dtype = dtype_for(self.bits)
+
+    def peaks_per_second(self, level):
+        return self.sample_rate / (self.samples_per_peak * 2**level)
+
+    def level_for(self, seconds, width, max_peaks):
+        """
+        The coarsest level still giving at least `width` peaks over
+        `seconds`, without exceeding `max_peaks`.
+        """
+        level = 0
+        while (
+            level + 1 < len(self.levels)
+            and seconds * self.peaks_per_second(level + 1) >= width
+        ):
+            level += 1
+        while (
+            level + 1 < len(self.levels)
+            and seconds * self.peaks_per_second(level) > max_peaks
+        ):
+            level += 1
+        return level
+
+    def read(self, level, first, count):
+        """Peaks [first, first + count) of `level` as a (n, 3) array."""
+        total, offset = self.levels[level]
+        first = min(max(first, 0), total)
+        count = max(0, min(count, total - first))
+        itemsize = self.dtype.itemsize * VALUES_PER_PEAK
+        with open(self.path, "rb") as f:
+            f.seek(offset + first * itemsize)
+            data = f.read(count * itemsize)
+        return first, np.frombuffer(data, dtype=self.dtype).reshape(-1, VALUES_PER_PEAK)
+
+
+def open_waveform(asset):
+    """The stored waveform of `asset`, or None if not generated yet."""
+    name = waveform_name(asset.digest)
+    if not default_storage.exists(name):
+        return None
+    return Waveform(default_storage.path(name))
@@ -0,0 +1,63 @@
+# workers.py
+import multiprocessing
+
+import django
+from django.db import connections
+
+
+def worker_main(stop_event, poll_interval, scheduler=None):
+    """Entry point of a single render worker process."""
+    # Przy starcie metodą "spawn" proces potomny musi sam skonfigurować Django
+    django.setup()
+    # Połączenia odziedziczone po procesie nadrzędnym nie mogą być współdzielone
+    connections.close_all()
+
+    from .jobs import worker_loop
+
+    try:
+        worker_loop(stop_event, poll_interval, scheduler)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connections.close_all()
+
+
+class WorkerPool:
+    """
+    A fixed-size pool of processes executing queued RenderJobs. All workers
+    share one DeviceScheduler, so concurrent jobs spread over every GPU and
+    the CPU instead of piling onto the first device.
+    """
+
+    def __init__(self, size, poll_interval=1.0, scheduler=None):
+        self.size = size
+        self.poll_interval = poll_interval
+        self.scheduler = scheduler
+        self.stop_event = multiprocessing.Event()
+        self.processes = []
+
+    def start(self):
+        if self.scheduler is None:
+            from .scheduler import create_scheduler
+
+            # Liczniki we współdzielonej pamięci muszą powstać przed procesami
+            self.scheduler = create_scheduler()
+        connections.close_all()
+        for index in range(self.size):
+            process = multiprocessing.Process(
+                target=worker_main,
+                args=(self.stop_event, self.poll_interval, self.scheduler),
+                name=f"render-worker-{index}",
+            )
+            process.start()
+            self.processes.append(process)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def join(self, timeout=None):
+        for process in self.processes:
+            process.join(timeout)
+
+    def alive(self):
+        return [process for process in self.processes if process.is_alive()]
@@ -4,4 +4,12 @@ python manage.py makemigrations
 
 python manage.py migrate
 
+python manage.py refresh_gpu_info
+
+python manage.py benchmark_encoders --if-stale
+
+python manage.py run_transcription_service &
+
+python manage.py run_render_workers &
+
 python manage.py runserver 0.0.0.0:8000
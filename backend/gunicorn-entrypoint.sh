@@ -6,4 +6,12 @@ python manage.py makemigrations
 
 python manage.py migrate
 
+python manage.py refresh_gpu_info
+
+python manage.py benchmark_encoders --if-stale
+
+python manage.py run_transcription_service &
+
+python manage.py run_render_workers &
+
 gunicorn -c gunicorn-config.py app_name.wsgi:application
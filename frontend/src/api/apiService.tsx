@@ -5,6 +5,16 @@ export interface Video {
     title: string;
     description: string;
     file: string;
+    project?: number | null;
+    project_title?: string | null;
+    // Wypełniane w tle po przesłaniu pliku (null do czasu zbadania)
+    duration?: number | null;
+    width?: number | null;
+    height?: number | null;
+    fps_num?: number | null;
+    fps_den?: number | null;
+    video_codec?: string;
+    size?: number | null;
 }
 
 export interface ProjectData {
@@ -18,9 +28,23 @@ interface FileResponse {
     url: string;
 }
 
-export const getVideos = async (): Promise<Video[]> => {
-    const response = await apiClient.get("videos/");
-    return response.data;
+// Listy są stronicowane kursorem; `next` to adres następnej strony
+export interface Page<T> {
+    next: string | null;
+    previous: string | null;
+    results: T[];
+}
+
+export const getVideos = async (
+    params: {
+        project?: number;
+        search?: string;
+        min_height?: number;
+        min_duration?: number;
+    } = {}
+): Promise<Video[]> => {
+    const response = await apiClient.get<Page<Video>>("videos/", { params });
+    return response.data.results;
 };
 
 export const postVideos = async (
@@ -44,9 +68,13 @@ export const deleteVideo = async (id: string): Promise<void> => {
     await apiClient.delete(`videos/${id}/`);
 };
 
-export const getProjects = async (): Promise<ProjectData[]> => {
-    const response = await apiClient.get("projects/");
-    return response.data;
+export const getProjects = async (
+    params: { search?: string } = {}
+): Promise<ProjectData[]> => {
+    const response = await apiClient.get<Page<ProjectData>>("projects/", {
+        params,
+    });
+    return response.data.results;
 };
 
 export const postProject = async (
@@ -67,6 +95,7 @@ export const getVideoMetadata = async (
     fps: number;
     duration: number;
     total_frames: number;
+    asset_id: number;
 }> => {
     const formData = new FormData();
     formData.append("video", file);
@@ -81,22 +110,125 @@ export const getVideoMetadata = async (
     return response.data;
 };
 
+export type RenderStatus = "queued" | "running" | "done" | "failed";
+
+export interface RenderClip {
+    index: number;
+    status: RenderStatus;
+    start_time: string;
+    end_time: string;
+    resolution: string;
+    enhance_audio: boolean;
+    video_url: string | null;
+    error: string;
+}
+
+export interface RenderProgress {
+    id: number;
+    status: RenderStatus;
+    queue_position: number;
+    stage: "" | "probe" | "encode" | "transcribe" | "write_srt";
+    progress: number;
+    eta_seconds: number | null;
+    speed: number | null;
+    fps: number | null;
+    bitrate: string;
+}
+
+export interface RenderJob extends RenderProgress {
+    video_url: string;
+    subtitles_url: string;
+    clips: RenderClip[];
+    error: string;
+}
+
+export const getRenderJob = async (jobID: number): Promise<RenderJob> => {
+    const response = await apiClient.get(`render-jobs/${jobID}/`);
+    return response.data;
+};
+
+// Server-sent events with the job's stage, percentage, ETA and encode speed
+export const watchRenderJob = (
+    jobID: number,
+    onProgress?: (progress: RenderProgress) => void
+): Promise<RenderJob> =>
+    new Promise((resolve, reject) => {
+        const source = new EventSource(
+            `${apiClient.defaults.baseURL}render-jobs/${jobID}/events/`
+        );
+        source.addEventListener("progress", (event) => {
+            onProgress?.(JSON.parse((event as MessageEvent).data));
+        });
+        source.addEventListener("done", (event) => {
+            source.close();
+            resolve(JSON.parse((event as MessageEvent).data));
+        });
+        // Streams are time-limited: continue on a new one
+        source.addEventListener("reconnect", (event) => {
+            source.close();
+            onProgress?.(JSON.parse((event as MessageEvent).data));
+            watchRenderJob(jobID, onProgress).then(resolve, reject);
+        });
+        // The job is not moving (no worker running): the caller polls instead
+        source.addEventListener("stalled", () => {
+            source.close();
+            reject(new Error("Render job is not progressing"));
+        });
+        source.onerror = () => {
+            source.close();
+            reject(new Error("Render progress stream closed"));
+        };
+    });
+
+export const waitForRenderJob = async (
+    jobID: number,
+    intervalMs: number = 2000,
+    onProgress?: (progress: RenderProgress) => void
+): Promise<RenderJob> => {
+    if (typeof EventSource !== "undefined") {
+        try {
+            return await watchRenderJob(jobID, onProgress);
+        } catch (error) {
+            // Stream unavailable (e.g. proxy buffering): fall back to polling
+            console.warn("Falling back to polling render job:", error);
+        }
+    }
+    for (;;) {
+        const job = await getRenderJob(jobID);
+        if (job.status === "done" || job.status === "failed") {
+            return job;
+        }
+        onProgress?.(job);
+        await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+};
+
 export const processVideo = async (
     videoFile: File,
     startTime: number,
     endTime: number,
     resolution: string,
     enhanceAudio: boolean,
-    addSubtitles: boolean
-): Promise<{ video_url: string; subtitles_url: string }> => {
+    addSubtitles: boolean,
+    burnSubtitles: boolean,
+    assetID?: number,
+    onProgress?: (progress: RenderProgress) => void
+): Promise<{ job_id: number; video_url: string; subtitles_url: string }> => {
     try {
         const formData = new FormData();
-        formData.append("video", videoFile);
+        // Source already uploaded for metadata: send only its asset ID
+        if (assetID) {
+            formData.append("asset_id", assetID.toString());
+        } else {
+            formData.append("video", videoFile);
+        }
         formData.append("start_time", startTime.toString());
         formData.append("end_time", endTime.toString());
         formData.append("resolution", resolution);
         formData.append("enhance_audio", enhanceAudio.toString());
         formData.append("add_subtitles", addSubtitles.toString());
+        // Captions drawn into the picture by the render's only video encode
+        formData.append("burn_subtitles", burnSubtitles.toString());
 
         const response = await apiClient.post("process-video/", formData, {
             headers: {
@@ -104,20 +236,68 @@ export const processVideo = async (
             },
         });
 
-        return response.data;
+        // Render runs in a background worker, follow the job until it finishes
+        const job = await waitForRenderJob(
+            response.data.job_id,
+            undefined,
+            onProgress
+        );
+        if (job.status !== "done") {
+            throw new Error(job.error || "Render job failed");
+        }
+
+        return {
+            job_id: job.id,
+            video_url: job.video_url,
+            subtitles_url: job.subtitles_url,
+        };
     } catch (error) {
         console.error("Error processing video:", error);
-        return { video_url: "", subtitles_url: "" };
+        return { job_id: 0, video_url: "", subtitles_url: "" };
+    }
+};
+
+export interface ClipRequest {
+    start_time: string | number;
+    end_time: string | number;
+    resolution?: string;
+    enhance_audio?: boolean;
+}
+
+export const processVideoBatch = async (
+    clips: ClipRequest[],
+    videoFile?: File,
+    assetID?: number
+): Promise<RenderClip[]> => {
+    const formData = new FormData();
+    if (assetID) {
+        formData.append("asset_id", assetID.toString());
+    } else if (videoFile) {
+        formData.append("video", videoFile);
     }
+    formData.append("clips", JSON.stringify(clips));
+
+    const response = await apiClient.post("batch-render/", formData, {
+        headers: {
+            "Content-Type": "multipart/form-data",
+        },
+    });
+
+    // All clips are rendered by one job; each clip reports its own status
+    const job = await waitForRenderJob(response.data.job_id);
+    return job.clips;
 };
 
 export const finalizeResponse = async (
     projectID: number,
+    jobID: number,
     videoName: string
 ): Promise<{ video_url: string; subtitles_url: string }> => {
     try {
+        // Each render job has its own output files; move this job's outputs
         const response = await apiClient.post("finalize-project-files/", {
             project_id: projectID,
+            job_id: jobID,
             video_name: videoName,
         });
 
@@ -128,58 +308,347 @@ export const finalizeResponse = async (
     }
 };
 
-export const uploadFileToBackend = async (
-    file: File,
-    projectID: number
-): Promise<string> => {
-    const formData = new FormData();
-    formData.append("file", file);
-    formData.append("project_id", projectID.toString());
+export interface UploadState {
+    upload_id: string;
+    filename: string;
+    total_size: number;
+    status: "open" | "queued" | "finalizing" | "complete" | "failed";
+    received_bytes: number;
+    received_ranges: [number, number][];
+    missing_ranges: [number, number][];
+    asset_id: number | null;
+    file_url: string | null;
+    error: string | null;
+}
+
+// Upload sessions survive page reloads: file identity -> upload_id
+const RESUMABLE_UPLOADS_KEY = "resumableUploads";
 
+const resumableUploadKey = (file: File, projectID?: number): string =>
+    [projectID ?? "", file.name, file.size, file.lastModified].join(":");
+
+const savedUploads = (): Record<string, string> => {
     try {
-        const response = await apiClient.post("upload-file/", formData, {
-            headers: {
-                "Content-Type": "multipart/form-data",
-            },
-        });
+        return JSON.parse(localStorage.getItem(RESUMABLE_UPLOADS_KEY) ?? "{}");
+    } catch {
+        return {};
+    }
+};
 
-        return response.data.file_url;
+const saveUploadID = (key: string, uploadID: string | null) => {
+    const uploads = savedUploads();
+    if (uploadID) {
+        uploads[key] = uploadID;
+    } else {
+        delete uploads[key];
+    }
+    try {
+        localStorage.setItem(RESUMABLE_UPLOADS_KEY, JSON.stringify(uploads));
     } catch (error) {
-        console.error("Error uploading file:", error);
-        return "";
+        console.warn("Could not remember upload session:", error);
+    }
+};
+
+export const uploadFileResumable = async (
+    file: File,
+    projectID?: number,
+    chunkSize: number = 8 * 1024 * 1024,
+    parallel: number = 3,
+    finalizeIntervalMs: number = 1000
+): Promise<UploadState> => {
+    const key = resumableUploadKey(file, projectID);
+
+    // Resume the session started for this file earlier, if the backend still has it
+    let state: UploadState | null = null;
+    const savedID = savedUploads()[key];
+    if (savedID) {
+        try {
+            state = (await apiClient.get(`uploads/${savedID}/`)).data;
+        } catch {
+            state = null; // Expired or removed
+        }
+        if (state && (state.status === "failed" || state.total_size !== file.size)) {
+            state = null;
+        }
+    }
+    if (!state) {
+        state = (
+            await apiClient.post("uploads/", {
+                filename: file.name,
+                size: file.size,
+                project_id: projectID,
+            })
+        ).data;
+        saveUploadID(key, state.upload_id);
+    }
+    const uploadID = state.upload_id;
+
+    if (state.status === "open") {
+        // Send only the ranges the backend does not have yet
+        const received = state.received_ranges;
+        const chunks: number[] = [];
+        for (let index = 0; index * chunkSize < file.size; index++) {
+            const start = index * chunkSize;
+            const end = Math.min(start + chunkSize, file.size);
+            if (!received.some(([from, to]) => from <= start && end <= to)) {
+                chunks.push(index);
+            }
+        }
+
+        const worker = async () => {
+            for (
+                let index = chunks.shift();
+                index !== undefined;
+                index = chunks.shift()
+            ) {
+                const offset = index * chunkSize;
+                await apiClient.put(
+                    `uploads/${uploadID}/chunks/${index}/`,
+                    file.slice(offset, offset + chunkSize),
+                    {
+                        params: { offset },
+                        headers: { "Content-Type": "application/octet-stream" },
+                    }
+                );
+            }
+        };
+        await Promise.all(Array.from({ length: parallel }, worker));
+        state = (await apiClient.post(`uploads/${uploadID}/finalize/`)).data;
+    }
+
+    // Hashing and registration run on a render worker: poll until done
+    while (state.status !== "complete") {
+        if (state.status === "failed") {
+            saveUploadID(key, null);
+            throw new Error(state.error ?? "Upload finalization failed");
+        }
+        await new Promise((resolve) => setTimeout(resolve, finalizeIntervalMs));
+        state = (await apiClient.get(`uploads/${uploadID}/`)).data;
     }
+    saveUploadID(key, null);
+    return state;
 };
 
 const BASE_URL = "http://localhost:8000"; // Base URL for backend
 
-export const fetchExistingFiles = async (
+export interface ProjectFile {
+    id: number;
+    name: string;
+    url: string;
+    proxy_url: string | null; // Low-resolution rendition for the preview
+    asset_id: number | null;
+    size: number;
+    content_hash: string;
+    mime_type: string;
+    duration: number | null;
+    width: number | null;
+    height: number | null;
+    video_codec: string;
+    audio_codec: string;
+    thumbnail_url: string | null;
+    updated_at: string;
+}
+
+export interface ProjectManifestPage {
+    count: number;
+    results: ProjectFile[];
+    next_cursor: number | null;
+}
+
+// Last manifest page per request, revalidated with If-None-Match
+const manifestCache = new Map<string, { etag: string; page: ProjectManifestPage }>();
+
+export const fetchProjectManifest = async (
+    projectID: number,
+    cursor?: number | null,
+    limit?: number
+): Promise<ProjectManifestPage> => {
+    const key = `${projectID}:${cursor ?? ""}:${limit ?? ""}`;
+    const cached = manifestCache.get(key);
+    const response = await apiClient.get(`projects/${projectID}/files/`, {
+        params: { cursor: cursor ?? undefined, limit },
+        headers: cached ? { "If-None-Match": cached.etag } : {},
+        validateStatus: (status) => status === 200 || status === 304,
+    });
+    if (response.status === 304 && cached) {
+        return cached.page;
+    }
+    const etag = response.headers["etag"];
+    if (etag) {
+        manifestCache.set(key, { etag, page: response.data });
+    }
+    return response.data;
+};
+
+// Metadata of every project file; only a few KB even for large projects
+export const fetchProjectFiles = async (
     projectID: number
-): Promise<File[]> => {
-    const response = await apiClient.get("list-files/", {
-        params: { project_id: projectID },
+): Promise<ProjectFile[]> => {
+    const files: ProjectFile[] = [];
+    let cursor: number | null = null;
+    do {
+        const page: ProjectManifestPage = await fetchProjectManifest(
+            projectID,
+            cursor
+        );
+        files.push(...page.results);
+        cursor = page.next_cursor;
+    } while (cursor !== null);
+    return files;
+};
+
+// Downloads one project file, only when the editor actually needs its data
+export const downloadProjectFile = async (entry: ProjectFile): Promise<File> => {
+    const fileUrl = entry.url.startsWith("http")
+        ? entry.url
+        : `${BASE_URL}${entry.url}`;
+    const fileResponse = await fetch(fileUrl);
+    if (!fileResponse.ok) {
+        throw new Error(`Failed to fetch file: ${entry.name}`);
+    }
+    const fileBlob = await fileResponse.blob();
+    return new File([fileBlob], entry.name, {
+        type: entry.mime_type || fileBlob.type,
     });
-    const data = response.data;
+};
 
-    const files = await Promise.all(
-        data.files.map(async ({ name, url }: { name: string; url: string }) => {
-            // Ensure the full URL is used
-            const fileUrl = url.startsWith("http") ? url : `${BASE_URL}${url}`;
+export interface SpriteLevel {
+    interval: number; // Seconds between tiles
+    columns: number;
+    rows: number;
+    tile_width: number;
+    tile_height: number;
+    count: number; // Tiles in total
+    vtt_url: string;
+    sheets: string[];
+}
 
-            console.log("Fetching file:", name, fileUrl);
-            const fileResponse = await fetch(fileUrl);
+export interface SpriteManifest {
+    status: string;
+    duration: number;
+    levels: SpriteLevel[];
+}
 
-            if (!fileResponse.ok) {
-                throw new Error(`Failed to fetch file: ${name}`);
-            }
+// Asset previews are generated in the background: the backend answers 202
+// until they exist
+const getWhenReady = async (
+    url: string,
+    params?: Record<string, number>,
+    retryDelayMs = 2000
+) => {
+    for (;;) {
+        const response = await apiClient.get(url, {
+            params,
+            validateStatus: (status) => status === 200 || status === 202,
+        });
+        if (response.status === 200) {
+            return response.data;
+        }
+        await new Promise((resolve) => setTimeout(resolve, retryDelayMs));
+    }
+};
 
-            const fileBlob = await fileResponse.blob();
-            return new File([fileBlob], name, { type: fileBlob.type });
-        })
-    );
+// Sprite manifest per asset
+const spriteManifests = new Map<number, Promise<SpriteManifest>>();
 
-    return files;
+export const fetchSpriteManifest = (
+    assetID: number
+): Promise<SpriteManifest> => {
+    let manifest = spriteManifests.get(assetID);
+    if (!manifest) {
+        manifest = getWhenReady(`assets/${assetID}/sprites/`);
+        manifest.catch(() => spriteManifests.delete(assetID));
+        spriteManifests.set(assetID, manifest);
+    }
+    return manifest;
 };
 
+export interface PreviewMedia {
+    url: string;
+    proxy: boolean; // False when the original is small enough to play
+    width: number;
+    height: number;
+}
+
+// What the preview plays for an asset; renders always use the original
+const previewMedia = new Map<number, Promise<PreviewMedia>>();
+
+export const fetchPreviewMedia = (assetID: number): Promise<PreviewMedia> => {
+    let media = previewMedia.get(assetID);
+    if (!media) {
+        media = getWhenReady(`assets/${assetID}/preview/`);
+        media.catch(() => previewMedia.delete(assetID));
+        previewMedia.set(assetID, media);
+    }
+    return media;
+};
+
+export interface WaveformWindow {
+    level: number;
+    levels: number;
+    bits: number; // Values are scaled to 2^(bits-1) - 1
+    peaks_per_second: number;
+    start: number; // Time of the first peak in seconds
+    min: number[];
+    max: number[];
+    rms: number[];
+}
+
+// Peaks of the visible window only, at a zoom level giving `width` peaks
+export const fetchWaveform = (
+    assetID: number,
+    start: number,
+    end: number,
+    width: number
+): Promise<WaveformWindow> =>
+    getWhenReady(`assets/${assetID}/waveform/`, { start, end, width });
+
+export interface HighlightCandidate {
+    start: number; // Seconds in the source
+    end: number;
+    score: number; // Weighted mean of the features, 0-1
+    features: {
+        loudness: number;
+        speech: number;
+        scene: number;
+        motion: number;
+    };
+}
+
+// Best non-overlapping windows of `length` seconds to cut shorts from
+export const fetchHighlights = (
+    assetID: number,
+    count = 5,
+    length = 30
+): Promise<{ duration: number; candidates: HighlightCandidate[] }> =>
+    getWhenReady(`assets/${assetID}/highlights/`, { count, length });
+
+export interface CutPointNeighbours {
+    previous: number | null; // Seconds, null when there is none
+    next: number | null;
+    nearest: number | null;
+}
+
+export interface CutPoints {
+    time: number;
+    keyframes: number; // Number of keyframes in the source
+    scene_cuts: number;
+    keyframe: CutPointNeighbours;
+    scene_cut: CutPointNeighbours;
+}
+
+// Keyframes and scene cuts around `time`, for snapping edit points
+export const fetchCutPoints = (
+    assetID: number,
+    time: number
+): Promise<CutPoints> =>
+    getWhenReady(`assets/${assetID}/cut-points/`, { t: time });
+
+// URL of a single frame, e.g. for a hover preview; cached by the browser
+export const thumbnailURL = (assetID: number, time: number, width = 320) =>
+    `${apiClient.defaults.baseURL}assets/${assetID}/thumbnail/` +
+    `?t=${time.toFixed(1)}&width=${width}`;
+
 export const fetchSubtitles = async (projectID: number) => {
     try {
         const response = await apiClient.get(`fetch-subtitles/`, {
@@ -192,6 +661,62 @@ export const fetchSubtitles = async (projectID: number) => {
     }
 };
 
+export interface SubtitleCue {
+    id: number;
+    start_ms: number;
+    end_ms: number;
+    text: string;
+    words: [number, number, string][] | null; // [start_ms, end_ms, word]
+}
+
+// Cues overlapping [startMs, endMs) only, not the whole track
+export const fetchSubtitleCues = async (
+    projectID: number,
+    startMs: number,
+    endMs: number
+): Promise<{ cues: SubtitleCue[]; truncated: boolean }> => {
+    const response = await apiClient.get(
+        `projects/${projectID}/subtitles/cues/`,
+        { params: { start_ms: startMs, end_ms: endMs } }
+    );
+    return response.data;
+};
+
+export const createSubtitleCue = async (
+    projectID: number,
+    cue: Omit<SubtitleCue, "id" | "words">
+): Promise<SubtitleCue> => {
+    const response = await apiClient.post(
+        `projects/${projectID}/subtitles/cues/`,
+        cue
+    );
+    return response.data;
+};
+
+// Sends only the changed fields of one cue
+export const updateSubtitleCue = async (
+    projectID: number,
+    cueID: number,
+    changes: Partial<Omit<SubtitleCue, "id">>
+): Promise<SubtitleCue> => {
+    const response = await apiClient.patch(
+        `projects/${projectID}/subtitles/cues/${cueID}/`,
+        changes
+    );
+    return response.data;
+};
+
+export const deleteSubtitleCue = async (projectID: number, cueID: number) => {
+    await apiClient.delete(`projects/${projectID}/subtitles/cues/${cueID}/`);
+};
+
+// Download link of the whole track, streamed by the backend
+export const subtitlesExportURL = (
+    projectID: number,
+    format: "srt" | "vtt" | "json"
+) =>
+    `${apiClient.defaults.baseURL}projects/${projectID}/subtitles/export/${format}/`;
+
 export const getGPUInfo = async () => {
     try {
         const response = await apiClient.get("gpu-info/");
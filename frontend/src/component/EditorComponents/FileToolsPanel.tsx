@@ -6,10 +6,28 @@ import DeleteIcon from "@mui/icons-material/Delete";
 import "./FileToolsPanel.css";
 
 const FileToolsPanel: React.FC = () => {
-    const { files, addFiles, removeFile, handleDrop, uploading, inputKey } =
-        useFileManagement();
+    const {
+        files,
+        projectFiles = [],
+        addFiles,
+        removeFile,
+        handleDrop,
+        uploading,
+        inputKey,
+    } = useFileManagement();
 
-    const handleDragStart = (event: React.DragEvent, file: File) => {
+    // Pliki z serwera, które nie zostały jeszcze pobrane do edytora
+    const remoteFiles = projectFiles.filter(
+        (entry) =>
+            (entry.mime_type.startsWith("video/") ||
+                entry.mime_type.startsWith("audio/")) &&
+            !files.some((file) => file.name === entry.name)
+    );
+
+    const handleDragStart = (
+        event: React.DragEvent,
+        file: { name: string }
+    ) => {
         event.dataTransfer.setData("text/plain", file.name);
         console.log("Rozpoczęto przeciąganie pliku:", file.name);
     };
@@ -45,6 +63,20 @@ const FileToolsPanel: React.FC = () => {
                             <span>{file.name}</span>
                         </ListGroup.Item>
                     ))}
+                {remoteFiles.map((entry) => (
+                    <ListGroup.Item
+                        key={`remote-${entry.id}`}
+                        className="d-flex justify-content-between align-items-center"
+                        draggable
+                        onDragStart={(e) => {
+                            handleDragStart(e, entry);
+                        }}>
+                        <span>{entry.name}</span>
+                        {entry.duration !== null && (
+                            <small>{Math.round(entry.duration)} s</small>
+                        )}
+                    </ListGroup.Item>
+                ))}
                 {uploading && (
                     <div className="uploading-indicator">
                         <Spinner animation="border" role="status" />
@@ -5,6 +5,7 @@ import PauseIcon from "@mui/icons-material/Pause";
 import StopIcon from "@mui/icons-material/Stop";
 import VolumeOffIcon from "@mui/icons-material/VolumeOff";
 import VolumeUpIcon from "@mui/icons-material/VolumeUp";
+import { fetchPreviewMedia } from "../../api/apiService";
 
 const PreviewPanel: React.FC = () => {
     const videoRef = useRef<HTMLVideoElement>(null);
@@ -13,6 +14,8 @@ const PreviewPanel: React.FC = () => {
     const [hasTriggered, setHasTriggered] = useState("");
     const [localPlaybackPosition, setLocalPlaybackPosition] = useState(0);
     const videoBlobURLs = useRef(new Map<string, string>());
+    // Proxy (lub oryginał) z serwera dla elementów osi czasu z zasobem
+    const [previewURLs, setPreviewURLs] = useState(new Map<number, string>());
     const [currentSubtitle, setCurrentSubtitle] = useState<string | null>(null);
 
     const {
@@ -36,6 +39,35 @@ const PreviewPanel: React.FC = () => {
         return videoBlobURLs.current.get(itemId) as string;
     };
 
+    /**
+     * Fetch preview media of every timeline video backed by an asset.
+     */
+    useEffect(() => {
+        let cancelled = false;
+        timelineItems
+            .filter((item) => item.type === "video" && item.assetID)
+            .forEach((item) => {
+                const assetID = item.assetID as number;
+                if (previewURLs.has(assetID)) {
+                    return;
+                }
+                fetchPreviewMedia(assetID)
+                    .then(
+                        (media) =>
+                            !cancelled &&
+                            setPreviewURLs((urls) =>
+                                new Map(urls).set(assetID, media.url)
+                            )
+                    )
+                    .catch((error) =>
+                        console.error("Error fetching preview media:", error)
+                    );
+            });
+        return () => {
+            cancelled = true;
+        };
+    }, [timelineItems]);
+
     /**
      * Sync `localPlaybackPosition` with `playbackPosition` changes.
      */
@@ -68,9 +100,18 @@ const PreviewPanel: React.FC = () => {
         );
 
         // Obsługa wideo
-        if (videoItem && hasTriggered !== videoItem.id && videoItem.file) {
-            const fileURL = getVideoBlobURL(videoItem.file, videoItem.id);
-
+        // Proxy z serwera zamiast lokalnego oryginału, gdy jest gotowy
+        const fileURL =
+            videoItem &&
+            ((videoItem.assetID && previewURLs.get(videoItem.assetID)) ||
+                (videoItem.file &&
+                    getVideoBlobURL(videoItem.file, videoItem.id)));
+
+        if (
+            videoItem &&
+            fileURL &&
+            (hasTriggered !== videoItem.id || videoURL !== fileURL)
+        ) {
             if (videoURL !== fileURL) {
                 setVideoURL(fileURL);
             }
@@ -110,7 +151,7 @@ const PreviewPanel: React.FC = () => {
         // } else {
         //     setCurrentSubtitle(null);
         // }
-    }, [localPlaybackPosition, pixelsPerSecond, timelineItems]);
+    }, [localPlaybackPosition, pixelsPerSecond, timelineItems, previewURLs]);
 
     useEffect(() => {
         const handleTimeUpdate = () => {
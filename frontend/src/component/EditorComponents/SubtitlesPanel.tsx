@@ -1,62 +1,17 @@
-import React, { useEffect, useState } from "react";
-import { v4 as uuidv4 } from "uuid";
+import React, { useCallback, useEffect, useState } from "react";
 import { Modal, Button, Form } from "react-bootstrap";
 import { useEditorContext } from "../../context/EditorContext";
-import { fetchSubtitles } from "../../api/apiService";
+import {
+    SubtitleCue,
+    createSubtitleCue,
+    deleteSubtitleCue,
+    fetchSubtitleCues,
+    updateSubtitleCue,
+} from "../../api/apiService";
 import DeleteIcon from "@mui/icons-material/Delete";
 
-interface SubtitleChunk {
-    text: string;
-    start: number;
-    end: number;
-}
-
-const splitTextIntoChunksWithTime = (
-    text: string,
-    maxLength: number,
-    startTime: number,
-    endTime: number
-): SubtitleChunk[] => {
-    const words = text.split(" ");
-    const totalDuration = endTime - startTime; // Całkowity czas trwania napisu
-    const chunks: SubtitleChunk[] = [];
-    let currentChunk: string[] = [];
-    let chunkStartTime = startTime;
-
-    words.forEach((word, index) => {
-        if (currentChunk.join(" ").length + word.length + 1 <= maxLength) {
-            currentChunk.push(word);
-        } else {
-            if (currentChunk.length > 0) {
-                const chunkDuration =
-                    (totalDuration / words.length) * currentChunk.length;
-
-                chunks.push({
-                    text: currentChunk.join(" "),
-                    start: chunkStartTime,
-                    end: chunkStartTime + chunkDuration,
-                });
-
-                chunkStartTime += chunkDuration; // Zaktualizuj czas rozpoczęcia
-                currentChunk = [word];
-            }
-        }
-
-        // Jeśli to ostatnie słowo, dodaj ostatni chunk
-        if (index === words.length - 1 && currentChunk.length > 0) {
-            const chunkDuration =
-                (totalDuration / words.length) * currentChunk.length;
-
-            chunks.push({
-                text: currentChunk.join(" "),
-                start: chunkStartTime,
-                end: chunkStartTime + chunkDuration,
-            });
-        }
-    });
-
-    return chunks;
-};
+// Panel trzyma tylko napisy okna wokół pozycji odtwarzania
+const WINDOW_SECONDS = 300;
 
 const convertToSeconds = (time: string): number => {
     const [hours, minutes, seconds] = time.split(":");
@@ -69,67 +24,16 @@ const convertToSeconds = (time: string): number => {
     );
 };
 
-const parseSRT = (subtitles: string): Subtitle[] => {
-    if (!subtitles) return [];
-    const entries = subtitles.trim().split("\n\n");
-
-    return entries
-        .map((entry) => {
-            try {
-                let lines = entry.split("\n");
-
-                // Filtruj linie, które zawierają tylko liczby (np. "6") lub są puste
-                lines = lines.filter(
-                    (line) => !/^\d+$/.test(line.trim()) && line.trim() !== ""
-                );
-
-                if (lines.length < 2) return null; // Minimalnie 2 linie: czas + tekst
-
-                const times = lines[0]; // Pierwsza linia po filtrowaniu to czas
-                const [start, end] = times.split(" --> ");
-                if (!start || !end) return null;
-
-                const startSeconds = convertToSeconds(start.trim());
-                const endSeconds = convertToSeconds(end.trim());
-                const textLines = lines.slice(1); // Reszta to tekst
-                const fullText = textLines.join(" ").trim();
-
-                // Podziel tekst na fragmenty uwzględniając maksymalną długość znaków
-                const textChunks = splitTextIntoChunksWithTime(
-                    fullText,
-                    25, // Maksymalna długość fragmentu
-                    startSeconds,
-                    endSeconds
-                );
-
-                console.table(textChunks);
-
-                // Każdy fragment traktujemy jako osobny napis
-                return textChunks.map((chunk) => ({
-                    id: uuidv4(),
-                    start: start.trim(),
-                    end: end.trim(),
-                    text: chunk.text,
-                    font: "Arial",
-                    color: "#ffffff",
-                    size: "32px",
-                    outline: "2px",
-                    outlineColor: "#000000",
-                }));
-            } catch (error) {
-                console.error("Error parsing SRT entry:", entry, error);
-                return null;
-            }
-        })
-        .flat() // Spłaszczenie tablicy fragmentów w jedną tablicę napisów
-        .filter(Boolean) as Subtitle[];
-};
-
-const cleanTextFromNumbers = (text: string): string => {
-    return text
-        .split("\n") // Podziel tekst na linie
-        .filter((line) => !/^\d+$/.test(line.trim())) // Usuń linie zawierające wyłącznie liczby
-        .join("\n"); // Połącz linie z powrotem w tekst
+const formatTimestamp = (milliseconds: number): string => {
+    const pad = (value: number, length = 2) =>
+        String(value).padStart(length, "0");
+    const hours = Math.floor(milliseconds / 3600000);
+    const minutes = Math.floor((milliseconds % 3600000) / 60000);
+    const seconds = Math.floor((milliseconds % 60000) / 1000);
+    return `${pad(hours)}:${pad(minutes)}:${pad(seconds)},${pad(
+        milliseconds % 1000,
+        3
+    )}`;
 };
 
 interface Subtitle {
@@ -144,14 +48,27 @@ interface Subtitle {
     outlineColor: string;
 }
 
+const cueToSubtitle = (cue: SubtitleCue): Subtitle => ({
+    id: String(cue.id),
+    start: formatTimestamp(cue.start_ms),
+    end: formatTimestamp(cue.end_ms),
+    text: cue.text,
+    font: "Arial",
+    color: "#ffffff",
+    size: "32px",
+    outline: "2px",
+    outlineColor: "#000000",
+});
+
+const subtitleTiming = ({ start, end, text }: Subtitle) => ({
+    start_ms: Math.round(convertToSeconds(start) * 1000),
+    end_ms: Math.round(convertToSeconds(end) * 1000),
+    text,
+});
+
 const SubtitlesPanel: React.FC = () => {
-    const {
-        projectID,
-        processedSubtitles,
-        setProcessedSubtitles,
-        setSubtitles,
-        setSubtitleStyles,
-    } = useEditorContext();
+    const { projectID, playbackPosition, setProcessedSubtitles } =
+        useEditorContext();
 
     const [subtitleList, setSubtitleList] = useState<Subtitle[]>([]);
     const [editingSubtitle, setEditingSubtitle] = useState<Subtitle | null>(
@@ -159,7 +76,7 @@ const SubtitlesPanel: React.FC = () => {
     );
     const [showModal, setShowModal] = useState(false);
     const [newSubtitle, setNewSubtitle] = useState<Subtitle>({
-        id: uuidv4(),
+        id: "",
         start: "00:00:00,000",
         end: "00:00:05,000",
         text: "",
@@ -170,45 +87,71 @@ const SubtitlesPanel: React.FC = () => {
         outlineColor: "#000000",
     });
 
-    // useEffect(() => {
-    //     const parsed = parseSRT(subtitles);
-    //     setSubtitleList(parsed);
-    // }, [subtitles]);
+    // Okno zmienia się dopiero, gdy odtwarzanie wyjdzie poza bieżące
+    const windowStart =
+        Math.floor(playbackPosition / WINDOW_SECONDS) * WINDOW_SECONDS;
+
+    const showSubtitles = useCallback(
+        (subtitles: Subtitle[]) => {
+            const sorted = [...subtitles].sort(
+                (a, b) => convertToSeconds(a.start) - convertToSeconds(b.start)
+            );
+            setSubtitleList(sorted);
+            setProcessedSubtitles(sorted);
+        },
+        [setProcessedSubtitles]
+    );
 
     useEffect(() => {
-        const loadSubtitlesFromProject = async () => {
+        let cancelled = false;
+        const loadSubtitleWindow = async () => {
             try {
-                const response = await fetchSubtitles(projectID);
-                if (response) {
-                    const parsedSubtitles = parseSRT(response);
-                    setSubtitleList(parsedSubtitles);
-                    setProcessedSubtitles(parsedSubtitles);
-                    // setSubtitles(response); // Surowy tekst SRT
+                const { cues } = await fetchSubtitleCues(
+                    projectID,
+                    windowStart * 1000,
+                    (windowStart + WINDOW_SECONDS) * 1000
+                );
+                if (!cancelled) {
+                    showSubtitles(cues.map(cueToSubtitle));
                 }
             } catch (error) {
                 console.error("Failed to load subtitles:", error);
             }
         };
 
-        loadSubtitlesFromProject();
-    }, [projectID, setProcessedSubtitles, setSubtitles]);
-
-    const handleAddOrEditSubtitle = () => {
-        const updatedList = editingSubtitle
-            ? processedSubtitles.map((subtitle) =>
-                  subtitle.id === editingSubtitle.id
-                      ? editingSubtitle
-                      : subtitle
-              )
-            : [...processedSubtitles, newSubtitle];
-
-        setProcessedSubtitles(updatedList);
-
-        setSubtitles(
-            updatedList
-                .map(({ start, end, text }) => `${start} --> ${end}\n${text}`)
-                .join("\n\n")
-        );
+        loadSubtitleWindow();
+        return () => {
+            cancelled = true;
+        };
+    }, [projectID, windowStart, showSubtitles]);
+
+    // Zapisywany jest tylko dodany lub zmieniony napis, nie cała ścieżka
+    const handleAddOrEditSubtitle = async () => {
+        try {
+            if (editingSubtitle) {
+                const cue = await updateSubtitleCue(
+                    projectID,
+                    Number(editingSubtitle.id),
+                    subtitleTiming(editingSubtitle)
+                );
+                showSubtitles(
+                    subtitleList.map((subtitle) =>
+                        subtitle.id === editingSubtitle.id
+                            ? { ...editingSubtitle, ...cueToSubtitle(cue) }
+                            : subtitle
+                    )
+                );
+            } else {
+                const cue = await createSubtitleCue(
+                    projectID,
+                    subtitleTiming(newSubtitle)
+                );
+                showSubtitles([...subtitleList, cueToSubtitle(cue)]);
+            }
+        } catch (error) {
+            console.error("Failed to save subtitle:", error);
+            return;
+        }
 
         setShowModal(false);
         setEditingSubtitle(null);
@@ -227,14 +170,15 @@ const SubtitlesPanel: React.FC = () => {
         }
     };
 
-    const handleDeleteSubtitle = (index: number) => {
-        const updatedList = subtitleList.filter((_, i) => i !== index);
-        setSubtitleList(updatedList);
-        setSubtitles(
-            updatedList
-                .map(({ start, end, text }) => `${start} --> ${end}\n${text}`)
-                .join("\n\n")
-        );
+    const handleDeleteSubtitle = async (subtitle: Subtitle) => {
+        try {
+            await deleteSubtitleCue(projectID, Number(subtitle.id));
+            showSubtitles(
+                subtitleList.filter((item) => item.id !== subtitle.id)
+            );
+        } catch (error) {
+            console.error("Failed to delete subtitle:", error);
+        }
     };
 
     return (
@@ -287,11 +231,7 @@ const SubtitlesPanel: React.FC = () => {
                         </Button>
                         <Button
                             variant="danger"
-                            onClick={() =>
-                                handleDeleteSubtitle(
-                                    subtitleList.indexOf(subtitle)
-                                )
-                            }>
+                            onClick={() => handleDeleteSubtitle(subtitle)}>
                             <DeleteIcon />
                         </Button>
                     </div>
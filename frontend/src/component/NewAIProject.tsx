@@ -23,6 +23,7 @@ import {
     postProject,
     finalizeResponse,
     getGPUInfo,
+    RenderProgress,
 } from "../api/apiService";
 import { formatTime } from "./utils/timeUtils";
 import { useEditorContext } from "../context/EditorContext";
@@ -45,13 +46,18 @@ const NewAIProject: React.FC = () => {
         end: number;
     }>({ start: 0, end: 0 });
     const [fps, setFps] = useState<number>(0);
+    const [assetID, setAssetID] = useState<number | undefined>(undefined);
     const [totalFrames, setTotalFrames] = useState<number>(1);
     const [options, setOptions] = useState({
         resolution: "1080",
         enhanceAudio: false,
         addSubtitles: false,
+        burnSubtitles: false,
     });
     const [loading, setLoading] = useState(false);
+    const [renderProgress, setRenderProgress] = useState<RenderProgress | null>(
+        null
+    );
     const [isPlaying, setIsPlaying] = useState(false);
     const [isMuted, setIsMuted] = useState(false);
     const [showModal, setShowModal] = useState(false);
@@ -85,6 +91,7 @@ const NewAIProject: React.FC = () => {
             try {
                 const response = await getVideoMetadata(file);
                 setFps(response.fps);
+                setAssetID(response.asset_id);
                 setTotalFrames(response.total_frames);
                 setTimestamps({ start: 0, end: response.total_frames });
 
@@ -197,7 +204,10 @@ const NewAIProject: React.FC = () => {
                 timestamps.end / fps,
                 options.resolution,
                 options.enhanceAudio,
-                options.addSubtitles
+                options.addSubtitles,
+                options.burnSubtitles,
+                assetID,
+                setRenderProgress
             );
 
             // Step 2: Fetch video blob and generate blob URL
@@ -229,7 +239,11 @@ const NewAIProject: React.FC = () => {
             setProjectID(createdProjectId);
 
             // Step 5: Finalize project files on the backend
-            await finalizeResponse(createdProjectId, videoFileName);
+            await finalizeResponse(
+                createdProjectId,
+                data.job_id,
+                videoFileName
+            );
 
             // Show success modal
             setShowModal(true);
@@ -262,13 +276,16 @@ const NewAIProject: React.FC = () => {
         setVideoUrl(null);
         setTimestamps({ start: 0, end: 0 });
         setFps(0);
+        setAssetID(undefined);
         setTotalFrames(1);
         setOptions({
             resolution: "1080",
             enhanceAudio: false,
             addSubtitles: false,
+            burnSubtitles: false,
         });
         setLoading(false);
+        setRenderProgress(null);
         setIsPlaying(false);
         setIsMuted(false);
         setShowModal(false);
@@ -440,6 +457,13 @@ const NewAIProject: React.FC = () => {
                             checked={options.addSubtitles}
                             onChange={handleOptionsChange}
                         />
+                        <Form.Check
+                            type="checkbox"
+                            label="Burn Subtitles into Video"
+                            name="burnSubtitles"
+                            checked={options.burnSubtitles}
+                            onChange={handleOptionsChange}
+                        />
 
                         {/* Dropdown dla rozdzielczości */}
                         <DropdownButton
@@ -494,7 +518,17 @@ const NewAIProject: React.FC = () => {
                                     onClick={handleProcessVideo}
                                     disabled={loading}>
                                     {loading ? (
-                                        "Processing..."
+                                        renderProgress?.stage ? (
+                                            `Processing... ${Math.round(
+                                                renderProgress.progress
+                                            )}% (${renderProgress.stage}${
+                                                renderProgress.speed
+                                                    ? `, ${renderProgress.speed}x`
+                                                    : ""
+                                            })`
+                                        ) : (
+                                            "Processing..."
+                                        )
                                     ) : (
                                         <>
                                             Prepare Video <CheckIcon />
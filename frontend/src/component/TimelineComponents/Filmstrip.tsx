@@ -0,0 +1,110 @@
+import React, { useEffect, useState } from "react";
+import {
+    fetchSpriteManifest,
+    SpriteLevel,
+    SpriteManifest,
+} from "../../api/apiService";
+
+interface FilmstripProps {
+    assetID: number;
+    durationInS: number; // Item duration in seconds
+    startTime: number; // Start time of the item within the source in seconds
+    widthPx: number; // Item width in pixels
+    heightPx: number; // Item height in pixels
+    visibleFromPx: number; // Visible part of the item, relative to its left edge
+    visibleToPx: number;
+}
+
+// Coarsest level that still gives every slot its own frame: fewest sheets to load
+const pickLevel = (levels: SpriteLevel[], secondsPerSlot: number) => {
+    const sorted = [...levels].sort((a, b) => a.interval - b.interval);
+    const fitting = sorted.filter((level) => level.interval <= secondsPerSlot);
+    return fitting.length ? fitting[fitting.length - 1] : sorted[0];
+};
+
+const Filmstrip: React.FC<FilmstripProps> = ({
+    assetID,
+    durationInS,
+    startTime,
+    widthPx,
+    heightPx,
+    visibleFromPx,
+    visibleToPx,
+}) => {
+    const [manifest, setManifest] = useState<SpriteManifest | null>(null);
+
+    useEffect(() => {
+        let cancelled = false;
+        fetchSpriteManifest(assetID)
+            .then((result) => !cancelled && setManifest(result))
+            .catch((error) =>
+                console.error("Error fetching sprite sheets:", error)
+            );
+        return () => {
+            cancelled = true;
+        };
+    }, [assetID]);
+
+    if (!manifest || !manifest.levels.length || durationInS <= 0) {
+        return null;
+    }
+
+    const first = manifest.levels[0];
+    const slotWidth = (first.tile_width * heightPx) / first.tile_height;
+    const pixelsPerSecond = widthPx / durationInS;
+    const level = pickLevel(manifest.levels, slotWidth / pixelsPerSecond);
+    const perSheet = level.columns * level.rows;
+
+    // Tylko kafelki w widocznym fragmencie osi czasu
+    const firstSlot = Math.max(0, Math.floor(visibleFromPx / slotWidth));
+    const lastSlot = Math.min(
+        Math.ceil(widthPx / slotWidth),
+        Math.ceil(visibleToPx / slotWidth)
+    );
+
+    const slots = [];
+    for (let slot = firstSlot; slot < lastSlot; slot++) {
+        const time = startTime + (slot * slotWidth) / pixelsPerSecond;
+        const tile = Math.min(
+            Math.floor(time / level.interval),
+            level.count - 1
+        );
+        const sheet = Math.floor(tile / perSheet);
+        const column = (tile % perSheet) % level.columns;
+        const row = Math.floor((tile % perSheet) / level.columns);
+        slots.push(
+            <div
+                key={slot}
+                style={{
+                    position: "absolute",
+                    left: `${slot * slotWidth}px`,
+                    width: `${Math.min(slotWidth, widthPx - slot * slotWidth)}px`,
+                    height: `${heightPx}px`,
+                    backgroundImage: `url(${level.sheets[sheet]})`,
+                    backgroundSize: `${level.columns * slotWidth}px ${
+                        level.rows * heightPx
+                    }px`,
+                    backgroundPosition: `-${column * slotWidth}px -${
+                        row * heightPx
+                    }px`,
+                }}
+            />
+        );
+    }
+
+    return (
+        <div
+            className="filmstrip"
+            style={{
+                position: "absolute",
+                inset: 0,
+                overflow: "hidden",
+                opacity: 0.6,
+                pointerEvents: "none",
+            }}>
+            {slots}
+        </div>
+    );
+};
+
+export default Filmstrip;
@@ -2,12 +2,15 @@ import React, { useRef, useState } from "react";
 import { useEditorContext } from "../../context/EditorContext"; // Import kontekstu
 import Draggable, { DraggableEvent } from "react-draggable";
 import { formatTime } from "../utils/timeUtils";
+import { downloadProjectFile } from "../../api/apiService";
+import Filmstrip from "./Filmstrip";
+import Waveform from "./Waveform";
 
 interface TimelineTrackProps {
     trackType: "video" | "audio" | "subtitles";
     pixelsPerSecond: number;
     scrollLeft: number;
-    handleFileProcessing: (file: File) => void;
+    handleFileProcessing: (file: File, assetID?: number | null) => void;
 }
 
 const stylesConfig = {
@@ -33,6 +36,8 @@ const TimelineTrack: React.FC<TimelineTrackProps> = ({
 }) => {
     const {
         files,
+        setFiles,
+        projectFiles,
         timelinePanelWidth,
         timelineTrackContainerWidthPx,
         timelineItems,
@@ -103,17 +108,25 @@ const TimelineTrack: React.FC<TimelineTrackProps> = ({
         setIsDraggingOver(false);
     };
 
-    const handleDrop = (event: React.DragEvent) => {
+    const handleDrop = async (event: React.DragEvent) => {
         event.preventDefault();
         setIsDraggingOver(false);
 
         const fileName = event.dataTransfer.getData("text/plain");
-        const file = files.find((file) => file.name === fileName);
+        let file = files.find((file) => file.name === fileName);
+
+        // Pliki z manifestu projektu pobierane dopiero przy pierwszym użyciu
+        const entry = projectFiles?.find((entry) => entry.name === fileName);
+        if (!file && entry) {
+            file = await downloadProjectFile(entry);
+            setFiles([...files, file]);
+        }
 
         console.log("Dropped file:", fileName, file);
 
         if (file) {
-            handleFileProcessing(file); // Use the processFile prop
+            // Zasób z manifestu daje podgląd klatek na osi czasu
+            handleFileProcessing(file, entry?.asset_id); // Use the processFile prop
         }
     };
 
@@ -210,6 +223,36 @@ const TimelineTrack: React.FC<TimelineTrackProps> = ({
                                             ? 0.5
                                             : 1,
                                 }}>
+                                {trackType === "video" && item.assetID && (
+                                    <Filmstrip
+                                        assetID={item.assetID}
+                                        durationInS={item.durationInS}
+                                        startTime={item.startTime}
+                                        widthPx={item.durationInPx}
+                                        heightPx={30}
+                                        visibleFromPx={scrollLeft - left}
+                                        visibleToPx={
+                                            scrollLeft +
+                                            timelinePanelWidth -
+                                            left
+                                        }
+                                    />
+                                )}
+                                {trackType === "audio" && item.assetID && (
+                                    <Waveform
+                                        assetID={item.assetID}
+                                        durationInS={item.durationInS}
+                                        startTime={item.startTime}
+                                        widthPx={item.durationInPx}
+                                        heightPx={30}
+                                        visibleFromPx={scrollLeft - left}
+                                        visibleToPx={
+                                            scrollLeft +
+                                            timelinePanelWidth -
+                                            left
+                                        }
+                                    />
+                                )}
                                 <div
                                     className="media-item-text"
                                     style={{
@@ -91,7 +91,7 @@ const TimelineTrackContainer: React.FC<TimelineTrackContainerProps> = ({
         processedSubtitles,
     } = useEditorContext();
 
-    const handleFileProcessing = (file: File) => {
+    const handleFileProcessing = (file: File, assetID?: number | null) => {
         const id = uuidv4();
         const lastTrackItem = timelineItems
             .filter(
@@ -121,6 +121,7 @@ const TimelineTrackContainer: React.FC<TimelineTrackContainerProps> = ({
                 startPosition,
                 startTime: 0,
                 endPosition: startPosition + durationInPx,
+                assetID,
             };
 
             console.log("Adding new item to timeline:", newItem);
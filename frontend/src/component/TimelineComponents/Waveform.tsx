@@ -0,0 +1,102 @@
+import React, { useEffect, useRef, useState } from "react";
+import { fetchWaveform, WaveformWindow } from "../../api/apiService";
+
+interface WaveformProps {
+    assetID: number;
+    durationInS: number; // Item duration in seconds
+    startTime: number; // Start time of the item within the source in seconds
+    widthPx: number; // Item width in pixels
+    heightPx: number; // Item height in pixels
+    visibleFromPx: number; // Visible part of the item, relative to its left edge
+    visibleToPx: number;
+}
+
+// Okno pobierane w kawałkach tej szerokości: przewijanie o kilka pikseli
+// nie wysyła nowego zapytania
+const CHUNK_PX = 512;
+
+const Waveform: React.FC<WaveformProps> = ({
+    assetID,
+    durationInS,
+    startTime,
+    widthPx,
+    heightPx,
+    visibleFromPx,
+    visibleToPx,
+}) => {
+    const canvasRef = useRef<HTMLCanvasElement | null>(null);
+    const [peaks, setPeaks] = useState<WaveformWindow | null>(null);
+
+    const fromPx = Math.max(0, Math.floor(visibleFromPx / CHUNK_PX) * CHUNK_PX);
+    const toPx = Math.min(
+        widthPx,
+        Math.ceil(visibleToPx / CHUNK_PX) * CHUNK_PX
+    );
+    const pixelsPerSecond = durationInS > 0 ? widthPx / durationInS : 0;
+
+    useEffect(() => {
+        if (toPx <= fromPx || !pixelsPerSecond) {
+            return;
+        }
+        let cancelled = false;
+        fetchWaveform(
+            assetID,
+            startTime + fromPx / pixelsPerSecond,
+            startTime + toPx / pixelsPerSecond,
+            toPx - fromPx
+        )
+            .then((result) => !cancelled && setPeaks(result))
+            .catch((error) =>
+                console.error("Error fetching waveform:", error)
+            );
+        return () => {
+            cancelled = true;
+        };
+    }, [assetID, startTime, fromPx, toPx, pixelsPerSecond]);
+
+    useEffect(() => {
+        const canvas = canvasRef.current;
+        const context = canvas?.getContext("2d");
+        if (!canvas || !context || !peaks) {
+            return;
+        }
+        context.clearRect(0, 0, canvas.width, canvas.height);
+        const scale = 2 ** (peaks.bits - 1) - 1;
+        const middle = heightPx / 2;
+        const pxPerPeak = pixelsPerSecond / peaks.peaks_per_second;
+        const offsetPx = (peaks.start - startTime) * pixelsPerSecond - fromPx;
+
+        for (let index = 0; index < peaks.max.length; index++) {
+            const x = offsetPx + index * pxPerPeak;
+            const width = Math.max(1, pxPerPeak);
+            const top = middle - (peaks.max[index] / scale) * middle;
+            const bottom = middle - (peaks.min[index] / scale) * middle;
+            context.fillStyle = "rgba(255, 255, 255, 0.35)";
+            context.fillRect(x, top, width, Math.max(1, bottom - top));
+            const rms = (peaks.rms[index] / scale) * middle;
+            context.fillStyle = "rgba(255, 255, 255, 0.7)";
+            context.fillRect(x, middle - rms, width, Math.max(1, 2 * rms));
+        }
+    }, [peaks, heightPx, pixelsPerSecond, startTime, fromPx]);
+
+    if (toPx <= fromPx) {
+        return null;
+    }
+
+    return (
+        <canvas
+            ref={canvasRef}
+            className="waveform"
+            width={toPx - fromPx}
+            height={heightPx}
+            style={{
+                position: "absolute",
+                left: `${fromPx}px`,
+                top: 0,
+                pointerEvents: "none",
+            }}
+        />
+    );
+};
+
+export default Waveform;
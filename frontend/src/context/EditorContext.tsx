@@ -1,5 +1,6 @@
 import React, { createContext, useContext, useState, ReactNode } from "react";
 import { TrackItem } from "../interfaces";
+import { ProjectFile } from "../api/apiService";
 
 interface SubtitleStyles {
     font: string;
@@ -28,6 +29,7 @@ interface EditorContextType {
     isPlaying: boolean;
     pixelsPerSecond: number;
     playbackPosition: number;
+    projectFiles: ProjectFile[];
     projectID: number;
     quarterQualityVideoURL: string | null;
     subtitles: string;
@@ -46,6 +48,7 @@ interface EditorContextType {
     setIsPlaying: (isPlaying: boolean) => void;
     setPixelsPerSecond: (pixelsPerSecond: number) => void;
     setPlaybackPosition: (position: number) => void;
+    setProjectFiles: (projectFiles: ProjectFile[]) => void;
     setProjectID: (projectID: number) => void;
     setQuarterQualityVideoURL: (url: string | null) => void;
     setSubtitles: (subtitles: string) => void;
@@ -91,6 +94,8 @@ export const EditorProvider: React.FC<EditorProviderProps> = ({ children }) => {
     const [isPlaying, setIsPlaying] = useState<boolean>(false);
     const [pixelsPerSecond, setPixelsPerSecond] = useState<number>(100);
     const [playbackPosition, setPlaybackPosition] = useState<number>(0);
+    // Manifest plików projektu: same metadane, bez pobierania treści
+    const [projectFiles, setProjectFiles] = useState<ProjectFile[]>([]);
     const [projectID, setProjectID] = useState<number>(-1);
     const [quarterQualityVideoURL, setQuarterQualityVideoURL] = useState<
         string | null
@@ -122,6 +127,7 @@ export const EditorProvider: React.FC<EditorProviderProps> = ({ children }) => {
         isPlaying,
         pixelsPerSecond,
         playbackPosition,
+        projectFiles,
         projectID,
         quarterQualityVideoURL,
         subtitles,
@@ -138,6 +144,7 @@ export const EditorProvider: React.FC<EditorProviderProps> = ({ children }) => {
         setIsPlaying,
         setPixelsPerSecond,
         setPlaybackPosition,
+        setProjectFiles,
         setProjectID,
         setQuarterQualityVideoURL,
         setSubtitles,
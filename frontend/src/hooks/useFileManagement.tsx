@@ -1,25 +1,25 @@
 import { useEffect, useState, useCallback } from "react";
 import { useEditorContext } from "../context/EditorContext";
-import { uploadFileToBackend, fetchExistingFiles } from "../api/apiService";
+import { uploadFileResumable, fetchProjectFiles } from "../api/apiService";
 
 export const useFileManagement = () => {
-    const { files, setFiles, projectID } = useEditorContext();
+    const { files, setFiles, projectFiles, setProjectFiles, projectID } =
+        useEditorContext();
     const [inputKey, setInputKey] = useState(0);
     const [uploading, setUploading] = useState(false);
 
     const handleFetchExistingFiles = useCallback(async () => {
         try {
-            const files: File[] = await fetchExistingFiles(projectID);
-
-            setFiles(files);
+            // Only metadata; a file is downloaded when it is dropped on the timeline
+            setProjectFiles(await fetchProjectFiles(projectID));
         } catch (error) {
             console.error("Error fetching existing files:", error);
         }
-    }, [projectID, setFiles]);
+    }, [projectID, setProjectFiles]);
 
     useEffect(() => {
         handleFetchExistingFiles();
-    }, [fetchExistingFiles, projectID]);
+    }, [handleFetchExistingFiles]);
 
     const addFiles = useCallback(
         async (newFiles: File[]) => {
@@ -35,12 +35,20 @@ export const useFileManagement = () => {
                     continue;
                 }
 
-                const fileExists = files.some((f) => f.name === file.name);
+                const fileExists =
+                    files.some((f) => f.name === file.name) ||
+                    projectFiles.some((f) => f.name === file.name);
                 if (!fileExists) {
-                    const fileUrl: string = await uploadFileToBackend(
-                        file,
-                        projectID
-                    );
+                    let fileUrl: string | null = null;
+                    try {
+                        // Chunked upload; an interrupted one resumes on retry
+                        ({ file_url: fileUrl } = await uploadFileResumable(
+                            file,
+                            projectID
+                        ));
+                    } catch (error) {
+                        console.error("Error uploading file:", error);
+                    }
                     if (fileUrl) {
                         uploadedFiles.push(file);
                         console.log("Added file:", file.name, "URL:", fileUrl);
@@ -52,7 +60,7 @@ export const useFileManagement = () => {
             setUploading(false);
             setInputKey((prevKey) => prevKey + 1); // Reset input after adding files
         },
-        [files, setFiles]
+        [files, projectFiles, setFiles]
     );
 
     const removeFile = useCallback(
@@ -60,9 +68,12 @@ export const useFileManagement = () => {
             console.log("Attempting to delete file:", fileName);
             const newFiles = files.filter((file) => file.name !== fileName);
             setFiles(newFiles);
+            setProjectFiles(
+                projectFiles.filter((file) => file.name !== fileName)
+            );
             setInputKey((prevKey) => prevKey + 1); // Reset input after deleting
         },
-        [files, setFiles]
+        [files, projectFiles, setFiles, setProjectFiles]
     );
 
     const handleDrop = useCallback(
@@ -92,6 +103,7 @@ export const useFileManagement = () => {
 
     return {
         files,
+        projectFiles,
         addFiles,
         removeFile,
         handleDrop,
@@ -8,4 +8,5 @@ export interface TrackItem {
     startPosition: number; // Item start position on timeline in pixels
     startTime: number; // Start time of item itself in seconds
     endPosition: number; // Item end position on timeline in pixels
+    assetID?: number | null; // Backend asset, used for timeline previews
 }